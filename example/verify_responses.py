@@ -7,6 +7,11 @@ Not part of the CI process, since the indexing is kind of heavy-weight.
 A reference set of responses can be generated by running the following command:
 
     ./bench.py --iterations 1 --save-responses responses.jsonl.gz
+
+To check how much the results of an approximate mode differ from the reference, pass the
+parameters for the mode and print a report on the overlap of the snippets instead of diffs:
+
+    ./verify_responses.py responses.jsonl.gz --param hl.ocr.lazyBreaks=true --report
 """
 
 import argparse
@@ -106,11 +111,45 @@ def _only_scores_differ(expected: dict, actual: dict) -> bool:
     return True
 
 
+def snippet_overlap(expected: dict, actual: dict) -> float:
+    """Fraction of the expected snippets that are also in the actual response."""
+    num_expected = 0
+    num_found = 0
+    for docid, data in expected.get("ocrHighlighting", {}).items():
+        expected_hashes = {_hash_snippet(snip) for snip in data["ocr_text"]["snippets"]}
+        actual_data = actual.get("ocrHighlighting", {}).get(docid, {})
+        actual_hashes = {
+            _hash_snippet(snip)
+            for snip in actual_data.get("ocr_text", {}).get("snippets", [])
+        }
+        num_expected += len(expected_hashes)
+        num_found += len(expected_hashes & actual_hashes)
+    if num_expected == 0:
+        return 1.0
+    return num_found / num_expected
+
+
+def report_response(
+    solr_handler_url: str, expected_response: dict, extra_params: dict
+) -> float:
+    params = {**expected_response["responseHeader"]["params"], **extra_params}
+    actual_response = run_query(solr_handler_url, params)
+    overlap = snippet_overlap(expected_response, actual_response)
+    color = "green" if overlap == 1.0 else "yellow" if overlap >= 0.8 else "red"
+    query = params["q"]
+    print(f"[{color}]{overlap:6.1%} of snippets match[/] for query {query}")
+    return overlap
+
+
 def check_reponse(
-    solr_handler_url: str, expected_response: dict, no_colors: bool = False
+    solr_handler_url: str,
+    expected_response: dict,
+    no_colors: bool = False,
+    extra_params: dict = None,
 ):
     actual_response = run_query(
-        solr_handler_url, expected_response["responseHeader"]["params"]
+        solr_handler_url,
+        {**expected_response["responseHeader"]["params"], **(extra_params or {})},
     )
     actual_norm = normalize_response(actual_response)
     expected_norm = normalize_response(expected_response)
@@ -177,11 +216,35 @@ def main():
     parser.add_argument(
         "--no-diff-colors", help="Disable colored output", action="store_true"
     )
+    parser.add_argument(
+        "--param",
+        help="Additional query parameter as key=value, can be repeated",
+        action="append",
+        default=[],
+    )
+    parser.add_argument(
+        "--report",
+        help="Only report the fraction of reference snippets found in each response",
+        action="store_true",
+    )
     args = parser.parse_args()
+    extra_params = dict(param.split("=", 1) for param in args.param)
 
     reference = load_reference_responses(Path(args.responses_file))
+    if args.report:
+        overlaps = [
+            report_response(args.solr_handler, ref, extra_params) for ref in reference
+        ]
+        if overlaps:
+            mean = sum(overlaps) / len(overlaps)
+            exact = sum(1 for o in overlaps if o == 1.0)
+            print(
+                f"Mean snippet overlap: {mean:.1%}, "
+                f"{exact}/{len(overlaps)} queries with identical snippets"
+            )
+        return
     for ref in reference:
-        check_reponse(args.solr_handler, ref, args.no_diff_colors)
+        check_reponse(args.solr_handler, ref, args.no_diff_colors, extra_params)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,316 @@
+package com.github.dbmdz.solrocr.breaklocator;
+
+import com.github.dbmdz.solrocr.model.OcrBlock;
+import com.github.dbmdz.solrocr.model.OcrFormat;
+import com.github.dbmdz.solrocr.model.SourcePointer;
+import com.github.dbmdz.solrocr.model.SourcePointer.Source;
+import com.github.dbmdz.solrocr.model.SourcePointer.SourceType;
+import com.github.dbmdz.solrocr.reader.FileIdentity;
+import com.github.dbmdz.solrocr.reader.SourceReader;
+import com.google.common.cache.Cache;
+import com.google.common.cache.CacheBuilder;
+import java.io.BufferedInputStream;
+import java.io.BufferedOutputStream;
+import java.io.DataInputStream;
+import java.io.DataOutputStream;
+import java.io.IOException;
+import java.lang.invoke.MethodHandles;
+import java.nio.file.Files;
+import java.nio.file.Path;
+import java.nio.file.Paths;
+import java.nio.file.StandardCopyOption;
+import java.util.ArrayList;
+import java.util.Arrays;
+import java.util.EnumMap;
+import java.util.List;
+import java.util.Locale;
+import java.util.Map;
+import org.slf4j.Logger;
+import org.slf4j.LoggerFactory;
+import solrocr.OcrHighlighter;
+
+/**
+ * Precomputed byte offsets of all block breaks in an OCR file, grouped by {@link OcrBlock} type.
+ *
+ * <p>The index is stored in a sidecar file next to the OCR file (with the {@value
+ * #SIDECAR_EXTENSION} extension) and can be built during indexing (see the {@code
+ * writeBreakIndex} option of {@link solrocr.ExternalUtf8ContentFilterFactory}) or with {@link
+ * #main(String[])}. During highlighting, the {@link IndexedBreakLocator}s obtained from it answer
+ * break queries by a binary search, without having to read and scan the OCR file itself.
+ *
+ * <p>The sidecar records the size and modification time of the OCR file it was built from, indexes
+ * for files that were modified afterwards are ignored. Loaded indexes are cached by the {@link
+ * FileIdentity} of their OCR files, so highlighting a document again only costs a stat call per
+ * file.
+ */
+public class BreakIndex {
+  private static final Logger log = LoggerFactory.getLogger(MethodHandles.lookup().lookupClass());
+
+  public static final String SIDECAR_EXTENSION = ".breaks";
+
+  private static final int MAGIC = 0x4f435242; // "OCRB"
+  private static final int VERSION = 1;
+
+  /** Maximum size of the loaded indexes that are kept in memory */
+  private static final long MAX_CACHE_SIZE_BYTES = 64 * 1024 * 1024;
+
+  /**
+   * Loaded indexes, keyed by the {@link FileIdentity} of their OCR file or by the list of
+   * identities for indexes of multi-file sources.
+   */
+  private static final Cache<Object, BreakIndex> CACHE =
+      CacheBuilder.newBuilder()
+          .maximumWeight(MAX_CACHE_SIZE_BYTES)
+          .<Object, BreakIndex>weigher((key, index) -> index.getSizeInBytes())
+          .build();
+
+  private final Map<OcrBlock, int[]> breaks;
+
+  private BreakIndex(Map<OcrBlock, int[]> breaks) {
+    this.breaks = breaks;
+  }
+
+  /** Approximate size of the offsets in the index */
+  private int getSizeInBytes() {
+    return 4 * breaks.values().stream().mapToInt(offsets -> offsets.length).sum();
+  }
+
+  /** Remove all loaded indexes from memory. */
+  public static void clearCache() {
+    CACHE.invalidateAll();
+  }
+
+  /** Get the sorted offsets of all breaks for the given block type. */
+  public int[] getBreaks(OcrBlock blockType) {
+    return breaks.getOrDefault(blockType, new int[0]);
+  }
+
+  /** Get a {@link BreakLocator} that splits the text on any of the given block types. */
+  public BreakLocator getBreakLocator(SourceReader reader, OcrBlock... blockTypes) {
+    if (blockTypes.length == 1) {
+      return new IndexedBreakLocator(reader, getBreaks(blockTypes[0]));
+    }
+    int[] merged =
+        Arrays.stream(blockTypes).flatMapToInt(b -> Arrays.stream(getBreaks(b))).toArray();
+    Arrays.sort(merged);
+    return new IndexedBreakLocator(reader, merged);
+  }
+
+  /** Get the path of the sidecar file for an OCR file. */
+  public static Path getSidecarPath(Path ocrPath) {
+    return ocrPath.resolveSibling(ocrPath.getFileName() + SIDECAR_EXTENSION);
+  }
+
+  /**
+   * Load the break index for the source a reader is reading from.
+   *
+   * @return the index or {@code null} if not all files in the source have an up-to-date sidecar
+   */
+  public static BreakIndex load(SourceReader reader) {
+    SourcePointer pointer = reader.getPointer();
+    if (pointer == null
+        || pointer.sources.stream()
+            .anyMatch(s -> s.type != SourceType.FILESYSTEM && s.type != SourceType.BGZF)) {
+      return null;
+    }
+    try {
+      List<FileIdentity> identities = new ArrayList<>(pointer.sources.size());
+      for (Source src : pointer.sources) {
+        identities.add(FileIdentity.of(Paths.get(src.target)));
+      }
+      Object cacheKey = identities.size() == 1 ? identities.get(0) : identities;
+      BreakIndex index = CACHE.getIfPresent(cacheKey);
+      if (index == null) {
+        index = load(pointer, identities);
+        if (index != null) {
+          CACHE.put(cacheKey, index);
+        }
+      }
+      return index;
+    } catch (IOException e) {
+      log.warn("Could not load break index for {}, falling back to scanning.", pointer, e);
+      return null;
+    }
+  }
+
+  private static BreakIndex load(SourcePointer pointer, List<FileIdentity> identities)
+      throws IOException {
+    if (pointer.sources.size() == 1) {
+      return read(Paths.get(pointer.sources.get(0).target), identities.get(0));
+    }
+    // Multiple files are treated as a single concatenated source, so we shift the breaks
+    // of every file by its offset in the concatenation
+    Map<OcrBlock, int[]> combined = new EnumMap<>(OcrBlock.class);
+    int offset = 0;
+    for (int srcIdx = 0; srcIdx < pointer.sources.size(); srcIdx++) {
+      Source src = pointer.sources.get(srcIdx);
+      FileIdentity identity = identities.get(srcIdx);
+      BreakIndex index = read(Paths.get(src.target), identity);
+      if (index == null) {
+        return null;
+      }
+      for (OcrBlock block : OcrBlock.values()) {
+        int[] existing = combined.getOrDefault(block, new int[0]);
+        int[] fileBreaks = index.getBreaks(block);
+        int[] merged = Arrays.copyOf(existing, existing.length + fileBreaks.length);
+        for (int i = 0; i < fileBreaks.length; i++) {
+          merged[existing.length + i] = fileBreaks[i] + offset;
+        }
+        combined.put(block, merged);
+      }
+      // The uncompressed size of BGZF files is only known from their block index
+      offset += (int) (src.type == SourceType.BGZF ? src.size : identity.size);
+    }
+    return new BreakIndex(combined);
+  }
+
+  /**
+   * Read the sidecar index for an OCR file.
+   *
+   * @return the index or {@code null} if there is no sidecar or it is out of date
+   */
+  public static BreakIndex read(Path ocrPath) throws IOException {
+    return read(ocrPath, FileIdentity.of(ocrPath));
+  }
+
+  private static BreakIndex read(Path ocrPath, FileIdentity identity) throws IOException {
+    Path sidecarPath = getSidecarPath(ocrPath);
+    if (!Files.exists(sidecarPath)) {
+      return null;
+    }
+    try (DataInputStream in =
+        new DataInputStream(new BufferedInputStream(Files.newInputStream(sidecarPath)))) {
+      if (in.readInt() != MAGIC || in.readInt() != VERSION) {
+        log.warn("Unsupported break index at {}, ignoring it.", sidecarPath);
+        return null;
+      }
+      long size = in.readLong();
+      long lastModifiedMs = in.readLong();
+      if (size != identity.size || lastModifiedMs != identity.lastModifiedMs) {
+        log.debug("Break index at {} is out of date, ignoring it.", sidecarPath);
+        return null;
+      }
+      Map<OcrBlock, int[]> breaks = new EnumMap<>(OcrBlock.class);
+      int numBlocks = in.readInt();
+      for (int i = 0; i < numBlocks; i++) {
+        OcrBlock block = OcrBlock.valueOf(in.readUTF());
+        int[] offsets = new int[in.readInt()];
+        int prev = 0;
+        for (int j = 0; j < offsets.length; j++) {
+          prev += readVInt(in);
+          offsets[j] = prev;
+        }
+        breaks.put(block, offsets);
+      }
+      return new BreakIndex(breaks);
+    }
+  }
+
+  /**
+   * Build the break index for an OCR file by scanning it with the break locators of its format.
+   *
+   * @throws IOException if the file could not be read or its format could not be determined
+   */
+  public static BreakIndex build(Path ocrPath) throws IOException {
+    SourcePointer pointer = SourcePointer.parse(ocrPath.toString());
+    try (SourceReader reader = pointer.getReader(64 * 1024, 8)) {
+      OcrFormat format = OcrHighlighter.getFormat(reader);
+      if (format == null) {
+        throw new IOException(
+            String.format(Locale.US, "Could not determine OCR format of %s", ocrPath));
+      }
+      return build(reader, format);
+    }
+  }
+
+  /** Build the break index for a source in the given format. */
+  public static BreakIndex build(SourceReader reader, OcrFormat format) throws IOException {
+    Map<OcrBlock, int[]> breaks = new EnumMap<>(OcrBlock.class);
+    int length = reader.length();
+    for (OcrBlock block : OcrBlock.values()) {
+      BreakLocator locator = format.getBreakLocator(reader, block);
+      int[] offsets = new int[64];
+      int numOffsets = 0;
+      int offset = 0;
+      while ((offset = locator.following(offset)) != BreakLocator.DONE && offset < length) {
+        if (numOffsets == offsets.length) {
+          offsets = Arrays.copyOf(offsets, offsets.length * 2);
+        }
+        offsets[numOffsets++] = offset;
+      }
+      breaks.put(block, Arrays.copyOf(offsets, numOffsets));
+    }
+    return new BreakIndex(breaks);
+  }
+
+  /**
+   * Write the index to the sidecar file for an OCR file.
+   *
+   * <p>The sidecar is written to a temporary file first and then moved into place, so concurrent
+   * readers never see a partially written index.
+   */
+  public void write(Path ocrPath) throws IOException {
+    FileIdentity identity = FileIdentity.of(ocrPath);
+    Path sidecarPath = getSidecarPath(ocrPath);
+    Path tmpPath = sidecarPath.resolveSibling(sidecarPath.getFileName() + ".tmp");
+    try (DataOutputStream out =
+        new DataOutputStream(new BufferedOutputStream(Files.newOutputStream(tmpPath)))) {
+      out.writeInt(MAGIC);
+      out.writeInt(VERSION);
+      out.writeLong(identity.size);
+      out.writeLong(identity.lastModifiedMs);
+      out.writeInt(breaks.size());
+      for (Map.Entry<OcrBlock, int[]> entry : breaks.entrySet()) {
+        out.writeUTF(entry.getKey().name());
+        int[] offsets = entry.getValue();
+        out.writeInt(offsets.length);
+        // Offsets are sorted, so we store them as variable-length deltas to keep the sidecar small
+        int prev = 0;
+        for (int offset : offsets) {
+          writeVInt(out, offset - prev);
+          prev = offset;
+        }
+      }
+    }
+    Files.move(tmpPath, sidecarPath, StandardCopyOption.REPLACE_EXISTING);
+  }
+
+  /** Make sure there is an up-to-date sidecar index for an OCR file, building it if needed. */
+  public static void ensureSidecar(Path ocrPath) throws IOException {
+    if (read(ocrPath) == null) {
+      build(ocrPath).write(ocrPath);
+    }
+  }
+
+  private static void writeVInt(DataOutputStream out, int i) throws IOException {
+    while ((i & ~0x7F) != 0) {
+      out.writeByte((i & 0x7F) | 0x80);
+      i >>>= 7;
+    }
+    out.writeByte(i);
+  }
+
+  private static int readVInt(DataInputStream in) throws IOException {
+    int value = 0;
+    for (int shift = 0; ; shift += 7) {
+      byte b = in.readByte();
+      value |= (b & 0x7F) << shift;
+      if ((b & 0x80) == 0) {
+        return value;
+      }
+    }
+  }
+
+  /** Build sidecar break indexes for all OCR files passed as arguments. */
+  public static void main(String[] args) throws IOException {
+    if (args.length == 0) {
+      System.err.println("Usage: BreakIndex <ocr-file>...");
+      System.exit(1);
+    }
+    for (String arg : args) {
+      Path path = Paths.get(arg);
+      build(path).write(path);
+      System.out.println("Wrote " + getSidecarPath(path));
+    }
+  }
+}
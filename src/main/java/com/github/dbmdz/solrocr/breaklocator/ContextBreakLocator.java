@@ -2,10 +2,17 @@ package com.github.dbmdz.solrocr.breaklocator;
 
 import com.github.dbmdz.solrocr.reader.SourceReader;
 import java.io.IOException;
+import java.util.HashMap;
+import java.util.Map;
 
 /**
  * A break locator that wraps other {@link BreakLocator}s and aggregates their breaks to form larger
  * contexts.
+ *
+ * <p>The context around an offset only depends on the closest break of the base locator and the
+ * closest limit, so dense matches (e.g. a common name on a newspaper page) share most of their
+ * contexts. The contexts are memoized by these two breaks, i.e. for every match after the first
+ * one in a region, only the closest breaks have to be located.
  */
 public class ContextBreakLocator implements BreakLocator {
 
@@ -13,6 +20,12 @@ public class ContextBreakLocator implements BreakLocator {
   private final BreakLocator limitLocator;
   private final int contextSize;
 
+  /** Context ends by the closest following base break and limit */
+  private final Map<Long, Integer> followingMemo = new HashMap<>();
+
+  /** Context starts by the closest preceding base break and limit */
+  private final Map<Long, Integer> precedingMemo = new HashMap<>();
+
   /** Wrap another BreakIterator and configure the output context size */
   public ContextBreakLocator(BreakLocator baseLocator, BreakLocator limitLocator, int contextSize) {
     this.baseLocator = baseLocator;
@@ -20,6 +33,10 @@ public class ContextBreakLocator implements BreakLocator {
     this.contextSize = contextSize;
   }
 
+  private static long memoKey(int baseBreak, int limit) {
+    return ((long) baseBreak << 32) | (limit & 0xFFFFFFFFL);
+  }
+
   @Override
   public int following(int offset) throws IOException {
     int limit = getText().length();
@@ -31,13 +48,20 @@ public class ContextBreakLocator implements BreakLocator {
     if (idx >= limit) {
       return limit;
     }
+    long key = memoKey(idx, limit);
+    Integer memoized = followingMemo.get(key);
+    if (memoized != null) {
+      return memoized;
+    }
     for (int i = 0; i < contextSize; i++) {
       int next = baseLocator.following(idx);
       if (next >= limit) {
-        return limit;
+        idx = limit;
+        break;
       }
       idx = next;
     }
+    followingMemo.put(key, idx);
     return idx;
   }
 
@@ -51,13 +75,20 @@ public class ContextBreakLocator implements BreakLocator {
     if (idx <= limit) {
       return limit;
     }
+    long key = memoKey(idx, limit);
+    Integer memoized = precedingMemo.get(key);
+    if (memoized != null) {
+      return memoized;
+    }
     for (int i = 0; i < contextSize; i++) {
       int next = baseLocator.preceding(idx);
       if (next <= limit) {
-        return limit;
+        idx = limit;
+        break;
       }
       idx = next;
     }
+    precedingMemo.put(key, idx);
     return idx;
   }
 
@@ -0,0 +1,50 @@
+package com.github.dbmdz.solrocr.breaklocator;
+
+import com.github.dbmdz.solrocr.reader.SourceReader;
+import java.io.IOException;
+import java.util.Arrays;
+
+/**
+ * A {@link BreakLocator} that looks up breaks in a sorted array of precomputed break offsets, see
+ * {@link BreakIndex}.
+ */
+public class IndexedBreakLocator implements BreakLocator {
+  private final SourceReader text;
+  private final int[] breaks;
+
+  public IndexedBreakLocator(SourceReader text, int[] breaks) {
+    this.text = text;
+    this.breaks = breaks;
+  }
+
+  @Override
+  public int following(int offset) throws IOException {
+    int length = text.length();
+    if (offset >= length) {
+      return DONE;
+    }
+    int idx = Arrays.binarySearch(breaks, offset + 1);
+    if (idx < 0) {
+      idx = -idx - 1;
+    }
+    return idx < breaks.length ? breaks[idx] : length;
+  }
+
+  @Override
+  public int preceding(int offset) {
+    if (offset <= 0) {
+      return DONE;
+    }
+    int idx = Arrays.binarySearch(breaks, offset);
+    if (idx < 0) {
+      idx = -idx - 1;
+    }
+    // idx now points to the first break >= offset, we want the last one before it
+    return idx > 0 ? breaks[idx - 1] : 0;
+  }
+
+  @Override
+  public SourceReader getText() {
+    return text;
+  }
+}
@@ -4,7 +4,13 @@ import com.github.dbmdz.solrocr.reader.SourceReader;
 import com.github.dbmdz.solrocr.reader.SourceReader.Section;
 import java.io.IOException;
 
-/** A {@link BreakLocator} that splits an XML-like document on a specific opening or closing tag. */
+/**
+ * A {@link BreakLocator} that splits an XML-like document on a specific opening or closing tag.
+ *
+ * <p>Since there is only a single pattern to look for, the sections are searched with {@link
+ * String#indexOf(String, int)}, which the JVM implements with vectorized instructions. Tags that
+ * span two sections are found by checking the bytes around the section boundary separately.
+ */
 public class TagBreakLocator extends BaseBreakLocator {
   private final String breakTag;
 
@@ -23,108 +29,62 @@ public class TagBreakLocator extends BaseBreakLocator {
 
   @Override
   protected int getFollowing(int offset) throws IOException {
-    String overlapHead = null;
-    int globalStart = Math.min(offset + 1, this.text.length());
-    // Read the source section-wise  to cut down on String allocations and improve the chance of
-    // cache hits in the reader
-    while (globalStart < this.text.length()) {
-      Section section = this.text.getAsciiSection(globalStart);
+    int length = this.text.length();
+    int pos = Math.min(offset + 1, length);
+    while (pos < length) {
+      Section section = this.text.getAsciiSection(pos);
       String block = section.text;
-      int blockStart = globalStart - section.start;
-
-      if (overlapHead != null) {
-        // If the previous section ended with a partial tag, we need to check if the overlapHead
-        // combined with the new section until the closing tag contains the breakTag
-        int firstTagClose = block.indexOf('>');
-        int overlapStart = globalStart - overlapHead.length();
-        String overlap = overlapHead.concat(block.substring(0, firstTagClose + 1));
-        int overlapMatch = overlap.indexOf(breakTag);
-        if (overlapMatch >= 0) {
-          return overlapStart + overlapMatch;
-        }
-        blockStart = firstTagClose + 1;
-        overlapHead = null;
-      }
-      // Truncate block to last '>' and keep the rest for the next iteration if needed
-      int blockEnd = block.length();
-      int lastTagOpen = block.lastIndexOf('<');
-      if (lastTagOpen < blockStart) {
-        lastTagOpen = -1;
-      }
-      int lastTagClose = block.lastIndexOf('>');
-      if (lastTagClose < blockStart) {
-        lastTagClose = -1;
+      int idx = block.indexOf(breakTag, pos - section.start);
+      if (idx >= 0) {
+        return section.start + idx;
       }
-      boolean partialTag =
-          (lastTagOpen >= 0 && lastTagClose < 0)
-              || (lastTagClose >= 0 && lastTagClose < lastTagOpen);
-      if (partialTag) {
-        overlapHead = block.substring(lastTagOpen, blockEnd);
-        blockEnd = lastTagOpen + 1;
+      int blockEnd = section.start + block.length();
+      if (blockEnd >= length) {
+        break;
       }
-
-      int idx = block.indexOf(breakTag, blockStart);
-      if (idx >= 0 && idx < blockEnd) {
-        return section.start + idx;
+      // A tag that starts at the end of the section continues in the next one
+      int overlapStart = Math.max(pos - section.start, block.length() - (breakTag.length() - 1));
+      String overlap = block.substring(overlapStart).concat(readBoundary(blockEnd, length));
+      idx = overlap.indexOf(breakTag);
+      if (idx >= 0) {
+        return section.start + overlapStart + idx;
       }
-
-      globalStart = section.end;
+      pos = blockEnd;
     }
-    return this.text.length();
+    return length;
   }
 
   @Override
   protected int getPreceding(int offset) throws IOException {
-    String overlapTail = null;
-    int globalEnd = offset;
-
-    // Read the source section-wise  to cut down on String allocations and improve the chance of
-    // cache hits in the reader
-    while (globalEnd > 0) {
-      Section section = this.text.getAsciiSection(globalEnd);
+    int length = this.text.length();
+    // Tags have to start before the offset
+    int pos = Math.min(offset, length) - 1;
+    while (pos >= 0) {
+      Section section = this.text.getAsciiSection(pos);
       String block = section.text;
-      int blockEnd = globalEnd - section.start;
-
-      if (overlapTail != null) {
-        // If the previous section started with a partial tag, we need to check if the overlapTail
-        // combined with the new section until the opening tag contains the breakTag
-        int lastTagOpen = block.lastIndexOf('<');
-        String overlapHead = block.substring(lastTagOpen);
-        String overlap = overlapHead.concat(overlapTail);
-        int overlapMatch = optimizedLastIndexOf(overlap, breakTag, overlap.length());
-        if (overlapMatch >= 0) {
-          return section.start + lastTagOpen + overlapMatch;
+      int lastStart = pos - section.start;
+      int blockEnd = section.start + block.length();
+      if (lastStart > block.length() - breakTag.length() && blockEnd < length) {
+        // A tag that starts at the end of the section continues in the next one, it comes after
+        // all tags in the section
+        int overlapStart = Math.max(0, block.length() - (breakTag.length() - 1));
+        String overlap = block.substring(overlapStart).concat(readBoundary(blockEnd, length));
+        int idx = optimizedLastIndexOf(overlap, breakTag, lastStart - overlapStart + 1);
+        if (idx >= 0) {
+          return section.start + overlapStart + idx;
         }
-        blockEnd = lastTagOpen;
-        overlapTail = null;
       }
-
-      int blockStart = 0;
-      int firstTagOpen = block.indexOf('<');
-      if (firstTagOpen > blockEnd) {
-        firstTagOpen = -1;
-      }
-      int firstTagClose = block.indexOf('>');
-      if (firstTagClose > blockEnd) {
-        firstTagClose = -1;
-      }
-      boolean partialTag =
-          (firstTagOpen < 0 && firstTagClose >= 0)
-              || (firstTagClose >= 0 && firstTagClose < firstTagOpen);
-      if (partialTag) {
-        // Section starts on a partial tag, store it for the next iteration
-        blockStart = firstTagClose + 1;
-        overlapTail = block.substring(0, firstTagClose + 1);
-      }
-
-      int match = optimizedLastIndexOf(block, breakTag, blockEnd);
-      if (match >= blockStart) {
-        return section.start + match;
+      int idx = optimizedLastIndexOf(block, breakTag, lastStart + 1);
+      if (idx >= 0) {
+        return section.start + idx;
       }
-
-      globalEnd = section.start - 1;
+      pos = section.start - 1;
     }
-
     return 0;
   }
+
+  /** Read the bytes after a section boundary that can be part of a tag starting before it. */
+  private String readBoundary(int boundary, int length) throws IOException {
+    return this.text.readAsciiString(boundary, Math.min(breakTag.length() - 1, length - boundary));
+  }
 }
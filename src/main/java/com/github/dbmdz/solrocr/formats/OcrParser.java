@@ -7,7 +7,7 @@ import com.github.dbmdz.solrocr.reader.PeekingReader;
 import com.google.common.collect.ImmutableMap;
 import java.io.Reader;
 import java.util.Arrays;
-import java.util.HashSet;
+import java.util.EnumSet;
 import java.util.Iterator;
 import java.util.List;
 import java.util.Locale;
@@ -56,22 +56,72 @@ public abstract class OcrParser implements Iterator<OcrBox>, Iterable<OcrBox> {
   public static final String START_HL = "\uD83D\uDD25"; // 🔥
   public static final String END_HL = "\uD83E\uDDEF"; // 🧯
 
-  private static final WstxInputFactory xmlInputFactory = new WstxInputFactory();
+  private static final int BEGIN_PEEK_SIZE = 2048;
+  private static final int BACK_CONTEXT_SIZE = 16384;
 
-  protected final PeekingReader input;
+  /**
+   * Factory for the StAX readers, configured once and never modified afterwards, which makes it
+   * safe to be used from multiple threads concurrently.
+   */
+  private static final WstxInputFactory xmlInputFactory = createInputFactory();
+
+  protected PeekingReader input;
   protected UUID currentHighlightSpan;
   protected boolean terminateHighlightSpanAfterNext = false;
 
-  private final XMLStreamReader2 xmlReader;
-  private final Set<ParsingFeature> features = new HashSet<>();
+  /** Number of highlight spans started in the current input, used to derive their identifiers */
+  private long numHighlightSpans;
+
+  private XMLStreamReader2 xmlReader;
+  private final Set<ParsingFeature> features = EnumSet.noneOf(ParsingFeature.class);
+
+  /** Buffers for the {@link PeekingReader}s we wrap our inputs in, re-used across inputs */
+  private char[] peekBuffer;
+
+  private char[] backContextBuffer;
 
   private OcrBox nextWord;
 
   public OcrParser(Reader input, ParsingFeature... features) throws XMLStreamException {
+    this.reset(input, features);
+  }
+
+  private static WstxInputFactory createInputFactory() {
+    WstxInputFactory factory = new WstxInputFactory();
+    // Woodstax sometimes splits long text nodes, this option forces it to merge them together
+    // before passing them to us
+    factory.getConfig().doCoalesceText(true);
+    // This parsing mode allows us to read multiple "concatenated" XML documents in a single pass
+    factory.getConfig().setInputParsingMode(WstxInputProperties.PARSING_MODE_DOCUMENTS);
+    // Ignore DTDs since they cause lookups to external URLs
+    factory.getConfig().doSupportDTDs(false);
+    // Register custom named entities used by hOCR
+    factory.getConfig().setCustomInternalEntities(ENTITIES);
+    // Fallback for unknown undeclared entities: just output them verbatim
+    factory
+        .getConfig()
+        .setUndeclaredEntityResolver(
+            (publicID, systemID, baseURI, namespace) ->
+                String.format(Locale.US, "&amp;%s;", namespace));
+    return factory;
+  }
+
+  /**
+   * Reset the parser to parse boxes from a new input with the given features.
+   *
+   * <p>Allows re-using a parser instance and its buffers for multiple inputs, see {@link
+   * OcrParserPool}.
+   */
+  public void reset(Reader input, ParsingFeature... features) throws XMLStreamException {
+    this.clear();
     if (input instanceof PeekingReader) {
       this.input = (PeekingReader) input;
     } else {
-      this.input = new PeekingReader(input, 2048, 16384);
+      if (this.peekBuffer == null) {
+        this.peekBuffer = new char[BEGIN_PEEK_SIZE];
+        this.backContextBuffer = new char[BACK_CONTEXT_SIZE];
+      }
+      this.input = new PeekingReader(input, this.peekBuffer, this.backContextBuffer);
     }
     if (features.length == 0) {
       features =
@@ -85,27 +135,58 @@ public abstract class OcrParser implements Iterator<OcrBox>, Iterable<OcrBox> {
             ParsingFeature.PAGES
           };
     }
+    this.features.clear();
     this.features.addAll(Arrays.asList(features));
+    this.resetHighlightSpans();
+    this.resetState();
 
-    // Woodstax sometimes splits long text nodes, this option forces it to merge them together
-    // before passing them to us
-    xmlInputFactory.getConfig().doCoalesceText(true);
-    // This parsing mode allows us to read multiple "concatenated" XML documents in a single pass
-    xmlInputFactory.getConfig().setInputParsingMode(WstxInputProperties.PARSING_MODE_DOCUMENTS);
-    // Ignore DTDs since they cause lookups to external URLs
-    xmlInputFactory.getConfig().doSupportDTDs(false);
-    // Register custom named entities used by hOCR
-    xmlInputFactory.getConfig().setCustomInternalEntities(ENTITIES);
-    // Fallback for unknown undeclared entities: just output them verbatim
-    xmlInputFactory
-        .getConfig()
-        .setUndeclaredEntityResolver(
-            (publicID, systemID, baseURI, namespace) ->
-                String.format(Locale.US, "&amp;%s;", namespace));
-    this.xmlReader = (XMLStreamReader2) xmlInputFactory.createXMLStreamReader(this.input);
     this.nextWord = prepareNext();
   }
 
+  /** Get the StAX reader for the current input, created on first access. */
+  protected XMLStreamReader2 getXmlReader() throws XMLStreamException {
+    if (this.xmlReader == null) {
+      this.xmlReader = (XMLStreamReader2) xmlInputFactory.createXMLStreamReader(this.input);
+    }
+    return this.xmlReader;
+  }
+
+  /** Forget about all highlight spans that were tracked so far. */
+  protected void resetHighlightSpans() {
+    this.currentHighlightSpan = null;
+    this.terminateHighlightSpanAfterNext = false;
+    this.numHighlightSpans = 0;
+  }
+
+  /**
+   * Reset the format-specific parsing state before parsing a new input.
+   *
+   * <p>Implementers with state that is carried over between words must override this.
+   */
+  protected void resetState() {
+    // NOP
+  }
+
+  /**
+   * Release the current input and the associated StAX reader, without closing the input.
+   *
+   * <p>Called before the parser is returned to a pool, so that pooled parsers don't hold on to
+   * their last input.
+   */
+  void clear() {
+    if (this.xmlReader != null) {
+      try {
+        // Returns the reader's buffers to Woodstox' buffer recycler
+        this.xmlReader.close();
+      } catch (XMLStreamException e) {
+        // Nothing we can do about it, the reader is not used anymore anyway
+      }
+      this.xmlReader = null;
+    }
+    this.input = null;
+    this.nextWord = null;
+  }
+
   @Override
   public Iterator<OcrBox> iterator() {
     return this;
@@ -133,11 +214,8 @@ public abstract class OcrParser implements Iterator<OcrBox>, Iterable<OcrBox> {
 
   private OcrBox prepareNext() {
     try {
-      while (xmlReader.hasNext()) {
-        OcrBox box = this.readNext(this.xmlReader, this.features);
-        if (box == null) {
-          continue;
-        }
+      OcrBox box;
+      while ((box = this.readNextBox()) != null) {
         // Boxes without text or coordinates (if either is requested with a feature flag) are
         // ignored since they break things downstream. Skip the current box and continue with next
         // one.
@@ -165,6 +243,28 @@ public abstract class OcrParser implements Iterator<OcrBox>, Iterable<OcrBox> {
     return null;
   }
 
+  /**
+   * Read the next box from the input, or return {@code null} if there are no more boxes.
+   *
+   * <p>The default implementation reads the boxes with {@link #readNext(XMLStreamReader2, Set)}
+   * from a StAX reader, parsers that don't rely on StAX can override this.
+   */
+  protected OcrBox readNextBox() throws XMLStreamException {
+    XMLStreamReader2 xmlReader = this.getXmlReader();
+    while (xmlReader.hasNext()) {
+      OcrBox box = this.readNext(xmlReader, this.features);
+      if (box != null) {
+        return box;
+      }
+    }
+    return null;
+  }
+
+  /** Get the features the parser was configured with. */
+  protected Set<ParsingFeature> getFeatures() {
+    return features;
+  }
+
   /**
    * "Peek" at the next word from the parse without advancing the parse to the word after it (i.e.
    * calling this does not influence the result of the `next()` call *
@@ -186,7 +286,9 @@ public abstract class OcrParser implements Iterator<OcrBox>, Iterable<OcrBox> {
    */
   protected UUID trackHighlightSpan(String text, OcrBox box) {
     if (this.currentHighlightSpan == null && text.contains(OcrParser.START_HL)) {
-      this.currentHighlightSpan = UUID.randomUUID();
+      // Identifiers only need to be unique within a single input, so there's no need for the
+      // (comparatively expensive) random UUIDs
+      this.currentHighlightSpan = new UUID(0, ++this.numHighlightSpans);
     }
     if (this.currentHighlightSpan != null
         && (terminateHighlightSpanAfterNext || text.contains(OcrParser.END_HL))) {
@@ -0,0 +1,80 @@
+package com.github.dbmdz.solrocr.formats;
+
+import com.github.dbmdz.solrocr.model.OcrFormat;
+import java.io.Reader;
+import java.lang.ref.SoftReference;
+import java.util.ArrayDeque;
+import java.util.IdentityHashMap;
+import java.util.Map;
+import javax.xml.stream.XMLStreamException;
+
+/**
+ * Per-thread pool of {@link OcrParser} instances.
+ *
+ * <p>Creating a parser allocates fairly large buffers for the {@link
+ * com.github.dbmdz.solrocr.reader.PeekingReader} that wraps its input, which adds up when a parser
+ * is created for every single snippet. Parsers acquired from this pool are instead {@link
+ * OcrParser#reset(Reader, OcrParser.ParsingFeature...) reset} to the new input and re-use their
+ * buffers. Every thread has its own pool, so no synchronization is needed.
+ *
+ * <p>Parsers must be {@link #release(OcrFormat, OcrParser) released} once they are no longer used.
+ * Released parsers drop their input, so an idle parser only retains its peek buffers (about 36KiB)
+ * and at most {@value #MAX_IDLE_PARSERS} idle parsers are kept per format and thread. The pools
+ * are only softly reachable from their threads, so they neither survive memory pressure nor keep
+ * the plugin's classes loaded on long-lived container threads after a core was unloaded.
+ */
+public final class OcrParserPool {
+  /** Maximum number of idle parsers per format and thread */
+  private static final int MAX_IDLE_PARSERS = 2;
+
+  /**
+   * Idle parsers by format instance, since instances of the same format class can be configured to
+   * create different parsers. Formats are long-lived, so this doesn't grow beyond a few entries.
+   */
+  private static final ThreadLocal<SoftReference<Map<OcrFormat, ArrayDeque<OcrParser>>>> POOLS =
+      new ThreadLocal<>();
+
+  private OcrParserPool() {}
+
+  /**
+   * Get a parser for the given format that is configured for the input and features, re-using an
+   * idle parser if possible.
+   */
+  public static OcrParser acquire(
+      OcrFormat format, Reader input, OcrParser.ParsingFeature... features) {
+    OcrParser parser = getIdleParsers(format).pollFirst();
+    if (parser == null) {
+      return format.getParser(input, features);
+    }
+    try {
+      parser.reset(input, features);
+    } catch (XMLStreamException e) {
+      throw new RuntimeException(e);
+    }
+    return parser;
+  }
+
+  /** Return a parser that was obtained via {@link #acquire} to the current thread's pool. */
+  public static void release(OcrFormat format, OcrParser parser) {
+    parser.clear();
+    ArrayDeque<OcrParser> idle = getIdleParsers(format);
+    if (idle.size() < MAX_IDLE_PARSERS) {
+      idle.addFirst(parser);
+    }
+  }
+
+  /** Drop all idle parsers of the current thread. */
+  public static void clear() {
+    POOLS.remove();
+  }
+
+  private static ArrayDeque<OcrParser> getIdleParsers(OcrFormat format) {
+    SoftReference<Map<OcrFormat, ArrayDeque<OcrParser>>> ref = POOLS.get();
+    Map<OcrFormat, ArrayDeque<OcrParser>> pools = ref == null ? null : ref.get();
+    if (pools == null) {
+      pools = new IdentityHashMap<>();
+      POOLS.set(new SoftReference<>(pools));
+    }
+    return pools.computeIfAbsent(format, k -> new ArrayDeque<>());
+  }
+}
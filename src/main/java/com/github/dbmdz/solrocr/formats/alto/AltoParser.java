@@ -19,14 +19,23 @@ public class AltoParser extends OcrParser {
 
   private boolean noMoreWords;
   private OcrPage currentPage;
-  private Boolean hasExplicitSpaces = null;
-  private OcrBox hyphenEnd = null;
-  private boolean inHyphenation = false;
+  private Boolean hasExplicitSpaces;
+  private OcrBox hyphenEnd;
+  private boolean inHyphenation;
 
   public AltoParser(Reader reader, ParsingFeature... features) throws XMLStreamException {
     super(reader, features);
   }
 
+  @Override
+  protected void resetState() {
+    this.noMoreWords = false;
+    this.currentPage = null;
+    this.hasExplicitSpaces = null;
+    this.hyphenEnd = null;
+    this.inHyphenation = false;
+  }
+
   @Override
   protected OcrBox readNext(XMLStreamReader2 xmlReader, Set<ParsingFeature> features)
       throws XMLStreamException {
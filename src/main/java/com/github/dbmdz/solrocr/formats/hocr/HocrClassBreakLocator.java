@@ -2,14 +2,23 @@ package com.github.dbmdz.solrocr.formats.hocr;
 
 import com.github.dbmdz.solrocr.breaklocator.BaseBreakLocator;
 import com.github.dbmdz.solrocr.reader.SourceReader;
-import com.github.dbmdz.solrocr.reader.SourceReader.Section;
+import com.github.dbmdz.solrocr.reader.SourceReader.ByteSection;
+import com.github.dbmdz.solrocr.util.AhoCorasickMatcher;
 import com.google.common.collect.ImmutableList;
 import java.io.IOException;
 import java.util.List;
+import java.util.concurrent.ConcurrentHashMap;
+import java.util.concurrent.ConcurrentMap;
 
 public class HocrClassBreakLocator extends BaseBreakLocator {
+  /** Compiled matchers for every set of break classes, forward matcher first, backward second */
+  private static final ConcurrentMap<List<String>, AhoCorasickMatcher[]> MATCHERS =
+      new ConcurrentHashMap<>();
 
-  private final List<String> breakClasses;
+  private static final byte[] META_TAG = {'m', 'e', 't', 'a'};
+
+  private final AhoCorasickMatcher forwardMatcher;
+  private final AhoCorasickMatcher backwardMatcher;
 
   public HocrClassBreakLocator(SourceReader reader, String breakClass) {
     this(reader, ImmutableList.of(breakClass));
@@ -17,60 +26,50 @@ public class HocrClassBreakLocator extends BaseBreakLocator {
 
   public HocrClassBreakLocator(SourceReader reader, List<String> breakClasses) {
     super(reader);
-    this.breakClasses = breakClasses;
+    AhoCorasickMatcher[] matchers =
+        MATCHERS.computeIfAbsent(
+            ImmutableList.copyOf(breakClasses),
+            classes ->
+                new AhoCorasickMatcher[] {
+                  new AhoCorasickMatcher(classes), AhoCorasickMatcher.reversed(classes)
+                });
+    this.forwardMatcher = matchers[0];
+    this.backwardMatcher = matchers[1];
   }
 
   @Override
   protected int getFollowing(int offset) throws IOException {
-    int globalStart = Math.min(offset + 1, this.text.length());
-    String overlapHead = null;
-    // Read the source section-wise  to cut down on String allocations and improve the chance of
-    // cache hits in the reader
-    while (globalStart < this.text.length()) {
-      Section section = this.text.getAsciiSection(globalStart);
-      String block = section.text;
-      int blockStart = globalStart - section.start;
-
-      // There was an overlap from the previous block, combine with the current block up until
-      // the first tag close and see if there's a match
-      if (overlapHead != null) {
-        int firstTagClose = block.indexOf('>');
-        int overlapStart = globalStart - overlapHead.length();
-        String overlap = overlapHead.concat(block.substring(0, firstTagClose + 1));
-        int overlapMatch = findForwardMatch(overlap, 0, overlap.length());
-        if (overlapMatch >= 0) {
-          return overlapStart + overlapMatch;
+    int length = this.text.length();
+    int pos = Math.min(offset + 1, length);
+    // Start of the tag we're currently in, -1 if we're outside of a tag or in a tag that started
+    // before the offset
+    int tagStart = -1;
+    int state = AhoCorasickMatcher.START;
+    // Stream the raw bytes of the source section-wise through the matcher, this way we neither
+    // have to decode the sections nor stitch together tags that span section boundaries
+    while (pos < length) {
+      ByteSection section = this.text.getByteSection(pos);
+      int end = Math.min(section.end, length);
+      for (; pos < end; pos++) {
+        byte b = section.byteAt(pos);
+        if (b == '<') {
+          tagStart = pos;
+          state = AhoCorasickMatcher.START;
+        } else if (b == '>') {
+          tagStart = -1;
+        } else if (tagStart >= 0) {
+          state = forwardMatcher.next(state, b);
+          if (forwardMatcher.matchLength(state) > 0) {
+            if (!isMetaTag(tagStart)) {
+              return tagStart;
+            }
+            // Block specification in meta tag, not a real block, skip the rest of the tag
+            tagStart = -1;
+          }
         }
-        blockStart = firstTagClose + 1;
-        overlapHead = null;
-      }
-
-      // Truncate block to last '>' and keep the rest for the next iteration if needed
-      int blockEnd = block.length();
-      int lastTagOpen = block.lastIndexOf('<');
-      if (lastTagOpen < blockStart) {
-        lastTagOpen = -1;
-      }
-      int lastTagClose = block.lastIndexOf('>');
-      if (lastTagClose < blockStart) {
-        lastTagClose = -1;
       }
-      boolean partialTag =
-          (lastTagOpen >= 0 && lastTagClose < 0)
-              || (lastTagClose >= 0 && lastTagClose < lastTagOpen);
-      if (partialTag) {
-        overlapHead = block.substring(lastTagOpen, blockEnd);
-        blockEnd = lastTagOpen + 1;
-      }
-
-      int match = findForwardMatch(block, blockStart, blockEnd);
-      if (match >= 0) {
-        return section.start + match;
-      }
-
-      globalStart = section.end;
     }
-    return this.text.length();
+    return length;
   }
 
   @Override
@@ -78,145 +77,49 @@ public class HocrClassBreakLocator extends BaseBreakLocator {
     if (offset <= 0) {
       return 0;
     }
-
-    // Read the source section-wise  to cut down on String allocations and improve the chance of
-    // cache hits in the reader
-    String overlapTail = null;
-    int globalEnd = Math.max(0, offset - 1);
-    while (globalEnd > 0) {
-      Section section = this.text.getAsciiSection(globalEnd);
-
-      String block = section.text;
-      int blockEnd = globalEnd - section.start;
-
-      // There was an overlap from the previous block, combine with the current block up until
-      // the first tag open and see if there's a match
-      if (overlapTail != null) {
-        int lastTagOpen = block.lastIndexOf('<', blockEnd);
-        String overlapHead = block.substring(lastTagOpen);
-        int overlapStartOffset = globalEnd - overlapHead.length() + 1;
-        String overlap = overlapHead.concat(overlapTail);
-        int overlapMatch = findBackwardMatch(overlap, overlap.length(), 0);
-        if (overlapMatch >= 0) {
-          return overlapStartOffset + overlapMatch;
+    // Classes must start at least two bytes before the offset, so we start at the last byte of the
+    // longest class that starts there
+    int lastStart = offset - 2;
+    int pos =
+        Math.min(lastStart + backwardMatcher.getMaxPatternLength() - 1, this.text.length() - 1);
+    // Whether we passed a class since the last tag boundary, i.e. we're looking for the start of
+    // the tag it's in
+    boolean pendingMatch = false;
+    int state = AhoCorasickMatcher.START;
+    while (pos >= 0) {
+      ByteSection section = this.text.getByteSection(pos);
+      for (; pos >= section.start; pos--) {
+        byte b = section.byteAt(pos);
+        if (b == '<') {
+          if (pendingMatch && !isMetaTag(pos)) {
+            return pos;
+          }
+          pendingMatch = false;
+          state = AhoCorasickMatcher.START;
+        } else if (b == '>') {
+          // Class was not part of a tag, keep looking
+          pendingMatch = false;
+          state = AhoCorasickMatcher.START;
+        } else {
+          state = backwardMatcher.next(state, b);
+          if (pos <= lastStart && backwardMatcher.matchLength(state) > 0) {
+            pendingMatch = true;
+          }
         }
-        blockEnd = lastTagOpen;
-        overlapTail = null;
-      }
-
-      int blockStart = 0;
-      int firstTagOpen = block.indexOf('<');
-      if (firstTagOpen > blockEnd) {
-        firstTagOpen = -1;
-      }
-      int firstTagClose = block.indexOf('>');
-      if (firstTagClose > blockEnd) {
-        firstTagClose = -1;
       }
-      boolean partialTag =
-          (firstTagOpen < 0 && firstTagClose >= 0)
-              || (firstTagClose >= 0 && firstTagClose < firstTagOpen);
-      if (partialTag) {
-        // Section starts on a partial tag, store it for the next iteration
-        blockStart = firstTagClose + 1;
-        overlapTail = block.substring(0, firstTagClose + 1);
-      }
-
-      int match = findBackwardMatch(block, blockEnd, blockStart);
-      if (match >= 0) {
-        return section.start + match;
-      }
-
-      globalEnd = section.start - 1;
     }
-
     return 0;
   }
 
-  /** Find a match for one of the break classes in the given String, seeking forward. */
-  private int findForwardMatch(String text, int fromOffset, int toOffset) {
-    int match = Integer.MAX_VALUE;
-    for (String breakClass : this.breakClasses) {
-      // Where to start looking from for a break in the next iteration
-      int fromIdx = fromOffset;
-      while (fromIdx < toOffset) {
-        int i = text.indexOf(breakClass, fromIdx);
-        if (i < 0 || i >= toOffset) {
-          // Not found, try next class
-          break;
-        }
-        int openIdx = text.lastIndexOf('<', i);
-        int closeIdx = text.indexOf('>', i);
-        if (openIdx < fromIdx && closeIdx < 0) {
-          // No match
-          break;
-        }
-        if (openIdx < fromOffset) {
-          // Incomplete element, try next position
-          fromIdx = closeIdx;
-          continue;
-        }
-        int nextOpenIdx = text.indexOf('<', i);
-        if (nextOpenIdx >= toOffset) {
-          nextOpenIdx = -1;
-        }
-        if (nextOpenIdx > 0 && closeIdx > nextOpenIdx) {
-          // Not inside an element tag, try next position
-          fromIdx = i + breakClass.length();
-          continue;
-        }
-        if (text.startsWith("meta", openIdx + 1)) {
-          // Block specification in meta tag, not a real block, try next position
-          fromIdx = closeIdx;
-          continue;
-        }
-        // Found a match, try next class to see whether there is a match closer to the offset
-        if (openIdx < match) {
-          match = openIdx;
-        }
-        break;
-      }
-    }
-    if (match == Integer.MAX_VALUE) {
-      return -1;
-    }
-    return match;
-  }
-
-  /** Find a match for one of the break classes in the given String, seeking backwards. */
-  private int findBackwardMatch(String text, int fromOffset, int toOffset) {
-    if (fromOffset == 0 || fromOffset == toOffset) {
-      return -1;
-    }
-
-    assert fromOffset > toOffset
-        : "fromOffset must be greater than toOffset, we're looking backwards!";
-
-    int match = -1;
-    for (String breakClass : this.breakClasses) {
-      // Look for the class in the block
-      while (fromOffset > toOffset) {
-        int i = optimizedLastIndexOf(text, breakClass, fromOffset);
-        if (i < toOffset) {
-          // Not found, try next class
-          break;
-        }
-        int elemOpen = text.lastIndexOf('<', i);
-        int previousClose = text.lastIndexOf('>', i);
-        if (elemOpen < toOffset
-            || previousClose > elemOpen
-            || text.startsWith("meta", elemOpen + 1)) {
-          // Class was not part of a tag or in the "meta" tag, keep looking
-          fromOffset = Math.max(previousClose, elemOpen);
-          continue;
-        }
-        // Found match, try next class to see whether there is a match closer to the offset
-        if (elemOpen > match) {
-          match = elemOpen;
-        }
-        break;
+  /** Check if the tag starting at the given offset is a {@code meta} tag. */
+  private boolean isMetaTag(int tagStart) throws IOException {
+    int length = this.text.length();
+    for (int i = 0; i < META_TAG.length; i++) {
+      int pos = tagStart + 1 + i;
+      if (pos >= length || this.text.getByteSection(pos).byteAt(pos) != META_TAG[i]) {
+        return false;
       }
     }
-    return match;
+    return true;
   }
 }
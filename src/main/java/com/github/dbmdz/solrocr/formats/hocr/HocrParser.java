@@ -21,12 +21,19 @@ public class HocrParser extends OcrParser {
 
   private boolean noMoreWords;
   private OcrPage currentPage;
-  private OcrBox hyphenEnd = null;
+  private OcrBox hyphenEnd;
 
   public HocrParser(Reader input, ParsingFeature... features) throws XMLStreamException {
     super(input, features);
   }
 
+  @Override
+  protected void resetState() {
+    this.noMoreWords = false;
+    this.currentPage = null;
+    this.hyphenEnd = null;
+  }
+
   @Override
   protected OcrBox readNext(XMLStreamReader2 xmlReader, Set<ParsingFeature> features)
       throws XMLStreamException {
@@ -27,7 +27,19 @@ public class MiniOcrFormat implements OcrFormat {
           OcrBlock.LINE, "l",
           OcrBlock.WORD, "w");
 
-  public MiniOcrFormat() {}
+  private final boolean useScanner;
+
+  public MiniOcrFormat() {
+    this(true);
+  }
+
+  /**
+   * @param useScanner whether to parse fragments with the hand-written {@link MiniOcrScanner}
+   *     instead of the StAX-based {@link MiniOcrParser}
+   */
+  public MiniOcrFormat(boolean useScanner) {
+    this.useScanner = useScanner;
+  }
 
   @Override
   public BreakLocator getBreakLocator(SourceReader reader, OcrBlock... blockTypes) {
@@ -42,6 +54,9 @@ public class MiniOcrFormat implements OcrFormat {
   @Override
   public OcrParser getParser(Reader input, OcrParser.ParsingFeature... features) {
     try {
+      if (useScanner) {
+        return new MiniOcrScanner(input, features);
+      }
       return new MiniOcrParser(input, features);
     } catch (XMLStreamException e) {
       throw new RuntimeException(e);
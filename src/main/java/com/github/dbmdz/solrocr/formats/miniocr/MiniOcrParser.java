@@ -20,13 +20,20 @@ public class MiniOcrParser extends OcrParser {
 
   private boolean noMoreWords;
   private OcrPage currentPage;
-  private OcrBox hyphenEnd = null;
+  private OcrBox hyphenEnd;
 
   public MiniOcrParser(Reader input, OcrParser.ParsingFeature... features)
       throws XMLStreamException {
     super(input, features);
   }
 
+  @Override
+  protected void resetState() {
+    this.noMoreWords = false;
+    this.currentPage = null;
+    this.hyphenEnd = null;
+  }
+
   @Override
   protected OcrBox readNext(XMLStreamReader2 xmlReader, Set<ParsingFeature> features)
       throws XMLStreamException {
@@ -0,0 +1,840 @@
+package com.github.dbmdz.solrocr.formats.miniocr;
+
+import com.github.dbmdz.solrocr.formats.OcrParser;
+import com.github.dbmdz.solrocr.model.OcrBox;
+import com.github.dbmdz.solrocr.model.OcrPage;
+import com.github.dbmdz.solrocr.reader.PeekingReader;
+import com.github.dbmdz.solrocr.util.SourceAwareReader;
+import java.awt.Dimension;
+import java.io.CharArrayReader;
+import java.io.IOException;
+import java.io.Reader;
+import java.io.UncheckedIOException;
+import java.lang.invoke.MethodHandles;
+import java.util.Arrays;
+import java.util.Optional;
+import java.util.Set;
+import javax.xml.stream.XMLStreamException;
+import org.apache.commons.lang3.StringUtils;
+import org.slf4j.Logger;
+import org.slf4j.LoggerFactory;
+
+/**
+ * Hand-written parser for MiniOCR fragments that tokenizes the markup directly from a character
+ * buffer, without going through a StAX parser.
+ *
+ * <p>MiniOCR only uses a handful of elements and attributes, so we can get away with a very simple
+ * scanner. The input is read in chunks as the boxes are requested and has the same semantics as
+ * the StAX-based {@link MiniOcrParser}. If the markup turns out to be malformed or uses XML
+ * features the scanner does not support (e.g. CDATA sections or namespaced elements), the input is
+ * parsed again with the {@link MiniOcrParser} this class is based on, skipping the boxes that were
+ * already returned, so malformed input results in the same boxes or errors as before. For this,
+ * the input that was already scanned is kept in the buffer, which is fine for the highlighting
+ * fragments the scanner is used for.
+ *
+ * <p>Inputs that are passed as a {@link PeekingReader} are whole documents that are streamed
+ * during indexing and too large to be buffered completely, these are always parsed with StAX.
+ */
+public class MiniOcrScanner extends MiniOcrParser {
+  private static final Logger log = LoggerFactory.getLogger(MethodHandles.lookup().lookupClass());
+  private static final char alternativeMarker = '⇿';
+
+  private static final float[] FLOAT_POW10 = {
+    1e0f, 1e1f, 1e2f, 1e3f, 1e4f, 1e5f, 1e6f, 1e7f, 1e8f, 1e9f, 1e10f
+  };
+
+  /** Input that was already read into the buffer, for re-parsing it with StAX. */
+  private static class BufferedInput extends CharArrayReader implements SourceAwareReader {
+    private final String source;
+
+    BufferedInput(char[] buf, int length, String source) {
+      super(buf, 0, length);
+      this.source = source;
+    }
+
+    @Override
+    public Optional<String> getSource() {
+      return Optional.ofNullable(source);
+    }
+  }
+
+  /** Thrown when the scanner runs into markup it can't handle. */
+  private static class UnsupportedMarkupException extends Exception {
+    UnsupportedMarkupException(String msg, int offset) {
+      // No stack trace needed, this is only used to trigger the fallback
+      super(msg + " at offset " + offset, null, false, false);
+    }
+  }
+
+  // NOTE: There are deliberately no field initializers in this class, since the base class
+  //       already starts parsing in its constructor, before they would run.
+
+  /** Whether the current input is parsed with StAX instead of the scanner */
+  private boolean useStax;
+
+  private char[] buf;
+  private int len;
+  private int pos;
+  private boolean eof;
+
+  /** Number of boxes returned by the scanner so far, to skip them when falling back to StAX */
+  private int numScanned;
+
+  // Scanning state, mirrors the state in MiniOcrParser
+  private boolean atWord;
+  private boolean noMoreWords;
+  private OcrPage currentPage;
+  private OcrBox hyphenEnd;
+
+  /** Start and end offsets of the names of all open elements */
+  private int[] openTags;
+
+  private int depth;
+  private boolean sawElement;
+
+  // Offsets of the name and the relevant attribute values of the last start tag, -1 if absent
+  private int tagStart;
+  private int tagNameStart;
+  private int tagNameEnd;
+  private boolean selfClosing;
+  private int xStart;
+  private int xEnd;
+  private int cStart;
+  private int cEnd;
+  private int whStart;
+  private int whEnd;
+  private int idStart;
+  private int idEnd;
+  private int pidStart;
+  private int pidEnd;
+
+  private float[] coords;
+  private StringBuilder textBuf;
+
+  public MiniOcrScanner(Reader input, OcrParser.ParsingFeature... features)
+      throws XMLStreamException {
+    super(input, features);
+  }
+
+  @Override
+  public void reset(Reader input, ParsingFeature... features) throws XMLStreamException {
+    this.useStax = input instanceof PeekingReader;
+    super.reset(input, features);
+  }
+
+  @Override
+  protected void resetState() {
+    super.resetState();
+    this.len = 0;
+    this.pos = 0;
+    this.eof = false;
+    this.numScanned = 0;
+    this.atWord = false;
+    this.noMoreWords = false;
+    this.currentPage = null;
+    this.hyphenEnd = null;
+    this.depth = 0;
+    this.sawElement = false;
+  }
+
+  @Override
+  protected OcrBox readNextBox() throws XMLStreamException {
+    if (useStax) {
+      return super.readNextBox();
+    }
+    if (buf == null) {
+      buf = new char[8192];
+      openTags = new int[32];
+      coords = new float[4];
+      textBuf = new StringBuilder();
+    }
+    try {
+      OcrBox box = scanNext(getFeatures());
+      if (box != null) {
+        numScanned++;
+      }
+      return box;
+    } catch (UnsupportedMarkupException e) {
+      log.debug(
+          "Falling back to StAX parsing for {}: {}",
+          input.getSource().orElse("<unknown>"),
+          e.getMessage());
+      return fallBackToStax();
+    } catch (UncheckedIOException e) {
+      throw new XMLStreamException(e.getCause());
+    }
+  }
+
+  /**
+   * Parse the input with StAX instead of the scanner, continuing after the boxes that were already
+   * returned by the scanner.
+   */
+  private OcrBox fallBackToStax() throws XMLStreamException {
+    while (fill()) {
+      // Read the remaining input, we need all of it for the StAX parser
+    }
+    String source = this.input.getSource().orElse(null);
+    int numSkipped = this.numScanned;
+    this.useStax = true;
+    this.resetHighlightSpans();
+    super.resetState();
+    this.input = new PeekingReader(new BufferedInput(buf, len, source), 2048, 16384);
+    for (int i = 0; i < numSkipped; i++) {
+      if (super.readNextBox() == null) {
+        return null;
+      }
+    }
+    return super.readNextBox();
+  }
+
+  /**
+   * Read the next chunk of the input into the buffer.
+   *
+   * @return whether there was more input
+   */
+  private boolean fill() {
+    if (eof) {
+      return false;
+    }
+    if (len == buf.length) {
+      buf = Arrays.copyOf(buf, buf.length * 2);
+    }
+    try {
+      int numRead = input.read(buf, len, buf.length - len);
+      if (numRead < 0) {
+        eof = true;
+        return false;
+      }
+      len += numRead;
+      return true;
+    } catch (IOException e) {
+      throw new UncheckedIOException(e);
+    }
+  }
+
+  /** Make sure the character at the given offset is in the buffer, if the input has it. */
+  private boolean hasInput(int offset) {
+    while (offset >= len) {
+      if (!fill()) {
+        return false;
+      }
+    }
+    return true;
+  }
+
+  /** Make sure the markup starting at the given offset is completely in the buffer. */
+  private void fillMarkup(int start) {
+    boolean isDeclaration = hasInput(start + 1) && (buf[start + 1] == '!' || buf[start + 1] == '?');
+    char quote = 0;
+    int i = start + 1;
+    do {
+      for (; i < len; i++) {
+        char c = buf[i];
+        if (quote != 0) {
+          if (c == quote) {
+            quote = 0;
+          }
+        } else if (c == '>' || (c == '<' && !isDeclaration)) {
+          // A '<' outside of an attribute value is malformed, the scanner will fail on it
+          return;
+        } else if (!isDeclaration && (c == '"' || c == '\'')) {
+          quote = c;
+        }
+      }
+    } while (fill());
+  }
+
+  /** Scan the next box, see {@link MiniOcrParser#readNext}. */
+  private OcrBox scanNext(Set<ParsingFeature> features) throws UnsupportedMarkupException {
+    if (hyphenEnd != null) {
+      OcrBox out = this.hyphenEnd;
+      this.hyphenEnd = null;
+      return out;
+    }
+
+    boolean trackPages = features.contains(ParsingFeature.PAGES);
+    if (!atWord) {
+      this.seekToNextWord(trackPages);
+    }
+
+    if (noMoreWords) {
+      return null;
+    }
+    atWord = false;
+
+    OcrBox box = new OcrBox();
+    if (features.contains(ParsingFeature.COORDINATES)) {
+      this.parseCoordinates(box);
+    }
+    if (features.contains(ParsingFeature.CONFIDENCE) && cStart >= 0 && cEnd > cStart) {
+      box.setConfidence(Double.parseDouble(attributeValue(cStart, cEnd)));
+    }
+    if (features.contains(ParsingFeature.TEXT)) {
+      this.parseText(
+          box,
+          features.contains(ParsingFeature.HIGHLIGHTS),
+          features.contains(ParsingFeature.OFFSETS),
+          features.contains(ParsingFeature.ALTERNATIVES));
+    }
+    if (trackPages && this.currentPage != null) {
+      box.setPage(this.currentPage);
+    }
+
+    String trailingChars = this.seekToNextWord(trackPages);
+    if (features.contains(ParsingFeature.TEXT) && !trailingChars.isEmpty()) {
+      box.setTrailingChars(trailingChars);
+    }
+
+    boolean isHyphenated = false;
+    if (box.getText() != null && box.getText().endsWith("\u00ad")) {
+      isHyphenated = true;
+      String boxText = box.getText();
+      box.setText(boxText.substring(0, boxText.length() - 1));
+      // Preliminary hyphenation info, dehyphenated form not yet available
+      box.setHyphenInfo(true, null);
+    } else if (trailingChars.startsWith("\u00ad")) {
+      isHyphenated = true;
+    }
+    if (isHyphenated) {
+      box.setTrailingChars(null);
+      hyphenEnd = this.scanNext(features);
+      if (hyphenEnd != null) {
+        String dehyphenated = box.getText() + hyphenEnd.getText();
+        box.setHyphenInfo(true, dehyphenated);
+        hyphenEnd.setHyphenInfo(false, dehyphenated);
+      } else {
+        // No hyphen end, strip hyphenation info, add trailing hyphen if needed
+        if (!box.getText().endsWith("-")
+            && (box.getTrailingChars() == null || box.getTrailingChars().endsWith("-"))) {
+          box.setTrailingChars("-");
+        }
+        box.setHyphenInfo(null, null);
+      }
+    }
+    return box;
+  }
+
+  private void parseCoordinates(OcrBox box) throws UnsupportedMarkupException {
+    if (xStart < 0) {
+      throw new UnsupportedMarkupException("<w> without x attribute", tagStart);
+    }
+    int numCoords = 0;
+    boolean fastPath = xEnd > xStart && buf[xStart] != ' ' && buf[xEnd - 1] != ' ';
+    int tokenStart = xStart;
+    while (fastPath && tokenStart < xEnd && numCoords < 4) {
+      int tokenEnd = tokenStart;
+      while (tokenEnd < xEnd && buf[tokenEnd] != ' ') {
+        tokenEnd++;
+      }
+      float value = parseSimpleFloat(tokenStart, tokenEnd);
+      if (Float.isNaN(value)) {
+        fastPath = false;
+      } else {
+        coords[numCoords++] = value;
+        tokenStart = tokenEnd + 1;
+      }
+    }
+    if (!fastPath) {
+      // Irregular values, use the same code as the StAX parser to get the same results
+      String[] parts = attributeValue(xStart, xEnd).split(" ");
+      numCoords = Math.min(parts.length, 4);
+      for (int i = 0; i < numCoords; i++) {
+        coords[i] = Float.parseFloat(parts[i]);
+      }
+    }
+    if (numCoords > 0) {
+      box.setUlx(coords[0]);
+    }
+    if (numCoords > 1) {
+      box.setUly(coords[1]);
+    }
+    if (numCoords > 2) {
+      box.setLrx(box.getUlx() + coords[2]);
+    }
+    if (numCoords > 3) {
+      box.setLry(box.getUly() + coords[3]);
+    } else {
+      log.warn("x attribute is incomplete: '{}'", attributeValue(xStart, xEnd));
+    }
+  }
+
+  /**
+   * Parse a plain decimal number with few digits, as used in MiniOCR coordinates.
+   *
+   * <p>Returns {@link Float#NaN} if the number is not of that form. For mantissas below 2^24 and at
+   * most 10 fractional digits, both the mantissa and the power of ten are exact floats, so a single
+   * (correctly rounded) division yields the same result as {@link Float#parseFloat(String)}.
+   */
+  private float parseSimpleFloat(int start, int end) {
+    boolean negative = start < end && buf[start] == '-';
+    int i = negative ? start + 1 : start;
+    int mantissa = 0;
+    int numDigits = 0;
+    int fractionDigits = -1;
+    for (; i < end; i++) {
+      char c = buf[i];
+      if (c >= '0' && c <= '9') {
+        mantissa = mantissa * 10 + (c - '0');
+        numDigits++;
+        if (fractionDigits >= 0) {
+          fractionDigits++;
+        }
+        if (mantissa >= (1 << 24)) {
+          return Float.NaN;
+        }
+      } else if (c == '.' && fractionDigits < 0) {
+        fractionDigits = 0;
+      } else {
+        return Float.NaN;
+      }
+    }
+    if (numDigits == 0 || fractionDigits >= FLOAT_POW10.length) {
+      return Float.NaN;
+    }
+    float value = fractionDigits > 0 ? mantissa / FLOAT_POW10[fractionDigits] : mantissa;
+    return negative ? -value : value;
+  }
+
+  /** Parse the text of a word box, mirrors the corresponding method in {@link MiniOcrParser}. */
+  private void parseText(
+      OcrBox box, boolean withHighlights, boolean withOffsets, boolean withAlternatives)
+      throws UnsupportedMarkupException {
+    if (selfClosing || !hasInput(pos) || buf[pos] == '<') {
+      log.warn(
+          "<w> element at offset {} in {} has no text!",
+          tagStart,
+          input.getSource().orElse("<unknown>"));
+      box.setText(null);
+      box.setTextOffset(-1);
+      return;
+    }
+    if (withOffsets) {
+      box.setTextOffset(pos);
+    }
+
+    String chars = scanText();
+
+    if (withHighlights) {
+      box.setHighlightSpan(this.trackHighlightSpan(chars, box));
+    }
+
+    if (chars.indexOf(alternativeMarker) < 0) {
+      box.setText(chars);
+    } else {
+      int idx = 0;
+      while (idx < chars.length()) {
+        int end = chars.indexOf(alternativeMarker, idx);
+        if (end < 0) {
+          end = chars.length();
+        }
+        if (idx == 0) {
+          box.setText(chars.substring(idx, end));
+          if (!withAlternatives) {
+            return;
+          }
+        } else {
+          String altText = chars.substring(idx, end);
+          box.addAlternative(altText, withOffsets ? box.getTextOffset() + idx : null);
+        }
+        idx = Math.min(end + 1, chars.length());
+      }
+    }
+  }
+
+  /** Seek to the next word box, mirrors the corresponding method in {@link MiniOcrParser}. */
+  private String seekToNextWord(boolean trackPages) throws UnsupportedMarkupException {
+    boolean foundWord = false;
+    StringBuilder trailingChars = new StringBuilder();
+    while (hasInput(pos)) {
+      if (buf[pos] == '<') {
+        fillMarkup(pos);
+        if (!scanMarkup()) {
+          continue;
+        }
+        if (isTag('w')) {
+          foundWord = true;
+          break;
+        } else if (isTag('l') && trailingChars.lastIndexOf(" ") < 0) {
+          trailingChars.append(' ');
+        } else if (trackPages && isTag('p')) {
+          this.currentPage = parsePage();
+        }
+      } else {
+        int textStart = pos;
+        String txt = scanText();
+        boolean isBlank = StringUtils.isBlank(txt);
+        if (depth == 0) {
+          if (isBlank) {
+            // Whitespace between top-level elements, not reported as text by StAX
+            continue;
+          }
+          throw new UnsupportedMarkupException("Text outside of an element", textStart);
+        }
+        if (isBlank
+            && (trailingChars.length() == 0
+                || trailingChars.lastIndexOf(" ") != (trailingChars.length() - 1))) {
+          trailingChars.append(' ');
+        } else if (!isBlank) {
+          trailingChars.append(txt);
+        }
+      }
+    }
+    if (!foundWord && (depth > 0 || !sawElement)) {
+      throw new UnsupportedMarkupException("Unexpected end of input", pos);
+    }
+    noMoreWords = !foundWord;
+    atWord = foundWord;
+    return trailingChars.toString();
+  }
+
+  private OcrPage parsePage() {
+    Dimension dims = null;
+    if (whStart >= 0) {
+      String dimStr = attributeValue(whStart, whEnd);
+      if (!dimStr.isEmpty()) {
+        String[] dimParts = dimStr.split(" ");
+        dims = new Dimension(Integer.parseInt(dimParts[0]), Integer.parseInt(dimParts[1]));
+      }
+    }
+    String id = idStart >= 0 ? attributeValue(idStart, idEnd) : null;
+    if (id == null || id.isEmpty()) {
+      id = pidStart >= 0 ? attributeValue(pidStart, pidEnd) : null;
+    }
+    return new OcrPage(id, dims);
+  }
+
+  private boolean isTag(char name) {
+    return tagNameEnd - tagNameStart == 1 && buf[tagNameStart] == name;
+  }
+
+  /**
+   * Scan the markup starting at the current position.
+   *
+   * @return whether the markup was a start tag
+   */
+  private boolean scanMarkup() throws UnsupportedMarkupException {
+    int start = pos;
+    if (pos + 1 >= len) {
+      throw new UnsupportedMarkupException("Unterminated markup", start);
+    }
+    char c = buf[pos + 1];
+    if (c == '!') {
+      if (regionMatches(pos, "<!--")) {
+        pos = indexOf("-->", pos + 4, start) + 3;
+      } else if (regionMatches(pos, "<![CDATA[")) {
+        throw new UnsupportedMarkupException("CDATA section", start);
+      } else if (regionMatches(pos, "<!DOCTYPE")) {
+        // Doctypes are ignored by the StAX parser, as long as they don't have an internal subset
+        int end = indexOf(">", pos + 2, start);
+        for (int i = pos; i < end; i++) {
+          if (buf[i] == '[') {
+            throw new UnsupportedMarkupException("Doctype with internal subset", start);
+          }
+        }
+        pos = end + 1;
+      } else {
+        throw new UnsupportedMarkupException("Malformed markup declaration", start);
+      }
+      return false;
+    }
+    if (c == '?') {
+      pos = indexOf("?>", pos + 2, start) + 2;
+      return false;
+    }
+    if (c == '/') {
+      int nameStart = pos + 2;
+      int nameEnd = scanName(nameStart);
+      int end = skipWhitespace(nameEnd);
+      if (end >= len || buf[end] != '>') {
+        throw new UnsupportedMarkupException("Malformed end tag", start);
+      }
+      if (depth == 0 || !nameEquals(openTags[2 * depth - 2], openTags[2 * depth - 1], nameStart)) {
+        throw new UnsupportedMarkupException("Unbalanced end tag", start);
+      }
+      depth--;
+      pos = end + 1;
+      return false;
+    }
+
+    tagStart = start;
+    tagNameStart = pos + 1;
+    tagNameEnd = scanName(tagNameStart);
+    if (tagNameEnd == tagNameStart) {
+      throw new UnsupportedMarkupException("Malformed start tag", start);
+    }
+    for (int i = tagNameStart; i < tagNameEnd; i++) {
+      if (buf[i] == ':') {
+        throw new UnsupportedMarkupException("Namespaced element", start);
+      }
+    }
+    xStart = xEnd = cStart = cEnd = whStart = whEnd = idStart = idEnd = pidStart = pidEnd = -1;
+    int p = tagNameEnd;
+    while (true) {
+      int attrStart = skipWhitespace(p);
+      if (attrStart >= len) {
+        throw new UnsupportedMarkupException("Unterminated start tag", start);
+      }
+      char ch = buf[attrStart];
+      if (ch == '>') {
+        selfClosing = false;
+        p = attrStart + 1;
+        break;
+      }
+      if (ch == '/') {
+        if (attrStart + 1 >= len || buf[attrStart + 1] != '>') {
+          throw new UnsupportedMarkupException("Malformed start tag", start);
+        }
+        selfClosing = true;
+        p = attrStart + 2;
+        break;
+      }
+      if (attrStart == p) {
+        throw new UnsupportedMarkupException("Missing whitespace before attribute", attrStart);
+      }
+      int attrNameEnd = scanName(attrStart);
+      int eq = skipWhitespace(attrNameEnd);
+      if (attrNameEnd == attrStart || eq >= len || buf[eq] != '=') {
+        throw new UnsupportedMarkupException("Malformed attribute", attrStart);
+      }
+      int quotePos = skipWhitespace(eq + 1);
+      if (quotePos >= len || (buf[quotePos] != '"' && buf[quotePos] != '\'')) {
+        throw new UnsupportedMarkupException("Unquoted attribute value", attrStart);
+      }
+      char quote = buf[quotePos];
+      int valueStart = quotePos + 1;
+      int valueEnd = valueStart;
+      while (valueEnd < len && buf[valueEnd] != quote) {
+        if (buf[valueEnd] == '<') {
+          throw new UnsupportedMarkupException("'<' in attribute value", valueEnd);
+        }
+        valueEnd++;
+      }
+      if (valueEnd >= len) {
+        throw new UnsupportedMarkupException("Unterminated attribute value", attrStart);
+      }
+      recordAttribute(attrStart, attrNameEnd, valueStart, valueEnd);
+      p = valueEnd + 1;
+    }
+    if (!selfClosing) {
+      if (2 * depth + 2 > openTags.length) {
+        openTags = Arrays.copyOf(openTags, openTags.length * 2);
+      }
+      openTags[2 * depth] = tagNameStart;
+      openTags[2 * depth + 1] = tagNameEnd;
+      depth++;
+    }
+    sawElement = true;
+    pos = p;
+    return true;
+  }
+
+  private void recordAttribute(int nameStart, int nameEnd, int valueStart, int valueEnd) {
+    int nameLen = nameEnd - nameStart;
+    if (nameLen == 1 && buf[nameStart] == 'x') {
+      xStart = valueStart;
+      xEnd = valueEnd;
+    } else if (nameLen == 1 && buf[nameStart] == 'c') {
+      cStart = valueStart;
+      cEnd = valueEnd;
+    } else if (nameLen == 2 && regionMatches(nameStart, "wh")) {
+      whStart = valueStart;
+      whEnd = valueEnd;
+    } else if (nameLen == 6 && regionMatches(nameStart, "xml:id")) {
+      idStart = valueStart;
+      idEnd = valueEnd;
+    } else if (nameLen == 3 && regionMatches(nameStart, "pid")) {
+      pidStart = valueStart;
+      pidEnd = valueEnd;
+    }
+  }
+
+  /** Scan text up to the next markup, decoding entities and normalizing line breaks. */
+  private String scanText() throws UnsupportedMarkupException {
+    // Make sure that the text up to the next markup is in the buffer
+    int end = pos;
+    do {
+      while (end < len && buf[end] != '<') {
+        end++;
+      }
+    } while (end == len && fill());
+    textBuf.setLength(0);
+    int runStart = pos;
+    while (pos < len) {
+      char c = buf[pos];
+      if (c == '<') {
+        break;
+      } else if (c == '&') {
+        textBuf.append(buf, runStart, pos - runStart);
+        pos = decodeEntity(pos, textBuf);
+        runStart = pos;
+      } else if (c == '\r') {
+        textBuf.append(buf, runStart, pos - runStart).append('\n');
+        pos++;
+        if (pos < len && buf[pos] == '\n') {
+          pos++;
+        }
+        runStart = pos;
+      } else {
+        pos++;
+      }
+    }
+    textBuf.append(buf, runStart, pos - runStart);
+    return textBuf.toString();
+  }
+
+  /** Get the value of an attribute, decoding entities and normalizing whitespace. */
+  private String attributeValue(int start, int end) {
+    boolean needsDecoding = false;
+    for (int i = start; i < end && !needsDecoding; i++) {
+      char c = buf[i];
+      needsDecoding = c == '&' || (c != ' ' && isWhitespace(c));
+    }
+    if (!needsDecoding) {
+      return new String(buf, start, end - start);
+    }
+    StringBuilder sb = new StringBuilder(end - start);
+    int i = start;
+    while (i < end) {
+      char c = buf[i];
+      if (c == '&') {
+        try {
+          i = decodeEntity(i, sb);
+        } catch (UnsupportedMarkupException e) {
+          // Can't happen for well-formed values, keep the raw value
+          sb.append(c);
+          i++;
+        }
+        continue;
+      }
+      if (c == '\r' && i + 1 < end && buf[i + 1] == '\n') {
+        i++;
+      }
+      sb.append(isWhitespace(c) ? ' ' : c);
+      i++;
+    }
+    return sb.toString();
+  }
+
+  /**
+   * Decode the entity starting at the given offset into the output.
+   *
+   * @return the offset after the entity
+   */
+  private int decodeEntity(int start, StringBuilder out) throws UnsupportedMarkupException {
+    int end = start + 1;
+    while (end < len && end - start < 32 && buf[end] != ';') {
+      end++;
+    }
+    if (end >= len || buf[end] != ';' || end == start + 1) {
+      throw new UnsupportedMarkupException("Malformed entity", start);
+    }
+    if (buf[start + 1] == '#') {
+      boolean hex = end > start + 2 && (buf[start + 2] == 'x');
+      int codePoint = 0;
+      int digitsStart = hex ? start + 3 : start + 2;
+      if (digitsStart >= end) {
+        throw new UnsupportedMarkupException("Malformed character reference", start);
+      }
+      for (int i = digitsStart; i < end; i++) {
+        int digit = Character.digit(buf[i], hex ? 16 : 10);
+        if (digit < 0 || codePoint > 0x10FFFF) {
+          throw new UnsupportedMarkupException("Malformed character reference", start);
+        }
+        codePoint = codePoint * (hex ? 16 : 10) + digit;
+      }
+      if (!Character.isValidCodePoint(codePoint)) {
+        throw new UnsupportedMarkupException("Invalid character reference", start);
+      }
+      out.appendCodePoint(codePoint);
+      return end + 1;
+    }
+    String name = new String(buf, start + 1, end - start - 1);
+    switch (name) {
+      case "amp":
+        out.append('&');
+        break;
+      case "lt":
+        out.append('<');
+        break;
+      case "gt":
+        out.append('>');
+        break;
+      case "quot":
+        out.append('"');
+        break;
+      case "apos":
+        out.append('\'');
+        break;
+      default:
+        String value = ENTITIES.get(name);
+        if (value == null) {
+          // Leave the handling of undeclared entities to StAX
+          throw new UnsupportedMarkupException("Undeclared entity", start);
+        }
+        out.append(value);
+    }
+    return end + 1;
+  }
+
+  private int scanName(int start) {
+    int end = start;
+    while (end < len) {
+      char c = buf[end];
+      if (isWhitespace(c) || c == '=' || c == '/' || c == '>' || c == '<') {
+        break;
+      }
+      end++;
+    }
+    return end;
+  }
+
+  private int skipWhitespace(int start) {
+    int end = start;
+    while (end < len && isWhitespace(buf[end])) {
+      end++;
+    }
+    return end;
+  }
+
+  private static boolean isWhitespace(char c) {
+    return c == ' ' || c == '\t' || c == '\n' || c == '\r';
+  }
+
+  private boolean nameEquals(int nameStart, int nameEnd, int otherStart) {
+    int nameLen = nameEnd - nameStart;
+    if (otherStart + nameLen > len || scanName(otherStart) != otherStart + nameLen) {
+      return false;
+    }
+    for (int i = 0; i < nameLen; i++) {
+      if (buf[nameStart + i] != buf[otherStart + i]) {
+        return false;
+      }
+    }
+    return true;
+  }
+
+  private boolean regionMatches(int start, String str) {
+    if (start + str.length() > len) {
+      return false;
+    }
+    for (int i = 0; i < str.length(); i++) {
+      if (buf[start + i] != str.charAt(i)) {
+        return false;
+      }
+    }
+    return true;
+  }
+
+  /** Find the next occurrence of a string, reading more input if needed, fail if there is none. */
+  private int indexOf(String str, int from, int markupStart) throws UnsupportedMarkupException {
+    int i = from;
+    do {
+      for (; i + str.length() <= len; i++) {
+        if (regionMatches(i, str)) {
+          return i;
+        }
+      }
+    } while (fill());
+    throw new UnsupportedMarkupException("Unterminated markup", markupStart);
+  }
+}
@@ -0,0 +1,112 @@
+package com.github.dbmdz.solrocr.lucene;
+
+import java.io.IOException;
+import java.util.Arrays;
+import org.apache.lucene.search.uhighlight.OffsetsEnum;
+import org.apache.lucene.util.BytesRef;
+
+/**
+ * An {@link OffsetsEnum} that replays the first positions of another enum from memory and then
+ * continues with the remaining positions of that enum.
+ *
+ * <p>Used to determine the offsets of the first matches in a document up front (e.g. to prefetch
+ * the surrounding sections from the source) while still being able to iterate over all matches
+ * afterwards.
+ */
+public class BufferedOffsetsEnum extends OffsetsEnum {
+  private final OffsetsEnum in;
+  private int[] startOffsets;
+  private int[] endOffsets;
+  private int[] freqs;
+  private BytesRef[] terms;
+  private int size = 0;
+  private int pos = -1;
+
+  /** Whether all positions of the input enum were read */
+  private boolean exhausted = false;
+
+  private BufferedOffsetsEnum(OffsetsEnum in, int initialCapacity) {
+    this.in = in;
+    this.startOffsets = new int[initialCapacity];
+    this.endOffsets = new int[initialCapacity];
+    this.freqs = new int[initialCapacity];
+    this.terms = new BytesRef[initialCapacity];
+  }
+
+  /**
+   * Read up to {@code maxPositions} positions from the enum into memory, the remaining positions
+   * are read from the enum once the buffered ones were consumed. Does not close the enum.
+   */
+  public static BufferedOffsetsEnum buffer(OffsetsEnum in, int maxPositions) throws IOException {
+    BufferedOffsetsEnum buf = new BufferedOffsetsEnum(in, Math.max(1, Math.min(maxPositions, 16)));
+    BytesRef lastTerm = null;
+    while (buf.size < maxPositions) {
+      if (!in.nextPosition()) {
+        buf.exhausted = true;
+        break;
+      }
+      if (buf.size == buf.startOffsets.length) {
+        int newSize = buf.size * 2;
+        buf.startOffsets = Arrays.copyOf(buf.startOffsets, newSize);
+        buf.endOffsets = Arrays.copyOf(buf.endOffsets, newSize);
+        buf.freqs = Arrays.copyOf(buf.freqs, newSize);
+        buf.terms = Arrays.copyOf(buf.terms, newSize);
+      }
+      // Terms can be references into buffers of the input enum, so we need our own copy. Most
+      // consecutive positions share the same term, so we only copy when the term changes.
+      BytesRef term = in.getTerm();
+      if (lastTerm == null || !lastTerm.bytesEquals(term)) {
+        lastTerm = BytesRef.deepCopyOf(term);
+      }
+      buf.startOffsets[buf.size] = in.startOffset();
+      buf.endOffsets[buf.size] = in.endOffset();
+      buf.freqs[buf.size] = in.freq();
+      buf.terms[buf.size] = lastTerm;
+      buf.size++;
+    }
+    return buf;
+  }
+
+  /** Get the start offsets of the buffered positions, in the order of the positions. */
+  public int[] getStartOffsets() {
+    return Arrays.copyOf(startOffsets, size);
+  }
+
+  private boolean isBuffered() {
+    return pos < size;
+  }
+
+  @Override
+  public boolean nextPosition() throws IOException {
+    if (pos + 1 < size) {
+      pos++;
+      return true;
+    }
+    pos = size;
+    if (exhausted) {
+      return false;
+    }
+    exhausted = !in.nextPosition();
+    return !exhausted;
+  }
+
+  @Override
+  public int freq() throws IOException {
+    return isBuffered() ? freqs[pos] : in.freq();
+  }
+
+  @Override
+  public BytesRef getTerm() throws IOException {
+    return isBuffered() ? terms[pos] : in.getTerm();
+  }
+
+  @Override
+  public int startOffset() throws IOException {
+    return isBuffered() ? startOffsets[pos] : in.startOffset();
+  }
+
+  @Override
+  public int endOffset() throws IOException {
+    return isBuffered() ? endOffsets[pos] : in.endOffset();
+  }
+}
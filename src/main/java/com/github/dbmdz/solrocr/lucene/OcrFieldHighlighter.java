@@ -25,14 +25,18 @@
 package com.github.dbmdz.solrocr.lucene;
 
 import com.github.dbmdz.solrocr.breaklocator.BreakLocator;
+import com.github.dbmdz.solrocr.model.OcrPage;
 import com.github.dbmdz.solrocr.model.OcrSnippet;
 import com.github.dbmdz.solrocr.reader.SourceReader;
 import java.io.IOException;
+import java.util.ArrayList;
 import java.util.Arrays;
 import java.util.Collections;
 import java.util.Comparator;
+import java.util.List;
 import java.util.PriorityQueue;
 import java.util.concurrent.ConcurrentHashMap;
+import java.util.concurrent.Executor;
 import org.apache.lucene.index.LeafReader;
 import org.apache.lucene.search.uhighlight.FieldHighlighter;
 import org.apache.lucene.search.uhighlight.FieldOffsetStrategy;
@@ -44,6 +48,15 @@ import org.apache.lucene.util.BytesRef;
 
 /** A customization of {@link FieldHighlighter} to support OCR fields */
 public class OcrFieldHighlighter {
+  /**
+   * Number of bytes around every match that are prefetched from the source, should cover the
+   * context of a typical snippet
+   */
+  private static final int PREFETCH_CONTEXT_BYTES = 4096;
+
+  /** Number of matches whose context is used to estimate the snippet size for lazy breaks */
+  private static final int NUM_GAP_SAMPLES = 5;
+
   private final ConcurrentHashMap<Integer, Integer> numMatches;
 
   private final String field;
@@ -51,6 +64,7 @@ public class OcrFieldHighlighter {
   private final PassageScorer passageScorer;
   private final int maxPassages;
   private final int maxNoHighlightPassages;
+  private final boolean lazyBreaks;
 
   public OcrFieldHighlighter(
       String field,
@@ -58,12 +72,29 @@ public class OcrFieldHighlighter {
       PassageScorer passageScorer,
       int maxPassages,
       int maxNoHighlightPassages) {
+    this(field, fieldOffsetStrategy, passageScorer, maxPassages, maxNoHighlightPassages, false);
+  }
+
+  /**
+   * @param lazyBreaks if {@code true}, scored passages are determined in two phases: matches are
+   *     clustered and scored by their offsets alone and breaks are only located for the best
+   *     clusters. Much cheaper for documents with many matches, but the resulting passages can
+   *     differ slightly from those determined by locating the breaks for every match.
+   */
+  public OcrFieldHighlighter(
+      String field,
+      FieldOffsetStrategy fieldOffsetStrategy,
+      PassageScorer passageScorer,
+      int maxPassages,
+      int maxNoHighlightPassages,
+      boolean lazyBreaks) {
     this.numMatches = new ConcurrentHashMap<>();
     this.field = field;
     this.fieldOffsetStrategy = fieldOffsetStrategy;
     this.passageScorer = passageScorer;
     this.maxPassages = maxPassages;
     this.maxNoHighlightPassages = maxNoHighlightPassages;
+    this.lazyBreaks = lazyBreaks;
   }
 
   /**
@@ -85,6 +116,69 @@ public class OcrFieldHighlighter {
       int snippetLimit,
       boolean scorePassages)
       throws IOException {
+    return highlightFieldForDoc(
+        reader,
+        indexDocId,
+        readerDocId,
+        breakLocator,
+        formatter,
+        content,
+        pageId,
+        snippetLimit,
+        scorePassages,
+        null);
+  }
+
+  /**
+   * Like {@link #highlightFieldForDoc(LeafReader, int, int, BreakLocator, OcrPassageFormatter,
+   * SourceReader, String, int, boolean)}, but if a {@code prefetchExecutor} is passed, the sections
+   * around the matches up to the snippet limit are read from the content in a single concurrent
+   * burst before any passages are formed.
+   */
+  public OcrSnippet[] highlightFieldForDoc(
+      LeafReader reader,
+      int indexDocId, // relative to the whole index
+      int readerDocId, // relative to the current leafReader
+      BreakLocator breakLocator,
+      OcrPassageFormatter formatter,
+      SourceReader content,
+      String pageId,
+      int snippetLimit,
+      boolean scorePassages,
+      Executor prefetchExecutor)
+      throws IOException {
+    return highlightFieldForDoc(
+        reader,
+        indexDocId,
+        readerDocId,
+        breakLocator,
+        formatter,
+        content,
+        pageId,
+        snippetLimit,
+        scorePassages,
+        prefetchExecutor,
+        null);
+  }
+
+  /**
+   * Like {@link #highlightFieldForDoc(LeafReader, int, int, BreakLocator, OcrPassageFormatter,
+   * SourceReader, String, int, boolean, Executor)}, but if a {@code parallelFormatter} is passed,
+   * the passages of the document are formatted concurrently with it.
+   */
+  public OcrSnippet[] highlightFieldForDoc(
+      LeafReader reader,
+      int indexDocId, // relative to the whole index
+      int readerDocId, // relative to the current leafReader
+      BreakLocator breakLocator,
+      OcrPassageFormatter formatter,
+      SourceReader content,
+      String pageId,
+      int snippetLimit,
+      boolean scorePassages,
+      Executor prefetchExecutor,
+      ParallelSnippetFormatter parallelFormatter)
+      throws IOException {
     // note: it'd be nice to accept a CharSequence for content, but we need a CharacterIterator impl
     // for it.
 
@@ -94,9 +188,17 @@ public class OcrFieldHighlighter {
 
     Passage[] passages;
     try (OffsetsEnum offsetsEnums = fieldOffsetStrategy.getOffsetsEnum(reader, readerDocId, null)) {
+      OffsetsEnum offsets = offsetsEnums;
+      // When filtering by page, most matches are usually not needed, so prefetching is not worth it
+      if (prefetchExecutor != null && pageId == null) {
+        // Passages are only formed for the matches up to the snippet limit, the rest are counted
+        BufferedOffsetsEnum buffered = BufferedOffsetsEnum.buffer(offsetsEnums, snippetLimit);
+        content.prefetch(buffered.getStartOffsets(), PREFETCH_CONTEXT_BYTES, prefetchExecutor);
+        offsets = buffered;
+      }
       passages =
           highlightOffsetsEnums(
-              offsetsEnums,
+              offsets,
               indexDocId,
               breakLocator,
               formatter,
@@ -114,7 +216,10 @@ public class OcrFieldHighlighter {
     }
 
     if (passages.length > 0) {
-      OcrSnippet[] snippets = formatter.format(passages, breakLocator.getText());
+      OcrSnippet[] snippets =
+          parallelFormatter != null
+              ? parallelFormatter.format(passages, formatter, breakLocator.getText())
+              : formatter.format(passages, breakLocator.getText());
       Arrays.sort(snippets, Collections.reverseOrder());
       return snippets;
     } else {
@@ -148,6 +253,12 @@ public class OcrFieldHighlighter {
     if (!off.nextPosition()) {
       return new Passage[0];
     }
+    if (!scorePassages && pageId == null && maxPassages > 0) {
+      return highlightOffsetsEnumsInOrder(off, indexDocId, breakLocator, contentLength);
+    }
+    if (lazyBreaks && pageId == null && maxPassages > 0) {
+      return highlightOffsetsEnumsLazily(off, indexDocId, breakLocator, contentLength);
+    }
     // If we're filtering by a page identifier, we want *all* hits on that page
     int queueSize = pageId != null ? 4096 : maxPassages;
     if (queueSize <= 0) {
@@ -184,8 +295,8 @@ public class OcrFieldHighlighter {
             "field '" + field + "' was indexed without offsets, cannot highlight");
       }
       if (pageId != null) {
-        String passagePageId = formatter.determineStartPage(start, breakLocator.getText()).id;
-        if (!passagePageId.equals(pageId)) {
+        OcrPage passagePage = formatter.determineStartPage(start, breakLocator.getText());
+        if (passagePage == null || !passagePage.id.equals(pageId)) {
           continue;
         }
       }
@@ -236,6 +347,161 @@ public class OcrFieldHighlighter {
     return passages;
   }
 
+  /**
+   * Form passages in the order of their occurrence in the document, used if passages are not
+   * scored.
+   *
+   * <p>Only the first {@code maxPassages} passages can be returned, so once these are formed, no
+   * more breaks are located. The remaining matches are only counted, every match after the end of
+   * the last counted match is counted as a single passage. Expects {@code off} to be positioned on
+   * the first match.
+   */
+  private Passage[] highlightOffsetsEnumsInOrder(
+      OffsetsEnum off, int indexDocId, BreakLocator breakLocator, int contentLength)
+      throws IOException {
+    List<Passage> passages = new ArrayList<>(Math.min(maxPassages, 64));
+    Passage passage = new Passage(); // the current passage in-progress
+    int numTotal = 0;
+    // End offset of the last match that was counted after all passages were formed
+    int countedUntil = -1;
+    do {
+      int start = off.startOffset();
+      if (start == -1) {
+        throw new IllegalArgumentException(
+            "field '" + field + "' was indexed without offsets, cannot highlight");
+      }
+      int end = off.endOffset();
+      if (start < contentLength && end > contentLength) {
+        continue;
+      }
+      if (start >= contentLength) {
+        break;
+      }
+      if (passages.size() == maxPassages) {
+        if (start >= countedUntil) {
+          numTotal++;
+        }
+        countedUntil = Math.max(countedUntil, end);
+        continue;
+      }
+      int passageStart = Math.max(breakLocator.preceding(start + 1), 0);
+      int passageEnd = Math.min(breakLocator.following(end), contentLength);
+      if (passageStart >= passage.getEndOffset()) {
+        if (passage.getStartOffset() >= 0) {
+          numTotal++;
+          passages.add(passage);
+          passage = new Passage();
+          if (passages.size() == maxPassages) {
+            // The match starts a passage that can never be returned
+            numTotal++;
+            countedUntil = end;
+            continue;
+          }
+        }
+        passage.setStartOffset(passageStart);
+      }
+      passage.setEndOffset(passageEnd);
+      passage.addMatch(start, end, off.getTerm(), off.freq());
+    } while (off.nextPosition());
+    if (passage.getStartOffset() >= 0) {
+      numTotal++;
+      passages.add(passage);
+    }
+
+    this.numMatches.put(indexDocId, numTotal);
+    return passages.toArray(new Passage[0]);
+  }
+
+  /**
+   * Determine scored passages in two phases, used if {@code lazyBreaks} is enabled.
+   *
+   * <p>First, the matches are clustered by their distance and the clusters are scored as passages,
+   * without reading any content. Two matches are in the same cluster if their distance is at most
+   * the typical size of the context around a match, i.e. if their contexts would likely overlap.
+   * The context size is the median of the contexts of the first {@link #NUM_GAP_SAMPLES} matches,
+   * so a single match in an unusually short or long block doesn't skew the clustering of the whole
+   * document. Then, breaks are only located for the best {@code maxPassages} clusters, and
+   * clusters whose contexts overlap are merged, like they would have been in the exact mode.
+   * Expects {@code off} to be positioned on the first match.
+   */
+  private Passage[] highlightOffsetsEnumsLazily(
+      OffsetsEnum off, int indexDocId, BreakLocator breakLocator, int contentLength)
+      throws IOException {
+    PriorityQueue<Passage> clusterQueue =
+        new PriorityQueue<>(
+            maxPassages,
+            Comparator.comparingDouble(Passage::getScore)
+                .thenComparingInt(Passage::getStartOffset));
+    Passage cluster = new Passage(); // the current cluster in-progress
+    int maxGap = -1;
+    int[] gapSamples = new int[NUM_GAP_SAMPLES];
+    int numGapSamples = 0;
+    int numTotal = 0;
+    do {
+      int start = off.startOffset();
+      if (start == -1) {
+        throw new IllegalArgumentException(
+            "field '" + field + "' was indexed without offsets, cannot highlight");
+      }
+      int end = off.endOffset();
+      if (start < contentLength && end > contentLength) {
+        continue;
+      }
+      if (start >= contentLength) {
+        break;
+      }
+      if (numGapSamples < NUM_GAP_SAMPLES) {
+        // The breaks around the first matches are cached by the locator, so they're not located
+        // again if the matches end up among the best clusters
+        int passageStart = Math.max(breakLocator.preceding(start + 1), 0);
+        int passageEnd = Math.min(breakLocator.following(end), contentLength);
+        gapSamples[numGapSamples++] = (start - passageStart) + (passageEnd - end);
+        int[] sorted = Arrays.copyOf(gapSamples, numGapSamples);
+        Arrays.sort(sorted);
+        maxGap = sorted[numGapSamples / 2];
+      }
+      if (cluster.getStartOffset() >= 0 && start - cluster.getEndOffset() > maxGap) {
+        numTotal++;
+        cluster = maybeAddPassage(clusterQueue, passageScorer, cluster, contentLength, true);
+      }
+      if (cluster.getStartOffset() < 0) {
+        cluster.setStartOffset(start);
+      }
+      cluster.setEndOffset(Math.max(cluster.getEndOffset(), end));
+      cluster.addMatch(start, end, off.getTerm(), off.freq());
+    } while (off.nextPosition());
+    if (cluster.getStartOffset() >= 0) {
+      numTotal++;
+      maybeAddPassage(clusterQueue, passageScorer, cluster, contentLength, true);
+    }
+    this.numMatches.put(indexDocId, numTotal);
+
+    Passage[] clusters = clusterQueue.toArray(new Passage[0]);
+    Arrays.sort(clusters, Comparator.comparingInt(Passage::getStartOffset));
+    List<Passage> passages = new ArrayList<>(clusters.length);
+    for (Passage candidate : clusters) {
+      int passageStart = Math.max(breakLocator.preceding(candidate.getStartOffset() + 1), 0);
+      int passageEnd = Math.min(breakLocator.following(candidate.getEndOffset()), contentLength);
+      Passage previous = passages.isEmpty() ? null : passages.get(passages.size() - 1);
+      if (previous != null && passageStart < previous.getEndOffset()) {
+        previous.setEndOffset(Math.max(previous.getEndOffset(), passageEnd));
+        for (int i = 0; i < candidate.getNumMatches(); i++) {
+          previous.addMatch(
+              candidate.getMatchStarts()[i],
+              candidate.getMatchEnds()[i],
+              candidate.getMatchTerms()[i],
+              candidate.getMatchTermFreqsInDoc()[i]);
+        }
+        previous.setScore(Math.max(previous.getScore(), candidate.getScore()));
+        continue;
+      }
+      candidate.setStartOffset(passageStart);
+      candidate.setEndOffset(passageEnd);
+      passages.add(candidate);
+    }
+    return passages.toArray(new Passage[0]);
+  }
+
   /**
    * Largely identical to {@link FieldHighlighter#maybeAddPassage(PriorityQueue, PassageScorer,
    * Passage, int)}.
@@ -5,6 +5,7 @@ import static com.github.dbmdz.solrocr.formats.OcrParser.START_HL;
 
 import com.github.dbmdz.solrocr.breaklocator.BreakLocator;
 import com.github.dbmdz.solrocr.formats.OcrParser;
+import com.github.dbmdz.solrocr.formats.OcrParserPool;
 import com.github.dbmdz.solrocr.lucene.filters.SanitizingXmlFilter;
 import com.github.dbmdz.solrocr.model.OcrBlock;
 import com.github.dbmdz.solrocr.model.OcrBox;
@@ -15,15 +16,16 @@ import com.github.dbmdz.solrocr.reader.SourceReader;
 import com.github.dbmdz.solrocr.reader.StringSourceReader;
 import com.google.common.collect.Lists;
 import com.google.common.collect.Range;
+import java.io.EOFException;
 import java.io.IOException;
 import java.io.StringReader;
+import java.nio.charset.StandardCharsets;
 import java.util.ArrayDeque;
 import java.util.ArrayList;
 import java.util.Arrays;
 import java.util.Collection;
 import java.util.Deque;
 import java.util.Iterator;
-import java.util.LinkedHashSet;
 import java.util.List;
 import java.util.Locale;
 import java.util.Objects;
@@ -51,6 +53,12 @@ public class OcrPassageFormatter extends PassageFormatter {
   protected final boolean alignSpans;
   protected final boolean trackPages;
 
+  /** Pages of the document that is currently being formatted */
+  private PageTable pageTable;
+
+  /** Buffer for the words of the snippet that is currently being formatted */
+  private final WordBoxBuffer words = new WordBoxBuffer();
+
   public OcrPassageFormatter(
       String startHlTag,
       String endHlTag,
@@ -128,6 +136,178 @@ public class OcrPassageFormatter extends PassageFormatter {
 
   protected String getHighlightedFragment(Passage passage, SourceReader content)
       throws IOException {
+    if (content.getPointer() == null) {
+      // In-memory sources are addressed by character offsets, not by UTF-8 byte offsets
+      return getHighlightedFragmentByDecoding(passage, content);
+    }
+    int passageStart = passage.getStartOffset();
+    byte[] data = readBytes(content, passageStart, passage.getLength());
+    // Number of UTF-16 chars that precede every byte offset in the passage, this lets us map the
+    // byte offsets of the matches to char offsets without decoding the passage more than once
+    int[] charOffsets = new int[data.length + 1];
+    String text = decodeUtf8WithOffsets(data, charOffsets);
+    if (text == null) {
+      return getHighlightedFragmentByDecoding(passage, content);
+    }
+    if (passage.getNumMatches() == 0) {
+      return text;
+    }
+
+    List<PassageMatch> matches =
+        mergeMatches(passage.getNumMatches(), passage.getMatchStarts(), passage.getMatchEnds());
+    // Determine all marker positions first (relative to the unmodified passage text) and splice
+    // the markers in afterwards, in a single pass
+    int[] markerPositions = new int[matches.size() * 2];
+    int prevHlEnd = 0;
+    for (int i = 0; i < matches.size(); i++) {
+      PassageMatch match = matches.get(i);
+      int matchStart = charOffsets[Math.max(0, Math.min(match.start - passageStart, data.length))];
+      if (alignSpans) {
+        matchStart = format.getLastContentStartIdx(text.substring(0, matchStart));
+      }
+      if (matchStart < prevHlEnd) {
+        // Overlapping highlights after alignment, the positions depend on the order of insertion
+        return getHighlightedFragmentByDecoding(passage, content);
+      }
+      int hlStart = this.adjustPositionToCharacterEntities(text, matchStart);
+      int matchEnd = charOffsets[Math.max(0, Math.min(match.end - passageStart, data.length))];
+      String matchText;
+      if (hlStart == matchStart) {
+        matchText = text.substring(matchStart, matchEnd);
+      } else {
+        // Keep the same window on the text as when inserting the start marker before looking at
+        // the match text
+        matchText =
+            new StringBuilder(text)
+                .insert(hlStart, START_HL)
+                .substring(matchStart + START_HL.length(), matchEnd + START_HL.length());
+      }
+      if (matchText.trim().endsWith(">")) {
+        // Set the end of the match to the position before the last inner closing tag inside of
+        // the match. This is only relevant for hOCR at the moment
+        Matcher m = LAST_INNER_TAG_PAT.matcher(matchText);
+        int idx = -1;
+        while (m.find()) {
+          idx = m.start() + 1;
+        }
+        if (idx > -1) {
+          matchEnd -= (matchText.length() - idx);
+        }
+      }
+      matchEnd = Math.min(matchEnd, text.length());
+      if (alignSpans && matchEnd != text.length()) {
+        matchEnd += format.getFirstContentEndIdx(text.substring(matchEnd));
+      }
+      if (matchEnd < hlStart) {
+        return getHighlightedFragmentByDecoding(passage, content);
+      }
+      int hlEnd = this.adjustPositionToCharacterEntities(text, matchEnd);
+      markerPositions[2 * i] = hlStart;
+      markerPositions[2 * i + 1] = hlEnd;
+      prevHlEnd = hlEnd;
+    }
+
+    StringBuilder sb =
+        new StringBuilder(text.length() + matches.size() * (START_HL.length() + END_HL.length()));
+    int textIdx = 0;
+    for (int i = 0; i < markerPositions.length; i++) {
+      sb.append(text, textIdx, markerPositions[i]).append(i % 2 == 0 ? START_HL : END_HL);
+      textIdx = markerPositions[i];
+    }
+    sb.append(text, textIdx, text.length());
+    return sb.toString();
+  }
+
+  /** Read {@code len} bytes from the source, starting at {@code start}. */
+  private static byte[] readBytes(SourceReader content, int start, int len) throws IOException {
+    if (start + len > content.length()) {
+      len = content.length() - start;
+    }
+    byte[] data = new byte[len];
+    int numRead = 0;
+    while (numRead < len) {
+      int n = content.readBytes(data, numRead, start + numRead, len - numRead);
+      if (n <= 0) {
+        throw new EOFException(
+            String.format(
+                Locale.US,
+                "Unexpected end of %s at offset %d, was it modified while it was read?",
+                content.getIdentifier(),
+                start + numRead));
+      }
+      numRead += n;
+    }
+    return data;
+  }
+
+  /**
+   * Decode UTF-8 data and record the number of UTF-16 chars that precede every byte offset.
+   *
+   * <p>Like {@link SourceReader#readUtf8String(int, int)}, partial multi-byte sequences at the
+   * beginning and end of the data are skipped. Offsets inside of a multi-byte sequence map to the
+   * char offset of the sequence.
+   *
+   * @param data UTF-8 encoded data
+   * @param charOffsets array of length {@code data.length + 1} that receives the char offsets
+   * @return the decoded string or {@code null} if the data is not well-formed UTF-8
+   */
+  static String decodeUtf8WithOffsets(byte[] data, int[] charOffsets) {
+    int idx = 0;
+    // Skip continuation bytes at the start
+    while (idx < data.length && (data[idx] & 0xC0) == 0x80) {
+      charOffsets[idx++] = 0;
+    }
+    int dataStart = idx;
+    int numChars = 0;
+    while (idx < data.length) {
+      int b = data[idx] & 0xFF;
+      int seqLen;
+      if (b < 0x80) {
+        seqLen = 1;
+      } else if ((b >> 5) == 0b110) {
+        seqLen = 2;
+      } else if ((b >> 4) == 0b1110) {
+        seqLen = 3;
+      } else if ((b >> 3) == 0b11110) {
+        seqLen = 4;
+      } else {
+        return null;
+      }
+      if (idx + seqLen > data.length) {
+        // Partial sequence at the end, skip it
+        break;
+      }
+      for (int i = 0; i < seqLen; i++) {
+        if (i > 0 && (data[idx + i] & 0xC0) != 0x80) {
+          return null;
+        }
+        charOffsets[idx + i] = numChars;
+      }
+      // Codepoints outside the BMP are encoded as a surrogate pair in UTF-16
+      numChars += seqLen == 4 ? 2 : 1;
+      idx += seqLen;
+    }
+    int dataEnd = idx;
+    for (; idx <= data.length; idx++) {
+      charOffsets[idx] = numChars;
+    }
+    String text = new String(data, dataStart, dataEnd - dataStart, StandardCharsets.UTF_8);
+    if (text.length() != numChars) {
+      // Malformed sequences (e.g. overlong encodings) that were replaced during decoding
+      return null;
+    }
+    return text;
+  }
+
+  /**
+   * Insert highlighting markers into the passage, determining the character offsets of every match
+   * by decoding the passage up to the match.
+   *
+   * <p>Used for sources that are not addressed by UTF-8 byte offsets and as a fallback for passages
+   * that are not well-formed UTF-8.
+   */
+  String getHighlightedFragmentByDecoding(Passage passage, SourceReader content)
+      throws IOException {
     StringBuilder sb =
         new StringBuilder(content.readUtf8String(passage.getStartOffset(), passage.getLength()));
     int extraChars = 0;
@@ -220,78 +400,81 @@ public class OcrPassageFormatter extends PassageFormatter {
     return snip;
   }
 
+  /**
+   * Set the table to look up pages from.
+   *
+   * <p>If none is set, a table that uses the format's page {@link BreakLocator} is created on
+   * demand.
+   */
+  public void setPageTable(PageTable pageTable) {
+    this.pageTable = pageTable;
+  }
+
   /** Determine the page an OCR fragment resides on. */
   OcrPage determineStartPage(int startOffset, SourceReader reader) throws IOException {
-    BreakLocator pageBreakLocator = this.format.getBreakLocator(reader, OcrBlock.PAGE);
-    int pageOffset = pageBreakLocator.preceding(startOffset);
-    if (pageOffset == BreakLocator.DONE) {
-      // This means the page is, if present, part of the passage, and will be determined during
-      // parsing anyway
-      return null;
+    if (pageTable == null || pageTable.getText() != reader) {
+      pageTable =
+          new PageTable(reader, this.format.getBreakLocator(reader, OcrBlock.PAGE), this.format);
     }
-    String pageFragment =
-        reader.readUtf8String(pageOffset, Math.min(512, reader.length() - pageOffset));
-    return this.format.parsePageFragment(pageFragment);
+    return pageTable.getPage(startOffset);
   }
 
   /** Parse an {@link OcrSnippet} from an OCR fragment. */
   protected OcrSnippet parseFragment(String ocrFragment, OcrPage page) {
-    List<OcrBox> allBoxes = this.parseWords(ocrFragment, page);
-    if (allBoxes.isEmpty()) {
+    WordBoxBuffer words = this.words;
+    words.clear();
+    this.parseWords(ocrFragment, page, words);
+    if (words.size() == 0) {
       return null;
     }
 
-    // Grouped by columns
-    List<List<OcrBox>> byColumns = new ArrayList<>();
-    List<OcrBox> currentCol = new ArrayList<>();
-    OcrBox prevBox = null;
+    // Grouped by columns, every column is a range of word indices
+    int[] columnStarts = new int[8];
+    int numColumns = 1;
+    int prevIdx = -1;
     String pageId = null;
-    for (OcrBox box : allBoxes) {
+    for (int idx = 0; idx < words.size(); idx++) {
       // Stupid, haphazard heuristic for column detection: If the next box is at least the height of
       // the current box times five higher on the page, we're on a new column. Or if the page
       // changes.
       // FIXME: This clearly needs some more thought put into it
       boolean newColumn =
-          prevBox != null && (box.getUly() + prevBox.getHeight() * 5) < prevBox.getUly();
-      String boxPageId = box.getPage() == null ? null : box.getPage().id;
+          prevIdx >= 0
+              && (words.getUly(idx) + words.getHeight(prevIdx) * 5) < words.getUly(prevIdx);
+      OcrPage boxPage = words.getPage(idx);
+      String boxPageId = boxPage == null ? null : boxPage.id;
       boolean newPage = pageId != null && !pageId.equals(boxPageId);
       if (newColumn || newPage) {
-        byColumns.add(currentCol);
-        currentCol = new ArrayList<>();
+        if (numColumns == columnStarts.length) {
+          columnStarts = Arrays.copyOf(columnStarts, numColumns * 2);
+        }
+        columnStarts[numColumns++] = idx;
       }
-      currentCol.add(box);
       // Skip very low-height boxes since they throw off the heuristic, we still track page changes,
       // though!
-      if (box.getHeight() > 5) {
-        prevBox = box;
+      if (words.getHeight(idx) > 5) {
+        prevIdx = idx;
       }
       pageId = boxPageId;
     }
-    byColumns.add(currentCol);
 
     // Get highlighted spans
-    Set<OcrPage> pages = new LinkedHashSet<>();
     List<List<OcrBox>> hlSpans = new ArrayList<>();
     List<OcrBox> currentSpan = null;
-    for (OcrBox wordBox : allBoxes) {
-      if (wordBox.getPage() != null) {
-        pages.add(wordBox.getPage());
-      }
-      if (wordBox.isInHighlight()) {
-        boolean isInNewSpan =
-            (currentSpan == null
-                || currentSpan.isEmpty()
-                || !wordBox.getHighlightSpan().equals(currentSpan.get(0).getHighlightSpan()));
-        if (isInNewSpan) {
+    int currentSpanId = -1;
+    for (int idx = 0; idx < words.size(); idx++) {
+      if (words.isInHighlight(idx)) {
+        if (currentSpan == null || words.getHighlightSpan(idx) != currentSpanId) {
           if (currentSpan != null && !currentSpan.isEmpty()) {
             hlSpans.add(currentSpan);
           }
           currentSpan = new ArrayList<>();
+          currentSpanId = words.getHighlightSpan(idx);
         }
         // Only add the word to the span if some of its text actually is in the highlight span,
         // i.e. don't if the word's text starts with the end-marker.
-        if (!wordBox.getText().startsWith(END_HL)) {
-          currentSpan.add(wordBox);
+        if (!words.getText(idx).startsWith(END_HL)) {
+          currentSpan.add(words.toOcrBox(idx));
         }
       } else if (currentSpan != null && !currentSpan.isEmpty()) {
         hlSpans.add(currentSpan);
@@ -303,14 +486,18 @@ public class OcrPassageFormatter extends PassageFormatter {
     }
 
     String highlightedText =
-        OcrParser.boxesToString(allBoxes)
+        words
+            .toText(0, words.size())
             .replace(START_HL, startHlTag)
             .replace(OcrParser.END_HL, endHlTag);
-    List<OcrBox> snippetRegions =
-        byColumns.stream()
-            .map(this::determineSnippetRegion)
-            .filter(r -> !r.getText().isEmpty() && !r.getText().trim().isEmpty())
-            .collect(Collectors.toList());
+    List<OcrBox> snippetRegions = new ArrayList<>(numColumns);
+    for (int col = 0; col < numColumns; col++) {
+      int colEnd = col < numColumns - 1 ? columnStarts[col + 1] : words.size();
+      OcrBox region = this.determineSnippetRegion(words, columnStarts[col], colEnd);
+      if (!region.getText().isEmpty() && !region.getText().trim().isEmpty()) {
+        snippetRegions.add(region);
+      }
+    }
     Set<String> snippetPageIds =
         snippetRegions.stream()
             .filter(b -> b.getPage() != null)
@@ -320,7 +507,7 @@ public class OcrPassageFormatter extends PassageFormatter {
     if (page != null) {
       allPages.add(page);
     }
-    allPages.addAll(pages);
+    allPages.addAll(words.getPages());
     List<OcrPage> snippetPages =
         allPages.stream()
             .filter(p -> snippetPageIds.contains(p.id))
@@ -332,20 +519,25 @@ public class OcrPassageFormatter extends PassageFormatter {
     return snip;
   }
 
-  private OcrBox determineSnippetRegion(List<OcrBox> wordBoxes) {
-    float snipUlx = wordBoxes.stream().map(OcrBox::getUlx).min(Float::compareTo).get();
-    float snipUly = wordBoxes.stream().map(OcrBox::getUly).min(Float::compareTo).get();
-    float snipLrx = wordBoxes.stream().map(OcrBox::getLrx).max(Float::compareTo).get();
-    float snipLry = wordBoxes.stream().map(OcrBox::getLry).max(Float::compareTo).get();
-    OcrPage page = wordBoxes.get(0).getPage();
-
-    String regionText = OcrParser.boxesToString(wordBoxes);
-    OcrBox firstBox = wordBoxes.get(0);
-    OcrBox lastBox = wordBoxes.get(wordBoxes.size() - 1);
-    if (firstBox.isInHighlight() && !firstBox.getText().contains(START_HL)) {
+  /** Determine the region of the words in the given range of the buffer. */
+  private OcrBox determineSnippetRegion(WordBoxBuffer words, int from, int to) {
+    float snipUlx = Float.POSITIVE_INFINITY;
+    float snipUly = Float.POSITIVE_INFINITY;
+    float snipLrx = Float.NEGATIVE_INFINITY;
+    float snipLry = Float.NEGATIVE_INFINITY;
+    for (int idx = from; idx < to; idx++) {
+      snipUlx = Math.min(snipUlx, words.getUlx(idx));
+      snipUly = Math.min(snipUly, words.getUly(idx));
+      snipLrx = Math.max(snipLrx, words.getLrx(idx));
+      snipLry = Math.max(snipLry, words.getLry(idx));
+    }
+    OcrPage page = words.getPage(from);
+
+    String regionText = words.toText(from, to);
+    if (words.isInHighlight(from) && !words.getText(from).contains(START_HL)) {
       regionText = START_HL + regionText;
     }
-    if (lastBox.isInHighlight() && !lastBox.getText().contains(END_HL)) {
+    if (words.isInHighlight(to - 1) && !words.getText(to - 1).contains(END_HL)) {
       regionText = regionText + END_HL;
     }
     regionText = regionText.replace(START_HL, startHlTag).replace(END_HL, endHlTag);
@@ -353,9 +545,8 @@ public class OcrPassageFormatter extends PassageFormatter {
     return new OcrBox(regionText, page, snipUlx, snipUly, snipLrx, snipLry, null);
   }
 
-  /** Parse word boxes from an OCR fragment. */
-  protected List<OcrBox> parseWords(String ocrFragment, OcrPage startPage) {
-    List<OcrBox> words = new ArrayList<>();
+  /** Parse word boxes from an OCR fragment into the buffer. */
+  protected void parseWords(String ocrFragment, OcrPage startPage, WordBoxBuffer words) {
     List<OcrParser.ParsingFeature> parsingFeatures =
         Lists.newArrayList(
             OcrParser.ParsingFeature.TEXT,
@@ -366,19 +557,23 @@ public class OcrPassageFormatter extends PassageFormatter {
       parsingFeatures.add(OcrParser.ParsingFeature.PAGES);
     }
     OcrParser parser =
-        format.getParser(
+        OcrParserPool.acquire(
+            format,
             new SanitizingXmlFilter(new StringReader(ocrFragment), true),
             parsingFeatures.toArray(new OcrParser.ParsingFeature[0]));
-    boolean onStartPage = true;
-    for (OcrBox box : parser) {
-      if (onStartPage && box.getPage() == null) {
-        box.setPage(startPage);
-      } else if (box.getPage() != null) {
-        onStartPage = false;
+    try {
+      boolean onStartPage = true;
+      for (OcrBox box : parser) {
+        if (onStartPage && box.getPage() == null) {
+          box.setPage(startPage);
+        } else if (box.getPage() != null) {
+          onStartPage = false;
+        }
+        words.add(box);
       }
-      words.add(box);
+    } finally {
+      OcrParserPool.release(format, parser);
     }
-    return words;
   }
 
   protected void addHighlightsToSnippet(List<List<OcrBox>> hlSpans, OcrSnippet snippet) {
@@ -0,0 +1,98 @@
+package com.github.dbmdz.solrocr.lucene;
+
+import com.github.dbmdz.solrocr.breaklocator.BreakLocator;
+import com.github.dbmdz.solrocr.model.OcrFormat;
+import com.github.dbmdz.solrocr.model.OcrPage;
+import com.github.dbmdz.solrocr.reader.SourceReader;
+import java.io.IOException;
+import java.util.Arrays;
+
+/**
+ * Table of the pages in a single OCR document, used to look up the page that contains a given
+ * offset.
+ *
+ * <p>The table is filled lazily: Every page is located and parsed only once, when the first offset
+ * on it is looked up. Subsequent lookups for offsets on the same page are a binary search over the
+ * pages that were already found. The pages are stored as sorted, non-overlapping offset ranges.
+ *
+ * <p>Not thread-safe.
+ */
+public class PageTable {
+  private final SourceReader text;
+  private final BreakLocator pageLocator;
+  private final OcrFormat format;
+
+  /** Exclusive start offsets of the page ranges, i.e. the offset of the page's opening tag */
+  private int[] starts = new int[8];
+
+  /** Inclusive end offsets of the page ranges, i.e. the offset of the next page's opening tag */
+  private int[] ends = new int[8];
+
+  private OcrPage[] pages = new OcrPage[8];
+  private int numPages = 0;
+
+  /**
+   * Create a new page table.
+   *
+   * @param text the OCR document
+   * @param pageLocator a {@link BreakLocator} for the document that breaks on pages
+   * @param format the format of the OCR document
+   */
+  public PageTable(SourceReader text, BreakLocator pageLocator, OcrFormat format) {
+    this.text = text;
+    this.pageLocator = pageLocator;
+    this.format = format;
+  }
+
+  public SourceReader getText() {
+    return text;
+  }
+
+  /**
+   * Get the page that the given offset is located on.
+   *
+   * @return the page or {@code null} if there is no page before the offset
+   */
+  public OcrPage getPage(int offset) throws IOException {
+    int idx = Arrays.binarySearch(starts, 0, numPages, offset);
+    // We need the last page that starts *before* the offset
+    int candidateIdx = idx >= 0 ? idx - 1 : -idx - 2;
+    if (candidateIdx >= 0 && offset <= ends[candidateIdx]) {
+      return pages[candidateIdx];
+    }
+
+    int pageStart = pageLocator.preceding(offset);
+    if (pageStart == BreakLocator.DONE) {
+      // This means the page is, if present, part of the passage, and will be determined during
+      // parsing anyway
+      return null;
+    }
+    int pageEnd = pageLocator.following(pageStart);
+    if (pageEnd == BreakLocator.DONE) {
+      pageEnd = text.length();
+    }
+    String pageFragment = text.readUtf8String(pageStart, Math.min(512, text.length() - pageStart));
+    OcrPage page = format.parsePageFragment(pageFragment);
+    insert(candidateIdx + 1, pageStart, Math.max(pageEnd, offset), page);
+    return page;
+  }
+
+  private void insert(int idx, int start, int end, OcrPage page) {
+    if (numPages == starts.length) {
+      int newSize = starts.length * 2;
+      starts = Arrays.copyOf(starts, newSize);
+      ends = Arrays.copyOf(ends, newSize);
+      pages = Arrays.copyOf(pages, newSize);
+    }
+    int numToMove = numPages - idx;
+    if (numToMove > 0) {
+      System.arraycopy(starts, idx, starts, idx + 1, numToMove);
+      System.arraycopy(ends, idx, ends, idx + 1, numToMove);
+      System.arraycopy(pages, idx, pages, idx + 1, numToMove);
+    }
+    starts[idx] = start;
+    ends[idx] = end;
+    pages[idx] = page;
+    numPages++;
+  }
+}
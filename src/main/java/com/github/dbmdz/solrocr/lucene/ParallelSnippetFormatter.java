@@ -0,0 +1,180 @@
+package com.github.dbmdz.solrocr.lucene;
+
+import com.github.dbmdz.solrocr.model.OcrSnippet;
+import com.github.dbmdz.solrocr.reader.SourceReader;
+import java.io.IOException;
+import java.lang.invoke.MethodHandles;
+import java.util.Arrays;
+import java.util.concurrent.CountDownLatch;
+import java.util.concurrent.Executor;
+import java.util.concurrent.RejectedExecutionException;
+import java.util.concurrent.atomic.AtomicInteger;
+import java.util.concurrent.atomic.AtomicReference;
+import org.apache.lucene.search.uhighlight.Passage;
+import org.slf4j.Logger;
+import org.slf4j.LoggerFactory;
+
+/**
+ * Formats the passages of a single document concurrently.
+ *
+ * <p>The passages are split into chunks that are formatted independently of each other. Helper
+ * tasks on the executor and the calling thread claim chunks until none are left, so the calling
+ * thread never waits on a task that hasn't started yet. This means it is safe to use the same
+ * executor the calling thread is running on, even if all of its threads are busy.
+ *
+ * <p>Neither {@link OcrPassageFormatter}s nor {@link SourceReader}s are safe for concurrent use, so
+ * every helper task formats its chunks with its own formatter and its own reader of the content,
+ * obtained from a {@link WorkerFactory}.
+ */
+public class ParallelSnippetFormatter {
+  private static final Logger log = LoggerFactory.getLogger(MethodHandles.lookup().lookupClass());
+
+  /** A formatter and the reader it formats passages from, used by a single thread. */
+  public static final class Worker implements AutoCloseable {
+    private final OcrPassageFormatter formatter;
+    private final SourceReader reader;
+
+    public Worker(OcrPassageFormatter formatter, SourceReader reader) {
+      this.formatter = formatter;
+      this.reader = reader;
+    }
+
+    @Override
+    public void close() throws IOException {
+      reader.close();
+    }
+  }
+
+  /** Creates a new {@link Worker} for a helper task. */
+  @FunctionalInterface
+  public interface WorkerFactory {
+    Worker create() throws IOException;
+  }
+
+  private final Executor executor;
+  private final WorkerFactory workerFactory;
+  private final int chunkSize;
+  private final int maxHelpers;
+
+  /**
+   * @param executor to run the helper tasks on
+   * @param workerFactory to create the formatter and reader for every helper task
+   * @param chunkSize number of passages that are formatted together
+   * @param maxHelpers maximum number of helper tasks that are submitted per document
+   */
+  public ParallelSnippetFormatter(
+      Executor executor, WorkerFactory workerFactory, int chunkSize, int maxHelpers) {
+    if (chunkSize <= 0) {
+      throw new IllegalArgumentException("chunkSize must be > 0");
+    }
+    this.executor = executor;
+    this.workerFactory = workerFactory;
+    this.chunkSize = chunkSize;
+    this.maxHelpers = maxHelpers;
+  }
+
+  /**
+   * Format the passages into {@link OcrSnippet}s, with the same result as {@link
+   * OcrPassageFormatter#format(Passage[], SourceReader)}.
+   *
+   * @param passages to format
+   * @param formatter used to format the chunks claimed by the calling thread
+   * @param content read by the formatter of the calling thread
+   */
+  public OcrSnippet[] format(
+      Passage[] passages, OcrPassageFormatter formatter, SourceReader content) {
+    int numChunks = (passages.length + chunkSize - 1) / chunkSize;
+    int numHelpers = Math.min(numChunks - 1, maxHelpers);
+    if (numHelpers <= 0) {
+      return formatter.format(passages, content);
+    }
+
+    OcrSnippet[] snippets = new OcrSnippet[passages.length];
+    AtomicInteger nextChunk = new AtomicInteger();
+    CountDownLatch chunksDone = new CountDownLatch(numChunks);
+    AtomicReference<RuntimeException> error = new AtomicReference<>();
+    for (int i = 0; i < numHelpers; i++) {
+      Runnable helper =
+          () -> {
+            if (nextChunk.get() >= numChunks) {
+              // Everything was already claimed while the task was queued
+              return;
+            }
+            Worker worker;
+            try {
+              worker = workerFactory.create();
+            } catch (IOException e) {
+              // The remaining chunks will be formatted by the other threads
+              log.warn(
+                  "Could not create reader for formatting snippets from '{}': {}",
+                  content.getIdentifier(),
+                  e.getMessage());
+              return;
+            }
+            try {
+              formatChunks(
+                  passages,
+                  snippets,
+                  worker.formatter,
+                  worker.reader,
+                  nextChunk,
+                  chunksDone,
+                  error);
+            } finally {
+              try {
+                worker.close();
+              } catch (IOException e) {
+                log.warn(
+                    "Encountered error while closing reader for '{}': {}",
+                    content.getIdentifier(),
+                    e.getMessage());
+              }
+            }
+          };
+      try {
+        executor.execute(helper);
+      } catch (RejectedExecutionException e) {
+        // The executor is saturated, the calling thread will pick up the slack
+        break;
+      }
+    }
+
+    formatChunks(passages, snippets, formatter, content, nextChunk, chunksDone, error);
+    try {
+      // Only waits for chunks that are currently being formatted by helper tasks
+      chunksDone.await();
+    } catch (InterruptedException e) {
+      Thread.currentThread().interrupt();
+      throw new IllegalStateException("Interrupted while formatting snippets", e);
+    }
+    if (error.get() != null) {
+      throw error.get();
+    }
+    return snippets;
+  }
+
+  private void formatChunks(
+      Passage[] passages,
+      OcrSnippet[] snippets,
+      OcrPassageFormatter formatter,
+      SourceReader reader,
+      AtomicInteger nextChunk,
+      CountDownLatch chunksDone,
+      AtomicReference<RuntimeException> error) {
+    int from;
+    while ((from = nextChunk.getAndIncrement() * chunkSize) < passages.length) {
+      int to = Math.min(from + chunkSize, passages.length);
+      try {
+        if (error.get() == null) {
+          OcrSnippet[] chunk = formatter.format(Arrays.copyOfRange(passages, from, to), reader);
+          System.arraycopy(chunk, 0, snippets, from, chunk.length);
+        }
+      } catch (RuntimeException e) {
+        // e.g. a timeout, which should fail the whole document, like in the sequential case
+        error.compareAndSet(null, e);
+      } finally {
+        chunksDone.countDown();
+      }
+    }
+  }
+}
@@ -0,0 +1,282 @@
+package com.github.dbmdz.solrocr.lucene;
+
+import static com.github.dbmdz.solrocr.formats.OcrParser.END_HL;
+import static com.github.dbmdz.solrocr.formats.OcrParser.START_HL;
+
+import com.github.dbmdz.solrocr.model.OcrBox;
+import com.github.dbmdz.solrocr.model.OcrPage;
+import java.util.ArrayList;
+import java.util.Arrays;
+import java.util.List;
+import java.util.UUID;
+
+/**
+ * Compact buffer for the word boxes of a single snippet.
+ *
+ * <p>Every property of the words is stored in a separate array ("struct of arrays") instead of in
+ * one {@link OcrBox} per word. Highlight spans are identified by consecutive integers, pages by
+ * their index in a per-buffer page table, and short trailing characters are de-duplicated via a
+ * pool that is shared between all buffers. The {@link OcrPassageFormatter} works on the buffer
+ * directly and only creates {@link OcrBox} instances for the regions and highlights that end up in
+ * the response.
+ *
+ * <p>The buffer is still filled from the {@link OcrBox} instances the {@link
+ * com.github.dbmdz.solrocr.formats.OcrParser} iterators hand out, so one short-lived box per word
+ * remains. Filling the arrays directly would mean duplicating the box handling (hyphenation, page
+ * tracking, skipping of empty boxes) of every parser, what the buffer saves is keeping all boxes
+ * of a snippet alive while it is formatted. The highlight spans of the parsers are no random UUIDs
+ * but a single counter-based instance per span, so they only cost a comparison per word.
+ *
+ * <p>Buffers are re-used for multiple snippets via {@link #clear()}. Not thread-safe.
+ */
+public class WordBoxBuffer {
+  private static final byte NOT_HYPHENATED = 0;
+  private static final byte HYPHEN_START = 1;
+  private static final byte HYPHEN_END = 2;
+
+  /** Number of slots in the trailing characters pool, must be a power of two */
+  private static final int POOL_SIZE = 256;
+
+  private static final int MAX_POOLED_LENGTH = 8;
+
+  /**
+   * Lossy pool for trailing characters, colliding strings simply replace each other. Concurrent
+   * access is fine without synchronization, since strings are immutable and at worst a slot is
+   * overwritten.
+   */
+  private static final String[] TRAILING_CHARS_POOL = new String[POOL_SIZE];
+
+  private int size = 0;
+  private float[] ulx = new float[64];
+  private float[] uly = new float[64];
+  private float[] lrx = new float[64];
+  private float[] lry = new float[64];
+  private String[] texts = new String[64];
+  private String[] trailingChars = new String[64];
+  private String[] dehyphenatedForms = new String[64];
+  private byte[] hyphenation = new byte[64];
+
+  /** Index of the word's page in {@link #pages}, -1 if the word has no page */
+  private int[] pageIdxs = new int[64];
+
+  /** Identifier of the word's highlight span, -1 if the word is not highlighted */
+  private int[] highlightSpans = new int[64];
+
+  /** End offsets of the word's alternatives in {@link #alternatives}, starts at the previous end */
+  private int[] alternativesEnds = new int[64];
+
+  private String[] alternatives = new String[16];
+  private int numAlternatives = 0;
+
+  private final List<OcrPage> pages = new ArrayList<>();
+  private UUID lastSpan;
+  private int numSpans = 0;
+
+  /** Remove all words from the buffer. */
+  public void clear() {
+    Arrays.fill(texts, 0, size, null);
+    Arrays.fill(trailingChars, 0, size, null);
+    Arrays.fill(dehyphenatedForms, 0, size, null);
+    Arrays.fill(alternatives, 0, numAlternatives, null);
+    size = 0;
+    numAlternatives = 0;
+    pages.clear();
+    lastSpan = null;
+    numSpans = 0;
+  }
+
+  /** Add a word box to the buffer. */
+  public void add(OcrBox box) {
+    if (size == texts.length) {
+      grow();
+    }
+    int idx = size++;
+    ulx[idx] = box.getUlx();
+    uly[idx] = box.getUly();
+    lrx[idx] = box.getLrx();
+    lry[idx] = box.getLry();
+    texts[idx] = box.getText();
+    trailingChars[idx] = pooled(box.getTrailingChars());
+    if (box.isHyphenated()) {
+      hyphenation[idx] = box.isHyphenStart() ? HYPHEN_START : HYPHEN_END;
+      dehyphenatedForms[idx] = box.getDehyphenatedForm();
+    } else {
+      hyphenation[idx] = NOT_HYPHENATED;
+    }
+    pageIdxs[idx] = pageIndex(box.getPage());
+
+    // Spans are contiguous, so we only need to compare with the span of the previous word
+    UUID span = box.getHighlightSpan();
+    if (span == null) {
+      highlightSpans[idx] = -1;
+    } else {
+      // Parsers return the same instance for all words of a span, so this is usually a no-op
+      if (span != lastSpan && !span.equals(lastSpan)) {
+        lastSpan = span;
+        numSpans++;
+      }
+      highlightSpans[idx] = numSpans - 1;
+    }
+
+    List<String> alts = box.getAlternatives();
+    if (numAlternatives + alts.size() > alternatives.length) {
+      int newSize = Math.max(alternatives.length * 2, numAlternatives + alts.size());
+      alternatives = Arrays.copyOf(alternatives, newSize);
+    }
+    for (String alt : alts) {
+      alternatives[numAlternatives++] = alt;
+    }
+    alternativesEnds[idx] = numAlternatives;
+  }
+
+  private void grow() {
+    int newSize = texts.length * 2;
+    ulx = Arrays.copyOf(ulx, newSize);
+    uly = Arrays.copyOf(uly, newSize);
+    lrx = Arrays.copyOf(lrx, newSize);
+    lry = Arrays.copyOf(lry, newSize);
+    texts = Arrays.copyOf(texts, newSize);
+    trailingChars = Arrays.copyOf(trailingChars, newSize);
+    dehyphenatedForms = Arrays.copyOf(dehyphenatedForms, newSize);
+    hyphenation = Arrays.copyOf(hyphenation, newSize);
+    pageIdxs = Arrays.copyOf(pageIdxs, newSize);
+    highlightSpans = Arrays.copyOf(highlightSpans, newSize);
+    alternativesEnds = Arrays.copyOf(alternativesEnds, newSize);
+  }
+
+  private static String pooled(String str) {
+    if (str == null || str.length() > MAX_POOLED_LENGTH) {
+      return str;
+    }
+    int slot = str.hashCode() & (POOL_SIZE - 1);
+    String existing = TRAILING_CHARS_POOL[slot];
+    if (str.equals(existing)) {
+      return existing;
+    }
+    TRAILING_CHARS_POOL[slot] = str;
+    return str;
+  }
+
+  private int pageIndex(OcrPage page) {
+    if (page == null) {
+      return -1;
+    }
+    // Words are added in document order, so the page is usually the last one
+    for (int i = pages.size() - 1; i >= 0; i--) {
+      if (pages.get(i) == page) {
+        return i;
+      }
+    }
+    pages.add(page);
+    return pages.size() - 1;
+  }
+
+  public int size() {
+    return size;
+  }
+
+  public float getUlx(int idx) {
+    return ulx[idx];
+  }
+
+  public float getUly(int idx) {
+    return uly[idx];
+  }
+
+  public float getLrx(int idx) {
+    return lrx[idx];
+  }
+
+  public float getLry(int idx) {
+    return lry[idx];
+  }
+
+  public float getHeight(int idx) {
+    return lry[idx] - uly[idx];
+  }
+
+  public String getText(int idx) {
+    return texts[idx];
+  }
+
+  public String getTrailingChars(int idx) {
+    return trailingChars[idx];
+  }
+
+  public OcrPage getPage(int idx) {
+    return pageIdxs[idx] < 0 ? null : pages.get(pageIdxs[idx]);
+  }
+
+  /** Get all distinct pages of the words in the buffer, in order of their first occurrence. */
+  public List<OcrPage> getPages() {
+    return pages;
+  }
+
+  public boolean isInHighlight(int idx) {
+    return highlightSpans[idx] >= 0;
+  }
+
+  /** Get the identifier of the word's highlight span, or -1 if the word is not highlighted. */
+  public int getHighlightSpan(int idx) {
+    return highlightSpans[idx];
+  }
+
+  /**
+   * Create an {@link OcrBox} with the text, page, coordinates and highlight span of the word, for
+   * use in the response.
+   */
+  public OcrBox toOcrBox(int idx) {
+    UUID span = highlightSpans[idx] < 0 ? null : new UUID(0, highlightSpans[idx]);
+    return new OcrBox(texts[idx], getPage(idx), ulx[idx], uly[idx], lrx[idx], lry[idx], span);
+  }
+
+  /**
+   * Convert a range of words to a text string, see {@link
+   * com.github.dbmdz.solrocr.formats.OcrParser#boxesToString(List)}.
+   *
+   * @param from index of the first word, inclusive
+   * @param to index of the last word, exclusive
+   */
+  public String toText(int from, int to) {
+    StringBuilder sb = new StringBuilder();
+    for (int idx = from; idx < to; idx++) {
+      if (hyphenation[idx] == HYPHEN_START) {
+        boolean wordIsCompleteHyphenation = idx < to - 1 && hyphenation[idx + 1] == HYPHEN_END;
+        if (wordIsCompleteHyphenation) {
+          // Both parts of the hyphenation are present, put the dehyphenated form in the text
+          sb.append(dehyphenatedForms[idx + 1]);
+          trailingChars[idx] = trailingChars[idx + 1];
+          if (trailingChars[idx] != null) {
+            sb.append(trailingChars[idx]);
+          }
+          idx++;
+          continue;
+        }
+        // An isolated hyphen start without its corresponding ending, denote the hyphenation
+        // explicitly
+        String text = texts[idx].trim();
+        if (!text.endsWith("-")) {
+          text += "-";
+        }
+        sb.append(text);
+      } else if (alternativesEnds[idx] > (idx == 0 ? 0 : alternativesEnds[idx - 1])) {
+        // If the highlight is on an alternative, output that alternative instead of the default
+        // token
+        String alternativeWithHighlight = null;
+        for (int i = idx == 0 ? 0 : alternativesEnds[idx - 1]; i < alternativesEnds[idx]; i++) {
+          if (alternatives[i].contains(START_HL) || alternatives[i].contains(END_HL)) {
+            alternativeWithHighlight = alternatives[i];
+            break;
+          }
+        }
+        sb.append(alternativeWithHighlight != null ? alternativeWithHighlight : texts[idx]);
+      } else {
+        sb.append(texts[idx]);
+      }
+      if (trailingChars[idx] != null) {
+        sb.append(trailingChars[idx]);
+      }
+    }
+    return sb.toString().trim();
+  }
+}
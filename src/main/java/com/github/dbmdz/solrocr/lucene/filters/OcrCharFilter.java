@@ -1,27 +1,60 @@
 package com.github.dbmdz.solrocr.lucene.filters;
 
 import com.github.dbmdz.solrocr.formats.OcrParser;
+import com.github.dbmdz.solrocr.formats.OcrParserPool;
 import com.github.dbmdz.solrocr.model.OcrBox;
-import com.google.common.collect.Range;
-import com.google.common.collect.RangeMap;
-import com.google.common.collect.TreeRangeMap;
+import com.github.dbmdz.solrocr.model.OcrFormat;
+import com.github.dbmdz.solrocr.util.ArrayUtils;
+import java.io.IOException;
 import java.io.StringReader;
 import java.util.List;
 import java.util.Locale;
 import java.util.Optional;
 import org.apache.lucene.analysis.CharFilter;
 import org.apache.lucene.analysis.charfilter.BaseCharFilter;
+import org.apache.lucene.util.ArrayUtil;
 import solrocr.OcrCharFilterFactory;
 
-@SuppressWarnings("UnstableApiUsage")
 public class OcrCharFilter extends BaseCharFilter {
+  private static final char[] ALTERNATIVE_MARKER =
+      OcrCharFilterFactory.ALTERNATIVE_MARKER.toCharArray();
+
+  /**
+   * Filter created on the current thread that has not been picked up by an {@link
+   * solrocr.OcrAlternativesFilterFactory.OcrAlternativesFilter} yet.
+   */
+  private static final ThreadLocal<OcrCharFilter> pendingFilter = new ThreadLocal<>();
+
   private final OcrParser parser;
-  protected final RangeMap<Integer, TokenWithAlternatives> alternativeMap = TreeRangeMap.create();
 
-  private char[] curWord;
-  private int curWordIdx = -1;
+  /** Whether alternative offsets have to be corrected with the input filter */
+  private final boolean inputIsCharFilter;
+
+  /** Format whose {@link OcrParserPool} the parser is returned to on close, if any */
+  private OcrFormat pooledFormat;
+
+  /**
+   * Tokens with alternatives, sorted by the (corrected) start offset of the range of the input that
+   * they cover. Stored as parallel arrays so lookups don't need to box the offsets.
+   */
+  private int[] altRangeStarts = new int[0];
+
+  private int[] altRangeEnds = new int[0];
+  private int[] altDefaultFormStarts = new int[0];
+  private int[] altDefaultFormEnds = new int[0];
+  private int[] altNumForms = new int[0];
+  private int numAlternativeTokens = 0;
+
+  /** Buffer with the output for the current word, re-used for every word */
+  private char[] wordBuf = new char[64];
+
+  private int wordLen = 0;
+  private int curWordIdx = 0;
   private int outputOffset = 0;
 
+  /** Whether offsets have been corrected with the filter, i.e. whether it is being consumed */
+  private boolean consumed = false;
+
   public static OcrCharFilter nopFilter() {
     return new OcrCharFilter();
   }
@@ -29,19 +62,113 @@ public class OcrCharFilter extends BaseCharFilter {
   private OcrCharFilter() {
     super(new StringReader(""));
     this.parser = null;
+    this.inputIsCharFilter = false;
   }
 
   public OcrCharFilter(OcrParser parser) {
     super(parser.getInput());
     this.parser = parser;
+    this.inputIsCharFilter = this.input instanceof CharFilter;
+  }
+
+  /**
+   * Create a filter for a parser obtained from the {@link OcrParserPool}, which is released back to
+   * the pool when the filter is closed.
+   */
+  public OcrCharFilter(OcrParser parser, OcrFormat format) {
+    this(parser);
+    this.pooledFormat = format;
+  }
+
+  /**
+   * Hand the filter over to the next {@link
+   * solrocr.OcrAlternativesFilterFactory.OcrAlternativesFilter} that is reset on the current
+   * thread.
+   *
+   * <p>Analyzers create the char filters for a field value right before the tokenizer is reset with
+   * them on the same thread, so this saves the token filter from digging the filter out of the
+   * tokenizer.
+   */
+  public void register() {
+    pendingFilter.set(this);
+  }
+
+  /**
+   * Get the filter that was last registered on the current thread, or {@code null} if there is
+   * none or if it is already being consumed, i.e. if it was left over from an earlier field value.
+   * The registration is cleared.
+   */
+  public static OcrCharFilter takeRegistered() {
+    OcrCharFilter filter = pendingFilter.get();
+    if (filter == null) {
+      return null;
+    }
+    pendingFilter.set(null);
+    return filter.consumed ? null : filter;
+  }
+
+  /** Clear a registration on the current thread that was never picked up. */
+  public static void clearRegistered() {
+    pendingFilter.remove();
+  }
+
+  /**
+   * Check whether the filter is being consumed. Tokenizers correct the offsets of every token they
+   * emit, so a filter that was not consumed by the time a tokenizer emits a token is not the
+   * tokenizer's input.
+   */
+  public boolean isConsumed() {
+    return consumed;
+  }
+
+  @Override
+  protected int correct(int currentOff) {
+    this.consumed = true;
+    return super.correct(currentOff);
+  }
+
+  private void appendToWord(String str) {
+    int len = str.length();
+    this.wordBuf = ArrayUtil.grow(this.wordBuf, this.wordLen + len);
+    str.getChars(0, len, this.wordBuf, this.wordLen);
+    this.wordLen += len;
+  }
+
+  private void appendToWord(char[] chars) {
+    this.wordBuf = ArrayUtil.grow(this.wordBuf, this.wordLen + chars.length);
+    System.arraycopy(chars, 0, this.wordBuf, this.wordLen, chars.length);
+    this.wordLen += chars.length;
+  }
+
+  /** Append the decimal representation of a number to the word, returns the number of digits. */
+  private int appendToWord(int num) {
+    if (num < 0) {
+      String str = Integer.toString(num);
+      appendToWord(str);
+      return str.length();
+    }
+    int numDigits = 1;
+    for (int n = num / 10; n > 0; n /= 10) {
+      numDigits++;
+    }
+    this.wordBuf = ArrayUtil.grow(this.wordBuf, this.wordLen + numDigits);
+    int idx = this.wordLen + numDigits;
+    do {
+      this.wordBuf[--idx] = (char) ('0' + num % 10);
+      num /= 10;
+    } while (num > 0);
+    this.wordLen += numDigits;
+    return numDigits;
   }
 
   private void readNextWord() {
-    while (this.curWord == null && this.parser.hasNext()) {
+    while (this.curWordIdx == this.wordLen && this.parser.hasNext()) {
       OcrBox nextWord = this.parser.next();
       if (nextWord.getText() == null) {
         continue;
       }
+      this.wordLen = 0;
+      this.curWordIdx = 0;
 
       // For hyphenated words where both the hyphen start and the end word are next to each
       // other, we only index the dehyphenated content and the trailing chars of the hyphen end.
@@ -62,11 +189,10 @@ public class OcrCharFilter extends BaseCharFilter {
         int endOutputOffset = outputOffset + beginLength;
         OcrBox hyphenEnd = this.parser.next();
         int endOffset = hyphenEnd.getTextOffset();
+        appendToWord(text);
         if (hyphenEnd.getTrailingChars() != null) {
-          text += hyphenEnd.getTrailingChars();
+          appendToWord(hyphenEnd.getTrailingChars());
         }
-        this.curWord = text.toCharArray();
-        this.curWordIdx = 0;
         // Map the offsets correctly: We output the full dehyphenated form, but the offsets point to
         // the constituting parts, i.e. the beginning and end text. This only makes a difference for
         // ALTO.
@@ -77,53 +203,44 @@ public class OcrCharFilter extends BaseCharFilter {
 
       this.addOffCorrectMap(outputOffset, nextWord.getTextOffset() - outputOffset);
 
-      StringBuilder text = new StringBuilder(nextWord.getText());
+      appendToWord(nextWord.getText());
+      String trailingChars = nextWord.getTrailingChars();
+      boolean addSpace = false;
       if (!nextWord.getAlternatives().isEmpty()) {
         List<String> alts = nextWord.getAlternatives();
-        int wordIdx = text.length();
+        List<Integer> altOffsets = nextWord.getAlternativeOffsets();
         for (int i = 0; i < alts.size(); i++) {
           // Every alternative is preceded a sequence of `<marker><offset><marker>`. The markers are
           // sequences of unicode `WORD JOINER` characters that prevent tokenizers from separating
           // alternatives and their offsets from each other so they can be accessed as a single unit
           // downstream in the `OcrAlternativesFilter`.
-          text.append(OcrCharFilterFactory.ALTERNATIVE_MARKER);
-          int offset;
-          if (this.input instanceof CharFilter) {
-            offset =
-                ((CharFilter) this.input).correctOffset(nextWord.getAlternativeOffsets().get(i));
+          int altOffset = altOffsets.get(i);
+          appendToWord(ALTERNATIVE_MARKER);
+          if (this.inputIsCharFilter) {
+            appendToWord(((CharFilter) this.input).correctOffset(altOffset));
           } else {
-            offset = nextWord.getAlternativeOffsets().get(i);
+            appendToWord(altOffset);
           }
-          text.append(offset);
-          text.append(OcrCharFilterFactory.ALTERNATIVE_MARKER);
-          int markerLen =
-              OcrCharFilterFactory.ALTERNATIVE_MARKER.length() * 2
-                  + Integer.toString(offset).length();
-          wordIdx += markerLen;
-          int outOff = this.outputOffset + wordIdx;
-          this.addOffCorrectMap(outOff, nextWord.getAlternativeOffsets().get(i) - outOff);
-          text.append(alts.get(i));
-          wordIdx += alts.get(i).length();
-        }
-        alternativeMap.put(
-            Range.closedOpen(
-                this.correctOffset(outputOffset), this.correctOffset(outputOffset + wordIdx)),
-            new TokenWithAlternatives(
-                this.correctOffset(outputOffset),
-                this.correctOffset(outputOffset + text.length()),
-                1 + alts.size()));
-        if ((nextWord.isHyphenStart() == null || !nextWord.isHyphenStart())
-            && !nextWord.getTrailingChars().contains(" ")) {
-          // Add a whitespace after boxes with alternatives so the tokenizer doesn't munge
-          // together the last alternative with the following token
-          nextWord.setTrailingChars(nextWord.getTrailingChars() + " ");
+          appendToWord(ALTERNATIVE_MARKER);
+          int outOff = this.outputOffset + this.wordLen;
+          this.addOffCorrectMap(outOff, altOffset - outOff);
+          appendToWord(alts.get(i));
         }
+        int start = this.correctOffset(outputOffset);
+        int end = this.correctOffset(outputOffset + this.wordLen);
+        addTokenWithAlternatives(start, end, start, end, 1 + alts.size());
+        // Add a whitespace after boxes with alternatives so the tokenizer doesn't munge
+        // together the last alternative with the following token
+        addSpace =
+            (nextWord.isHyphenStart() == null || !nextWord.isHyphenStart())
+                && (trailingChars == null || !trailingChars.contains(" "));
       }
-      if (nextWord.getTrailingChars() != null) {
-        text.append(nextWord.getTrailingChars());
+      if (trailingChars != null) {
+        appendToWord(trailingChars);
+      }
+      if (addSpace) {
+        appendToWord(" ");
       }
-      this.curWord = text.toString().toCharArray();
-      this.curWordIdx = 0;
     }
   }
 
@@ -133,26 +250,106 @@ public class OcrCharFilter extends BaseCharFilter {
       return -1;
     }
 
-    if (this.curWord == null) {
+    if (this.curWordIdx == this.wordLen) {
       this.readNextWord();
     }
 
     int numRead = 0;
-    while (numRead < len && (this.curWord != null)) {
-      int lenToRead = Math.min(len - numRead, this.curWord.length - this.curWordIdx);
-      System.arraycopy(this.curWord, this.curWordIdx, cbuf, off + numRead, lenToRead);
+    while (numRead < len && this.curWordIdx < this.wordLen) {
+      int lenToRead = Math.min(len - numRead, this.wordLen - this.curWordIdx);
+      System.arraycopy(this.wordBuf, this.curWordIdx, cbuf, off + numRead, lenToRead);
       curWordIdx += lenToRead;
       outputOffset += lenToRead;
       numRead += lenToRead;
-      if (curWordIdx == curWord.length) {
-        this.curWord = null;
-      }
     }
     return numRead;
   }
 
+  @Override
+  public void close() throws IOException {
+    super.close();
+    if (pendingFilter.get() == this) {
+      // Never picked up, don't keep the filter alive until the next one is registered
+      pendingFilter.set(null);
+    }
+    if (this.pooledFormat != null) {
+      OcrParserPool.release(this.pooledFormat, this.parser);
+      this.pooledFormat = null;
+    }
+  }
+
+  /**
+   * Register a token with alternatives that covers the input range {@code [rangeStart:rangeEnd[}.
+   * Tokens are usually added in the order of their offsets, the ranges of the tokens must not
+   * overlap.
+   */
+  protected void addTokenWithAlternatives(
+      int rangeStart, int rangeEnd, int defaultFormStart, int defaultFormEnd, int numForms) {
+    if (rangeEnd <= rangeStart) {
+      return;
+    }
+    int newSize = this.numAlternativeTokens + 1;
+    this.altRangeStarts = ArrayUtil.grow(this.altRangeStarts, newSize);
+    this.altRangeEnds = ArrayUtil.grow(this.altRangeEnds, newSize);
+    this.altDefaultFormStarts = ArrayUtil.grow(this.altDefaultFormStarts, newSize);
+    this.altDefaultFormEnds = ArrayUtil.grow(this.altDefaultFormEnds, newSize);
+    this.altNumForms = ArrayUtil.grow(this.altNumForms, newSize);
+    int idx = this.numAlternativeTokens;
+    if (idx > 0 && this.altRangeStarts[idx - 1] > rangeStart) {
+      idx =
+          ArrayUtils.binaryFloorIdxSearch(
+                  this.altRangeStarts, this.numAlternativeTokens, rangeStart)
+              + 1;
+      int numToMove = this.numAlternativeTokens - idx;
+      System.arraycopy(this.altRangeStarts, idx, this.altRangeStarts, idx + 1, numToMove);
+      System.arraycopy(this.altRangeEnds, idx, this.altRangeEnds, idx + 1, numToMove);
+      System.arraycopy(
+          this.altDefaultFormStarts, idx, this.altDefaultFormStarts, idx + 1, numToMove);
+      System.arraycopy(this.altDefaultFormEnds, idx, this.altDefaultFormEnds, idx + 1, numToMove);
+      System.arraycopy(this.altNumForms, idx, this.altNumForms, idx + 1, numToMove);
+    }
+    this.altRangeStarts[idx] = rangeStart;
+    this.altRangeEnds[idx] = rangeEnd;
+    this.altDefaultFormStarts[idx] = defaultFormStart;
+    this.altDefaultFormEnds[idx] = defaultFormEnd;
+    this.altNumForms[idx] = numForms;
+    this.numAlternativeTokens = newSize;
+  }
+
+  /**
+   * Find the token with alternatives that covers the given input offset.
+   *
+   * @return an index for {@link #getDefaultFormStart(int)} and {@link #getDefaultFormEnd(int)} or
+   *     -1 if the offset is not covered by a token with alternatives.
+   */
+  public int findTokenWithAlternatives(int inputOffset) {
+    int idx =
+        ArrayUtils.binaryFloorIdxSearch(
+            this.altRangeStarts, this.numAlternativeTokens, inputOffset);
+    if (idx < 0 || inputOffset >= this.altRangeEnds[idx]) {
+      return -1;
+    }
+    return idx;
+  }
+
+  /** Start offset of the default form of a token found with {@link #findTokenWithAlternatives}. */
+  public int getDefaultFormStart(int tokenIdx) {
+    return this.altDefaultFormStarts[tokenIdx];
+  }
+
+  /** End offset of the default form of a token found with {@link #findTokenWithAlternatives}. */
+  public int getDefaultFormEnd(int tokenIdx) {
+    return this.altDefaultFormEnds[tokenIdx];
+  }
+
   public Optional<TokenWithAlternatives> getTokenWithAlternatives(int inputOffset) {
-    return Optional.ofNullable(this.alternativeMap.get(inputOffset));
+    int idx = findTokenWithAlternatives(inputOffset);
+    if (idx < 0) {
+      return Optional.empty();
+    }
+    return Optional.of(
+        new TokenWithAlternatives(
+            this.altDefaultFormStarts[idx], this.altDefaultFormEnds[idx], this.altNumForms[idx]));
   }
 
   public static class TokenWithAlternatives {
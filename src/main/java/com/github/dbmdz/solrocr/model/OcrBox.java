@@ -1,6 +1,7 @@
 package com.github.dbmdz.solrocr.model;
 
 import java.util.ArrayList;
+import java.util.Collections;
 import java.util.Comparator;
 import java.util.List;
 import java.util.Objects;
@@ -10,15 +11,16 @@ import org.apache.solr.common.util.SimpleOrderedMap;
 
 @SuppressWarnings({"rawtypes", "unchecked"})
 public class OcrBox implements Comparable<OcrBox> {
-  private final Comparator<OcrBox> comparator =
+  private static final Comparator<OcrBox> comparator =
       Comparator.comparing(OcrBox::getPage)
           .thenComparingDouble(OcrBox::getUly)
           .thenComparingDouble(OcrBox::getUlx);
 
   private String text;
   private int textOffset = -1;
-  private final List<String> alternatives = new ArrayList<>();
-  private final List<Integer> alternativeOffsets = new ArrayList<>();
+  // Most boxes don't have alternatives, so the lists are only created when needed
+  private List<String> alternatives;
+  private List<Integer> alternativeOffsets;
   private String trailingChars = "";
   private OcrPage page;
   private float ulx = -1;
@@ -90,11 +92,11 @@ public class OcrBox implements Comparable<OcrBox> {
     if (textOffset >= 0) {
       sb.append('@').append(textOffset);
     }
-    if (!this.alternatives.isEmpty()) {
+    if (this.alternatives != null) {
       sb.append(", alternatives={");
       for (int i = 0; i < alternatives.size(); i++) {
         sb.append('\'').append(alternatives.get(i)).append('\'');
-        if (!this.alternativeOffsets.isEmpty()) {
+        if (this.alternativeOffsets != null) {
           sb.append('@').append(this.alternativeOffsets.get(i));
         }
         if (i != alternatives.size() - 1) {
@@ -157,11 +159,11 @@ public class OcrBox implements Comparable<OcrBox> {
   }
 
   public List<String> getAlternatives() {
-    return alternatives;
+    return alternatives == null ? Collections.emptyList() : alternatives;
   }
 
   public List<Integer> getAlternativeOffsets() {
-    return alternativeOffsets;
+    return alternativeOffsets == null ? Collections.emptyList() : alternativeOffsets;
   }
 
   public String getTrailingChars() {
@@ -225,8 +227,14 @@ public class OcrBox implements Comparable<OcrBox> {
   }
 
   public void addAlternative(String alternative, Integer offset) {
+    if (this.alternatives == null) {
+      this.alternatives = new ArrayList<>();
+    }
     this.alternatives.add(alternative);
     if (offset != null) {
+      if (this.alternativeOffsets == null) {
+        this.alternativeOffsets = new ArrayList<>();
+      }
       this.alternativeOffsets.add(offset);
     }
   }
@@ -307,8 +315,8 @@ public class OcrBox implements Comparable<OcrBox> {
         && Float.compare(ocrBox.lrx, lrx) == 0
         && Float.compare(ocrBox.lry, lry) == 0
         && Objects.equals(text, ocrBox.text)
-        && Objects.equals(alternatives, ocrBox.alternatives)
-        && Objects.equals(alternativeOffsets, ocrBox.alternativeOffsets)
+        && Objects.equals(getAlternatives(), ocrBox.getAlternatives())
+        && Objects.equals(getAlternativeOffsets(), ocrBox.getAlternativeOffsets())
         && Objects.equals(trailingChars, ocrBox.trailingChars)
         && Objects.equals(page, ocrBox.page)
         && Objects.equals(highlightSpan, ocrBox.highlightSpan)
@@ -324,8 +332,8 @@ public class OcrBox implements Comparable<OcrBox> {
     return Objects.hash(
         text,
         textOffset,
-        alternatives,
-        alternativeOffsets,
+        getAlternatives(),
+        getAlternativeOffsets(),
         trailingChars,
         page,
         ulx,
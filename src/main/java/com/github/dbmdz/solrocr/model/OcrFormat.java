@@ -2,6 +2,7 @@ package com.github.dbmdz.solrocr.model;
 
 import com.github.dbmdz.solrocr.breaklocator.BreakLocator;
 import com.github.dbmdz.solrocr.formats.OcrParser;
+import com.github.dbmdz.solrocr.formats.OcrParserPool;
 import com.github.dbmdz.solrocr.lucene.OcrPassageFormatter;
 import com.github.dbmdz.solrocr.lucene.filters.OcrCharFilter;
 import com.github.dbmdz.solrocr.reader.PeekingReader;
@@ -87,7 +88,9 @@ public interface OcrFormat {
     if (expandAlternatives) {
       features.add(OcrParser.ParsingFeature.ALTERNATIVES);
     }
-    return new OcrCharFilter(getParser(input, features.toArray(new OcrParser.ParsingFeature[] {})));
+    return new OcrCharFilter(
+        OcrParserPool.acquire(this, input, features.toArray(new OcrParser.ParsingFeature[] {})),
+        this);
   }
 
   /**
@@ -1,16 +1,26 @@
 package com.github.dbmdz.solrocr.model;
 
+import com.github.dbmdz.solrocr.reader.BgzfIndex;
+import com.github.dbmdz.solrocr.reader.BgzfSourceReader;
+import com.github.dbmdz.solrocr.reader.FileChannelPool;
 import com.github.dbmdz.solrocr.reader.FileSourceReader;
 import com.github.dbmdz.solrocr.reader.MultiFileSourceReader;
+import com.github.dbmdz.solrocr.reader.SectionCache;
+import com.github.dbmdz.solrocr.reader.SourceBackend;
+import com.github.dbmdz.solrocr.reader.SourceBackends;
 import com.github.dbmdz.solrocr.reader.SourceReader;
+import com.google.common.collect.ImmutableList;
 import java.io.FileNotFoundException;
 import java.io.IOException;
 import java.lang.invoke.MethodHandles;
 import java.nio.file.Files;
+import java.nio.file.NoSuchFileException;
 import java.nio.file.Path;
 import java.nio.file.Paths;
+import java.nio.file.attribute.BasicFileAttributes;
 import java.util.ArrayList;
 import java.util.Arrays;
+import java.util.Collections;
 import java.util.Comparator;
 import java.util.List;
 import java.util.Locale;
@@ -25,51 +35,99 @@ public class SourcePointer {
 
   public enum SourceType {
     FILESYSTEM,
+    /** Block-compressed file on the local filesystem, see {@link BgzfIndex} */
+    BGZF,
+    /** Target in a configured {@link SourceBackend}, e.g. a file served over HTTP */
+    REMOTE,
   };
 
   public static class Source {
 
     public final SourceType type;
     public final String target;
-    public List<Region> regions;
-    public boolean isAscii;
+    /**
+     * Size of the (uncompressed) target in bytes at the time the source was created, {@code -1} for
+     * {@link SourceType#REMOTE} sources, whose size is only determined by their reader
+     */
+    public final long size;
+
+    /** Block index of the target for {@link SourceType#BGZF} sources, otherwise {@code null} */
+    public final BgzfIndex blockIndex;
+
+    /** Backend of the target for {@link SourceType#REMOTE} sources, otherwise {@code null} */
+    public final SourceBackend backend;
+
+    /** Regions of the target to read, sorted by their start offset, never modified */
+    public final List<Region> regions;
+
+    public final boolean isAscii;
 
     public Source(String target, List<Region> regions, boolean isAscii) throws IOException {
-      this.type = determineType(target);
-      Source.validateTarget(target, this.type);
+      this(target, regions, isAscii, SourceBackends.NONE);
+    }
+
+    /**
+     * Create a source, targets that are handled by one of the backends are neither validated nor
+     * accessed, local files are validated.
+     */
+    public Source(String target, List<Region> regions, boolean isAscii, SourceBackends backends)
+        throws IOException {
+      this.backend = backends.forTarget(target);
+      this.type = backend != null ? SourceType.REMOTE : determineType(target);
+      long targetSize = backend != null ? -1 : Source.validateTarget(target, type);
+      if (this.type == SourceType.BGZF) {
+        this.blockIndex = BgzfIndex.load(Paths.get(target));
+        targetSize = blockIndex.getLength();
+        if (targetSize == 0) {
+          throw new IOException(String.format(Locale.US, "File at %s is empty.", target));
+        }
+      } else {
+        this.blockIndex = null;
+      }
+      this.size = targetSize;
       this.target = target;
-      this.regions = regions;
+      this.regions = ImmutableList.copyOf(regions);
       this.isAscii = isAscii;
     }
 
     static SourceType determineType(String target) throws IOException {
-      if (target.startsWith("/")) {
-        return SourceType.FILESYSTEM;
-      } else if (Files.exists(Paths.get(target))) {
-        return SourceType.FILESYSTEM;
+      if (URL_PAT.matcher(target).find()) {
+        throw new IOException(
+            String.format(
+                Locale.US,
+                "Target %s is not a local file and no configured source backend allows it.",
+                target));
+      } else if (target.startsWith("/") || Files.exists(Paths.get(target))) {
+        return BgzfIndex.isBgzfTarget(target) ? SourceType.BGZF : SourceType.FILESYSTEM;
       } else {
         throw new IOException(
             String.format(Locale.US, "Target %s is currently not supported.", target));
       }
     }
 
-    static void validateTarget(String target, SourceType type) throws IOException {
-      if (type == SourceType.FILESYSTEM) {
+    /** Check that the target exists and is not empty, returns its size in bytes. */
+    static long validateTarget(String target, SourceType type) throws IOException {
+      if (type == SourceType.FILESYSTEM || type == SourceType.BGZF) {
         Path path = Paths.get(target);
-        if (!Files.exists(path)) {
+        long size;
+        try {
+          // A single stat call for both the existence and the size check
+          size = Files.readAttributes(path, BasicFileAttributes.class).size();
+        } catch (NoSuchFileException e) {
           throw new FileNotFoundException(
               String.format(Locale.US, "File at %s does not exist.", target));
         }
-        if (Files.size(path) == 0) {
+        if (size == 0) {
           throw new IOException(String.format(Locale.US, "File at %s is empty.", target));
         }
+        return size;
       } else {
         throw new IOException(
             String.format(Locale.US, "Target %s is currently not supported.", target));
       }
     }
 
-    static Source parse(String pointer) {
+    static Source parse(String pointer, SourceBackends backends) {
       Matcher m = POINTER_PAT.matcher(pointer);
       if (!m.find()) {
         throw new RuntimeException("Could not parse source pointer from '" + pointer + ".");
@@ -84,11 +142,12 @@ public class SourcePointer {
                 .collect(Collectors.toList());
       }
       try {
-        return new Source(target, regions, m.group("isAscii") != null);
+        return new Source(target, regions, m.group("isAscii") != null, backends);
       } catch (FileNotFoundException e) {
         throw new RuntimeException("Could not locate file at '" + target + ".");
       } catch (IOException e) {
-        throw new RuntimeException("Could not read target at '" + target + ".");
+        throw new RuntimeException(
+            "Could not read target at '" + target + "': " + e.getMessage(), e);
       }
     }
 
@@ -96,6 +155,17 @@ public class SourcePointer {
       if (this.type == SourceType.FILESYSTEM) {
         return new FileSourceReader(
             Paths.get(this.target), SourcePointer.parse(this.target), sectionSize, maxCacheEntries);
+      } else if (this.type == SourceType.BGZF) {
+        // Avoid parsing the target again, since that would load the block index again
+        return new BgzfSourceReader(
+            Paths.get(this.target),
+            this.blockIndex,
+            new SourcePointer(Collections.singletonList(this)),
+            sectionSize,
+            maxCacheEntries);
+      } else if (this.type == SourceType.REMOTE) {
+        return this.backend.getReader(
+            new SourcePointer(Collections.singletonList(this)), sectionSize, maxCacheEntries, null);
       } else {
         throw new UnsupportedOperationException("Unsupported source type '" + this.type + "'.");
       }
@@ -122,8 +192,10 @@ public class SourcePointer {
 
   public static class Region {
 
-    public int start;
-    public int end;
+    public final int start;
+
+    /** End offset of the region (exclusive), {@code -1} if it extends to the end of the target */
+    public final int end;
 
     public static Region parse(String r) {
       if (r.startsWith(":")) {
@@ -147,11 +219,31 @@ public class SourcePointer {
     }
   }
 
+  /** Targets that look like URLs, these are never treated as local paths */
+  private static final Pattern URL_PAT = Pattern.compile("^[a-zA-Z][a-zA-Z0-9+.-]*://");
+
   static final Pattern POINTER_PAT =
       Pattern.compile("^(?<target>.+?)(?<isAscii>\\{ascii})?(?:\\[(?<regions>[0-9:,]+)])?$");
 
   public final List<Source> sources;
 
+  /**
+   * Offsets of the sources in the concatenated data, based on their sizes at creation time, {@code
+   * null} if the size of a source is unknown
+   */
+  private final int[] startOffsets;
+
+  private final long length;
+
+  /** Whether the data pointed at was found to have changed since the pointer was parsed */
+  private volatile boolean stale;
+
+  /**
+   * OCR format of the data pointed at, once it has been determined. Pointers are cached across
+   * requests, so this saves sniffing the beginning of the data for every request.
+   */
+  private volatile OcrFormat format;
+
   public static boolean isPointer(String pointer) {
     if (pointer.startsWith("<")) {
       return false;
@@ -160,13 +252,25 @@ public class SourcePointer {
         .allMatch(pointerToken -> POINTER_PAT.matcher(pointerToken).matches());
   }
 
+  /** Parse a pointer to files on the local filesystem. */
   public static SourcePointer parse(String pointer) {
+    return parse(pointer, SourceBackends.NONE);
+  }
+
+  /**
+   * Parse a pointer whose targets can be local files or targets in one of the backends. Only local
+   * files are accessed to validate them, targets in the backends are validated when a reader for
+   * them is created.
+   */
+  public static SourcePointer parse(String pointer, SourceBackends backends) {
     if (!isPointer(pointer)) {
       throw new RuntimeException("Could not parse pointer: " + pointer);
     }
     String[] sourceTokens = pointer.split("\\+");
     List<Source> sources =
-        Arrays.stream(sourceTokens).map(Source::parse).collect(Collectors.toList());
+        Arrays.stream(sourceTokens)
+            .map(token -> Source.parse(token, backends))
+            .collect(Collectors.toList());
     if (sources.isEmpty()) {
       return null;
     } else {
@@ -176,6 +280,57 @@ public class SourcePointer {
 
   public SourcePointer(List<Source> sources) {
     this.sources = sources;
+    if (sources.stream().anyMatch(s -> s.size < 0)) {
+      this.startOffsets = null;
+      this.length = -1;
+      return;
+    }
+    this.startOffsets = new int[sources.size()];
+    long offset = 0;
+    for (int i = 0; i < sources.size(); i++) {
+      startOffsets[i] = (int) offset;
+      offset += sources.get(i).size;
+    }
+    this.length = offset;
+  }
+
+  /**
+   * Get the offsets of the sources in the data pointed at, i.e. the cumulative sizes of all
+   * preceding sources, {@code null} if the size of a source is only known to its reader.
+   */
+  public int[] getStartOffsets() {
+    return startOffsets == null ? null : startOffsets.clone();
+  }
+
+  /**
+   * Get the total size of the data pointed at in bytes, {@code -1} if the size of a source is only
+   * known to its reader.
+   */
+  public long getLength() {
+    return length;
+  }
+
+  /** Get the OCR format of the data pointed at, {@code null} if it has not been determined yet. */
+  public OcrFormat getFormat() {
+    return format;
+  }
+
+  /** Remember the OCR format of the data pointed at. */
+  public void setFormat(OcrFormat format) {
+    this.format = format;
+  }
+
+  /**
+   * Mark the pointer as stale, i.e. the sizes of its sources no longer match the data pointed at.
+   * Stale pointers are evicted from the {@link SourcePointerCache}.
+   */
+  public void markStale() {
+    this.stale = true;
+  }
+
+  /** Check whether the pointer was found to be out of date with the data pointed at. */
+  public boolean isStale() {
+    return stale;
   }
 
   @Override
@@ -185,16 +340,55 @@ public class SourcePointer {
 
   /** Create a reader for the data pointed at by this source pointer. */
   public SourceReader getReader(int sectionSize, int maxCacheEntries) throws IOException {
-    if (this.sources.stream().allMatch(s -> s.type == SourceType.FILESYSTEM)) {
-      if (this.sources.size() == 1) {
+    return getReader(sectionSize, maxCacheEntries, null);
+  }
+
+  /**
+   * Create a reader for the data pointed at by this source pointer that uses a shared section
+   * cache in addition to its own cache.
+   */
+  public SourceReader getReader(int sectionSize, int maxCacheEntries, SectionCache sharedCache)
+      throws IOException {
+    return getReader(sectionSize, maxCacheEntries, sharedCache, null);
+  }
+
+  /**
+   * Create a reader for the data pointed at by this source pointer that uses a shared section
+   * cache in addition to its own cache and acquires its file channels from a shared pool.
+   */
+  public SourceReader getReader(
+      int sectionSize, int maxCacheEntries, SectionCache sharedCache, FileChannelPool channelPool)
+      throws IOException {
+    SourceBackend backend = this.sources.get(0).backend;
+    if (backend != null && this.sources.stream().allMatch(s -> s.backend == backend)) {
+      return backend.getReader(this, sectionSize, maxCacheEntries, sharedCache);
+    } else if (this.sources.stream()
+        .allMatch(s -> s.type == SourceType.FILESYSTEM || s.type == SourceType.BGZF)) {
+      if (this.sources.size() == 1 && this.sources.get(0).type == SourceType.BGZF) {
+        return new BgzfSourceReader(
+            Paths.get(this.sources.get(0).target),
+            this.sources.get(0).blockIndex,
+            this,
+            sectionSize,
+            maxCacheEntries,
+            sharedCache,
+            channelPool);
+      } else if (this.sources.size() == 1) {
         return new FileSourceReader(
-            Paths.get(this.sources.get(0).target), this, sectionSize, maxCacheEntries);
+            Paths.get(this.sources.get(0).target),
+            this,
+            sectionSize,
+            maxCacheEntries,
+            sharedCache,
+            channelPool);
       } else {
         return new MultiFileSourceReader(
             this.sources.stream().map(s -> Paths.get(s.target)).collect(Collectors.toList()),
             this,
             sectionSize,
-            maxCacheEntries);
+            maxCacheEntries,
+            sharedCache,
+            channelPool);
       }
     } else {
       throw new IOException(
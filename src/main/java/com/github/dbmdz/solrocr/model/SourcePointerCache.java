@@ -0,0 +1,100 @@
+package com.github.dbmdz.solrocr.model;
+
+import com.google.common.cache.Cache;
+import com.google.common.cache.CacheBuilder;
+import com.google.common.cache.CacheStats;
+import java.util.concurrent.TimeUnit;
+
+/**
+ * Cache for parsed and validated {@link SourcePointer}s that is shared across requests.
+ *
+ * <p>Parsing a pointer runs a regular expression on every source in it and checks the existence
+ * and size of every file, which can add up to thousands of filesystem calls per query for large
+ * multi-file pointers on network filesystems. This cache maps the stored field value to the parsed
+ * pointer, so this only has to happen once per value.
+ *
+ * <p>Since the file sizes recorded in the pointers can become stale, entries expire after a
+ * configurable time and the cache should be cleared whenever a new searcher is opened. Pointers
+ * that a reader found to be out of date with their files are {@link SourcePointer#markStale()
+ * marked as stale} and evicted on the next lookup. Cached pointers are shared between requests
+ * and are immutable apart from these flags.
+ */
+public class SourcePointerCache {
+  /** Values longer than this are never cached, they are most likely not pointers */
+  private static final int MAX_VALUE_LENGTH = 64 * 1024;
+
+  private final Cache<String, SourcePointer> cache;
+
+  /**
+   * @param maxEntries maximum number of pointers in the cache
+   * @param ttlSeconds number of seconds after which a pointer has to be parsed and validated again,
+   *     entries don't expire if this is {@code <= 0}
+   */
+  public SourcePointerCache(long maxEntries, long ttlSeconds) {
+    if (maxEntries <= 0) {
+      throw new IllegalArgumentException("maxEntries must be > 0");
+    }
+    CacheBuilder<Object, Object> builder =
+        CacheBuilder.newBuilder().maximumSize(maxEntries).recordStats();
+    if (ttlSeconds > 0) {
+      builder.expireAfterWrite(ttlSeconds, TimeUnit.SECONDS);
+    }
+    this.cache = builder.build();
+  }
+
+  private static boolean isCacheable(String value) {
+    // Inline OCR documents are never pointers, check them as cheaply as possible
+    return !value.startsWith("<") && value.length() <= MAX_VALUE_LENGTH;
+  }
+
+  /**
+   * Get the cached pointer for the stored field value, or {@code null} if it's not in the cache.
+   */
+  public SourcePointer get(String value) {
+    if (!isCacheable(value)) {
+      return null;
+    }
+    SourcePointer pointer = cache.getIfPresent(value);
+    if (pointer != null && pointer.isStale()) {
+      // A reader found the sizes in the pointer to be out of date, parse and validate it again
+      cache.invalidate(value);
+      return null;
+    }
+    return pointer;
+  }
+
+  /** Add the parsed pointer for the stored field value to the cache. */
+  public void put(String value, SourcePointer pointer) {
+    if (pointer == null || !isCacheable(value)) {
+      return;
+    }
+    cache.put(value, pointer);
+  }
+
+  /** Remove all pointers from the cache. */
+  public void clear() {
+    cache.invalidateAll();
+  }
+
+  public long getHitCount() {
+    return cache.stats().hitCount();
+  }
+
+  public long getMissCount() {
+    return cache.stats().missCount();
+  }
+
+  public long getEvictionCount() {
+    return cache.stats().evictionCount();
+  }
+
+  public double getHitRatio() {
+    CacheStats stats = cache.stats();
+    return stats.requestCount() == 0 ? 0 : stats.hitRate();
+  }
+
+  /** Get the number of pointers currently in the cache */
+  public long getNumEntries() {
+    return cache.size();
+  }
+}
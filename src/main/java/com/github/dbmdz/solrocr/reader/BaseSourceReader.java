@@ -1,9 +1,19 @@
 package com.github.dbmdz.solrocr.reader;
 
 import com.github.dbmdz.solrocr.model.SourcePointer;
+import java.io.EOFException;
 import java.io.IOException;
+import java.io.InterruptedIOException;
+import java.io.UncheckedIOException;
 import java.nio.charset.StandardCharsets;
+import java.util.ArrayList;
 import java.util.Arrays;
+import java.util.List;
+import java.util.Locale;
+import java.util.concurrent.CompletableFuture;
+import java.util.concurrent.CompletionException;
+import java.util.concurrent.Executor;
+import java.util.concurrent.Semaphore;
 
 /**
  * Base class that provides caching and section reading for source readers.
@@ -12,47 +22,39 @@ import java.util.Arrays;
  * BaseSourceReader#readBytes(byte[], int, int, int)} method.
  */
 public abstract class BaseSourceReader implements SourceReader {
-  private static final int UNUSED = -1;
-
   protected final SourcePointer pointer;
   protected final int sectionSize;
-  private final byte[] copyBuf;
-  private final int maxCacheEntries;
 
-  /**
-   * Array with a slot for every possible section in the source, of which only {@link
-   * BaseSourceReader#maxCacheEntries} slots will ever be non-null
-   */
-  CachedSection[] cache;
+  /** Cache shared across readers and requests, consulted on misses in our own cache, can be null */
+  private final SectionCache sharedCache;
 
-  /**
-   * Array of length {@link BaseSourceReader#maxCacheEntries} with the indexes of the sections that
-   * are currently cached
-   */
-  int[] cachedSectionIdxes;
+  /** Identity of the source for lookups in the shared cache, determined lazily */
+  private Object sourceIdentity;
 
-  int cacheSlotsUsed = 0;
+  /** Permits for reads from the storage, shared with other readers, null if reads are unbounded */
+  private Semaphore readPermits;
+
+  /** Sections that were recently read by this reader */
+  final SectionLruCache cache;
+
+  /** Maximum number of adjacent sections that are coalesced into a single read when prefetching */
+  private static final int MAX_SECTIONS_PER_READ = 16;
 
   private enum AdjustDirection {
     LEFT,
     RIGHT
   }
 
-  static final class CachedSection {
-    public final Section section;
-    public long lastUsedTimestampNs;
-
-    private CachedSection(Section section) {
-      this.section = section;
-      this.lastUsedTimestampNs = System.nanoTime();
-    }
+  public BaseSourceReader(SourcePointer pointer, int sectionSize, int maxCacheEntries) {
+    this(pointer, sectionSize, maxCacheEntries, null);
   }
 
-  public BaseSourceReader(SourcePointer pointer, int sectionSize, int maxCacheEntries) {
+  public BaseSourceReader(
+      SourcePointer pointer, int sectionSize, int maxCacheEntries, SectionCache sharedCache) {
     this.pointer = pointer;
     this.sectionSize = sectionSize;
-    this.copyBuf = new byte[sectionSize];
-    this.maxCacheEntries = maxCacheEntries;
+    this.sharedCache = sharedCache;
+    this.cache = new SectionLruCache(maxCacheEntries);
   }
 
   @Override
@@ -64,53 +66,42 @@ public abstract class BaseSourceReader implements SourceReader {
   @Override
   public abstract String getIdentifier();
 
+  /**
+   * Limit the number of concurrent reads from the storage: every read acquires one of the permits
+   * for its duration. Reads that are served from the caches don't need a permit.
+   */
+  public void setReadPermits(Semaphore readPermits) {
+    this.readPermits = readPermits;
+  }
+
   @Override
   public SourcePointer getPointer() {
     return pointer;
   }
 
   /**
-   * Initialize data structures for section cache.
+   * Get an identity for the source that changes when the underlying data changes, used as the key
+   * for the shared section cache.
    *
-   * <p>Gotta do this outside of the constructor because we need to know the length, which is only
-   * available after the constructor has run
-   *
-   * @throws IOException
+   * <p>Implementations that can't provide such an identity should return {@code null}, which
+   * disables the shared cache for the reader.
    */
-  private void initializeCache() throws IOException {
-    // We trade off some memory for a simpler implementation by using a fixed-size cache
-    // with `null` entries for unused slots plus a timestamp array to track LRU
-    // The memory impact is not too bad, even for small section sizes like 1KiB, the
-    // cache will only occupy around 40KiB for a 10MiB file
-    int numSections = (int) Math.ceil((double) this.length() / sectionSize);
-    this.cache = new CachedSection[numSections];
-    this.cachedSectionIdxes = new int[maxCacheEntries];
-    Arrays.fill(cachedSectionIdxes, UNUSED);
-  }
-
-  /** If the cache is full, remove the least recently used section */
-  private void purgeLeastRecentlyUsed() {
-    if (this.cache.length == 0 || cacheSlotsUsed < maxCacheEntries) {
-      return;
-    }
+  protected Object getSourceIdentity() throws IOException {
+    return null;
+  }
 
-    long oldestTimestamp = Long.MAX_VALUE;
-    int oldestIndex = -1;
-    int idxOfOldestIndex = -1;
-    for (int i = 0; i < cachedSectionIdxes.length; i++) {
-      int sectionIdx = cachedSectionIdxes[i];
-      if (sectionIdx < 0) {
-        continue;
-      }
-      if (cache[sectionIdx].lastUsedTimestampNs < oldestTimestamp) {
-        oldestTimestamp = cache[sectionIdx].lastUsedTimestampNs;
-        oldestIndex = sectionIdx;
-        idxOfOldestIndex = i;
-      }
+  /** Look up a section in the shared cache, if available */
+  private ByteSection getSharedSection(int sectionIndex) throws IOException {
+    if (sharedCache == null) {
+      return null;
+    }
+    if (sourceIdentity == null) {
+      sourceIdentity = getSourceIdentity();
     }
-    cache[oldestIndex] = null;
-    cachedSectionIdxes[idxOfOldestIndex] = UNUSED;
-    cacheSlotsUsed--;
+    if (sourceIdentity == null) {
+      return null;
+    }
+    return sharedCache.get(sourceIdentity, sectionSize, sectionIndex);
   }
 
   @Override
@@ -121,16 +112,18 @@ public abstract class BaseSourceReader implements SourceReader {
     if (start + len > this.length()) {
       len = this.length() - start;
     }
-    StringBuilder sb = new StringBuilder(len);
+    byte[] data = new byte[len];
     int numRead = 0;
     while (numRead < len) {
-      Section section = getAsciiSection(start + numRead);
-      int sectionStart = (start + numRead) - section.start;
-      int sectionEnd = Math.min(sectionStart + (len - numRead), section.end - section.start);
-      sb.append(section.text, sectionStart, sectionEnd);
-      numRead += (sectionEnd - sectionStart);
+      ByteSection section = getByteSection(start + numRead);
+      int toCopy = Math.min(len - numRead, section.end - (start + numRead));
+      section.copyTo(start + numRead, data, numRead, toCopy);
+      numRead += toCopy;
     }
-    return sb.toString();
+    // Construct a String without going through a decoder to save on CPU.
+    // Given that the method has been deprecated since Java 1.1 and was never removed, I don't
+    // think this is very risky 😅
+    return new String(data, 0, 0, len);
   }
 
   @Override
@@ -143,15 +136,52 @@ public abstract class BaseSourceReader implements SourceReader {
       byteLen = this.length() - start;
     }
     byte[] data = new byte[byteLen];
-    int numRead = 0;
-    while (numRead < byteLen) {
-      numRead += this.readBytes(data, numRead, start + numRead, byteLen - numRead);
-    }
+    this.readFully(data, start);
     int dataStart = adjustOffset(0, data, AdjustDirection.RIGHT);
     int dataEnd = adjustOffset(data.length - 1, data, AdjustDirection.LEFT);
     return new String(data, dataStart, dataEnd - dataStart + 1, StandardCharsets.UTF_8);
   }
 
+  /**
+   * Fill the buffer with the data starting at the given offset, failing if the source ends before
+   * the buffer is full.
+   */
+  private void readFully(byte[] data, int start) throws IOException {
+    Semaphore permits = this.readPermits;
+    if (permits != null) {
+      try {
+        permits.acquire();
+      } catch (InterruptedException e) {
+        Thread.currentThread().interrupt();
+        throw new InterruptedIOException(
+            "Interrupted while waiting to read from " + this.getIdentifier());
+      }
+    }
+    try {
+      readFullyUnbounded(data, start);
+    } finally {
+      if (permits != null) {
+        permits.release();
+      }
+    }
+  }
+
+  private void readFullyUnbounded(byte[] data, int start) throws IOException {
+    int numRead = 0;
+    while (numRead < data.length) {
+      int n = this.readBytes(data, numRead, start + numRead, data.length - numRead);
+      if (n < 0) {
+        throw new EOFException(
+            String.format(
+                Locale.US,
+                "Unexpected end of %s at offset %d, was it modified while it was read?",
+                this.getIdentifier(),
+                start + numRead));
+      }
+      numRead += n;
+    }
+  }
+
   /**
    * Move offset if we're on a partital UTF8 multi-byte sequence so that we start at a valid UTF8
    * sequence
@@ -200,7 +230,14 @@ public abstract class BaseSourceReader implements SourceReader {
     return offset;
   }
 
+  @Override
   public Section getAsciiSection(int offset) throws IOException {
+    ByteSection section = getByteSection(offset);
+    return new Section(section.start, section.start + sectionSize, section.toAsciiString());
+  }
+
+  @Override
+  public ByteSection getByteSection(int offset) throws IOException {
     if (offset < 0) {
       throw new IllegalArgumentException("offset must be >= 0");
     }
@@ -208,38 +245,137 @@ public abstract class BaseSourceReader implements SourceReader {
       throw new IllegalArgumentException("offset must be < length");
     }
     int sectionIndex = offset / sectionSize;
-    if (cache == null) {
-      initializeCache();
+    ByteSection cached = cache.get(sectionIndex);
+    if (cached != null) {
+      return cached;
     }
-    if (cache[sectionIndex] != null) {
-      cache[sectionIndex].lastUsedTimestampNs = System.nanoTime();
-      return cache[sectionIndex].section;
+    ByteSection section = getSharedSection(sectionIndex);
+    if (section == null) {
+      int startOffset = sectionIndex * sectionSize;
+      int readLen = Math.min(sectionSize, this.length() - startOffset);
+      byte[] data = new byte[readLen];
+      this.readFully(data, startOffset);
+      section = new ByteSection(startOffset, data);
+      if (sourceIdentity != null) {
+        sharedCache.put(sourceIdentity, sectionSize, sectionIndex, section);
+      }
     }
-    int startOffset = sectionIndex * sectionSize;
-    int readLen = Math.min(sectionSize, this.length() - startOffset);
-    int numRead = 0;
-    while (numRead < readLen) {
-      numRead += this.readBytes(copyBuf, numRead, startOffset + numRead, readLen - numRead);
+    cache.put(sectionIndex, section);
+
+    return section;
+  }
+
+  /**
+   * Prefetch the sections around the offsets into the reader's cache.
+   *
+   * <p>Only as many sections as fit into the cache are prefetched, starting with the lowest
+   * offsets. Sections that are already cached are skipped, the remaining ones are coalesced into
+   * runs of adjacent sections that are each read with a single call to {@link
+   * #readBytes(byte[], int, int, int)}. All runs are issued concurrently on the executor, so
+   * implementations of {@code readBytes} must be safe for concurrent use.
+   */
+  @Override
+  public void prefetch(int[] offsets, int contextBytes, Executor executor) throws IOException {
+    int maxSections = cache.capacity();
+    int length = this.length();
+    if (maxSections == 0 || offsets.length == 0 || length == 0) {
+      return;
     }
-    // Construct a String without going through a decoder to save on CPU.
-    // Given that the method has been deprecated since Java 1.1 and was never removed, I don't think
-    // this is very risky 😅
-    Section section =
-        new Section(startOffset, startOffset + sectionSize, new String(copyBuf, 0, 0, readLen));
-    if (cache.length > 0 && cacheSlotsUsed == maxCacheEntries) {
-      purgeLeastRecentlyUsed();
-    }
-    if (cache.length > 0) {
-      for (int i = 0; i < cachedSectionIdxes.length; i++) {
-        if (cachedSectionIdxes[i] < 0) {
-          cachedSectionIdxes[i] = sectionIndex;
-          break;
+
+    // Determine the indexes of all sections in the context of the offsets that are not cached yet
+    int[] sectionIdxs = new int[maxSections];
+    int numSections = 0;
+    int lastIdx = -1;
+    outer:
+    for (int offset : offsets) {
+      int fromIdx = Math.max(0, offset - contextBytes) / sectionSize;
+      int toIdx = (Math.min(length, offset + contextBytes + 1) - 1) / sectionSize;
+      for (int idx = Math.max(fromIdx, lastIdx + 1); idx <= toIdx; idx++) {
+        lastIdx = idx;
+        if (cache.contains(idx)) {
+          continue;
+        }
+        ByteSection shared = getSharedSection(idx);
+        if (shared != null) {
+          cache.put(idx, shared);
+          continue;
+        }
+        sectionIdxs[numSections++] = idx;
+        if (numSections == maxSections) {
+          break outer;
         }
       }
-      cache[sectionIndex] = new CachedSection(section);
-      cacheSlotsUsed++;
+    }
+    if (numSections == 0) {
+      return;
     }
 
-    return section;
+    // Coalesce adjacent sections into runs, stored as (first index, number of sections)
+    List<int[]> runs = new ArrayList<>();
+    int runStart = sectionIdxs[0];
+    int runLength = 1;
+    for (int i = 1; i < numSections; i++) {
+      if (sectionIdxs[i] == runStart + runLength && runLength < MAX_SECTIONS_PER_READ) {
+        runLength++;
+      } else {
+        runs.add(new int[] {runStart, runLength});
+        runStart = sectionIdxs[i];
+        runLength = 1;
+      }
+    }
+    runs.add(new int[] {runStart, runLength});
+
+    List<CompletableFuture<ByteSection[]>> futs = new ArrayList<>(runs.size());
+    for (int[] run : runs) {
+      futs.add(
+          CompletableFuture.supplyAsync(
+              () -> {
+                try {
+                  return readRun(run[0], run[1], length);
+                } catch (IOException e) {
+                  throw new UncheckedIOException(e);
+                }
+              },
+              executor));
+    }
+    try {
+      CompletableFuture.allOf(futs.toArray(new CompletableFuture[0])).join();
+    } catch (CompletionException e) {
+      if (e.getCause() instanceof UncheckedIOException) {
+        throw ((UncheckedIOException) e.getCause()).getCause();
+      } else if (e.getCause() instanceof RuntimeException) {
+        throw (RuntimeException) e.getCause();
+      }
+      throw e;
+    }
+
+    // The caches are not thread-safe, so they're only populated once all reads are done
+    for (CompletableFuture<ByteSection[]> fut : futs) {
+      for (ByteSection section : fut.join()) {
+        int sectionIndex = section.start / sectionSize;
+        cache.put(sectionIndex, section);
+        if (sourceIdentity != null) {
+          sharedCache.put(sourceIdentity, sectionSize, sectionIndex, section);
+        }
+      }
+    }
+  }
+
+  /** Read a run of adjacent sections with a single read and split it into sections. */
+  private ByteSection[] readRun(int firstIdx, int numSections, int length) throws IOException {
+    int startOffset = firstIdx * sectionSize;
+    int readLen = Math.min(numSections * sectionSize, length - startOffset);
+    byte[] data = new byte[readLen];
+    this.readFully(data, startOffset);
+    if (numSections == 1) {
+      return new ByteSection[] {new ByteSection(startOffset, data)};
+    }
+    ByteSection[] sections = new ByteSection[(readLen + sectionSize - 1) / sectionSize];
+    for (int i = 0; i < sections.length; i++) {
+      int from = i * sectionSize;
+      int to = Math.min(readLen, from + sectionSize);
+      sections[i] = new ByteSection(startOffset + from, Arrays.copyOfRange(data, from, to));
+    }
+    return sections;
   }
 }
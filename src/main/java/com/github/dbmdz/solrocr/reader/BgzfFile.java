@@ -0,0 +1,129 @@
+package com.github.dbmdz.solrocr.reader;
+
+import java.io.IOException;
+import java.nio.ByteBuffer;
+import java.nio.ByteOrder;
+import java.nio.channels.FileChannel;
+import java.util.Locale;
+import java.util.zip.DataFormatException;
+import java.util.zip.Inflater;
+
+/**
+ * Random access to the uncompressed data of a BGZF file.
+ *
+ * <p>Reads are translated to the blocks that hold the requested range with the {@link BgzfIndex},
+ * only these blocks are read from the channel and decompressed. The most recently decompressed
+ * blocks are kept, since consecutive sections of a reader usually fall into the same block.
+ * Reads can happen concurrently during prefetching, so all methods are thread-safe.
+ */
+public class BgzfFile {
+  /** Number of decompressed blocks that are kept */
+  private static final int NUM_CACHED_BLOCKS = 4;
+
+  private final FileChannel channel;
+  private final BgzfIndex index;
+
+  private final int[] cachedIdxs = new int[NUM_CACHED_BLOCKS];
+  private final byte[][] cachedBlocks = new byte[NUM_CACHED_BLOCKS][];
+  private int nextCacheSlot = 0;
+
+  /**
+   * @param channel to read the compressed data from, not closed by this class
+   * @param index of the blocks in the file
+   */
+  public BgzfFile(FileChannel channel, BgzfIndex index) {
+    this.channel = channel;
+    this.index = index;
+  }
+
+  /** Get the size of the uncompressed data in bytes. */
+  public long length() {
+    return index.getLength();
+  }
+
+  /**
+   * Read uncompressed data starting at {@code position} into {@code dst}, until it is full or the
+   * end of the data was reached.
+   *
+   * @return the number of bytes read, or {@code -1} if the position is at or after the end
+   */
+  public int read(ByteBuffer dst, long position) throws IOException {
+    if (position >= index.getLength()) {
+      return -1;
+    }
+    int numRead = 0;
+    while (dst.hasRemaining() && position < index.getLength()) {
+      int blockIdx = index.getBlockIndex(position);
+      byte[] block = getBlock(blockIdx);
+      int offsetInBlock = (int) (position - index.getUncompressedOffset(blockIdx));
+      int len = Math.min(dst.remaining(), block.length - offsetInBlock);
+      dst.put(block, offsetInBlock, len);
+      numRead += len;
+      position += len;
+    }
+    return numRead;
+  }
+
+  private byte[] getBlock(int blockIdx) throws IOException {
+    synchronized (cachedBlocks) {
+      for (int i = 0; i < NUM_CACHED_BLOCKS; i++) {
+        if (cachedBlocks[i] != null && cachedIdxs[i] == blockIdx) {
+          return cachedBlocks[i];
+        }
+      }
+    }
+    byte[] block = decompressBlock(blockIdx);
+    synchronized (cachedBlocks) {
+      cachedIdxs[nextCacheSlot] = blockIdx;
+      cachedBlocks[nextCacheSlot] = block;
+      nextCacheSlot = (nextCacheSlot + 1) % NUM_CACHED_BLOCKS;
+    }
+    return block;
+  }
+
+  private byte[] decompressBlock(int blockIdx) throws IOException {
+    long blockOffset = index.getCompressedOffset(blockIdx);
+    ByteBuffer compressed = ByteBuffer.allocate(index.getCompressedSize(blockIdx));
+    while (compressed.hasRemaining()) {
+      int numRead = channel.read(compressed, blockOffset + compressed.position());
+      if (numRead < 0) {
+        throw new IOException(
+            String.format(
+                Locale.US, "Unexpected end of BGZF file in block at offset %d", blockOffset));
+      }
+    }
+    compressed.order(ByteOrder.LITTLE_ENDIAN);
+    int dataOffset = BgzfIndex.FIXED_HEADER_SIZE + BgzfIndex.checkHeader(compressed, blockOffset);
+
+    byte[] block = new byte[index.getUncompressedSize(blockIdx)];
+    // Raw deflate data, the gzip header is handled by us. Inflating stops at the end of the
+    // member's deflate stream, so the trailer and any empty blocks after the member are ignored.
+    Inflater inflater = new Inflater(true);
+    try {
+      inflater.setInput(compressed.array(), dataOffset, compressed.capacity() - dataOffset);
+      int numInflated = 0;
+      while (numInflated < block.length && !inflater.finished()) {
+        int n = inflater.inflate(block, numInflated, block.length - numInflated);
+        if (n == 0 && (inflater.needsInput() || inflater.needsDictionary())) {
+          break;
+        }
+        numInflated += n;
+      }
+      if (numInflated != block.length) {
+        throw new IOException(
+            String.format(
+                Locale.US,
+                "BGZF block at %d has %d bytes instead of %d, is the index out of date?",
+                blockOffset,
+                numInflated,
+                block.length));
+      }
+    } catch (DataFormatException e) {
+      throw new IOException(
+          String.format(Locale.US, "Corrupt BGZF block at offset %d", blockOffset), e);
+    } finally {
+      inflater.end();
+    }
+    return block;
+  }
+}
@@ -0,0 +1,332 @@
+package com.github.dbmdz.solrocr.reader;
+
+import com.google.common.cache.Cache;
+import com.google.common.cache.CacheBuilder;
+import java.io.BufferedInputStream;
+import java.io.BufferedOutputStream;
+import java.io.DataInputStream;
+import java.io.DataOutputStream;
+import java.io.FileNotFoundException;
+import java.io.IOException;
+import java.lang.invoke.MethodHandles;
+import java.nio.ByteBuffer;
+import java.nio.ByteOrder;
+import java.nio.channels.FileChannel;
+import java.nio.file.Files;
+import java.nio.file.NoSuchFileException;
+import java.nio.file.Path;
+import java.nio.file.StandardCopyOption;
+import java.nio.file.StandardOpenOption;
+import java.util.Arrays;
+import java.util.Locale;
+import org.slf4j.Logger;
+import org.slf4j.LoggerFactory;
+
+/**
+ * Offsets of all blocks in a BGZF file, used to translate offsets in the uncompressed data to the
+ * block that holds them.
+ *
+ * <p>BGZF is a sequence of gzip members ("blocks") that each hold at most 64KiB of uncompressed
+ * data and record their compressed size in a gzip extra field. It was popularized by htslib, i.e.
+ * files can be created with {@code bgzip -i <file>} or with {@link BgzfWriter}. Any gzip
+ * decompressor can read the file as a whole.
+ *
+ * <p>The index is read from a sidecar file next to the compressed file (with the {@value
+ * #SIDECAR_EXTENSION} extension, in the format written by htslib). Without an up-to-date sidecar,
+ * the block headers are scanned, which takes two small reads per block. Loaded indexes are cached
+ * by the {@link FileIdentity} of their file, so this only happens once per file and modification.
+ */
+public class BgzfIndex {
+  private static final Logger log = LoggerFactory.getLogger(MethodHandles.lookup().lookupClass());
+
+  public static final String SIDECAR_EXTENSION = ".gzi";
+
+  /** Size of the fixed part of a gzip member header, up to and including XLEN */
+  static final int FIXED_HEADER_SIZE = 12;
+
+  /** Maximum size of the block offsets of all cached indexes */
+  private static final long MAX_CACHE_SIZE_BYTES = 32 * 1024 * 1024;
+
+  private static final Cache<FileIdentity, BgzfIndex> CACHE =
+      CacheBuilder.newBuilder()
+          .maximumWeight(MAX_CACHE_SIZE_BYTES)
+          .<FileIdentity, BgzfIndex>weigher((key, index) -> 16 * index.compressedOffsets.length)
+          .build();
+
+  /**
+   * Compressed offsets of all blocks with data, followed by the compressed offset after the last
+   * block with data
+   */
+  private final long[] compressedOffsets;
+
+  /** Uncompressed offsets of all blocks with data, followed by the uncompressed length */
+  private final long[] uncompressedOffsets;
+
+  BgzfIndex(long[] compressedOffsets, long[] uncompressedOffsets) {
+    this.compressedOffsets = compressedOffsets;
+    this.uncompressedOffsets = uncompressedOffsets;
+  }
+
+  /** Check if a target should be read as a BGZF file, based on its extension. */
+  public static boolean isBgzfTarget(String target) {
+    return target.endsWith(".gz") || target.endsWith(".bgz");
+  }
+
+  /** Get the path of the sidecar index for a BGZF file. */
+  public static Path getSidecarPath(Path path) {
+    return path.resolveSibling(path.getFileName() + SIDECAR_EXTENSION);
+  }
+
+  /** Remove all loaded indexes from the cache. */
+  public static void clearCache() {
+    CACHE.invalidateAll();
+  }
+
+  /**
+   * Load the block index for a BGZF file, from the cache, from its sidecar if it is up to date or
+   * otherwise by scanning the block headers.
+   *
+   * @throws IOException if the file is not BGZF-compressed, e.g. a plain gzip file
+   */
+  public static BgzfIndex load(Path path) throws IOException {
+    FileIdentity identity;
+    try {
+      identity = FileIdentity.of(path);
+    } catch (NoSuchFileException e) {
+      throw new FileNotFoundException(
+          String.format(Locale.US, "File at %s does not exist.", path));
+    }
+    BgzfIndex index = CACHE.getIfPresent(identity);
+    if (index == null) {
+      index = read(path);
+      CACHE.put(identity, index);
+    }
+    return index;
+  }
+
+  private static BgzfIndex read(Path path) throws IOException {
+    long[][] entries = null;
+    Path sidecarPath = getSidecarPath(path);
+    try {
+      if (Files.getLastModifiedTime(sidecarPath).compareTo(Files.getLastModifiedTime(path)) >= 0) {
+        entries = readSidecar(sidecarPath);
+      } else {
+        log.debug("BGZF index at {} is out of date, ignoring it.", sidecarPath);
+      }
+    } catch (NoSuchFileException e) {
+      // No sidecar, scan the headers instead
+    }
+    try (FileChannel chan = FileChannel.open(path, StandardOpenOption.READ)) {
+      // The sidecar doesn't tell us whether the file is actually BGZF, so always check the first
+      // block, otherwise plain gzip files would only fail once their data is read
+      checkFirstBlock(chan, path);
+      if (entries == null) {
+        return scan(chan, new long[] {0}, new long[] {0});
+      }
+      return scan(chan, entries[0], entries[1]);
+    } catch (NoSuchFileException e) {
+      throw new FileNotFoundException(
+          String.format(Locale.US, "File at %s does not exist.", path));
+    }
+  }
+
+  /** Read the (compressed, uncompressed) block offsets from a sidecar in the htslib format. */
+  private static long[][] readSidecar(Path sidecarPath) throws IOException {
+    try (DataInputStream in =
+        new DataInputStream(new BufferedInputStream(Files.newInputStream(sidecarPath)))) {
+      byte[] buf = new byte[16];
+      ByteBuffer le = ByteBuffer.wrap(buf).order(ByteOrder.LITTLE_ENDIAN);
+      in.readFully(buf, 0, 8);
+      long numEntries = le.getLong(0);
+      // The first block at (0, 0) is implicit
+      long[] compressed = new long[(int) numEntries + 1];
+      long[] uncompressed = new long[(int) numEntries + 1];
+      for (int i = 1; i <= numEntries; i++) {
+        in.readFully(buf, 0, 16);
+        compressed[i] = le.getLong(0);
+        uncompressed[i] = le.getLong(8);
+      }
+      return new long[][] {compressed, uncompressed};
+    }
+  }
+
+  /**
+   * Complete the known block offsets by scanning the block headers from the last known block to
+   * the end of the file.
+   */
+  private static BgzfIndex scan(FileChannel chan, long[] compressed, long[] uncompressed)
+      throws IOException {
+    int numKnown = compressed.length - 1;
+    long[] cOffsets = Arrays.copyOf(compressed, Math.max(16, compressed.length * 2));
+    long[] uOffsets = Arrays.copyOf(uncompressed, cOffsets.length);
+    int numBlocks = 0;
+    // Drop empty blocks (e.g. the EOF marker), they share their uncompressed offset with the next
+    for (int i = 0; i < numKnown; i++) {
+      if (uncompressed[i] < uncompressed[i + 1]) {
+        cOffsets[numBlocks] = compressed[i];
+        uOffsets[numBlocks] = uncompressed[i];
+        numBlocks++;
+      }
+    }
+
+    long cOffset = compressed[numKnown];
+    long uOffset = uncompressed[numKnown];
+    long cEnd = cOffset;
+    long fileSize = chan.size();
+    ByteBuffer header = ByteBuffer.allocate(FIXED_HEADER_SIZE).order(ByteOrder.LITTLE_ENDIAN);
+    ByteBuffer isizeBuf = ByteBuffer.allocate(4).order(ByteOrder.LITTLE_ENDIAN);
+    while (cOffset < fileSize) {
+      header.clear();
+      readFully(chan, header, cOffset);
+      int xlen = checkHeader(header, cOffset);
+      ByteBuffer extra = ByteBuffer.allocate(xlen).order(ByteOrder.LITTLE_ENDIAN);
+      readFully(chan, extra, cOffset + FIXED_HEADER_SIZE);
+      int blockSize = getBlockSize(extra, cOffset);
+      isizeBuf.clear();
+      readFully(chan, isizeBuf, cOffset + blockSize - 4);
+      long isize = isizeBuf.getInt(0) & 0xFFFFFFFFL;
+      if (isize > 0) {
+        if (numBlocks + 1 >= cOffsets.length) {
+          cOffsets = Arrays.copyOf(cOffsets, cOffsets.length * 2);
+          uOffsets = Arrays.copyOf(uOffsets, uOffsets.length * 2);
+        }
+        cOffsets[numBlocks] = cOffset;
+        uOffsets[numBlocks] = uOffset;
+        numBlocks++;
+        cEnd = cOffset + blockSize;
+      }
+      uOffset += isize;
+      cOffset += blockSize;
+    }
+    cOffsets[numBlocks] = cEnd;
+    uOffsets[numBlocks] = uOffset;
+    return new BgzfIndex(
+        Arrays.copyOf(cOffsets, numBlocks + 1), Arrays.copyOf(uOffsets, numBlocks + 1));
+  }
+
+  /** Check that the file starts with a BGZF block, i.e. a gzip member with a block size. */
+  private static void checkFirstBlock(FileChannel chan, Path path) throws IOException {
+    try {
+      ByteBuffer header = ByteBuffer.allocate(FIXED_HEADER_SIZE).order(ByteOrder.LITTLE_ENDIAN);
+      readFully(chan, header, 0);
+      ByteBuffer extra = ByteBuffer.allocate(checkHeader(header, 0)).order(ByteOrder.LITTLE_ENDIAN);
+      readFully(chan, extra, FIXED_HEADER_SIZE);
+      getBlockSize(extra, 0);
+    } catch (IOException e) {
+      throw new IOException(
+          String.format(
+              Locale.US,
+              "File at %s is not BGZF-compressed (%s). Only files compressed with `bgzip` or the"
+                  + " plugin's BgzfWriter can be read, plain gzip files are not supported.",
+              path,
+              e.getMessage()),
+          e);
+    }
+  }
+
+  private static void readFully(FileChannel chan, ByteBuffer dst, long position)
+      throws IOException {
+    while (dst.hasRemaining()) {
+      int numRead = chan.read(dst, position);
+      if (numRead < 0) {
+        throw new IOException("Unexpected end of BGZF file");
+      }
+      position += numRead;
+    }
+  }
+
+  /** Check the fixed part of a gzip member header and return the length of its extra field. */
+  static int checkHeader(ByteBuffer header, long blockOffset) throws IOException {
+    if ((header.get(0) & 0xFF) != 0x1f
+        || (header.get(1) & 0xFF) != 0x8b
+        || header.get(2) != 8
+        || (header.get(3) & 0x04) == 0) {
+      throw new IOException(
+          String.format(
+              Locale.US,
+              "No BGZF block header at offset %d, is the file a plain gzip file?",
+              blockOffset));
+    }
+    return header.getShort(10) & 0xFFFF;
+  }
+
+  /** Get the total size of a block from the {@code BC} subfield of its extra field. */
+  private static int getBlockSize(ByteBuffer extra, long blockOffset) throws IOException {
+    int pos = 0;
+    while (pos + 4 <= extra.limit()) {
+      int subfieldLength = extra.getShort(pos + 2) & 0xFFFF;
+      if (extra.get(pos) == 'B' && extra.get(pos + 1) == 'C' && subfieldLength == 2) {
+        return (extra.getShort(pos + 4) & 0xFFFF) + 1;
+      }
+      pos += 4 + subfieldLength;
+    }
+    throw new IOException(
+        String.format(
+            Locale.US,
+            "Block at offset %d has no BGZF block size, is the file a plain gzip file?",
+            blockOffset));
+  }
+
+  /**
+   * Write the index to the sidecar file for a BGZF file, in the format used by htslib.
+   *
+   * <p>The sidecar is written to a temporary file first and then moved into place, so concurrent
+   * readers never see a partially written index.
+   */
+  public void write(Path path) throws IOException {
+    Path sidecarPath = getSidecarPath(path);
+    Path tmpPath = sidecarPath.resolveSibling(sidecarPath.getFileName() + ".tmp");
+    try (DataOutputStream out =
+        new DataOutputStream(new BufferedOutputStream(Files.newOutputStream(tmpPath)))) {
+      ByteBuffer le = ByteBuffer.allocate(16).order(ByteOrder.LITTLE_ENDIAN);
+      le.putLong(0, getNumBlocks() - 1);
+      out.write(le.array(), 0, 8);
+      for (int i = 1; i < getNumBlocks(); i++) {
+        le.putLong(0, compressedOffsets[i]);
+        le.putLong(8, uncompressedOffsets[i]);
+        out.write(le.array(), 0, 16);
+      }
+    }
+    Files.move(tmpPath, sidecarPath, StandardCopyOption.REPLACE_EXISTING);
+  }
+
+  /** Get the number of blocks with data. */
+  public int getNumBlocks() {
+    return compressedOffsets.length - 1;
+  }
+
+  /** Get the size of the uncompressed data in bytes. */
+  public long getLength() {
+    return uncompressedOffsets[uncompressedOffsets.length - 1];
+  }
+
+  /** Get the index of the block that holds the given offset in the uncompressed data. */
+  public int getBlockIndex(long offset) {
+    if (offset < 0 || offset >= getLength()) {
+      throw new IllegalArgumentException(
+          String.format(Locale.US, "Offset %d is out of bounds [0, %d)", offset, getLength()));
+    }
+    int idx = Arrays.binarySearch(uncompressedOffsets, 0, getNumBlocks(), offset);
+    return idx >= 0 ? idx : -idx - 2;
+  }
+
+  /** Get the offset of a block in the compressed file. */
+  public long getCompressedOffset(int blockIdx) {
+    return compressedOffsets[blockIdx];
+  }
+
+  /** Get the number of bytes of a block in the compressed file. */
+  public int getCompressedSize(int blockIdx) {
+    return (int) (compressedOffsets[blockIdx + 1] - compressedOffsets[blockIdx]);
+  }
+
+  /** Get the offset of the first byte of a block in the uncompressed data. */
+  public long getUncompressedOffset(int blockIdx) {
+    return uncompressedOffsets[blockIdx];
+  }
+
+  /** Get the number of uncompressed bytes in a block. */
+  public int getUncompressedSize(int blockIdx) {
+    return (int) (uncompressedOffsets[blockIdx + 1] - uncompressedOffsets[blockIdx]);
+  }
+}
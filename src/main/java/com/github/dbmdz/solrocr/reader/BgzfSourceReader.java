@@ -0,0 +1,82 @@
+package com.github.dbmdz.solrocr.reader;
+
+import com.github.dbmdz.solrocr.model.SourcePointer;
+import java.io.IOException;
+import java.nio.ByteBuffer;
+import java.nio.channels.FileChannel;
+import java.nio.file.Path;
+import java.nio.file.StandardOpenOption;
+
+/**
+ * Reads the uncompressed data of a BGZF file, see {@link BgzfIndex} for details on the format.
+ *
+ * <p>All offsets are offsets in the uncompressed data, i.e. the same offsets that are stored in
+ * the index when indexing the uncompressed file. Only the blocks around the sections that are
+ * actually needed for highlighting are read and decompressed.
+ */
+public class BgzfSourceReader extends BaseSourceReader {
+  private final Path path;
+  private final FileChannel chan;
+  /** Lease on the channel if it was acquired from a pool, null otherwise */
+  private final FileChannelPool.Lease lease;
+
+  private final BgzfFile file;
+
+  public BgzfSourceReader(
+      Path path, BgzfIndex index, SourcePointer ptr, int sectionSize, int maxCacheEntries)
+      throws IOException {
+    this(path, index, ptr, sectionSize, maxCacheEntries, null, null);
+  }
+
+  public BgzfSourceReader(
+      Path path,
+      BgzfIndex index,
+      SourcePointer ptr,
+      int sectionSize,
+      int maxCacheEntries,
+      SectionCache sharedCache,
+      FileChannelPool channelPool)
+      throws IOException {
+    super(ptr, sectionSize, maxCacheEntries, sharedCache);
+    this.path = path;
+    if (channelPool != null) {
+      this.lease = channelPool.acquire(path);
+      this.chan = lease.channel();
+    } else {
+      this.lease = null;
+      this.chan = FileChannel.open(path, StandardOpenOption.READ);
+    }
+    this.file = new BgzfFile(chan, index);
+  }
+
+  @Override
+  public int readBytes(ByteBuffer dst, int start) throws IOException {
+    return file.read(dst, start);
+  }
+
+  @Override
+  public int length() {
+    return (int) file.length();
+  }
+
+  @Override
+  public void close() throws IOException {
+    if (this.lease != null) {
+      this.lease.close();
+    } else {
+      this.chan.close();
+    }
+  }
+
+  @Override
+  protected Object getSourceIdentity() throws IOException {
+    // Sections are addressed by their uncompressed offsets, which only change with the file.
+    // Pooled channels were validated when they were acquired, no need to stat the file again.
+    return lease != null ? lease.identity() : FileIdentity.of(this.path);
+  }
+
+  @Override
+  public String getIdentifier() {
+    return this.path.toString();
+  }
+}
@@ -0,0 +1,124 @@
+package com.github.dbmdz.solrocr.reader;
+
+import java.io.BufferedOutputStream;
+import java.io.IOException;
+import java.io.InputStream;
+import java.io.OutputStream;
+import java.nio.ByteBuffer;
+import java.nio.ByteOrder;
+import java.nio.file.Files;
+import java.nio.file.Path;
+import java.nio.file.Paths;
+import java.util.Arrays;
+import java.util.zip.CRC32;
+import java.util.zip.Deflater;
+
+/**
+ * Compresses files into the BGZF format and writes their block index, so they can be indexed and
+ * highlighted without decompressing them first.
+ *
+ * <p>The output is compatible with htslib's {@code bgzip -i}, which can be used instead of this
+ * class.
+ */
+public class BgzfWriter {
+  /** Maximum number of uncompressed bytes per block, the same as htslib */
+  static final int MAX_BLOCK_DATA_SIZE = 0xff00;
+
+  private static final int HEADER_SIZE = 18;
+
+  /** Empty block that marks the end of the file */
+  private static final byte[] EOF_BLOCK = {
+    0x1f, (byte) 0x8b, 8, 4, 0, 0, 0, 0, 0, (byte) 0xff, 6, 0, 'B', 'C', 2, 0, 0x1b, 0, 3, 0, 0, 0,
+    0, 0, 0, 0, 0, 0
+  };
+
+  private BgzfWriter() {}
+
+  /**
+   * Compress {@code src} into the BGZF file {@code dst} and write the block index next to it.
+   *
+   * @param level compression level, see {@link Deflater}
+   */
+  public static BgzfIndex compress(Path src, Path dst, int level) throws IOException {
+    long srcSize = Files.size(src);
+    int maxBlocks = (int) (srcSize / MAX_BLOCK_DATA_SIZE) + 1;
+    long[] compressedOffsets = new long[maxBlocks + 1];
+    long[] uncompressedOffsets = new long[maxBlocks + 1];
+    int numBlocks = 0;
+
+    byte[] data = new byte[MAX_BLOCK_DATA_SIZE];
+    // Incompressible data is stored with a few bytes of overhead, which always fits into a block
+    byte[] block = new byte[HEADER_SIZE + MAX_BLOCK_DATA_SIZE + 1024];
+    ByteBuffer blockBuf = ByteBuffer.wrap(block).order(ByteOrder.LITTLE_ENDIAN);
+    Deflater deflater = new Deflater(level, true);
+    CRC32 crc = new CRC32();
+    long cOffset = 0;
+    long uOffset = 0;
+    try (InputStream in = Files.newInputStream(src);
+        OutputStream out = new BufferedOutputStream(Files.newOutputStream(dst))) {
+      int len;
+      while ((len = readBlockData(in, data)) > 0) {
+        deflater.reset();
+        deflater.setInput(data, 0, len);
+        deflater.finish();
+        int compressedLen = 0;
+        while (!deflater.finished()) {
+          int offset = HEADER_SIZE + compressedLen;
+          // Leave room for the CRC32 and ISIZE trailer
+          compressedLen += deflater.deflate(block, offset, block.length - offset - 8);
+        }
+        crc.reset();
+        crc.update(data, 0, len);
+        int blockSize = HEADER_SIZE + compressedLen + 8;
+        System.arraycopy(EOF_BLOCK, 0, block, 0, HEADER_SIZE);
+        blockBuf.putShort(16, (short) (blockSize - 1));
+        blockBuf.putInt(HEADER_SIZE + compressedLen, (int) crc.getValue());
+        blockBuf.putInt(HEADER_SIZE + compressedLen + 4, len);
+        out.write(block, 0, blockSize);
+
+        compressedOffsets[numBlocks] = cOffset;
+        uncompressedOffsets[numBlocks] = uOffset;
+        numBlocks++;
+        cOffset += blockSize;
+        uOffset += len;
+      }
+      out.write(EOF_BLOCK);
+    } finally {
+      deflater.end();
+    }
+    compressedOffsets[numBlocks] = cOffset;
+    uncompressedOffsets[numBlocks] = uOffset;
+    BgzfIndex index =
+        new BgzfIndex(
+            Arrays.copyOf(compressedOffsets, numBlocks + 1),
+            Arrays.copyOf(uncompressedOffsets, numBlocks + 1));
+    index.write(dst);
+    return index;
+  }
+
+  private static int readBlockData(InputStream in, byte[] buf) throws IOException {
+    int numRead = 0;
+    while (numRead < buf.length) {
+      int n = in.read(buf, numRead, buf.length - numRead);
+      if (n < 0) {
+        break;
+      }
+      numRead += n;
+    }
+    return numRead;
+  }
+
+  /** Compress all files passed as arguments to {@code <file>.gz}, along with their index. */
+  public static void main(String[] args) throws IOException {
+    if (args.length == 0) {
+      System.err.println("Usage: BgzfWriter <ocr-file>...");
+      System.exit(1);
+    }
+    for (String arg : args) {
+      Path path = Paths.get(arg);
+      Path dst = path.resolveSibling(path.getFileName() + ".gz");
+      compress(path, dst, Deflater.DEFAULT_COMPRESSION);
+      System.out.println("Wrote " + dst + " and " + BgzfIndex.getSidecarPath(dst));
+    }
+  }
+}
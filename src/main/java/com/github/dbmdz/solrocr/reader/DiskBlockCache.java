@@ -0,0 +1,172 @@
+package com.github.dbmdz.solrocr.reader;
+
+import com.google.common.hash.Hashing;
+import java.io.IOException;
+import java.lang.invoke.MethodHandles;
+import java.nio.charset.StandardCharsets;
+import java.nio.file.DirectoryStream;
+import java.nio.file.Files;
+import java.nio.file.NoSuchFileException;
+import java.nio.file.Path;
+import java.nio.file.StandardCopyOption;
+import java.nio.file.attribute.BasicFileAttributes;
+import java.util.ArrayList;
+import java.util.Comparator;
+import java.util.HashMap;
+import java.util.Iterator;
+import java.util.LinkedHashMap;
+import java.util.List;
+import java.util.Map;
+import org.slf4j.Logger;
+import org.slf4j.LoggerFactory;
+
+/**
+ * Cache for blocks of remote files in a directory on the local disk, with a limit on its total
+ * size.
+ *
+ * <p>Every block is stored in its own file, named after the hash of its key. Blocks are evicted in
+ * least-recently-used order once the size limit is exceeded. Blocks that are already in the
+ * directory when the cache is created are reused, i.e. the cache survives restarts.
+ */
+public class DiskBlockCache {
+  private static final Logger log = LoggerFactory.getLogger(MethodHandles.lookup().lookupClass());
+
+  private static final String TMP_EXTENSION = ".tmp";
+
+  private final Path directory;
+  private final long maxBytes;
+
+  /** Sizes of the cached files by file name, in access order */
+  private final LinkedHashMap<String, Long> entries = new LinkedHashMap<>(64, 0.75f, true);
+
+  private long totalBytes = 0;
+  private long hitCount = 0;
+  private long missCount = 0;
+
+  /**
+   * @param directory to store the blocks in, is created if it does not exist
+   * @param maxBytes maximum total size of the cached blocks
+   */
+  public DiskBlockCache(Path directory, long maxBytes) throws IOException {
+    if (maxBytes <= 0) {
+      throw new IllegalArgumentException("maxBytes must be > 0");
+    }
+    this.directory = Files.createDirectories(directory);
+    this.maxBytes = maxBytes;
+
+    // Pick up the blocks from previous runs, oldest first, so they're evicted first
+    Map<Path, BasicFileAttributes> existing = new HashMap<>();
+    try (DirectoryStream<Path> stream = Files.newDirectoryStream(this.directory)) {
+      for (Path path : stream) {
+        if (path.getFileName().toString().endsWith(TMP_EXTENSION)) {
+          // Leftover from an interrupted write
+          Files.deleteIfExists(path);
+          continue;
+        }
+        BasicFileAttributes attrs = Files.readAttributes(path, BasicFileAttributes.class);
+        if (attrs.isRegularFile()) {
+          existing.put(path, attrs);
+        }
+      }
+    }
+    List<Path> paths = new ArrayList<>(existing.keySet());
+    paths.sort(Comparator.comparing(p -> existing.get(p).lastModifiedTime()));
+    synchronized (this) {
+      for (Path path : paths) {
+        long size = existing.get(path).size();
+        entries.put(path.getFileName().toString(), size);
+        totalBytes += size;
+      }
+      evict();
+    }
+  }
+
+  /** Get the data of a block, or {@code null} if it is not cached. */
+  public byte[] get(String key) throws IOException {
+    String fileName = getFileName(key);
+    synchronized (this) {
+      if (entries.get(fileName) == null) {
+        missCount++;
+        return null;
+      }
+    }
+    try {
+      byte[] data = Files.readAllBytes(directory.resolve(fileName));
+      synchronized (this) {
+        hitCount++;
+      }
+      return data;
+    } catch (NoSuchFileException e) {
+      // Evicted in the meantime
+      synchronized (this) {
+        missCount++;
+        remove(fileName);
+      }
+      return null;
+    }
+  }
+
+  /** Store the data of a block in the cache. */
+  public void put(String key, byte[] data) throws IOException {
+    String fileName = getFileName(key);
+    // Write to a temporary file first, so concurrent readers never see a partially written block
+    Path tmpPath = Files.createTempFile(directory, fileName, TMP_EXTENSION);
+    try {
+      Files.write(tmpPath, data);
+      Files.move(tmpPath, directory.resolve(fileName), StandardCopyOption.REPLACE_EXISTING);
+    } finally {
+      Files.deleteIfExists(tmpPath);
+    }
+    synchronized (this) {
+      remove(fileName);
+      entries.put(fileName, (long) data.length);
+      totalBytes += data.length;
+      evict();
+    }
+  }
+
+  /** Remove an entry from the bookkeeping, the caller must hold the lock. */
+  private void remove(String fileName) {
+    Long size = entries.remove(fileName);
+    if (size != null) {
+      totalBytes -= size;
+    }
+  }
+
+  /** Delete the least recently used blocks until we're within the limit, must hold the lock. */
+  private void evict() {
+    Iterator<Map.Entry<String, Long>> it = entries.entrySet().iterator();
+    while (totalBytes > maxBytes && it.hasNext()) {
+      Map.Entry<String, Long> entry = it.next();
+      try {
+        Files.deleteIfExists(directory.resolve(entry.getKey()));
+      } catch (IOException e) {
+        log.warn("Could not delete cached block at {}", directory.resolve(entry.getKey()), e);
+      }
+      totalBytes -= entry.getValue();
+      it.remove();
+    }
+  }
+
+  private static String getFileName(String key) {
+    return Hashing.sha256().hashString(key, StandardCharsets.UTF_8).toString();
+  }
+
+  /** Get the total size of the cached blocks in bytes. */
+  public synchronized long getSize() {
+    return totalBytes;
+  }
+
+  /** Get the number of cached blocks. */
+  public synchronized int getNumEntries() {
+    return entries.size();
+  }
+
+  public synchronized long getHitCount() {
+    return hitCount;
+  }
+
+  public synchronized long getMissCount() {
+    return missCount;
+  }
+}
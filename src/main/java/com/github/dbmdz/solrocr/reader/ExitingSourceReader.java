@@ -5,6 +5,7 @@ import java.io.IOException;
 import java.nio.ByteBuffer;
 import java.nio.channels.SeekableByteChannel;
 import java.util.Locale;
+import java.util.concurrent.Executor;
 import org.apache.lucene.index.QueryTimeout;
 
 public class ExitingSourceReader implements SourceReader {
@@ -77,6 +78,18 @@ public class ExitingSourceReader implements SourceReader {
     return input.getAsciiSection(offset);
   }
 
+  @Override
+  public ByteSection getByteSection(int offset) throws IOException {
+    checkAndThrow();
+    return input.getByteSection(offset);
+  }
+
+  @Override
+  public void prefetch(int[] offsets, int contextBytes, Executor executor) throws IOException {
+    checkAndThrow();
+    input.prefetch(offsets, contextBytes, executor);
+  }
+
   @Override
   public int readBytes(ByteBuffer dst, int start) throws IOException {
     checkAndThrow();
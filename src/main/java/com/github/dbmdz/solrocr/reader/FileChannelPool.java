@@ -0,0 +1,338 @@
+package com.github.dbmdz.solrocr.reader;
+
+import java.io.Closeable;
+import java.io.IOException;
+import java.lang.invoke.MethodHandles;
+import java.nio.channels.FileChannel;
+import java.nio.file.Path;
+import java.nio.file.StandardOpenOption;
+import java.util.ArrayList;
+import java.util.HashMap;
+import java.util.Iterator;
+import java.util.List;
+import java.util.Map;
+import java.util.concurrent.TimeUnit;
+import org.slf4j.Logger;
+import org.slf4j.LoggerFactory;
+
+/**
+ * Pool of read-only {@link FileChannel}s that is shared across readers and requests.
+ *
+ * <p>Opening and closing files can be expensive, especially on network filesystems where each of
+ * these operations is a round trip to the server. Readers acquire a {@link Lease} on a channel for
+ * a path and release it when they're done, the channel is kept open for subsequent readers. Since
+ * all reads on the channels are positional, a channel can be used by multiple readers at the same
+ * time.
+ *
+ * <p>Channels are reference-counted and only closed once they're no longer in use, either because
+ * they were idle for longer than the configured timeout, because the pool exceeded its maximum
+ * number of open files or because the file changed on disk. Files are checked for changes (by
+ * comparing their {@link FileIdentity}) when a channel is acquired and the last check is older
+ * than the configured revalidation interval. Idle channels are evicted when the pool is accessed,
+ * there is no background thread.
+ */
+public class FileChannelPool implements Closeable {
+  private static final Logger log = LoggerFactory.getLogger(MethodHandles.lookup().lookupClass());
+
+  /** A channel leased from the pool, has to be closed to return the channel to the pool. */
+  public static final class Lease implements Closeable {
+    private final FileChannelPool pool;
+    private final Entry entry;
+    private boolean released = false;
+
+    private Lease(FileChannelPool pool, Entry entry) {
+      this.pool = pool;
+      this.entry = entry;
+    }
+
+    public FileChannel channel() {
+      return entry.channel;
+    }
+
+    /** Get the identity of the file, as it was when it was last validated by the pool. */
+    public FileIdentity identity() {
+      return entry.identity;
+    }
+
+    @Override
+    public void close() throws IOException {
+      if (released) {
+        return;
+      }
+      released = true;
+      pool.release(entry);
+    }
+  }
+
+  private static final class Entry {
+    final Path path;
+    final FileChannel channel;
+    final FileIdentity identity;
+    long lastValidatedNanos;
+    long lastReleasedNanos;
+    int refCount = 0;
+
+    /** Whether the entry was removed from the pool and should be closed once it's released */
+    boolean retired = false;
+
+    Entry(Path path, FileChannel channel, FileIdentity identity, long now) {
+      this.path = path;
+      this.channel = channel;
+      this.identity = identity;
+      this.lastValidatedNanos = now;
+      this.lastReleasedNanos = now;
+    }
+  }
+
+  private final int maxOpenFiles;
+  private final long idleTimeoutNanos;
+  private final long revalidateIntervalNanos;
+
+  /** Pooled entries by absolute path */
+  private final Map<Path, Entry> entries = new HashMap<>();
+
+  private long lastSweepNanos;
+  private long hitCount = 0;
+  private long openCount = 0;
+  private long evictionCount = 0;
+  private long invalidationCount = 0;
+
+  /**
+   * @param maxOpenFiles maximum number of channels kept open by the pool, channels in use are never
+   *     closed, so the actual number can temporarily be higher
+   * @param idleTimeoutMs time after which unused channels are closed
+   * @param revalidateIntervalMs time after which a file is checked for changes again on acquire
+   */
+  public FileChannelPool(int maxOpenFiles, long idleTimeoutMs, long revalidateIntervalMs) {
+    if (maxOpenFiles <= 0) {
+      throw new IllegalArgumentException("maxOpenFiles must be > 0");
+    }
+    this.maxOpenFiles = maxOpenFiles;
+    this.idleTimeoutNanos = TimeUnit.MILLISECONDS.toNanos(idleTimeoutMs);
+    this.revalidateIntervalNanos = TimeUnit.MILLISECONDS.toNanos(revalidateIntervalMs);
+    this.lastSweepNanos = System.nanoTime();
+  }
+
+  /** Acquire a channel for the file at the given path, opening it if necessary. */
+  public Lease acquire(Path path) throws IOException {
+    Path key = path.toAbsolutePath();
+    long now = System.nanoTime();
+    boolean needsValidation;
+    synchronized (this) {
+      Entry entry = entries.get(key);
+      needsValidation = entry != null && now - entry.lastValidatedNanos >= revalidateIntervalNanos;
+      if (entry != null && !needsValidation) {
+        entry.refCount++;
+        hitCount++;
+        return new Lease(this, entry);
+      }
+    }
+
+    // The filesystem is only accessed outside of the lock, so that slow opens or stats don't block
+    // other readers
+    FileIdentity identity = FileIdentity.of(key);
+    List<Entry> toClose = new ArrayList<>();
+    if (needsValidation) {
+      Entry entry;
+      synchronized (this) {
+        entry = entries.get(key);
+        if (entry != null && entry.identity.equals(identity)) {
+          entry.lastValidatedNanos = now;
+          entry.refCount++;
+          hitCount++;
+        } else if (entry != null) {
+          invalidationCount++;
+          retire(entry, toClose);
+          entry = null;
+        }
+      }
+      closeAll(toClose);
+      toClose.clear();
+      if (entry != null) {
+        return new Lease(this, entry);
+      }
+    }
+
+    FileChannel channel = FileChannel.open(key, StandardOpenOption.READ);
+    Entry newEntry = new Entry(key, channel, identity, now);
+    Entry existing;
+    synchronized (this) {
+      existing = entries.get(key);
+      if (existing != null && existing.identity.equals(identity)) {
+        // Another reader opened the file in the meantime, use that channel instead
+        existing.refCount++;
+        hitCount++;
+      } else {
+        if (existing != null) {
+          invalidationCount++;
+          retire(existing, toClose);
+        }
+        existing = null;
+        openCount++;
+        newEntry.refCount++;
+        entries.put(key, newEntry);
+        evict(now, toClose);
+      }
+    }
+    closeAll(toClose);
+    if (existing != null) {
+      closeQuietly(newEntry);
+      return new Lease(this, existing);
+    }
+    return new Lease(this, newEntry);
+  }
+
+  /**
+   * Get the identity of the file at the given path. If the pool has a channel for the file that was
+   * validated within the revalidation interval, its identity is used, otherwise the file is
+   * stat'ed.
+   */
+  public FileIdentity getIdentity(Path path) throws IOException {
+    Path key = path.toAbsolutePath();
+    synchronized (this) {
+      Entry entry = entries.get(key);
+      if (entry != null && System.nanoTime() - entry.lastValidatedNanos < revalidateIntervalNanos) {
+        return entry.identity;
+      }
+    }
+    return FileIdentity.of(key);
+  }
+
+  private void release(Entry entry) {
+    long now = System.nanoTime();
+    List<Entry> toClose = new ArrayList<>();
+    synchronized (this) {
+      entry.refCount--;
+      entry.lastReleasedNanos = now;
+      if (entry.retired && entry.refCount == 0) {
+        toClose.add(entry);
+      }
+      if (now - lastSweepNanos > idleTimeoutNanos / 2 || entries.size() > maxOpenFiles) {
+        evict(now, toClose);
+      }
+    }
+    closeAll(toClose);
+  }
+
+  /**
+   * Remove an entry from the pool, it will be closed once it's no longer in use. Must be called
+   * with the lock held, unused entries are added to {@code toClose}.
+   */
+  private void retire(Entry entry, List<Entry> toClose) {
+    entries.remove(entry.path);
+    entry.retired = true;
+    if (entry.refCount == 0) {
+      toClose.add(entry);
+    }
+  }
+
+  /**
+   * Collect unused entries that were idle for too long or, if the pool is over capacity, the least
+   * recently released unused entries. Must be called with the lock held, closing the collected
+   * entries is left to the caller so it can happen outside of the lock.
+   */
+  private void evict(long now, List<Entry> toClose) {
+    lastSweepNanos = now;
+    List<Entry> idle = new ArrayList<>();
+    Iterator<Entry> it = entries.values().iterator();
+    while (it.hasNext()) {
+      Entry entry = it.next();
+      if (entry.refCount > 0) {
+        continue;
+      }
+      if (now - entry.lastReleasedNanos > idleTimeoutNanos) {
+        it.remove();
+        entry.retired = true;
+        toClose.add(entry);
+        evictionCount++;
+      } else {
+        idle.add(entry);
+      }
+    }
+    if (entries.size() > maxOpenFiles) {
+      idle.sort((a, b) -> Long.compare(a.lastReleasedNanos, b.lastReleasedNanos));
+      for (Entry entry : idle) {
+        if (entries.size() <= maxOpenFiles) {
+          break;
+        }
+        entries.remove(entry.path);
+        entry.retired = true;
+        toClose.add(entry);
+        evictionCount++;
+      }
+    }
+  }
+
+  private static void closeAll(List<Entry> entries) {
+    for (Entry entry : entries) {
+      closeQuietly(entry);
+    }
+  }
+
+  private static void closeQuietly(Entry entry) {
+    try {
+      entry.channel.close();
+    } catch (IOException e) {
+      log.warn("Failed to close file at {}: {}", entry.path, e.getMessage());
+    }
+  }
+
+  /**
+   * Close all channels that are currently not in use and remove them from the pool. Channels in use
+   * stay in the pool.
+   */
+  public void evictIdle() {
+    List<Entry> toClose = new ArrayList<>();
+    synchronized (this) {
+      lastSweepNanos = System.nanoTime();
+      Iterator<Entry> it = entries.values().iterator();
+      while (it.hasNext()) {
+        Entry entry = it.next();
+        if (entry.refCount > 0) {
+          continue;
+        }
+        it.remove();
+        entry.retired = true;
+        toClose.add(entry);
+        evictionCount++;
+      }
+    }
+    closeAll(toClose);
+  }
+
+  /**
+   * Close the pool. All channels are removed from the pool, those that are not in use are closed
+   * immediately, all others once they're released.
+   */
+  @Override
+  public void close() {
+    List<Entry> toClose = new ArrayList<>();
+    synchronized (this) {
+      for (Entry entry : new ArrayList<>(entries.values())) {
+        retire(entry, toClose);
+      }
+    }
+    closeAll(toClose);
+  }
+
+  /** Get the number of channels currently held open by the pool, including those in use */
+  public synchronized long getNumOpenFiles() {
+    return entries.size();
+  }
+
+  public synchronized long getHitCount() {
+    return hitCount;
+  }
+
+  public synchronized long getOpenCount() {
+    return openCount;
+  }
+
+  public synchronized long getEvictionCount() {
+    return evictionCount;
+  }
+
+  public synchronized long getInvalidationCount() {
+    return invalidationCount;
+  }
+}
@@ -0,0 +1,59 @@
+package com.github.dbmdz.solrocr.reader;
+
+import java.io.IOException;
+import java.nio.file.Files;
+import java.nio.file.Path;
+import java.nio.file.attribute.BasicFileAttributes;
+import java.util.Objects;
+
+/**
+ * Identity of a file on disk at a given point in time.
+ *
+ * <p>Consists of the absolute path, the size and the modification time of the file, i.e. if the
+ * file is modified, its identity changes. This makes it suitable as a key for caching data read
+ * from the file.
+ */
+public final class FileIdentity {
+  public final String path;
+  public final long size;
+  public final long lastModifiedMs;
+
+  public FileIdentity(String path, long size, long lastModifiedMs) {
+    this.path = path;
+    this.size = size;
+    this.lastModifiedMs = lastModifiedMs;
+  }
+
+  /** Determine the current identity of the file at the given path. */
+  public static FileIdentity of(Path path) throws IOException {
+    BasicFileAttributes attrs = Files.readAttributes(path, BasicFileAttributes.class);
+    return new FileIdentity(
+        path.toAbsolutePath().toString(), attrs.size(), attrs.lastModifiedTime().toMillis());
+  }
+
+  @Override
+  public boolean equals(Object o) {
+    if (this == o) return true;
+    if (o == null || getClass() != o.getClass()) return false;
+    FileIdentity that = (FileIdentity) o;
+    return size == that.size && lastModifiedMs == that.lastModifiedMs && path.equals(that.path);
+  }
+
+  @Override
+  public int hashCode() {
+    return Objects.hash(path, size, lastModifiedMs);
+  }
+
+  @Override
+  public String toString() {
+    return "FileIdentity{"
+        + "path='"
+        + path
+        + '\''
+        + ", size="
+        + size
+        + ", lastModifiedMs="
+        + lastModifiedMs
+        + '}';
+  }
+}
@@ -13,13 +13,47 @@ import java.nio.file.StandardOpenOption;
 public class FileSourceReader extends BaseSourceReader {
   private final Path path;
   private final FileChannel chan;
+
+  /** Lease on the channel if it was acquired from a pool, null otherwise */
+  private final FileChannelPool.Lease lease;
+
+  /** Private channel for {@link #getByteChannel()}, pooled channels must not be repositioned */
+  private FileChannel privateChan;
+
   private int fileSizeBytes = -1;
 
   public FileSourceReader(Path path, SourcePointer ptr, int sectionSize, int maxCacheEntries)
       throws IOException {
-    super(ptr, sectionSize, maxCacheEntries);
+    this(path, ptr, sectionSize, maxCacheEntries, null);
+  }
+
+  public FileSourceReader(
+      Path path,
+      SourcePointer ptr,
+      int sectionSize,
+      int maxCacheEntries,
+      SectionCache sharedCache)
+      throws IOException {
+    this(path, ptr, sectionSize, maxCacheEntries, sharedCache, null);
+  }
+
+  public FileSourceReader(
+      Path path,
+      SourcePointer ptr,
+      int sectionSize,
+      int maxCacheEntries,
+      SectionCache sharedCache,
+      FileChannelPool channelPool)
+      throws IOException {
+    super(ptr, sectionSize, maxCacheEntries, sharedCache);
     this.path = path;
-    this.chan = (FileChannel) Files.newByteChannel(path, StandardOpenOption.READ);
+    if (channelPool != null) {
+      this.lease = channelPool.acquire(path);
+      this.chan = lease.channel();
+    } else {
+      this.lease = null;
+      this.chan = (FileChannel) Files.newByteChannel(path, StandardOpenOption.READ);
+    }
   }
 
   @Override
@@ -30,14 +64,32 @@ public class FileSourceReader extends BaseSourceReader {
   @Override
   public int length() throws IOException {
     if (this.fileSizeBytes < 0) {
+      // Always use the size of the open file, the size in the (possibly cached) pointer can be
+      // out of date if the file was modified since the pointer was parsed
       this.fileSizeBytes = (int) this.chan.size();
+      if (pointer != null && pointer.getLength() != this.fileSizeBytes) {
+        pointer.markStale();
+      }
     }
     return this.fileSizeBytes;
   }
 
   @Override
   public void close() throws IOException {
-    this.chan.close();
+    if (this.privateChan != null) {
+      this.privateChan.close();
+    }
+    if (this.lease != null) {
+      this.lease.close();
+    } else {
+      this.chan.close();
+    }
+  }
+
+  @Override
+  protected Object getSourceIdentity() throws IOException {
+    // Pooled channels were validated when they were acquired, no need to stat the file again
+    return lease != null ? lease.identity() : FileIdentity.of(this.path);
   }
 
   @Override
@@ -47,6 +99,12 @@ public class FileSourceReader extends BaseSourceReader {
 
   @Override
   public SeekableByteChannel getByteChannel() throws IOException {
-    return this.chan;
+    if (this.lease == null) {
+      return this.chan;
+    }
+    if (this.privateChan == null) {
+      this.privateChan = FileChannel.open(this.path, StandardOpenOption.READ);
+    }
+    return this.privateChan;
   }
 }
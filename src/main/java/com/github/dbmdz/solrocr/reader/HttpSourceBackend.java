@@ -0,0 +1,542 @@
+package com.github.dbmdz.solrocr.reader;
+
+import com.github.dbmdz.solrocr.model.SourcePointer;
+import com.google.common.base.Splitter;
+import com.google.common.base.Strings;
+import com.google.common.cache.Cache;
+import com.google.common.cache.CacheBuilder;
+import com.google.common.collect.ImmutableList;
+import com.google.common.util.concurrent.UncheckedExecutionException;
+import java.io.FileNotFoundException;
+import java.io.IOException;
+import java.io.InputStream;
+import java.io.InterruptedIOException;
+import java.lang.invoke.MethodHandles;
+import java.net.HttpURLConnection;
+import java.net.URI;
+import java.net.URISyntaxException;
+import java.net.URL;
+import java.nio.file.Paths;
+import java.util.Arrays;
+import java.util.List;
+import java.util.Locale;
+import java.util.Map;
+import java.util.Objects;
+import java.util.concurrent.CompletableFuture;
+import java.util.concurrent.ConcurrentHashMap;
+import java.util.concurrent.ExecutionException;
+import java.util.concurrent.Semaphore;
+import java.util.concurrent.TimeUnit;
+import java.util.concurrent.atomic.AtomicLong;
+import java.util.regex.Matcher;
+import java.util.regex.Pattern;
+import org.slf4j.Logger;
+import org.slf4j.LoggerFactory;
+
+/**
+ * Backend for targets that are served over HTTP(S) by a server that supports range requests, e.g.
+ * a plain web server or an object store like S3 (with public or pre-signed URLs).
+ *
+ * <p>Remote files are read in aligned blocks of a fixed size, so the small sections that are read
+ * during highlighting translate to a few larger requests:
+ *
+ * <ul>
+ *   <li>Consecutive blocks that are needed for a read are fetched with a single range request.
+ *   <li>Concurrent reads of the same block (e.g. during prefetching) share a single request.
+ *   <li>Fetched blocks can be kept in a {@link DiskBlockCache} that is shared across requests.
+ * </ul>
+ *
+ * <p>Only URLs that start with one of the configured prefixes are handled, all other URLs are
+ * rejected when the pointer is parsed. Redirects are not followed, since they could lead to URLs
+ * outside of the allowed prefixes.
+ *
+ * <p>Connections are kept alive and reused by the JDK's HTTP client (the number of idle connections
+ * kept per host is controlled with the {@code http.maxConnections} system property), the number of
+ * concurrent requests is limited by the backend. The sizes of remote files are looked up when a
+ * reader is created and kept for a short time. Blocks are keyed by the URL and the size of the
+ * remote file, so files that changed their size are fetched again once the size has expired.
+ */
+public class HttpSourceBackend implements SourceBackend {
+  private static final Logger log = LoggerFactory.getLogger(MethodHandles.lookup().lookupClass());
+
+  public static final String NAME = "http";
+  public static final int DEFAULT_MAX_CONNECTIONS = 16;
+  public static final int DEFAULT_BLOCK_SIZE = 64 * 1024;
+  public static final int DEFAULT_TIMEOUT_MS = 10_000;
+
+  /** How long the size of a remote file is kept before it is looked up again */
+  private static final long SIZE_TTL_SECONDS = 60;
+
+  private static final long MAX_CACHED_SIZES = 16 * 1024;
+
+  private static final Pattern CONTENT_RANGE_PAT =
+      Pattern.compile("^bytes (?<start>\\d+)-(?<end>\\d+)/(?<total>\\d+|\\*)$");
+
+  private static final class BlockKey {
+    final String url;
+    final long length;
+    final int blockIdx;
+
+    BlockKey(String url, long length, int blockIdx) {
+      this.url = url;
+      this.length = length;
+      this.blockIdx = blockIdx;
+    }
+
+    @Override
+    public boolean equals(Object o) {
+      if (this == o) {
+        return true;
+      }
+      if (o == null || getClass() != o.getClass()) {
+        return false;
+      }
+      BlockKey other = (BlockKey) o;
+      return length == other.length && blockIdx == other.blockIdx && url.equals(other.url);
+    }
+
+    @Override
+    public int hashCode() {
+      return Objects.hash(url, length, blockIdx);
+    }
+  }
+
+  private final ImmutableList<String> allowedUrlPrefixes;
+  private final int blockSize;
+  private final int timeoutMs;
+  private final Semaphore connections;
+
+  /** Cache for fetched blocks, can be null */
+  private final DiskBlockCache diskCache;
+
+  /** Blocks that are currently being fetched */
+  private final ConcurrentHashMap<BlockKey, CompletableFuture<byte[]>> inFlight =
+      new ConcurrentHashMap<>();
+
+  /** Sizes of the remote files that were recently validated */
+  private final Cache<String, Long> sizes =
+      CacheBuilder.newBuilder()
+          .maximumSize(MAX_CACHED_SIZES)
+          .expireAfterWrite(SIZE_TTL_SECONDS, TimeUnit.SECONDS)
+          .build();
+
+  private final AtomicLong requestCount = new AtomicLong();
+  private final AtomicLong fetchedBytes = new AtomicLong();
+
+  /**
+   * @param allowedUrlPrefixes only URLs that start with one of these are read, every prefix must
+   *     contain at least the scheme, the host and the slash that starts the path
+   */
+  public HttpSourceBackend(List<String> allowedUrlPrefixes) {
+    this(allowedUrlPrefixes, DEFAULT_MAX_CONNECTIONS, DEFAULT_BLOCK_SIZE, DEFAULT_TIMEOUT_MS, null);
+  }
+
+  /**
+   * @param allowedUrlPrefixes only URLs that start with one of these are read, every prefix must
+   *     contain at least the scheme, the host and the slash that starts the path
+   * @param maxConnections maximum number of concurrent requests
+   * @param blockSize size of the blocks that remote files are read in
+   * @param timeoutMs connect and read timeout for requests
+   * @param diskCache cache for fetched blocks, can be {@code null}
+   */
+  public HttpSourceBackend(
+      List<String> allowedUrlPrefixes,
+      int maxConnections,
+      int blockSize,
+      int timeoutMs,
+      DiskBlockCache diskCache) {
+    if (allowedUrlPrefixes == null || allowedUrlPrefixes.isEmpty()) {
+      throw new IllegalArgumentException("At least one allowed URL prefix is required");
+    }
+    allowedUrlPrefixes.forEach(HttpSourceBackend::checkPrefix);
+    if (maxConnections <= 0) {
+      throw new IllegalArgumentException("maxConnections must be > 0");
+    }
+    if (blockSize <= 0) {
+      throw new IllegalArgumentException("blockSize must be > 0");
+    }
+    this.allowedUrlPrefixes = ImmutableList.copyOf(allowedUrlPrefixes);
+    this.connections = new Semaphore(maxConnections, true);
+    this.blockSize = blockSize;
+    this.timeoutMs = timeoutMs;
+    this.diskCache = diskCache;
+  }
+
+  /**
+   * Create a backend from the {@code http*} attributes of a plugin configuration.
+   *
+   * @return the backend or {@code null} if no {@code httpAllowedUrlPrefixes} are configured, i.e.
+   *     the backend is disabled
+   * @throws IllegalArgumentException if the configuration is invalid
+   * @throws IOException if the block cache directory could not be created
+   */
+  public static HttpSourceBackend fromConfig(Map<String, String> config) throws IOException {
+    String prefixes = config.get("httpAllowedUrlPrefixes");
+    if (Strings.isNullOrEmpty(prefixes)) {
+      if (config.keySet().stream().anyMatch(k -> k.startsWith("http"))) {
+        throw new IllegalArgumentException(
+            "httpAllowedUrlPrefixes must be set to enable the HTTP backend");
+      }
+      return null;
+    }
+    List<String> allowedUrlPrefixes =
+        Splitter.on(',').trimResults().omitEmptyStrings().splitToList(prefixes);
+    int maxConnections =
+        Integer.parseInt(
+            config.getOrDefault("httpMaxConnections", String.valueOf(DEFAULT_MAX_CONNECTIONS)));
+    int blockSize = Integer.parseInt(config.getOrDefault("httpBlockSizeKiB", "64")) * 1024;
+    int timeoutMs = Integer.parseInt(config.getOrDefault("httpTimeoutSeconds", "10")) * 1000;
+    DiskBlockCache diskCache = null;
+    String cacheDir = config.get("httpCacheDir");
+    if (!Strings.isNullOrEmpty(cacheDir)) {
+      long cacheSize =
+          Long.parseLong(config.getOrDefault("httpCacheSizeMiB", "1024")) * 1024 * 1024;
+      diskCache = new DiskBlockCache(Paths.get(cacheDir), cacheSize);
+    }
+    return new HttpSourceBackend(
+        allowedUrlPrefixes, maxConnections, blockSize, timeoutMs, diskCache);
+  }
+
+  private static void checkPrefix(String prefix) {
+    URI uri;
+    try {
+      uri = new URI(prefix);
+    } catch (URISyntaxException e) {
+      throw new IllegalArgumentException("Invalid allowed URL prefix: " + prefix, e);
+    }
+    boolean isHttp = "http".equals(uri.getScheme()) || "https".equals(uri.getScheme());
+    // Without the slash after the host, 'https://example.com' would also allow
+    // 'https://example.com.evil.org/'
+    if (!isHttp
+        || uri.getHost() == null
+        || uri.getRawUserInfo() != null
+        || uri.getRawPath() == null
+        || !uri.getRawPath().startsWith("/")
+        || uri.getRawQuery() != null
+        || uri.getRawFragment() != null) {
+      throw new IllegalArgumentException(
+          "Allowed URL prefixes must be http(s) URLs with a host and a path (e.g. "
+              + "'https://example.com/ocr/'), got: "
+              + prefix);
+    }
+  }
+
+  @Override
+  public String getName() {
+    return NAME;
+  }
+
+  @Override
+  public boolean handles(String target) {
+    if (!target.startsWith("http://") && !target.startsWith("https://")) {
+      return false;
+    }
+    try {
+      URI uri = new URI(target);
+      // Dot segments could escape the allowed prefix once the server resolves them
+      if (uri.getRawUserInfo() != null || !uri.normalize().toString().equals(target)) {
+        return false;
+      }
+    } catch (URISyntaxException e) {
+      return false;
+    }
+    return allowedUrlPrefixes.stream().anyMatch(target::startsWith);
+  }
+
+  /** Get the size of a remote file, from a recent validation if possible. */
+  long getSize(String target) throws IOException {
+    try {
+      return sizes.get(target, () -> fetchSize(target));
+    } catch (ExecutionException | UncheckedExecutionException e) {
+      if (e.getCause() instanceof IOException) {
+        throw (IOException) e.getCause();
+      }
+      throw new IOException(e.getCause());
+    }
+  }
+
+  @Override
+  public long validateTarget(String target) throws IOException {
+    long size = fetchSize(target);
+    // Readers for the target that are created right after this don't need to check it again
+    sizes.put(target, size);
+    return size;
+  }
+
+  private long fetchSize(String target) throws IOException {
+    if (!handles(target)) {
+      throw new IOException(
+          String.format(Locale.US, "URL %s is not allowed by the HTTP backend.", target));
+    }
+    // A single-byte range request checks for range support and tells us the size of the file
+    HttpURLConnection conn = openConnection(target, 0, 1);
+    acquireConnection();
+    try {
+      int status = conn.getResponseCode();
+      if (status == HttpURLConnection.HTTP_NOT_FOUND || status == HttpURLConnection.HTTP_GONE) {
+        // Missing files are expected, so keep the connection for the next request
+        drainErrorStream(conn);
+        throw new FileNotFoundException(
+            String.format(Locale.US, "File at %s does not exist.", target));
+      } else if (status >= 300 && status < 400) {
+        conn.disconnect();
+        throw new IOException(
+            String.format(
+                Locale.US,
+                "Request to %s was redirected (HTTP %d), redirects are not followed.",
+                target,
+                status));
+      } else if (status == 416) {
+        // Range Not Satisfiable, the only range that can't be satisfied is the one of empty files
+        drainErrorStream(conn);
+        throw new IOException(String.format(Locale.US, "File at %s is empty.", target));
+      } else if (status != HttpURLConnection.HTTP_PARTIAL) {
+        conn.disconnect();
+        throw new IOException(
+            String.format(
+                Locale.US,
+                "Unexpected response for range request to %s: HTTP %d, the server must support "
+                    + "range requests.",
+                target,
+                status));
+      }
+      Matcher m = parseContentRange(conn, target);
+      if (m.group("total").equals("*")) {
+        conn.disconnect();
+        throw new IOException(
+            String.format(Locale.US, "Server did not return the size of the file at %s", target));
+      }
+      try (InputStream is = conn.getInputStream()) {
+        drain(is);
+      }
+      return Long.parseLong(m.group("total"));
+    } finally {
+      connections.release();
+    }
+  }
+
+  @Override
+  public SourceReader getReader(
+      SourcePointer pointer, int sectionSize, int maxCacheEntries, SectionCache sharedCache)
+      throws IOException {
+    return new HttpSourceReader(this, pointer, sectionSize, maxCacheEntries, sharedCache);
+  }
+
+  /** Get the size of the blocks that remote files are read in. */
+  public int getBlockSize() {
+    return blockSize;
+  }
+
+  /** Get the number of range requests issued for reading blocks. */
+  public long getRequestCount() {
+    return requestCount.get();
+  }
+
+  /** Get the number of bytes fetched for reading blocks. */
+  public long getFetchedBytes() {
+    return fetchedBytes.get();
+  }
+
+  /**
+   * Get consecutive blocks of a remote file. Blocks that are not in the disk cache or being fetched
+   * already are fetched with as few requests as possible.
+   *
+   * @param length the size of the remote file in bytes
+   */
+  byte[][] getBlocks(String url, long length, int firstBlock, int numBlocks) throws IOException {
+    byte[][] blocks = new byte[numBlocks][];
+    @SuppressWarnings("unchecked")
+    CompletableFuture<byte[]>[] pending = new CompletableFuture[numBlocks];
+    boolean[] owned = new boolean[numBlocks];
+    for (int i = 0; i < numBlocks; i++) {
+      BlockKey key = new BlockKey(url, length, firstBlock + i);
+      if (diskCache != null) {
+        blocks[i] = diskCache.get(getCacheKey(key));
+        if (blocks[i] != null) {
+          continue;
+        }
+      }
+      CompletableFuture<byte[]> future = new CompletableFuture<>();
+      CompletableFuture<byte[]> existing = inFlight.putIfAbsent(key, future);
+      pending[i] = existing != null ? existing : future;
+      owned[i] = existing == null;
+    }
+
+    try {
+      int runStart = 0;
+      while (runStart < numBlocks) {
+        if (!owned[runStart]) {
+          runStart++;
+          continue;
+        }
+        int runEnd = runStart + 1;
+        while (runEnd < numBlocks && owned[runEnd]) {
+          runEnd++;
+        }
+        fetchBlocks(url, length, firstBlock, runStart, runEnd, pending);
+        runStart = runEnd;
+      }
+    } catch (IOException | RuntimeException e) {
+      // Don't leave concurrent readers waiting for blocks we were supposed to fetch
+      for (int i = 0; i < numBlocks; i++) {
+        if (owned[i] && pending[i].completeExceptionally(e)) {
+          inFlight.remove(new BlockKey(url, length, firstBlock + i), pending[i]);
+        }
+      }
+      throw e;
+    }
+
+    for (int i = 0; i < numBlocks; i++) {
+      if (blocks[i] == null) {
+        blocks[i] = await(pending[i]);
+      }
+    }
+    return blocks;
+  }
+
+  /** Fetch the blocks in {@code [runStart, runEnd)} (relative to firstBlock) with one request. */
+  private void fetchBlocks(
+      String url,
+      long length,
+      int firstBlock,
+      int runStart,
+      int runEnd,
+      CompletableFuture<byte[]>[] pending)
+      throws IOException {
+    long start = (long) (firstBlock + runStart) * blockSize;
+    long end = Math.min(length, (long) (firstBlock + runEnd) * blockSize);
+    byte[] data = fetchRange(url, start, end);
+    for (int i = runStart; i < runEnd; i++) {
+      int offset = (i - runStart) * blockSize;
+      byte[] block = Arrays.copyOfRange(data, offset, Math.min(data.length, offset + blockSize));
+      BlockKey key = new BlockKey(url, length, firstBlock + i);
+      if (diskCache != null) {
+        try {
+          diskCache.put(getCacheKey(key), block);
+        } catch (IOException e) {
+          log.warn("Could not write block {} of {} to the disk cache", key.blockIdx, url, e);
+        }
+      }
+      pending[i].complete(block);
+      inFlight.remove(key, pending[i]);
+    }
+  }
+
+  /** Fetch the bytes in {@code [start, end)} of a remote file. */
+  private byte[] fetchRange(String url, long start, long end) throws IOException {
+    HttpURLConnection conn = openConnection(url, start, end);
+    acquireConnection();
+    try {
+      requestCount.incrementAndGet();
+      int status = conn.getResponseCode();
+      if (status != HttpURLConnection.HTTP_PARTIAL) {
+        conn.disconnect();
+        throw new IOException(
+            String.format(
+                Locale.US,
+                "Range request for bytes %d-%d of %s failed with HTTP %d",
+                start,
+                end - 1,
+                url,
+                status));
+      }
+      Matcher m = parseContentRange(conn, url);
+      if (Long.parseLong(m.group("start")) != start) {
+        conn.disconnect();
+        throw new IOException(
+            String.format(
+                Locale.US, "Server returned the wrong range for %s: %s", url, m.group(0)));
+      }
+      byte[] data = new byte[(int) (end - start)];
+      try (InputStream is = conn.getInputStream()) {
+        int numRead = 0;
+        while (numRead < data.length) {
+          int n = is.read(data, numRead, data.length - numRead);
+          if (n < 0) {
+            throw new IOException(
+                String.format(
+                    Locale.US,
+                    "Response for bytes %d-%d of %s ended after %d bytes, did the file change?",
+                    start,
+                    end - 1,
+                    url,
+                    numRead));
+          }
+          numRead += n;
+        }
+        // Consume any remaining bytes, so the connection can be reused
+        drain(is);
+      }
+      fetchedBytes.addAndGet(data.length);
+      return data;
+    } finally {
+      connections.release();
+    }
+  }
+
+  private HttpURLConnection openConnection(String url, long start, long end) throws IOException {
+    HttpURLConnection conn = (HttpURLConnection) new URL(url).openConnection();
+    conn.setInstanceFollowRedirects(false);
+    conn.setConnectTimeout(timeoutMs);
+    conn.setReadTimeout(timeoutMs);
+    conn.setRequestProperty("Range", String.format(Locale.US, "bytes=%d-%d", start, end - 1));
+    return conn;
+  }
+
+  private void acquireConnection() throws IOException {
+    try {
+      connections.acquire();
+    } catch (InterruptedException e) {
+      Thread.currentThread().interrupt();
+      throw new InterruptedIOException("Interrupted while waiting for a connection");
+    }
+  }
+
+  private static Matcher parseContentRange(HttpURLConnection conn, String url) throws IOException {
+    String contentRange = conn.getHeaderField("Content-Range");
+    Matcher m = contentRange == null ? null : CONTENT_RANGE_PAT.matcher(contentRange);
+    if (m == null || !m.matches()) {
+      conn.disconnect();
+      throw new IOException(
+          String.format(
+              Locale.US, "Invalid Content-Range in response for %s: %s", url, contentRange));
+    }
+    return m;
+  }
+
+  private static void drain(InputStream is) throws IOException {
+    byte[] buf = new byte[512];
+    while (is.read(buf) >= 0) {
+      // Discard
+    }
+  }
+
+  /** Consume the body of an error response so the connection can be reused, or close it. */
+  private static void drainErrorStream(HttpURLConnection conn) {
+    try (InputStream is = conn.getErrorStream()) {
+      if (is != null) {
+        drain(is);
+      }
+    } catch (IOException e) {
+      conn.disconnect();
+    }
+  }
+
+  private String getCacheKey(BlockKey key) {
+    return String.format(Locale.US, "%s\n%d\n%d\n%d", key.url, key.length, blockSize, key.blockIdx);
+  }
+
+  private static byte[] await(CompletableFuture<byte[]> future) throws IOException {
+    try {
+      return future.get();
+    } catch (InterruptedException e) {
+      Thread.currentThread().interrupt();
+      throw new InterruptedIOException("Interrupted while waiting for a block");
+    } catch (ExecutionException e) {
+      if (e.getCause() instanceof IOException) {
+        throw new IOException(e.getCause().getMessage(), e.getCause());
+      }
+      throw new IOException(e.getCause());
+    }
+  }
+}
@@ -0,0 +1,156 @@
+package com.github.dbmdz.solrocr.reader;
+
+import com.github.dbmdz.solrocr.model.SourcePointer;
+import java.io.IOException;
+import java.nio.ByteBuffer;
+import java.util.Arrays;
+
+/**
+ * Reads from one or more files served over HTTP, see {@link HttpSourceBackend}.
+ *
+ * <p>Like {@link MultiFileSourceReader}, the files are treated as a single, concatenated source.
+ * The sizes of the files are looked up when the reader is created, since pointers to remote files
+ * are parsed without accessing them. The most recently read blocks of the files are kept, since
+ * consecutive sections of a reader usually fall into the same block.
+ */
+public class HttpSourceReader extends BaseSourceReader {
+  /** Number of blocks that are kept */
+  private static final int NUM_CACHED_BLOCKS = 8;
+
+  private final HttpSourceBackend backend;
+  private final String[] urls;
+  private final long[] sizes;
+  private final int[] startOffsets;
+  private final int length;
+
+  /** Keys of the cached blocks, file index in the upper and block index in the lower 32 bits */
+  private final long[] cachedKeys = new long[NUM_CACHED_BLOCKS];
+
+  private final byte[][] cachedBlocks = new byte[NUM_CACHED_BLOCKS][];
+  private int nextCacheSlot = 0;
+
+  public HttpSourceReader(
+      HttpSourceBackend backend,
+      SourcePointer pointer,
+      int sectionSize,
+      int maxCacheEntries,
+      SectionCache sharedCache)
+      throws IOException {
+    super(pointer, sectionSize, maxCacheEntries, sharedCache);
+    this.backend = backend;
+    this.urls = pointer.sources.stream().map(s -> s.target).toArray(String[]::new);
+    this.sizes = new long[urls.length];
+    this.startOffsets = new int[urls.length];
+    long offset = 0;
+    for (int i = 0; i < urls.length; i++) {
+      startOffsets[i] = (int) offset;
+      sizes[i] = backend.getSize(urls[i]);
+      offset += sizes[i];
+    }
+    this.length = (int) offset;
+  }
+
+  @Override
+  public int readBytes(ByteBuffer dst, int start) throws IOException {
+    if (start >= length) {
+      return -1;
+    }
+    int blockSize = backend.getBlockSize();
+    int numRead = 0;
+    int position = start;
+    while (dst.hasRemaining() && position < length) {
+      int fileIdx = getFileIndex(position);
+      long offsetInFile = position - startOffsets[fileIdx];
+      int len = (int) Math.min(dst.remaining(), sizes[fileIdx] - offsetInFile);
+      int firstBlock = (int) (offsetInFile / blockSize);
+      int lastBlock = (int) ((offsetInFile + len - 1) / blockSize);
+      byte[][] blocks = getBlocks(fileIdx, firstBlock, lastBlock - firstBlock + 1);
+      int offsetInBlock = (int) (offsetInFile - (long) firstBlock * blockSize);
+      for (byte[] block : blocks) {
+        int n = Math.min(len, block.length - offsetInBlock);
+        dst.put(block, offsetInBlock, n);
+        len -= n;
+        numRead += n;
+        position += n;
+        offsetInBlock = 0;
+      }
+    }
+    return numRead;
+  }
+
+  private int getFileIndex(int offset) {
+    // Sources are never empty, so start offsets are unique
+    int idx = Arrays.binarySearch(startOffsets, offset);
+    return idx >= 0 ? idx : -idx - 2;
+  }
+
+  /** Get consecutive blocks of a file, only the ones we don't have are fetched from the backend */
+  private byte[][] getBlocks(int fileIdx, int firstBlock, int numBlocks) throws IOException {
+    byte[][] blocks = new byte[numBlocks][];
+    int firstMissing = -1;
+    int lastMissing = -1;
+    synchronized (cachedBlocks) {
+      for (int i = 0; i < numBlocks; i++) {
+        blocks[i] = getCachedBlock(getBlockKey(fileIdx, firstBlock + i));
+        if (blocks[i] == null) {
+          if (firstMissing < 0) {
+            firstMissing = i;
+          }
+          lastMissing = i;
+        }
+      }
+    }
+    if (firstMissing < 0) {
+      return blocks;
+    }
+    int numMissing = lastMissing - firstMissing + 1;
+    byte[][] fetched =
+        backend.getBlocks(urls[fileIdx], sizes[fileIdx], firstBlock + firstMissing, numMissing);
+    synchronized (cachedBlocks) {
+      for (int i = 0; i < fetched.length; i++) {
+        blocks[firstMissing + i] = fetched[i];
+        cachedKeys[nextCacheSlot] = getBlockKey(fileIdx, firstBlock + firstMissing + i);
+        cachedBlocks[nextCacheSlot] = fetched[i];
+        nextCacheSlot = (nextCacheSlot + 1) % NUM_CACHED_BLOCKS;
+      }
+    }
+    return blocks;
+  }
+
+  private byte[] getCachedBlock(long key) {
+    for (int i = 0; i < NUM_CACHED_BLOCKS; i++) {
+      if (cachedBlocks[i] != null && cachedKeys[i] == key) {
+        return cachedBlocks[i];
+      }
+    }
+    return null;
+  }
+
+  private static long getBlockKey(int fileIdx, int blockIdx) {
+    return ((long) fileIdx << 32) | blockIdx;
+  }
+
+  @Override
+  public int length() {
+    return length;
+  }
+
+  @Override
+  public void close() {
+    synchronized (cachedBlocks) {
+      Arrays.fill(cachedBlocks, null);
+    }
+  }
+
+  @Override
+  protected Object getSourceIdentity() {
+    // Sizes were determined when the reader was created, changed files with a different size will
+    // thus get a different identity once their size is looked up again
+    return getIdentifier() + "@" + Arrays.toString(sizes);
+  }
+
+  @Override
+  public String getIdentifier() {
+    return String.join("+", urls);
+  }
+}
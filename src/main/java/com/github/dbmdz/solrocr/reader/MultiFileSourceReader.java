@@ -2,6 +2,8 @@ package com.github.dbmdz.solrocr.reader;
 
 import com.github.dbmdz.solrocr.model.SourcePointer;
 import com.github.dbmdz.solrocr.util.ArrayUtils;
+import com.google.common.collect.ImmutableList;
+import java.io.EOFException;
 import java.io.IOException;
 import java.lang.invoke.MethodHandles;
 import java.nio.ByteBuffer;
@@ -11,6 +13,7 @@ import java.nio.file.Path;
 import java.nio.file.StandardOpenOption;
 import java.util.Arrays;
 import java.util.List;
+import java.util.Locale;
 import java.util.stream.Collectors;
 import org.slf4j.Logger;
 import org.slf4j.LoggerFactory;
@@ -18,6 +21,9 @@ import org.slf4j.LoggerFactory;
 /**
  * Reads from multiple file sources, treating them as a single large chunk of data, using a {@link
  * FileChannel}.
+ *
+ * <p>Files can be BGZF-compressed (see {@link BgzfIndex}), in which case the uncompressed data of
+ * the file is part of the concatenation.
  */
 public class MultiFileSourceReader extends BaseSourceReader {
   private static final Logger log = LoggerFactory.getLogger(MethodHandles.lookup().lookupClass());
@@ -25,46 +31,103 @@ public class MultiFileSourceReader extends BaseSourceReader {
   /** A single file that has been opened, responsible for a subsection of the concattenated data */
   private static final class OpenFile {
     private final FileChannel channel;
+    private final FileChannelPool.Lease lease;
+    /** Uncompressed view of the file if it is BGZF-compressed, null otherwise */
+    private final BgzfFile bgzf;
     final int startOffset;
     final Path path;
 
-    private OpenFile(Path p, int startOffset) throws IOException {
+    private OpenFile(Path p, BgzfIndex blockIndex, int startOffset, FileChannelPool channelPool)
+        throws IOException {
       this.path = p;
-      channel = FileChannel.open(p, StandardOpenOption.READ);
+      if (channelPool != null) {
+        this.lease = channelPool.acquire(p);
+        this.channel = lease.channel();
+      } else {
+        this.lease = null;
+        this.channel = FileChannel.open(p, StandardOpenOption.READ);
+      }
+      this.bgzf = blockIndex == null ? null : new BgzfFile(channel, blockIndex);
       this.startOffset = startOffset;
     }
 
     public int read(ByteBuffer dst, int start) throws IOException {
+      if (this.bgzf != null) {
+        return this.bgzf.read(dst, start);
+      }
       return this.channel.read(dst, start);
     }
 
     public void close() throws IOException {
-      this.channel.close();
+      if (this.lease != null) {
+        this.lease.close();
+      } else {
+        this.channel.close();
+      }
     }
   }
 
   private final Path[] paths;
+  /** Block indexes of the BGZF-compressed files, null for uncompressed files */
+  private final BgzfIndex[] blockIndexes;
+
+  private final FileChannelPool channelPool;
   private final OpenFile[] openFiles;
   private final int[] startOffsets;
   private final int numBytes;
 
   public MultiFileSourceReader(
       List<Path> paths, SourcePointer ptr, int sectionSize, int maxCacheEntries) {
-    super(ptr, sectionSize, maxCacheEntries);
+    this(paths, ptr, sectionSize, maxCacheEntries, null);
+  }
+
+  public MultiFileSourceReader(
+      List<Path> paths,
+      SourcePointer ptr,
+      int sectionSize,
+      int maxCacheEntries,
+      SectionCache sharedCache) {
+    this(paths, ptr, sectionSize, maxCacheEntries, sharedCache, null);
+  }
+
+  public MultiFileSourceReader(
+      List<Path> paths,
+      SourcePointer ptr,
+      int sectionSize,
+      int maxCacheEntries,
+      SectionCache sharedCache,
+      FileChannelPool channelPool) {
+    super(ptr, sectionSize, maxCacheEntries, sharedCache);
     this.paths = paths.toArray(new Path[0]);
+    this.channelPool = channelPool;
     this.openFiles = new OpenFile[paths.size()];
-    this.startOffsets = new int[paths.size()];
-    int offset = 0;
-    try {
+    this.blockIndexes = new BgzfIndex[paths.size()];
+    if (ptr != null && ptr.sources.size() == paths.size()) {
+      // File sizes were determined when the pointer was parsed, no need to stat the files again
+      this.startOffsets = ptr.getStartOffsets();
+      this.numBytes = (int) ptr.getLength();
       for (int i = 0; i < paths.size(); i++) {
-        startOffsets[i] = offset;
-        offset += (int) Files.size(this.paths[i]);
+        blockIndexes[i] = ptr.sources.get(i).blockIndex;
+      }
+    } else {
+      this.startOffsets = new int[paths.size()];
+      int offset = 0;
+      try {
+        for (int i = 0; i < paths.size(); i++) {
+          startOffsets[i] = offset;
+          if (BgzfIndex.isBgzfTarget(this.paths[i].toString())) {
+            blockIndexes[i] = BgzfIndex.load(this.paths[i]);
+            offset += (int) blockIndexes[i].getLength();
+          } else {
+            offset += (int) Files.size(this.paths[i]);
+          }
+        }
+      } catch (IOException e) {
+        // Should've been caught by SourcePointer validation
+        throw new RuntimeException(e);
       }
-    } catch (IOException e) {
-      // Should've been caught by SourcePointer validation
-      throw new RuntimeException(e);
+      this.numBytes = offset;
     }
-    this.numBytes = offset;
   }
 
   @Override
@@ -74,37 +137,76 @@ public class MultiFileSourceReader extends BaseSourceReader {
       throw new RuntimeException(String.format("Offset %d is out of bounds", start));
     }
     int fileOffset = startOffsets[fileIdx];
-    if (openFiles[fileIdx] == null) {
-      openFiles[fileIdx] = new OpenFile(paths[fileIdx], fileOffset);
-    }
-    OpenFile file = openFiles[fileIdx];
+    OpenFile file = getOpenFile(fileIdx, fileOffset);
 
     int len = dst.remaining();
     int numRead = 0;
     while (numRead < len) {
-      numRead += file.read(dst, (start + numRead) - fileOffset);
+      int n = file.read(dst, (start + numRead) - fileOffset);
+      if (n < 0) {
+        throw new EOFException(
+            String.format(
+                Locale.US, "Unexpected end of %s at offset %d", file.path, start + numRead));
+      }
+      numRead += n;
       if (numRead < len) {
         fileIdx++;
         if (fileIdx >= paths.length) {
           break;
         }
-        if (openFiles[fileIdx] == null) {
-          openFiles[fileIdx] = new OpenFile(paths[fileIdx], start + numRead);
-        }
-        file = openFiles[fileIdx];
+        file = getOpenFile(fileIdx, start + numRead);
         fileOffset = startOffsets[fileIdx];
       }
     }
     return numRead;
   }
 
+  /**
+   * Get the opened file at the given index, opening it if necessary. Synchronized since reads can
+   * happen concurrently during prefetching.
+   *
+   * <p>The offsets of the files are based on the sizes recorded in the (possibly cached) pointer,
+   * so the size of every uncompressed file is checked against the opened file. On a mismatch, the
+   * pointer is marked as stale, so it is parsed again on the next request.
+   */
+  private synchronized OpenFile getOpenFile(int fileIdx, int startOffset) throws IOException {
+    if (openFiles[fileIdx] == null) {
+      OpenFile file = new OpenFile(paths[fileIdx], blockIndexes[fileIdx], startOffset, channelPool);
+      if (file.bgzf == null) {
+        long expectedSize =
+            (fileIdx + 1 < startOffsets.length ? startOffsets[fileIdx + 1] : numBytes)
+                - startOffsets[fileIdx];
+        long actualSize = file.channel.size();
+        if (actualSize != expectedSize) {
+          file.close();
+          if (pointer != null) {
+            pointer.markStale();
+          }
+          throw new IOException(
+              String.format(
+                  Locale.US,
+                  "File at %s changed while it was read, expected %d bytes, but it has %d bytes.",
+                  paths[fileIdx],
+                  expectedSize,
+                  actualSize));
+        }
+      }
+      openFiles[fileIdx] = file;
+    }
+    return openFiles[fileIdx];
+  }
+
+  private synchronized OpenFile getOpenFileIfPresent(int fileIdx) {
+    return openFiles[fileIdx];
+  }
+
   @Override
   public int length() {
     return this.numBytes;
   }
 
   @Override
-  public void close() throws IOException {
+  public synchronized void close() throws IOException {
     for (OpenFile file : openFiles) {
       if (file == null) {
         continue;
@@ -117,6 +219,24 @@ public class MultiFileSourceReader extends BaseSourceReader {
     }
   }
 
+  @Override
+  protected Object getSourceIdentity() throws IOException {
+    // Sections can span file boundaries, so the identity of the source is that of all its files.
+    // With a pool, files are only stat'ed if they weren't validated by the pool recently.
+    ImmutableList.Builder<FileIdentity> identities = ImmutableList.builder();
+    for (int i = 0; i < paths.length; i++) {
+      OpenFile file = getOpenFileIfPresent(i);
+      if (file != null && file.lease != null) {
+        identities.add(file.lease.identity());
+      } else if (channelPool != null) {
+        identities.add(channelPool.getIdentity(paths[i]));
+      } else {
+        identities.add(FileIdentity.of(paths[i]));
+      }
+    }
+    return identities.build();
+  }
+
   @Override
   public String getIdentifier() {
     return String.format(
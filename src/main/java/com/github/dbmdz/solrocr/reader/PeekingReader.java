@@ -14,11 +14,14 @@ public class PeekingReader extends BaseCharFilter implements SourceAwareReader {
   /** Buffer to hold the beginning of the input reader. */
   private final char[] peekStart;
 
+  /** Number of characters from the beginning of the input reader in the peek buffer */
+  private final int peekStartLength;
+
   /** How much of the input buffer has been re-used for writing out data via `read` */
   private int peekStartOffset = 0;
 
   /** Buffer to hold the back context accumulated from previous reads. */
-  private char[] backContext;
+  private final char[] backContext;
 
   /** Offset in the input reader. */
   private long inputOffset = 0;
@@ -34,24 +37,38 @@ public class PeekingReader extends BaseCharFilter implements SourceAwareReader {
    * @param maxBackContextSize number of characters to buffer from previous reads
    */
   public PeekingReader(Reader in, int beginPeekSize, int maxBackContextSize) {
+    this(in, new char[beginPeekSize], new char[maxBackContextSize]);
+  }
+
+  /**
+   * Construct a new peeking reader that uses the given buffers.
+   *
+   * <p>This allows re-using the buffers across multiple inputs, as long as the readers they were
+   * previously passed to are no longer used.
+   *
+   * @param in input Reader instance
+   * @param peekBuffer buffer for the beginning of the string, its size determines how many
+   *     characters can be peeked at
+   * @param backContextBuffer buffer for the context from previous reads, its size determines the
+   *     maximum size of the back context
+   */
+  public PeekingReader(Reader in, char[] peekBuffer, char[] backContextBuffer) {
     super(in);
     try {
       // Set up the beginning peek buffer
-      char[] buf = new char[beginPeekSize];
-      int numRead = this.input.read(buf, 0, beginPeekSize);
-      if (numRead < beginPeekSize) {
-        // If the input reader has less characters than the requested start peek buffer, use a
-        // smaller buffer
-        this.peekStart = new char[Math.max(0, numRead)];
-        if (numRead > 0) {
-          System.arraycopy(buf, 0, this.peekStart, 0, numRead);
+      int numRead = 0;
+      while (numRead < peekBuffer.length) {
+        int r = this.input.read(peekBuffer, numRead, peekBuffer.length - numRead);
+        if (r < 0) {
+          break;
         }
-      } else {
-        this.peekStart = buf;
+        numRead += r;
       }
+      this.peekStart = peekBuffer;
+      this.peekStartLength = numRead;
 
       // Set up the back context
-      this.backContext = new char[maxBackContextSize];
+      this.backContext = backContextBuffer;
     } catch (IOException e) {
       throw new RuntimeException(e);
     }
@@ -62,14 +79,14 @@ public class PeekingReader extends BaseCharFilter implements SourceAwareReader {
     int numRead = 0;
     int writeOff = off;
     // Empty start peek-buffer first
-    if (peekStartOffset < peekStart.length) {
-      int restLen = Math.min(peekStart.length - peekStartOffset, len);
+    if (peekStartOffset < peekStartLength) {
+      int restLen = Math.min(peekStartLength - peekStartOffset, len);
       System.arraycopy(peekStart, peekStartOffset, cbuf, writeOff, restLen);
       numRead += restLen;
       writeOff += numRead;
       peekStartOffset += numRead;
     }
-    if (peekStartOffset == peekStart.length && len > numRead) {
+    if (peekStartOffset == peekStartLength && len > numRead) {
       int r = this.input.read(cbuf, writeOff, len - numRead);
       if (numRead == 0 || r > 0) {
         numRead += r;
@@ -97,15 +114,13 @@ public class PeekingReader extends BaseCharFilter implements SourceAwareReader {
       System.arraycopy(cbuf, srcOffset, this.backContext, dstOffset, copyLen);
       this.backContextSize = Math.min(ctxFillLen + copyLen, ctxLen);
     } else {
-      // Shift back context
-      char[] newContext = new char[ctxLen];
+      // Shift back context in place, System.arraycopy handles the overlap
       // How much to copy over from the old context
       int srcLen = ctxLen - numRead;
       // Copy over old context starting from where?
       int srcOff = ctxFillLen - srcLen;
-      System.arraycopy(this.backContext, srcOff, newContext, 0, srcLen);
-      System.arraycopy(cbuf, off, newContext, srcLen, numRead);
-      this.backContext = newContext;
+      System.arraycopy(this.backContext, srcOff, this.backContext, 0, srcLen);
+      System.arraycopy(cbuf, off, this.backContext, srcLen, numRead);
       this.backContextSize = ctxLen;
     }
     inputOffset += numRead;
@@ -114,7 +129,7 @@ public class PeekingReader extends BaseCharFilter implements SourceAwareReader {
 
   /** Peek into the beginning of the input reader without affecting the current reader position. */
   public String peekBeginning() {
-    return new String(peekStart);
+    return new String(peekStart, 0, peekStartLength);
   }
 
   /**
@@ -0,0 +1,213 @@
+package com.github.dbmdz.solrocr.reader;
+
+import com.github.dbmdz.solrocr.model.SourcePointer.Region;
+import java.io.IOException;
+import java.io.InterruptedIOException;
+import java.io.UncheckedIOException;
+import java.nio.ByteBuffer;
+import java.nio.channels.SeekableByteChannel;
+import java.util.ArrayDeque;
+import java.util.ArrayList;
+import java.util.List;
+import java.util.Locale;
+import java.util.concurrent.CompletableFuture;
+import java.util.concurrent.ExecutionException;
+import java.util.concurrent.Executor;
+
+/**
+ * Read-only channel for a {@link SourceReader} that reads the regions that are going to be consumed
+ * next in the background.
+ *
+ * <p>Used during indexing, where the regions of a pointer are consumed sequentially: the regions
+ * are split into chunks and up to a fixed number of chunks after the current position are read on
+ * an executor, so the latency of opening and reading the next files of a multi-file pointer
+ * overlaps with the decoding and tokenization of the current one. Reads outside of the planned
+ * chunks (e.g. by a decoder reading past the end of a region) go to the reader directly.
+ */
+public class ReadAheadChannel implements SeekableByteChannel {
+  private static final class Chunk {
+    final int start;
+    final int end;
+    final CompletableFuture<byte[]> data;
+
+    Chunk(int start, int end, CompletableFuture<byte[]> data) {
+      this.start = start;
+      this.end = end;
+      this.data = data;
+    }
+  }
+
+  private final SourceReader reader;
+  private final Executor executor;
+  private final int maxChunksAhead;
+
+  /** Start and end offsets of all chunks, in the order they are consumed */
+  private final int[] chunkStarts;
+
+  private final int[] chunkEnds;
+
+  /** Index of the next chunk that has not been scheduled yet */
+  private int nextChunk = 0;
+
+  private final ArrayDeque<Chunk> scheduled = new ArrayDeque<>();
+  private int position = 0;
+  private boolean closed = false;
+
+  /**
+   * @param reader to read from, closed when the channel is closed
+   * @param regions regions that will be consumed, in the order they will be consumed, with offsets
+   *     relative to the start of the reader's data and resolved end offsets
+   * @param chunkSize maximum size of the chunks that are read in the background
+   * @param maxChunksAhead maximum number of chunks that are read ahead of the current position
+   * @param executor to issue the background reads on
+   */
+  public ReadAheadChannel(
+      SourceReader reader,
+      List<Region> regions,
+      int chunkSize,
+      int maxChunksAhead,
+      Executor executor) {
+    if (chunkSize <= 0 || maxChunksAhead <= 0) {
+      throw new IllegalArgumentException("chunkSize and maxChunksAhead must be > 0");
+    }
+    this.reader = reader;
+    this.executor = executor;
+    this.maxChunksAhead = maxChunksAhead;
+    List<int[]> chunks = new ArrayList<>();
+    for (Region region : regions) {
+      for (int start = region.start; start < region.end; start += chunkSize) {
+        chunks.add(new int[] {start, Math.min(region.end, start + chunkSize)});
+      }
+    }
+    this.chunkStarts = chunks.stream().mapToInt(c -> c[0]).toArray();
+    this.chunkEnds = chunks.stream().mapToInt(c -> c[1]).toArray();
+    scheduleChunks();
+  }
+
+  /** Drop the chunks that are behind the current position and schedule reads for the next ones */
+  private void scheduleChunks() {
+    while (!scheduled.isEmpty() && scheduled.peekFirst().end <= position) {
+      scheduled.removeFirst();
+    }
+    while (nextChunk < chunkStarts.length && chunkEnds[nextChunk] <= position) {
+      nextChunk++;
+    }
+    while (scheduled.size() < maxChunksAhead && nextChunk < chunkStarts.length) {
+      int start = chunkStarts[nextChunk];
+      int end = chunkEnds[nextChunk];
+      CompletableFuture<byte[]> data =
+          CompletableFuture.supplyAsync(() -> readChunk(start, end), executor);
+      scheduled.addLast(new Chunk(start, end, data));
+      nextChunk++;
+    }
+  }
+
+  private byte[] readChunk(int start, int end) {
+    byte[] data = new byte[end - start];
+    try {
+      int numRead = 0;
+      while (numRead < data.length) {
+        int n = reader.readBytes(data, numRead, start + numRead, data.length - numRead);
+        if (n <= 0) {
+          throw new IOException(
+              String.format(
+                  Locale.US,
+                  "Unexpected end of data at offset %d in %s",
+                  start + numRead,
+                  reader.getIdentifier()));
+        }
+        numRead += n;
+      }
+    } catch (IOException e) {
+      throw new UncheckedIOException(e);
+    }
+    return data;
+  }
+
+  @Override
+  public int read(ByteBuffer dst) throws IOException {
+    if (!dst.hasRemaining()) {
+      return 0;
+    }
+    if (position >= reader.length()) {
+      return -1;
+    }
+    scheduleChunks();
+    Chunk chunk = scheduled.peekFirst();
+    if (chunk == null || position < chunk.start) {
+      int numRead = reader.readBytes(dst, position);
+      if (numRead > 0) {
+        position += numRead;
+      }
+      return numRead;
+    }
+    byte[] data = await(chunk.data);
+    int len = Math.min(dst.remaining(), chunk.end - position);
+    dst.put(data, position - chunk.start, len);
+    position += len;
+    return len;
+  }
+
+  private static byte[] await(CompletableFuture<byte[]> future) throws IOException {
+    try {
+      return future.get();
+    } catch (InterruptedException e) {
+      Thread.currentThread().interrupt();
+      throw new InterruptedIOException("Interrupted while waiting for read-ahead");
+    } catch (ExecutionException e) {
+      if (e.getCause() instanceof UncheckedIOException) {
+        throw ((UncheckedIOException) e.getCause()).getCause();
+      }
+      throw new IOException(e.getCause());
+    }
+  }
+
+  @Override
+  public int write(ByteBuffer src) {
+    throw new UnsupportedOperationException("Channel is read-only");
+  }
+
+  @Override
+  public long position() {
+    return position;
+  }
+
+  @Override
+  public SeekableByteChannel position(long newPosition) {
+    this.position = (int) newPosition;
+    return this;
+  }
+
+  @Override
+  public long size() throws IOException {
+    return reader.length();
+  }
+
+  @Override
+  public SeekableByteChannel truncate(long size) {
+    throw new UnsupportedOperationException("Channel is read-only");
+  }
+
+  @Override
+  public boolean isOpen() {
+    return !closed;
+  }
+
+  @Override
+  public void close() throws IOException {
+    if (closed) {
+      return;
+    }
+    closed = true;
+    // Reads that are still running could otherwise reopen files of the closed reader
+    for (Chunk chunk : scheduled) {
+      try {
+        chunk.data.join();
+      } catch (RuntimeException e) {
+        // Nobody is interested in the data anymore
+      }
+    }
+    scheduled.clear();
+    reader.close();
+  }
+}
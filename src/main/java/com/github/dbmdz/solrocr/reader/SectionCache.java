@@ -0,0 +1,124 @@
+package com.github.dbmdz.solrocr.reader;
+
+import com.github.dbmdz.solrocr.reader.SourceReader.ByteSection;
+import com.google.common.cache.Cache;
+import com.google.common.cache.CacheBuilder;
+import com.google.common.cache.CacheStats;
+import com.google.common.cache.Weigher;
+import java.util.Objects;
+
+/**
+ * Cache for sections read from OCR sources that is shared across readers and requests.
+ *
+ * <p>Every {@link BaseSourceReader} has a small private cache of sections that lives only as long
+ * as the reader. This cache sits behind those, so that sections of frequently requested sources
+ * don't need to be read and decoded again for every request.
+ *
+ * <p>Sections are keyed by the identity of their source (see {@link FileIdentity}) and their index
+ * in the source, so modified files never result in stale cache hits. The cache is bounded by the
+ * total size of the cached sections, the least recently used sections are evicted first.
+ */
+public class SectionCache {
+  /** Rough estimate of the per-entry memory overhead (key, section and map entry objects) */
+  private static final int ENTRY_OVERHEAD_BYTES = 96;
+
+  private static final Weigher<Key, ByteSection> WEIGHER =
+      (key, section) -> section.length() + ENTRY_OVERHEAD_BYTES;
+
+  private final Cache<Key, ByteSection> cache;
+  private final long maxSizeBytes;
+
+  public SectionCache(long maxSizeBytes) {
+    if (maxSizeBytes <= 0) {
+      throw new IllegalArgumentException("maxSizeBytes must be > 0");
+    }
+    this.maxSizeBytes = maxSizeBytes;
+    this.cache =
+        CacheBuilder.newBuilder().maximumWeight(maxSizeBytes).weigher(WEIGHER).recordStats().build();
+  }
+
+  /**
+   * Get the cached section with the given index for the source, or {@code null} if it's not in the
+   * cache.
+   */
+  public ByteSection get(Object sourceIdentity, int sectionSize, int sectionIdx) {
+    return cache.getIfPresent(new Key(sourceIdentity, sectionSize, sectionIdx));
+  }
+
+  /** Add a section with the given index for the source to the cache. */
+  public void put(Object sourceIdentity, int sectionSize, int sectionIdx, ByteSection section) {
+    cache.put(new Key(sourceIdentity, sectionSize, sectionIdx), section);
+  }
+
+  /** Remove all sections from the cache. */
+  public void clear() {
+    cache.invalidateAll();
+  }
+
+  public long getHitCount() {
+    return cache.stats().hitCount();
+  }
+
+  public long getMissCount() {
+    return cache.stats().missCount();
+  }
+
+  public long getEvictionCount() {
+    return cache.stats().evictionCount();
+  }
+
+  public double getHitRatio() {
+    CacheStats stats = cache.stats();
+    return stats.requestCount() == 0 ? 0 : stats.hitRate();
+  }
+
+  /** Get the number of sections currently in the cache */
+  public long getNumEntries() {
+    return cache.size();
+  }
+
+  public long getMaxSizeBytes() {
+    return maxSizeBytes;
+  }
+
+  @Override
+  public String toString() {
+    return "SectionCache{"
+        + "maxSizeBytes="
+        + maxSizeBytes
+        + ", numEntries="
+        + getNumEntries()
+        + ", stats="
+        + cache.stats()
+        + '}';
+  }
+
+  private static final class Key {
+    private final Object sourceIdentity;
+    private final int sectionSize;
+    private final int sectionIdx;
+    private final int hash;
+
+    private Key(Object sourceIdentity, int sectionSize, int sectionIdx) {
+      this.sourceIdentity = Objects.requireNonNull(sourceIdentity);
+      this.sectionSize = sectionSize;
+      this.sectionIdx = sectionIdx;
+      this.hash = Objects.hash(sourceIdentity, sectionSize, sectionIdx);
+    }
+
+    @Override
+    public boolean equals(Object o) {
+      if (this == o) return true;
+      if (o == null || getClass() != o.getClass()) return false;
+      Key key = (Key) o;
+      return sectionSize == key.sectionSize
+          && sectionIdx == key.sectionIdx
+          && sourceIdentity.equals(key.sourceIdentity);
+    }
+
+    @Override
+    public int hashCode() {
+      return hash;
+    }
+  }
+}
@@ -0,0 +1,208 @@
+package com.github.dbmdz.solrocr.reader;
+
+import com.github.dbmdz.solrocr.reader.SourceReader.ByteSection;
+import java.util.Arrays;
+
+/**
+ * Small, bounded LRU cache for the sections of a single source, keyed by section index.
+ *
+ * <p>All state lives in a handful of arrays sized by the number of cache entries, not by the number
+ * of sections in the source, so the memory footprint and the cost of lookups and evictions are
+ * independent of the size of the source. Sections are stored in a fixed number of slots, which are
+ * linked into a doubly linked recency list via {@code prev}/{@code next} index arrays. A linear
+ * probing hash table maps section indexes to slots. The arrays are only allocated once the first
+ * section is added.
+ *
+ * <p>Not thread-safe, like the readers it is used by.
+ */
+final class SectionLruCache {
+  private static final int NONE = -1;
+
+  private final int capacity;
+
+  /** Section index for every slot */
+  private int[] keys;
+
+  /** Cached section for every slot */
+  private ByteSection[] sections;
+
+  /** Next more recently used slot, or {@link #NONE} for the most recently used slot */
+  private int[] newer;
+
+  /** Next less recently used slot, or {@link #NONE} for the least recently used slot */
+  private int[] older;
+
+  /** Open addressing table from section index to slot (stored as {@code slot + 1}, 0 is empty) */
+  private int[] table;
+
+  private int tableMask;
+  private int size = 0;
+  private int newest = NONE;
+  private int oldest = NONE;
+
+  SectionLruCache(int capacity) {
+    this.capacity = Math.max(0, capacity);
+  }
+
+  /** Get the section with the given index and mark it as most recently used, or null. */
+  ByteSection get(int sectionIdx) {
+    int slot = findSlot(sectionIdx);
+    if (slot == NONE) {
+      return null;
+    }
+    moveToNewest(slot);
+    return sections[slot];
+  }
+
+  /** Check if the section with the given index is cached, without updating the recency order. */
+  boolean contains(int sectionIdx) {
+    return findSlot(sectionIdx) != NONE;
+  }
+
+  /**
+   * Add a section with the given index that is not yet in the cache, evicting the least recently
+   * used section if the cache is full.
+   */
+  void put(int sectionIdx, ByteSection section) {
+    if (capacity == 0) {
+      return;
+    }
+    if (keys == null) {
+      allocate();
+    }
+    int slot;
+    if (size < capacity) {
+      slot = size++;
+    } else {
+      slot = oldest;
+      removeFromTable(keys[slot]);
+      unlink(slot);
+    }
+    keys[slot] = sectionIdx;
+    sections[slot] = section;
+    insertIntoTable(sectionIdx, slot);
+    linkAsNewest(slot);
+  }
+
+  /** Get the maximum number of cached sections */
+  int capacity() {
+    return capacity;
+  }
+
+  /** Get the number of cached sections */
+  int size() {
+    return size;
+  }
+
+  /** Get the indexes of all cached sections, ordered from most to least recently used. */
+  int[] getSectionIdxes() {
+    int[] out = new int[size];
+    int i = 0;
+    for (int slot = newest; slot != NONE; slot = older[slot]) {
+      out[i++] = keys[slot];
+    }
+    return out;
+  }
+
+  private void allocate() {
+    this.keys = new int[capacity];
+    this.sections = new ByteSection[capacity];
+    this.newer = new int[capacity];
+    this.older = new int[capacity];
+    // Keep the load factor at or below 0.5 so probe sequences stay short
+    int tableSize = Integer.highestOneBit(Math.max(capacity * 2 - 1, 1)) << 1;
+    this.table = new int[tableSize];
+    this.tableMask = tableSize - 1;
+  }
+
+  private static int hash(int sectionIdx) {
+    // Section indexes are usually sequential, spread them over the table
+    int h = sectionIdx * 0x9E3779B9;
+    return h ^ (h >>> 16);
+  }
+
+  private int findSlot(int sectionIdx) {
+    if (table == null) {
+      return NONE;
+    }
+    for (int pos = hash(sectionIdx) & tableMask; table[pos] != 0; pos = (pos + 1) & tableMask) {
+      int slot = table[pos] - 1;
+      if (keys[slot] == sectionIdx) {
+        return slot;
+      }
+    }
+    return NONE;
+  }
+
+  private void insertIntoTable(int sectionIdx, int slot) {
+    int pos = hash(sectionIdx) & tableMask;
+    while (table[pos] != 0) {
+      pos = (pos + 1) & tableMask;
+    }
+    table[pos] = slot + 1;
+  }
+
+  /** Remove a key from the table, shifting back subsequent entries to keep probe chains intact. */
+  private void removeFromTable(int sectionIdx) {
+    int pos = hash(sectionIdx) & tableMask;
+    while (keys[table[pos] - 1] != sectionIdx) {
+      pos = (pos + 1) & tableMask;
+    }
+    int next = (pos + 1) & tableMask;
+    while (table[next] != 0) {
+      int home = hash(keys[table[next] - 1]) & tableMask;
+      // Move the entry into the hole if its home position is not between the hole and its position
+      if (((next - home) & tableMask) >= ((next - pos) & tableMask)) {
+        table[pos] = table[next];
+        pos = next;
+      }
+      next = (next + 1) & tableMask;
+    }
+    table[pos] = 0;
+  }
+
+  private void moveToNewest(int slot) {
+    if (slot == newest) {
+      return;
+    }
+    unlink(slot);
+    linkAsNewest(slot);
+  }
+
+  private void unlink(int slot) {
+    int n = newer[slot];
+    int o = older[slot];
+    if (n == NONE) {
+      newest = o;
+    } else {
+      older[n] = o;
+    }
+    if (o == NONE) {
+      oldest = n;
+    } else {
+      newer[o] = n;
+    }
+  }
+
+  private void linkAsNewest(int slot) {
+    newer[slot] = NONE;
+    older[slot] = newest;
+    if (newest != NONE) {
+      newer[newest] = slot;
+    }
+    newest = slot;
+    if (oldest == NONE) {
+      oldest = slot;
+    }
+  }
+
+  @Override
+  public String toString() {
+    return "SectionLruCache{"
+        + "capacity="
+        + capacity
+        + ", sectionIdxes="
+        + Arrays.toString(getSectionIdxes())
+        + '}';
+  }
+}
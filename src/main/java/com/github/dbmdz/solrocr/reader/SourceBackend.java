@@ -0,0 +1,43 @@
+package com.github.dbmdz.solrocr.reader;
+
+import com.github.dbmdz.solrocr.model.SourcePointer;
+import java.io.IOException;
+
+/**
+ * Storage backend for source pointer targets that are not files on the local filesystem, e.g. files
+ * served over HTTP or stored in an object store.
+ *
+ * <p>Pointers are parsed with the {@link SourceBackends} of a core, targets that one of them
+ * {@linkplain #handles(String) handles} are parsed into sources of type {@link
+ * SourcePointer.SourceType#REMOTE}. Parsing must not do any I/O, targets are only accessed once a
+ * reader is created or a document is indexed. Implementations must be thread-safe, since a single
+ * instance is shared by all requests of a core.
+ */
+public interface SourceBackend {
+  /** Name of the backend, unique within a {@link SourceBackends}. */
+  String getName();
+
+  /**
+   * Check if the target (e.g. a URL) is stored in this backend and may be read, without doing any
+   * I/O.
+   */
+  boolean handles(String target);
+
+  /**
+   * Check that the target exists and is not empty, returns its size in bytes. Sources of this
+   * backend don't know their size until this is called, usually by the reader.
+   *
+   * @throws java.io.FileNotFoundException if the target does not exist
+   */
+  long validateTarget(String target) throws IOException;
+
+  /**
+   * Create a reader for the data pointed at by a pointer, all sources of the pointer are stored in
+   * this backend.
+   *
+   * @param sharedCache cache shared across readers and requests, can be {@code null}
+   */
+  SourceReader getReader(
+      SourcePointer pointer, int sectionSize, int maxCacheEntries, SectionCache sharedCache)
+      throws IOException;
+}
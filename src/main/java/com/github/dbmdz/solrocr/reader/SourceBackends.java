@@ -0,0 +1,63 @@
+package com.github.dbmdz.solrocr.reader;
+
+import com.google.common.collect.ImmutableList;
+import java.util.Arrays;
+import java.util.Objects;
+
+/**
+ * The {@link SourceBackend}s that source pointers are resolved with, for targets that are not on
+ * the local filesystem.
+ *
+ * <p>No backends are enabled by default: every core configures its own backends (on the {@code
+ * OcrHighlightComponent} and the {@code ExternalUtf8ContentFilterFactory}) and passes them to
+ * {@link com.github.dbmdz.solrocr.model.SourcePointer#parse(String, SourceBackends)}. Pointers that
+ * are parsed without backends can only point to local files.
+ */
+public final class SourceBackends {
+  /** No backends, i.e. only targets on the local filesystem are supported */
+  public static final SourceBackends NONE = new SourceBackends(ImmutableList.of());
+
+  private final ImmutableList<SourceBackend> backends;
+
+  private SourceBackends(ImmutableList<SourceBackend> backends) {
+    this.backends = backends;
+  }
+
+  /** Create a set of backends, {@code null} values are ignored. */
+  public static SourceBackends of(SourceBackend... backends) {
+    ImmutableList<SourceBackend> nonNull =
+        Arrays.stream(backends).filter(Objects::nonNull).collect(ImmutableList.toImmutableList());
+    if (nonNull.isEmpty()) {
+      return NONE;
+    }
+    if (nonNull.stream().map(SourceBackend::getName).distinct().count() != nonNull.size()) {
+      throw new IllegalArgumentException("Backend names must be unique");
+    }
+    return new SourceBackends(nonNull);
+  }
+
+  /** Get the backend with the given name, or {@code null} if there is none. */
+  public SourceBackend get(String name) {
+    for (SourceBackend backend : backends) {
+      if (backend.getName().equals(name)) {
+        return backend;
+      }
+    }
+    return null;
+  }
+
+  /** Find the backend that handles a target, or {@code null} if no backend handles it. */
+  public SourceBackend forTarget(String target) {
+    for (SourceBackend backend : backends) {
+      if (backend.handles(target)) {
+        return backend;
+      }
+    }
+    return null;
+  }
+
+  /** Check if there are no backends. */
+  public boolean isEmpty() {
+    return backends.isEmpty();
+  }
+}
@@ -4,6 +4,7 @@ import com.github.dbmdz.solrocr.model.SourcePointer;
 import java.io.IOException;
 import java.nio.ByteBuffer;
 import java.nio.channels.SeekableByteChannel;
+import java.util.concurrent.Executor;
 
 /** API for reading data from a source. */
 public interface SourceReader extends AutoCloseable {
@@ -39,6 +40,28 @@ public interface SourceReader extends AutoCloseable {
    */
   Section getAsciiSection(int offset) throws IOException;
 
+  /**
+   * Read a section aligned to this reader's section size as raw bytes.
+   *
+   * <p>Like {@link #getAsciiSection(int)}, but without materializing the section as a String. Used
+   * by the break locators, which only ever look for ASCII markup in the source.
+   */
+  ByteSection getByteSection(int offset) throws IOException;
+
+  /**
+   * Read the sections around the given offsets ahead of time, so later calls to {@link
+   * #getByteSection(int)} and {@link #getAsciiSection(int)} for them don't have to go to the
+   * source.
+   *
+   * <p>This is only a hint, implementations are free to prefetch only some or none of the sections.
+   * The default implementation does nothing.
+   *
+   * @param offsets byte offsets in the source, in ascending order
+   * @param contextBytes number of bytes before and after every offset to prefetch
+   * @param executor executor to issue the reads on, the method waits for all reads to complete
+   */
+  default void prefetch(int[] offsets, int contextBytes, Executor executor) throws IOException {}
+
   /**
    * Read into {@param dst} starting at {@param start} from the source. , returning the number of
    * bytes read.
@@ -125,4 +148,55 @@ public interface SourceReader extends AutoCloseable {
       return "Section{" + "start=" + start + ", end=" + end + '}';
     }
   }
+
+  /** A section of the source as raw bytes, addressed by absolute offsets in the source. */
+  final class ByteSection {
+    /** Start byte offset of the section, inclusive */
+    public final int start;
+    /** End byte offset of the section, exclusive */
+    public final int end;
+
+    private final byte[] data;
+
+    /** Create a new section starting at {@code start}, takes ownership of {@code data}. */
+    public ByteSection(int start, byte[] data) {
+      this.start = start;
+      this.end = start + data.length;
+      this.data = data;
+    }
+
+    /** Get the byte at the given absolute offset in the source. */
+    public byte byteAt(int offset) {
+      return data[offset - start];
+    }
+
+    /** Get the number of bytes in the section */
+    public int length() {
+      return data.length;
+    }
+
+    /**
+     * Copy {@code len} bytes starting at absolute offset {@code offset} in the source to {@code
+     * dst}.
+     */
+    public void copyTo(int offset, byte[] dst, int dstOffset, int len) {
+      System.arraycopy(data, offset - start, dst, dstOffset, len);
+    }
+
+    /** Get a read-only view of the section's bytes. */
+    public ByteBuffer asReadOnlyBuffer() {
+      return ByteBuffer.wrap(data).asReadOnlyBuffer();
+    }
+
+    /** Get the section as an ASCII/Latin1 string, without going through a decoder. */
+    @SuppressWarnings("deprecation")
+    public String toAsciiString() {
+      return new String(data, 0, 0, data.length);
+    }
+
+    @Override
+    public String toString() {
+      return "ByteSection{" + "start=" + start + ", end=" + end + '}';
+    }
+  }
 }
@@ -8,6 +8,7 @@ import java.nio.charset.StandardCharsets;
 public class StringSourceReader implements SourceReader {
 
   private final String str;
+  private ByteSection byteSection;
 
   public StringSourceReader(String str) {
     this.str = str;
@@ -30,6 +31,22 @@ public class StringSourceReader implements SourceReader {
     return new Section(0, str.length(), str);
   }
 
+  @Override
+  public ByteSection getByteSection(int offset) {
+    if (byteSection == null) {
+      // Only ASCII is ever searched for in byte sections, so we keep the char offset semantics of
+      // this reader and simply replace everything outside of Latin1. This has to be done char by
+      // char, encoding the string would turn surrogate pairs into a single byte.
+      byte[] bytes = new byte[str.length()];
+      for (int i = 0; i < bytes.length; i++) {
+        char c = str.charAt(i);
+        bytes[i] = c <= 0xFF ? (byte) c : (byte) '?';
+      }
+      byteSection = new ByteSection(0, bytes);
+    }
+    return byteSection;
+  }
+
   @Override
   public int readBytes(ByteBuffer dst, int start) {
     byte[] bytes = str.getBytes(StandardCharsets.UTF_8);
@@ -0,0 +1,229 @@
+package com.github.dbmdz.solrocr.solr;
+
+import com.google.common.util.concurrent.ThreadFactoryBuilder;
+import java.lang.invoke.MethodHandles;
+import java.util.ArrayDeque;
+import java.util.concurrent.Executor;
+import java.util.concurrent.RejectedExecutionException;
+import java.util.concurrent.ThreadFactory;
+import java.util.concurrent.TimeUnit;
+import java.util.concurrent.locks.Condition;
+import java.util.concurrent.locks.ReentrantLock;
+import java.util.function.LongSupplier;
+import org.slf4j.Logger;
+import org.slf4j.LoggerFactory;
+
+/**
+ * Thread pool for highlighting tasks that is shared by all requests, but schedules the tasks of
+ * concurrent requests fairly.
+ *
+ * <p>Every request submits its tasks to its own {@link RequestQueue}. Worker threads pick tasks
+ * from the request queues in round-robin order, so a request with many documents can't starve
+ * requests with only a few documents. Additionally, the number of tasks of a single request that
+ * run at the same time is limited, so some threads are always available for new requests.
+ *
+ * <p>Like the {@link java.util.concurrent.ThreadPoolExecutor} that is used without fair scheduling,
+ * the number of queued tasks is bounded, both for every request and in total. Tasks beyond these
+ * bounds are rejected with a {@link RejectedExecutionException}, the highlighter then runs them on
+ * the request thread.
+ */
+public class FairHighlightScheduler {
+  private static final Logger log = LoggerFactory.getLogger(MethodHandles.lookup().lookupClass());
+
+  private static final class Task {
+    final Runnable runnable;
+    final long enqueuedNanos;
+
+    Task(Runnable runnable, long enqueuedNanos) {
+      this.runnable = runnable;
+      this.enqueuedNanos = enqueuedNanos;
+    }
+  }
+
+  /** Queue for the tasks of a single request, tasks are run in the order they were submitted. */
+  public final class RequestQueue implements Executor {
+    private final ArrayDeque<Task> tasks = new ArrayDeque<>();
+    private int numRunning = 0;
+
+    /** Whether the queue is currently in the round-robin queue of the scheduler */
+    private boolean isReady = false;
+
+    private RequestQueue() {}
+
+    @Override
+    public void execute(Runnable command) {
+      lock.lock();
+      try {
+        if (isShutdown) {
+          throw new RejectedExecutionException("Scheduler was shut down");
+        }
+        if (tasks.size() >= maxQueuedPerRequest || numQueuedTasks >= maxQueued) {
+          throw new RejectedExecutionException("Too many queued highlighting tasks");
+        }
+        if (tasks.isEmpty() && numRunning == 0) {
+          numActiveRequests++;
+        }
+        tasks.addLast(new Task(command, System.nanoTime()));
+        numQueuedTasks++;
+        markReady(this);
+      } finally {
+        lock.unlock();
+      }
+    }
+  }
+
+  private final int maxRunningPerRequest;
+  private final int maxQueuedPerRequest;
+  private final long maxQueued;
+  private final Thread[] workers;
+  private final ReentrantLock lock = new ReentrantLock();
+  private final Condition hasWork = lock.newCondition();
+
+  /** Request queues with tasks that can be started, in round-robin order */
+  private final ArrayDeque<RequestQueue> readyQueues = new ArrayDeque<>();
+
+  private boolean isShutdown = false;
+  private long numQueuedTasks = 0;
+  private long numRunningTasks = 0;
+  private long numActiveRequests = 0;
+  private long numCompletedTasks = 0;
+  private long totalQueueTimeNanos = 0;
+
+  /**
+   * @param numThreads number of worker threads
+   * @param maxRunningPerRequest maximum number of tasks of a single request that run at the same
+   *     time
+   * @param maxQueuedPerThread maximum number of queued tasks per thread, i.e. a request can queue
+   *     up to {@code maxRunningPerRequest * maxQueuedPerThread} tasks and all requests together up
+   *     to {@code numThreads * maxQueuedPerThread} tasks
+   */
+  public FairHighlightScheduler(int numThreads, int maxRunningPerRequest, int maxQueuedPerThread) {
+    if (numThreads <= 0) {
+      throw new IllegalArgumentException("numThreads must be > 0");
+    }
+    if (maxRunningPerRequest <= 0) {
+      throw new IllegalArgumentException("maxRunningPerRequest must be > 0");
+    }
+    if (maxQueuedPerThread <= 0) {
+      throw new IllegalArgumentException("maxQueuedPerThread must be > 0");
+    }
+    this.maxRunningPerRequest = maxRunningPerRequest;
+    this.maxQueuedPerRequest = maxRunningPerRequest * maxQueuedPerThread;
+    this.maxQueued = (long) numThreads * maxQueuedPerThread;
+    ThreadFactory threadFactory =
+        new ThreadFactoryBuilder().setNameFormat("OcrHighlighter-%d").setDaemon(true).build();
+    this.workers = new Thread[numThreads];
+    for (int i = 0; i < numThreads; i++) {
+      workers[i] = threadFactory.newThread(this::work);
+      workers[i].start();
+    }
+  }
+
+  /** Create a new queue for the tasks of a request. */
+  public RequestQueue newRequestQueue() {
+    return new RequestQueue();
+  }
+
+  /** Add the queue to the round-robin queue if it has tasks that can be started. */
+  private void markReady(RequestQueue queue) {
+    if (!queue.isReady && !queue.tasks.isEmpty() && queue.numRunning < maxRunningPerRequest) {
+      queue.isReady = true;
+      readyQueues.addLast(queue);
+      hasWork.signal();
+    }
+  }
+
+  private void work() {
+    while (true) {
+      RequestQueue queue;
+      Task task;
+      lock.lock();
+      try {
+        while (readyQueues.isEmpty()) {
+          if (isShutdown) {
+            return;
+          }
+          hasWork.awaitUninterruptibly();
+        }
+        queue = readyQueues.pollFirst();
+        queue.isReady = false;
+        task = queue.tasks.pollFirst();
+        queue.numRunning++;
+        numQueuedTasks--;
+        numRunningTasks++;
+        totalQueueTimeNanos += System.nanoTime() - task.enqueuedNanos;
+        // Re-adds the queue at the end if it has more tasks, i.e. round-robin
+        markReady(queue);
+      } finally {
+        lock.unlock();
+      }
+
+      try {
+        task.runnable.run();
+      } catch (Throwable e) {
+        // Keep the worker alive, there are no other threads that would pick up its work
+        log.error("Error while running highlighting task", e);
+      } finally {
+        lock.lock();
+        try {
+          queue.numRunning--;
+          numRunningTasks--;
+          numCompletedTasks++;
+          if (queue.tasks.isEmpty() && queue.numRunning == 0) {
+            numActiveRequests--;
+          }
+          markReady(queue);
+        } finally {
+          lock.unlock();
+        }
+      }
+    }
+  }
+
+  /**
+   * Stop accepting new tasks. Tasks that were already submitted are still run, the worker threads
+   * terminate once all queues are empty.
+   */
+  public void shutdown() {
+    lock.lock();
+    try {
+      isShutdown = true;
+      hasWork.signalAll();
+    } finally {
+      lock.unlock();
+    }
+  }
+
+  private long getStat(LongSupplier stat) {
+    lock.lock();
+    try {
+      return stat.getAsLong();
+    } finally {
+      lock.unlock();
+    }
+  }
+
+  /** Get the number of tasks that are waiting to be run */
+  public long getNumQueuedTasks() {
+    return getStat(() -> numQueuedTasks);
+  }
+
+  /** Get the number of tasks that are currently running */
+  public long getNumRunningTasks() {
+    return getStat(() -> numRunningTasks);
+  }
+
+  /** Get the number of requests with queued or running tasks */
+  public long getNumActiveRequests() {
+    return getStat(() -> numActiveRequests);
+  }
+
+  public long getNumCompletedTasks() {
+    return getStat(() -> numCompletedTasks);
+  }
+
+  /** Get the total time that all started tasks spent in the queue, in milliseconds */
+  public long getTotalQueueTimeMs() {
+    return getStat(() -> TimeUnit.NANOSECONDS.toMillis(totalQueueTimeNanos));
+  }
+}
@@ -20,6 +20,13 @@ public interface OcrHighlightParams {
   String TIME_ALLOWED = "hl.ocr.timeAllowed";
   String ALIGN_SPANS = "hl.ocr.alignSpans";
   String TRACK_PAGES = "hl.ocr.trackPages";
+  String USE_BREAK_INDEX = "hl.ocr.useBreakIndex";
+  String USE_MINIOCR_SCANNER = "hl.ocr.useMiniOcrScanner";
+  String PREFETCH = "hl.ocr.prefetch";
+  String PARALLEL_FORMAT = "hl.ocr.parallelFormat";
+  String LAZY_BREAKS = "hl.ocr.lazyBreaks";
+  String FORMAT = "hl.ocr.format";
+  String CACHE = "hl.ocr.cache";
 
   /**
    * Get a boolean value from a `hl.ocr.*` parameter. If no value is given for the parameter, try to
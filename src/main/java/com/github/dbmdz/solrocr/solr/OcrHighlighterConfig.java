@@ -0,0 +1,146 @@
+package com.github.dbmdz.solrocr.solr;
+
+import com.github.dbmdz.solrocr.model.SourcePointerCache;
+import com.github.dbmdz.solrocr.reader.FileChannelPool;
+import com.github.dbmdz.solrocr.reader.SectionCache;
+import com.github.dbmdz.solrocr.reader.SourceBackends;
+
+/**
+ * Configuration of the OCR highlighter that applies to all requests, i.e. its threads and the
+ * settings and shared resources of the readers for the OCR files.
+ *
+ * <p>All settings have defaults, the setters return the configuration so they can be chained. The
+ * configuration must not be modified once it was passed to a highlighter.
+ */
+public class OcrHighlighterConfig {
+  private int numHlThreads = Runtime.getRuntime().availableProcessors();
+  private int maxQueuedPerThread = 8;
+  private int maxThreadsPerRequest = 0;
+  private boolean useVirtualThreads = false;
+  private int numPrefetchThreads = 0;
+  private int readerSectionSize = 8 * 1024;
+  private int readerMaxCacheEntries = 64 * 1024;
+  private SectionCache sharedSectionCache = null;
+  private SourcePointerCache sourcePointerCache = null;
+  private FileChannelPool channelPool = null;
+  private SourceBackends sourceBackends = SourceBackends.NONE;
+
+  public int getNumHlThreads() {
+    return numHlThreads;
+  }
+
+  /** Number of threads for highlighting documents, {@code 0} highlights on the request thread. */
+  public OcrHighlighterConfig setNumHlThreads(int numHlThreads) {
+    this.numHlThreads = numHlThreads;
+    return this;
+  }
+
+  public int getMaxQueuedPerThread() {
+    return maxQueuedPerThread;
+  }
+
+  /** Number of documents that can be queued for highlighting per thread. */
+  public OcrHighlighterConfig setMaxQueuedPerThread(int maxQueuedPerThread) {
+    this.maxQueuedPerThread = maxQueuedPerThread;
+    return this;
+  }
+
+  public int getMaxThreadsPerRequest() {
+    return maxThreadsPerRequest;
+  }
+
+  /**
+   * If {@code > 0}, the documents of concurrent requests are scheduled fairly and at most this many
+   * documents of a single request are highlighted at the same time, see {@link
+   * FairHighlightScheduler}. Otherwise all requests share a single queue.
+   */
+  public OcrHighlighterConfig setMaxThreadsPerRequest(int maxThreadsPerRequest) {
+    this.maxThreadsPerRequest = maxThreadsPerRequest;
+    return this;
+  }
+
+  public boolean isUseVirtualThreads() {
+    return useVirtualThreads;
+  }
+
+  /**
+   * If {@code true} and the JVM supports it, every document is highlighted on its own virtual
+   * thread and the number of highlighting threads is the maximum number of concurrent reads from
+   * the OCR files, see {@link VirtualThreadExecutor}. Falls back to platform threads on JVMs
+   * without virtual threads.
+   */
+  public OcrHighlighterConfig setUseVirtualThreads(boolean useVirtualThreads) {
+    this.useVirtualThreads = useVirtualThreads;
+    return this;
+  }
+
+  public int getNumPrefetchThreads() {
+    return numPrefetchThreads;
+  }
+
+  /** Number of threads for prefetching the OCR files of matches, {@code 0} disables them. */
+  public OcrHighlighterConfig setNumPrefetchThreads(int numPrefetchThreads) {
+    this.numPrefetchThreads = numPrefetchThreads;
+    return this;
+  }
+
+  public int getReaderSectionSize() {
+    return readerSectionSize;
+  }
+
+  /** Size of the sections the readers read from the OCR files, in bytes. */
+  public OcrHighlighterConfig setReaderSectionSize(int readerSectionSize) {
+    this.readerSectionSize = readerSectionSize;
+    return this;
+  }
+
+  public int getReaderMaxCacheEntries() {
+    return readerMaxCacheEntries;
+  }
+
+  /** Maximum number of sections cached by every reader. */
+  public OcrHighlighterConfig setReaderMaxCacheEntries(int readerMaxCacheEntries) {
+    this.readerMaxCacheEntries = readerMaxCacheEntries;
+    return this;
+  }
+
+  public SectionCache getSharedSectionCache() {
+    return sharedSectionCache;
+  }
+
+  /** Section cache shared by all readers across requests, can be {@code null}. */
+  public OcrHighlighterConfig setSharedSectionCache(SectionCache sharedSectionCache) {
+    this.sharedSectionCache = sharedSectionCache;
+    return this;
+  }
+
+  public SourcePointerCache getSourcePointerCache() {
+    return sourcePointerCache;
+  }
+
+  /** Cache for parsed source pointers shared by all requests, can be {@code null}. */
+  public OcrHighlighterConfig setSourcePointerCache(SourcePointerCache sourcePointerCache) {
+    this.sourcePointerCache = sourcePointerCache;
+    return this;
+  }
+
+  public FileChannelPool getChannelPool() {
+    return channelPool;
+  }
+
+  /** Pool of file channels shared by all readers, can be {@code null}. */
+  public OcrHighlighterConfig setChannelPool(FileChannelPool channelPool) {
+    this.channelPool = channelPool;
+    return this;
+  }
+
+  public SourceBackends getSourceBackends() {
+    return sourceBackends;
+  }
+
+  /** Backends for pointer targets that are not on the local filesystem. */
+  public OcrHighlighterConfig setSourceBackends(SourceBackends sourceBackends) {
+    this.sourceBackends = sourceBackends;
+    return this;
+  }
+}
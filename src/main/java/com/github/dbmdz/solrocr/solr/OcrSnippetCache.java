@@ -0,0 +1,241 @@
+package com.github.dbmdz.solrocr.solr;
+
+import com.github.dbmdz.solrocr.model.OcrBox;
+import com.github.dbmdz.solrocr.model.OcrSnippet;
+import com.google.common.collect.ImmutableSet;
+import java.util.Arrays;
+import java.util.Iterator;
+import java.util.List;
+import java.util.Map;
+import java.util.Objects;
+import java.util.Set;
+import java.util.TreeMap;
+import org.apache.lucene.search.Query;
+import org.apache.lucene.util.Accountable;
+import org.apache.lucene.util.RamUsageEstimator;
+import org.apache.solr.common.params.HighlightParams;
+import org.apache.solr.common.params.SolrParams;
+import org.apache.solr.search.SolrCache;
+import org.apache.solr.search.SolrIndexSearcher;
+
+/**
+ * Caches the highlighted snippets of a document field for a query, so popular queries don't have
+ * to read and parse the same OCR passages over and over again.
+ *
+ * <p>The snippets are stored in a Solr user cache named {@value #CACHE_NAME} that has to be
+ * configured in the {@code <query>} section of {@code solrconfig.xml}. Since user caches belong to
+ * a searcher, the cache is empty whenever a new searcher is opened and cached documents are always
+ * identified by their index-wide document id. Entries are keyed by the query, the field, the
+ * document and all highlighting parameters that can influence the snippets.
+ */
+public class OcrSnippetCache {
+  public static final String CACHE_NAME = "ocrHighlightCache";
+
+  /** Parameters that don't change the snippets of a single field and are not part of the key */
+  private static final Set<String> IGNORED_PARAMS =
+      ImmutableSet.of(
+          HighlightParams.HIGHLIGHT,
+          HighlightParams.FIELDS,
+          OcrHighlightParams.OCR_FIELDS,
+          OcrHighlightParams.PREFETCH,
+          OcrHighlightParams.PARALLEL_FORMAT,
+          OcrHighlightParams.CACHE,
+          // Snippets of documents that ran into the timeout are never cached
+          OcrHighlightParams.TIME_ALLOWED,
+          // Break indexes and the MiniOCR scanner only make highlighting faster
+          OcrHighlightParams.USE_BREAK_INDEX,
+          OcrHighlightParams.USE_MINIOCR_SCANNER);
+
+  /** Rough estimates for the parts of a snippet that are not accounted for in detail */
+  private static final long SNIPPET_BYTES = 256;
+
+  private static final long BOX_BYTES = 128;
+
+  /** A document field for the query and parameters of a request */
+  private static final class Key implements Accountable {
+    private static final long BASE_RAM_BYTES_USED =
+        RamUsageEstimator.shallowSizeOfInstance(Key.class);
+
+    private final RequestKey request;
+    private final String field;
+    private final int docId;
+
+    private Key(RequestKey request, String field, int docId) {
+      this.request = request;
+      this.field = field;
+      this.docId = docId;
+    }
+
+    @Override
+    public boolean equals(Object o) {
+      if (this == o) {
+        return true;
+      }
+      if (o == null || getClass() != o.getClass()) {
+        return false;
+      }
+      Key key = (Key) o;
+      return docId == key.docId && field.equals(key.field) && request.equals(key.request);
+    }
+
+    @Override
+    public int hashCode() {
+      return Objects.hash(request, field, docId);
+    }
+
+    @Override
+    public long ramBytesUsed() {
+      // The request key is shared by all keys of a request, so it's not accounted for here
+      return BASE_RAM_BYTES_USED + RamUsageEstimator.sizeOf(field);
+    }
+  }
+
+  /** The parts of the key that are the same for all documents of a request */
+  private static final class RequestKey {
+    private final Query query;
+    private final Map<String, List<String>> params;
+    private final int hash;
+
+    private RequestKey(Query query, Map<String, List<String>> params) {
+      this.query = query;
+      this.params = params;
+      this.hash = Objects.hash(query, params);
+    }
+
+    @Override
+    public boolean equals(Object o) {
+      if (this == o) {
+        return true;
+      }
+      if (o == null || getClass() != o.getClass()) {
+        return false;
+      }
+      RequestKey other = (RequestKey) o;
+      return hash == other.hash && query.equals(other.query) && params.equals(other.params);
+    }
+
+    @Override
+    public int hashCode() {
+      return hash;
+    }
+  }
+
+  /** The snippets of a document field and the total number of matches in it. */
+  public static final class Entry implements Accountable {
+    private static final long BASE_RAM_BYTES_USED =
+        RamUsageEstimator.shallowSizeOfInstance(Entry.class);
+
+    private final OcrSnippet[] snippets;
+    private final int numTotal;
+    private final long ramBytesUsed;
+
+    private Entry(OcrSnippet[] snippets, int numTotal) {
+      this.snippets = snippets;
+      this.numTotal = numTotal;
+      this.ramBytesUsed = BASE_RAM_BYTES_USED + estimateRamBytes(snippets);
+    }
+
+    private static long estimateRamBytes(OcrSnippet[] snippets) {
+      if (snippets == null) {
+        return 0;
+      }
+      long bytes = RamUsageEstimator.shallowSizeOf(snippets);
+      for (OcrSnippet snippet : snippets) {
+        if (snippet == null) {
+          continue;
+        }
+        long numBoxes = snippet.getSnippetRegions().size();
+        for (OcrBox[] span : snippet.getHighlightSpans()) {
+          numBoxes += span.length;
+        }
+        bytes += SNIPPET_BYTES + RamUsageEstimator.sizeOf(snippet.getText()) + numBoxes * BOX_BYTES;
+      }
+      return bytes;
+    }
+
+    /** Get the snippets of the document field, must not be modified. */
+    public OcrSnippet[] getSnippets() {
+      return snippets;
+    }
+
+    /** Get the total number of matches in the document field. */
+    public int getNumTotal() {
+      return numTotal;
+    }
+
+    @Override
+    public long ramBytesUsed() {
+      return ramBytesUsed;
+    }
+  }
+
+  private final SolrCache<Key, Entry> cache;
+  private final RequestKey requestKey;
+
+  private OcrSnippetCache(SolrCache<Key, Entry> cache, RequestKey requestKey) {
+    this.cache = cache;
+    this.requestKey = requestKey;
+  }
+
+  /**
+   * Get the snippet cache of the searcher for highlighting the query with the given parameters, or
+   * {@code null} if the cache is not configured or was disabled for the request.
+   *
+   * @param fields names of the fields that are highlighted, needed to parse per-field parameters
+   */
+  public static OcrSnippetCache get(
+      SolrIndexSearcher searcher, Query query, SolrParams params, String[] fields) {
+    if (!params.getBool(OcrHighlightParams.CACHE, true)) {
+      return null;
+    }
+    SolrCache<Key, Entry> cache = searcher.getCache(CACHE_NAME);
+    if (cache == null) {
+      return null;
+    }
+    return new OcrSnippetCache(cache, new RequestKey(query, getRelevantParams(params, fields)));
+  }
+
+  private static Map<String, List<String>> getRelevantParams(SolrParams params, String[] fields) {
+    // Sorted, so the order of the parameters in the request doesn't matter
+    Map<String, List<String>> relevant = new TreeMap<>();
+    Iterator<String> names = params.getParameterNamesIterator();
+    while (names.hasNext()) {
+      String name = names.next();
+      String hlName = name.startsWith("f.") ? stripFieldPrefix(name, fields) : name;
+      if (hlName == null || !hlName.startsWith("hl") || IGNORED_PARAMS.contains(hlName)) {
+        continue;
+      }
+      relevant.put(name, Arrays.asList(params.getParams(name)));
+    }
+    return relevant;
+  }
+
+  /**
+   * Strip the `f.<field>.` prefix from a per-field parameter name, or return {@code null} if the
+   * parameter is not for one of the given fields. The prefix is matched against the requested
+   * fields instead of searching for `.hl`, since field names can contain `.hl` themselves.
+   */
+  private static String stripFieldPrefix(String name, String[] fields) {
+    String stripped = null;
+    for (String field : fields) {
+      int prefixLen = 2 + field.length() + 1;
+      // The longest matching field wins, e.g. `foo.hlx` over `foo` for `f.foo.hlx.hl.snippets`
+      if (name.startsWith(field, 2)
+          && name.startsWith(".hl", prefixLen - 1)
+          && (stripped == null || name.length() - prefixLen < stripped.length())) {
+        stripped = name.substring(prefixLen);
+      }
+    }
+    return stripped;
+  }
+
+  /** Get the cached snippets for the document field, or {@code null} if they are not cached. */
+  public Entry get(String field, int docId) {
+    return cache.get(new Key(requestKey, field, docId));
+  }
+
+  /** Add the snippets for the document field to the cache. */
+  public void put(String field, int docId, OcrSnippet[] snippets, int numTotal) {
+    cache.put(new Key(requestKey, field, docId), new Entry(snippets, numTotal));
+  }
+}
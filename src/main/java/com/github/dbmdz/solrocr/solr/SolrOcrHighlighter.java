@@ -25,6 +25,9 @@
 package com.github.dbmdz.solrocr.solr;
 
 import com.github.dbmdz.solrocr.model.OcrHighlightResult;
+import com.github.dbmdz.solrocr.model.SourcePointerCache;
+import com.github.dbmdz.solrocr.reader.FileChannelPool;
+import com.github.dbmdz.solrocr.reader.SectionCache;
 import com.google.common.util.concurrent.ThreadFactoryBuilder;
 import java.io.IOException;
 import java.lang.invoke.MethodHandles;
@@ -53,19 +56,49 @@ public class SolrOcrHighlighter extends UnifiedSolrHighlighter {
   private static final Logger log = LoggerFactory.getLogger(MethodHandles.lookup().lookupClass());
 
   private final Executor hlExecutor;
-  private final int readerSectionSize;
-  private final int readerMaxCacheEntries;
+  private final FairHighlightScheduler hlScheduler;
+  private final Executor prefetchExecutor;
+  private final OcrHighlighterConfig config;
 
   public SolrOcrHighlighter() {
-    this(Runtime.getRuntime().availableProcessors(), 8, 8 * 1024, 64 * 1024);
+    this(new OcrHighlighterConfig());
   }
 
   public SolrOcrHighlighter(
       int numHlThreads, int maxQueuedPerThread, int readerSectionSize, int readerMaxCacheEntries) {
+    this(
+        new OcrHighlighterConfig()
+            .setNumHlThreads(numHlThreads)
+            .setMaxQueuedPerThread(maxQueuedPerThread)
+            .setReaderSectionSize(readerSectionSize)
+            .setReaderMaxCacheEntries(readerMaxCacheEntries));
+  }
+
+  public SolrOcrHighlighter(OcrHighlighterConfig config) {
     super();
-    this.readerSectionSize = readerSectionSize;
-    this.readerMaxCacheEntries = readerMaxCacheEntries;
-    if (numHlThreads > 0) {
+    this.config = config;
+    int numHlThreads = config.getNumHlThreads();
+    int maxQueuedPerThread = config.getMaxQueuedPerThread();
+    int maxThreadsPerRequest = config.getMaxThreadsPerRequest();
+    int numPrefetchThreads = config.getNumPrefetchThreads();
+    VirtualThreadExecutor virtualExecutor = null;
+    if (config.isUseVirtualThreads() && numHlThreads > 0) {
+      virtualExecutor = VirtualThreadExecutor.create(numHlThreads);
+      if (virtualExecutor == null) {
+        log.warn(
+            "Virtual threads are not supported by this JVM (requires Java 21+), falling back to "
+                + "platform threads for highlighting.");
+      }
+    }
+    if (virtualExecutor != null) {
+      this.hlScheduler = null;
+      this.hlExecutor = virtualExecutor;
+    } else if (numHlThreads > 0 && maxThreadsPerRequest > 0) {
+      this.hlScheduler =
+          new FairHighlightScheduler(numHlThreads, maxThreadsPerRequest, maxQueuedPerThread);
+      this.hlExecutor = null;
+    } else if (numHlThreads > 0) {
+      this.hlScheduler = null;
       this.hlExecutor =
           new ThreadPoolExecutor(
               numHlThreads,
@@ -75,15 +108,65 @@ public class SolrOcrHighlighter extends UnifiedSolrHighlighter {
               new LinkedBlockingQueue<>(numHlThreads * maxQueuedPerThread),
               new ThreadFactoryBuilder().setNameFormat("OcrHighlighter-%d").build());
     } else {
+      this.hlScheduler = null;
       // Executors.newDirectExecutorService() for Java 8
       this.hlExecutor = Runnable::run;
     }
+    if (numPrefetchThreads > 0) {
+      // Prefetch reads are short and never block on other tasks, so if the queue is full, the
+      // highlighting thread can simply issue the read itself
+      this.prefetchExecutor =
+          new ThreadPoolExecutor(
+              numPrefetchThreads,
+              numPrefetchThreads,
+              120L,
+              TimeUnit.SECONDS,
+              new LinkedBlockingQueue<>(numPrefetchThreads * 64),
+              new ThreadFactoryBuilder().setNameFormat("OcrPrefetch-%d").setDaemon(true).build(),
+              new ThreadPoolExecutor.CallerRunsPolicy());
+    } else {
+      this.prefetchExecutor = null;
+    }
+  }
+
+  /** Get the section cache shared by all readers created by this highlighter, can be null. */
+  public SectionCache getSharedSectionCache() {
+    return config.getSharedSectionCache();
+  }
+
+  /** Get the cache for parsed source pointers shared by all requests, can be null. */
+  public SourcePointerCache getSourcePointerCache() {
+    return config.getSourcePointerCache();
+  }
+
+  /** Get the pool of file channels shared by all readers of this highlighter, can be null. */
+  public FileChannelPool getChannelPool() {
+    return config.getChannelPool();
+  }
+
+  /** Get the fair scheduler for highlighting tasks, null if all requests share a single queue. */
+  public FairHighlightScheduler getScheduler() {
+    return hlScheduler;
+  }
+
+  /** Get the executor for highlighting tasks on virtual threads, null if it's not used. */
+  public VirtualThreadExecutor getVirtualThreadExecutor() {
+    return hlExecutor instanceof VirtualThreadExecutor ? (VirtualThreadExecutor) hlExecutor : null;
   }
 
   public void shutdownThreadPool() {
+    if (hlScheduler != null) {
+      hlScheduler.shutdown();
+    }
+    if (hlExecutor instanceof VirtualThreadExecutor) {
+      ((VirtualThreadExecutor) hlExecutor).shutdown();
+    }
     if (hlExecutor instanceof ThreadPoolExecutor) {
       ((ThreadPoolExecutor) hlExecutor).shutdown();
     }
+    if (prefetchExecutor instanceof ThreadPoolExecutor) {
+      ((ThreadPoolExecutor) prefetchExecutor).shutdown();
+    }
   }
 
   public NamedList<Object> doHighlighting(
@@ -116,11 +199,19 @@ public class SolrOcrHighlighter extends UnifiedSolrHighlighter {
             req.getSearcher(),
             req.getSchema().getIndexAnalyzer(),
             req,
-            readerSectionSize,
-            readerMaxCacheEntries);
+            config,
+            hlExecutor instanceof VirtualThreadExecutor
+                ? ((VirtualThreadExecutor) hlExecutor).getReadPermits()
+                : null);
     OcrHighlightResult[] ocrSnippets =
         ocrHighlighter.highlightOcrFields(
-            ocrFieldNames, query, docIDs, maxPassagesOcr, respHeader, hlExecutor);
+            ocrFieldNames,
+            query,
+            docIDs,
+            maxPassagesOcr,
+            respHeader,
+            hlScheduler != null ? hlScheduler.newRequestQueue() : hlExecutor,
+            prefetchExecutor);
 
     // Assemble output data
     SimpleOrderedMap<Object> out = new SimpleOrderedMap<>();
@@ -0,0 +1,123 @@
+package com.github.dbmdz.solrocr.solr;
+
+import com.github.dbmdz.solrocr.reader.BaseSourceReader;
+import java.lang.invoke.MethodHandles;
+import java.lang.reflect.Method;
+import java.util.concurrent.Executor;
+import java.util.concurrent.ExecutorService;
+import java.util.concurrent.Semaphore;
+import java.util.concurrent.atomic.AtomicInteger;
+import org.slf4j.Logger;
+import org.slf4j.LoggerFactory;
+
+/**
+ * Executor that runs every task on its own virtual thread, with a bound on the number of blocking
+ * reads that the tasks issue at the same time.
+ *
+ * <p>Highlighting is mostly blocked on reads from the OCR files, so with platform threads the
+ * number of highlighting threads has to be far higher than the number of cores on high-latency
+ * storage, with the memory overhead of a full thread stack for each of them. Virtual threads are
+ * cheap to create and to block, so the only limit needed is the number of concurrent reads. It is
+ * enforced with a fair {@link Semaphore} that the readers of the tasks acquire around every read
+ * from the storage (see {@link BaseSourceReader#setReadPermits(Semaphore)}), while parsing and
+ * formatting the snippets is not limited.
+ *
+ * <p>Virtual threads are only available on Java 21 and newer. Since we're compiled for older
+ * versions, the virtual thread executor is created via reflection, use {@link #isSupported()} to
+ * check for support.
+ */
+public class VirtualThreadExecutor implements Executor {
+  private static final Logger log = LoggerFactory.getLogger(MethodHandles.lookup().lookupClass());
+
+  private static final Method newVirtualThreadPerTaskExecutor;
+
+  static {
+    Method method = null;
+    try {
+      method = java.util.concurrent.Executors.class.getMethod("newVirtualThreadPerTaskExecutor");
+    } catch (NoSuchMethodException e) {
+      // Java < 21
+    }
+    newVirtualThreadPerTaskExecutor = method;
+  }
+
+  private final ExecutorService delegate;
+  private final int maxConcurrentReads;
+  private final Semaphore readPermits;
+  private final AtomicInteger numRunningTasks = new AtomicInteger();
+
+  private VirtualThreadExecutor(ExecutorService delegate, int maxConcurrentReads) {
+    this.delegate = delegate;
+    this.maxConcurrentReads = maxConcurrentReads;
+    this.readPermits = new Semaphore(maxConcurrentReads, true);
+  }
+
+  /** Check if the running JVM supports virtual threads. */
+  public static boolean isSupported() {
+    return newVirtualThreadPerTaskExecutor != null;
+  }
+
+  /**
+   * Create a new executor whose tasks issue at most {@code maxConcurrentReads} reads at the same
+   * time, or return {@code null} if the JVM does not support virtual threads.
+   */
+  public static VirtualThreadExecutor create(int maxConcurrentReads) {
+    if (maxConcurrentReads <= 0) {
+      throw new IllegalArgumentException("maxConcurrentReads must be > 0");
+    }
+    if (!isSupported()) {
+      return null;
+    }
+    try {
+      return new VirtualThreadExecutor(
+          (ExecutorService) newVirtualThreadPerTaskExecutor.invoke(null), maxConcurrentReads);
+    } catch (ReflectiveOperationException e) {
+      log.warn("Could not create virtual thread executor: {}", e.getMessage());
+      return null;
+    }
+  }
+
+  @Override
+  public void execute(Runnable command) {
+    delegate.execute(
+        () -> {
+          numRunningTasks.incrementAndGet();
+          try {
+            command.run();
+          } finally {
+            numRunningTasks.decrementAndGet();
+          }
+        });
+  }
+
+  /**
+   * Get the permits that readers used by the tasks have to acquire for every read from the
+   * storage.
+   */
+  public Semaphore getReadPermits() {
+    return readPermits;
+  }
+
+  /** Get the number of tasks that are currently running */
+  public long getNumRunningTasks() {
+    return numRunningTasks.get();
+  }
+
+  /** Get the number of reads that are currently in progress */
+  public long getNumActiveReads() {
+    return maxConcurrentReads - readPermits.availablePermits();
+  }
+
+  /** Get the (approximate) number of reads that are waiting for a permit */
+  public long getNumQueuedReads() {
+    return readPermits.getQueueLength();
+  }
+
+  /**
+   * Stop accepting new tasks. Tasks that were already submitted are still run, virtual threads
+   * don't keep the JVM alive, so there is nothing else to clean up.
+   */
+  public void shutdown() {
+    delegate.shutdown();
+  }
+}
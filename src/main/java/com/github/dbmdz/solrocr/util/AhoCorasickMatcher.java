@@ -0,0 +1,143 @@
+package com.github.dbmdz.solrocr.util;
+
+import java.util.ArrayDeque;
+import java.util.Arrays;
+import java.util.Collection;
+import java.util.Deque;
+
+/**
+ * Deterministic Aho-Corasick automaton for finding a small set of ASCII patterns in a byte stream.
+ *
+ * <p>The automaton is fed one byte at a time via {@link #next(int, byte)}, so the input can be
+ * streamed across section boundaries without having to stitch together any overlaps. Transitions
+ * for every state are precomputed into a single flat table. To keep that table small, bytes are
+ * first mapped to a compressed alphabet that only contains the bytes that occur in the patterns,
+ * all other bytes share a single column.
+ *
+ * <p>Instances are immutable and can be shared between threads.
+ */
+public final class AhoCorasickMatcher {
+  /** The initial state of the automaton */
+  public static final int START = 0;
+
+  /** Column in the transition table for every possible byte value */
+  private final int[] columns = new int[256];
+
+  private final int alphabetSize;
+
+  /** Flat transition table, indexed by {@code state * alphabetSize + column} */
+  private final int[] transitions;
+
+  /** Length of the longest pattern matched in every state, 0 if there is no match */
+  private final int[] matchLengths;
+
+  private final int maxPatternLength;
+
+  /** Build an automaton that finds any of the given patterns. */
+  public AhoCorasickMatcher(Collection<String> patterns) {
+    this(patterns, false);
+  }
+
+  private AhoCorasickMatcher(Collection<String> patterns, boolean reverse) {
+    if (patterns.isEmpty()) {
+      throw new IllegalArgumentException("At least one pattern is needed");
+    }
+    int numColumns = 1;
+    int maxStates = 1;
+    int maxLen = 0;
+    for (String pattern : patterns) {
+      if (pattern.isEmpty()) {
+        throw new IllegalArgumentException("Patterns must not be empty");
+      }
+      for (int i = 0; i < pattern.length(); i++) {
+        char c = pattern.charAt(i);
+        if (c > 0x7F) {
+          throw new IllegalArgumentException("Patterns must be ASCII, got: " + pattern);
+        }
+        if (columns[c] == 0) {
+          columns[c] = numColumns++;
+        }
+      }
+      maxStates += pattern.length();
+      maxLen = Math.max(maxLen, pattern.length());
+    }
+    this.alphabetSize = numColumns;
+    this.maxPatternLength = maxLen;
+
+    // Build the trie, missing transitions are marked with -1
+    int[] trie = new int[maxStates * alphabetSize];
+    Arrays.fill(trie, -1);
+    int[] lengths = new int[maxStates];
+    int numStates = 1;
+    for (String pattern : patterns) {
+      int state = START;
+      for (int i = 0; i < pattern.length(); i++) {
+        char c = pattern.charAt(reverse ? pattern.length() - i - 1 : i);
+        int idx = state * alphabetSize + columns[c];
+        if (trie[idx] < 0) {
+          trie[idx] = numStates++;
+        }
+        state = trie[idx];
+      }
+      lengths[state] = pattern.length();
+    }
+
+    // Turn the trie into a DFA by resolving the missing transitions via the failure links, in
+    // breadth-first order so the failure targets are always fully resolved
+    int[] failure = new int[numStates];
+    Deque<Integer> queue = new ArrayDeque<>();
+    for (int c = 0; c < alphabetSize; c++) {
+      int child = trie[c];
+      if (child < 0) {
+        trie[c] = START;
+      } else {
+        failure[child] = START;
+        queue.add(child);
+      }
+    }
+    while (!queue.isEmpty()) {
+      int state = queue.poll();
+      lengths[state] = Math.max(lengths[state], lengths[failure[state]]);
+      for (int c = 0; c < alphabetSize; c++) {
+        int idx = state * alphabetSize + c;
+        int fallback = trie[failure[state] * alphabetSize + c];
+        if (trie[idx] < 0) {
+          trie[idx] = fallback;
+        } else {
+          failure[trie[idx]] = fallback;
+          queue.add(trie[idx]);
+        }
+      }
+    }
+    this.transitions = Arrays.copyOf(trie, numStates * alphabetSize);
+    this.matchLengths = Arrays.copyOf(lengths, numStates);
+  }
+
+  /**
+   * Build an automaton that finds any of the given patterns in a byte stream that is fed to it in
+   * reverse order, i.e. for searching backwards.
+   */
+  public static AhoCorasickMatcher reversed(Collection<String> patterns) {
+    return new AhoCorasickMatcher(patterns, true);
+  }
+
+  /** Get the state after feeding the given byte to the automaton in the given state. */
+  public int next(int state, byte b) {
+    return transitions[state * alphabetSize + columns[b & 0xFF]];
+  }
+
+  /**
+   * Get the length of the longest pattern that was matched when the automaton reached the given
+   * state, or 0 if no pattern was matched.
+   *
+   * <p>When searching forward, the match ends at the byte that was fed last, when searching
+   * backwards it starts at that byte.
+   */
+  public int matchLength(int state) {
+    return matchLengths[state];
+  }
+
+  public int getMaxPatternLength() {
+    return maxPatternLength;
+  }
+}
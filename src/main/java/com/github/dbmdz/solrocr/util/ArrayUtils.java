@@ -6,12 +6,23 @@ public class ArrayUtils {
    * x} or -1 if none was found.
    */
   public static int binaryFloorIdxSearch(int[] arr, int x) {
-    if (arr == null || arr.length == 0) {
+    if (arr == null) {
+      return -1;
+    }
+    return binaryFloorIdxSearch(arr, arr.length, x);
+  }
+
+  /**
+   * Like {@link #binaryFloorIdxSearch(int[], int)}, but only considers the first {@param len}
+   * elements of {@param arr}, for arrays that are only partially filled.
+   */
+  public static int binaryFloorIdxSearch(int[] arr, int len, int x) {
+    if (arr == null || len == 0) {
       return -1;
     }
 
     int left = 0;
-    int right = arr.length - 1;
+    int right = len - 1;
     int middle;
     int floorIdx = -1;
 
@@ -1,27 +1,43 @@
 package solrocr;
 
+import com.github.dbmdz.solrocr.breaklocator.BreakIndex;
 import com.github.dbmdz.solrocr.lucene.filters.ExternalUtf8ContentFilter;
 import com.github.dbmdz.solrocr.model.SourcePointer;
 import com.github.dbmdz.solrocr.model.SourcePointer.Region;
 import com.github.dbmdz.solrocr.model.SourcePointer.Source;
 import com.github.dbmdz.solrocr.model.SourcePointer.SourceType;
+import com.github.dbmdz.solrocr.reader.HttpSourceBackend;
+import com.github.dbmdz.solrocr.reader.ReadAheadChannel;
+import com.github.dbmdz.solrocr.reader.SourceBackends;
 import com.github.dbmdz.solrocr.reader.SourceReader;
+import com.google.common.collect.ImmutableList;
+import com.google.common.util.concurrent.ThreadFactoryBuilder;
 import java.io.File;
 import java.io.IOException;
+import java.io.InterruptedIOException;
 import java.io.Reader;
 import java.io.StringReader;
-import java.nio.ByteBuffer;
+import java.io.UncheckedIOException;
+import java.lang.invoke.MethodHandles;
 import java.nio.channels.SeekableByteChannel;
 import java.nio.file.Paths;
+import java.util.ArrayList;
 import java.util.Arrays;
 import java.util.List;
 import java.util.Locale;
 import java.util.Map;
-import java.util.stream.Collectors;
+import java.util.concurrent.ArrayBlockingQueue;
+import java.util.concurrent.CompletableFuture;
+import java.util.concurrent.ExecutionException;
+import java.util.concurrent.ExecutorService;
+import java.util.concurrent.ThreadPoolExecutor;
+import java.util.concurrent.TimeUnit;
 import org.apache.commons.io.IOUtils;
 import org.apache.lucene.analysis.CharFilterFactory;
 import org.apache.solr.common.SolrException;
 import org.apache.solr.common.SolrException.ErrorCode;
+import org.slf4j.Logger;
+import org.slf4j.LoggerFactory;
 
 /**
  * A CharFilter implementation that loads the field value from an external UTF8-encoded source and
@@ -30,8 +46,41 @@ import org.apache.solr.common.SolrException.ErrorCode;
  * <p>For more information on these source pointers, refer to {@link SourcePointer}.
  */
 public class ExternalUtf8ContentFilterFactory extends CharFilterFactory {
+  private static final Logger log = LoggerFactory.getLogger(MethodHandles.lookup().lookupClass());
+
+  /** Maximum number of reads queued per read-ahead thread before reads are done synchronously */
+  private static final int MAX_QUEUED_PER_THREAD = 16;
+
+  /** Executor for read-ahead and probing of the files of multi-file pointers, shared globally */
+  private static final ExecutorService READ_AHEAD_EXECUTOR = createReadAheadExecutor();
+
+  private static final byte[] UTF8_BOM = new byte[] {(byte) 0xEF, (byte) 0xBB, (byte) 0xBF};
+
+  private final boolean writeBreakIndex;
+  private final int readAheadChunks;
+  private final int readAheadChunkSize;
+  private final SourceBackends sourceBackends;
+
   public ExternalUtf8ContentFilterFactory(Map<String, String> args) {
     super(args);
+    this.writeBreakIndex = "true".equals(args.get("writeBreakIndex"));
+    this.readAheadChunks = Integer.parseInt(args.getOrDefault("readAheadChunks", "4"));
+    this.readAheadChunkSize =
+        Integer.parseInt(args.getOrDefault("readAheadChunkSizeKiB", "256")) * 1024;
+    if (readAheadChunks > 0 && readAheadChunkSize <= 0) {
+      throw new IllegalArgumentException("readAheadChunkSizeKiB must be > 0");
+    }
+    if (args.containsKey("httpCacheDir")) {
+      // Remote files are read only once during indexing, so caching their blocks doesn't help
+      throw new IllegalArgumentException(
+          "httpCacheDir is only supported on the OcrHighlightComponent");
+    }
+    try {
+      // Remote files can only be indexed if the backend is explicitly enabled for this field type
+      this.sourceBackends = SourceBackends.of(HttpSourceBackend.fromConfig(args));
+    } catch (IOException e) {
+      throw new UncheckedIOException(e);
+    }
     // TODO: Read allowed base directories from config
     // TODO: Read allowed filename patterns from config
     // TODO: Warn of security implications if neither is defined
@@ -50,7 +99,7 @@ public class ExternalUtf8ContentFilterFactory extends CharFilterFactory {
       return new StringReader("");
     }
     try {
-      SourcePointer pointer = SourcePointer.parse(ptrStr);
+      SourcePointer pointer = SourcePointer.parse(ptrStr, sourceBackends);
       if (pointer == null) {
         throw new RuntimeException(
             String.format(
@@ -67,13 +116,23 @@ public class ExternalUtf8ContentFilterFactory extends CharFilterFactory {
                 + "Pointer was: "
                 + ptrStr);
       }
-      adjustRegions(pointer);
+      if (writeBreakIndex) {
+        writeBreakIndexes(pointer);
+      }
+      List<Region> regions = adjustRegions(pointer);
       // Section size and cache size don't matter, since we don't use sectioned reads during
       // indexing.
       SourceReader r = pointer.getReader(512 * 1024, 0);
-      List<SourcePointer.Region> regions =
-          pointer.sources.stream().flatMap(s -> s.regions.stream()).collect(Collectors.toList());
-      return new ExternalUtf8ContentFilter(r.getByteChannel(), regions, ptrStr);
+      SeekableByteChannel channel;
+      if (readAheadChunks > 0 && pointer.sources.size() > 1) {
+        // Read the next files while the current one is being decoded and tokenized
+        channel =
+            new ReadAheadChannel(
+                r, regions, readAheadChunkSize, readAheadChunks, READ_AHEAD_EXECUTOR);
+      } else {
+        channel = r.getByteChannel();
+      }
+      return new ExternalUtf8ContentFilter(channel, regions, ptrStr);
     } catch (IOException e) {
       throw new RuntimeException(
           String.format(
@@ -85,7 +144,7 @@ public class ExternalUtf8ContentFilterFactory extends CharFilterFactory {
   private void validateSource(Source src) {
     // TODO: Check if sourcePath is located under one of the allowed base directories, else abort
     // TODO: Check if sourcePath's filename matches one of the allowed filename patterns, else abort
-    if (src.type == SourceType.FILESYSTEM) {
+    if (src.type == SourceType.FILESYSTEM || src.type == SourceType.BGZF) {
       File f = Paths.get(src.target).toFile();
       if (!f.exists() || !f.canRead()) {
         throw new SolrException(
@@ -93,6 +152,17 @@ public class ExternalUtf8ContentFilterFactory extends CharFilterFactory {
             String.format(
                 Locale.US, "File at %s either does not exist or cannot be read.", src.target));
       }
+    } else if (src.type == SourceType.REMOTE) {
+      // Pointers are parsed without accessing remote targets, so this is the first access
+      try {
+        src.backend.validateTarget(src.target);
+      } catch (IOException e) {
+        throw new SolrException(
+            ErrorCode.BAD_REQUEST,
+            String.format(
+                Locale.US, "File at %s cannot be read: %s", src.target, e.getMessage()),
+            e);
+      }
     } else {
       throw new SolrException(
           ErrorCode.BAD_REQUEST,
@@ -101,48 +171,139 @@ public class ExternalUtf8ContentFilterFactory extends CharFilterFactory {
   }
 
   /**
-   * Adjust regions to account for UTF BOM, if present, and to make them relative to the
-   * concatenated inputs.
+   * Build sidecar break indexes for all files in the pointer that don't have an up-to-date one.
+   *
+   * <p>Failures are logged, but don't abort indexing, since the highlighter falls back to scanning
+   * the files for breaks.
+   */
+  private void writeBreakIndexes(SourcePointer ptr) {
+    for (Source src : ptr.sources) {
+      if (src.type == SourceType.REMOTE) {
+        // Sidecars can only be written next to local files
+        continue;
+      }
+      try {
+        BreakIndex.ensureSidecar(Paths.get(src.target));
+      } catch (IOException e) {
+        log.warn("Could not write break index for {}", src.target, e);
+      }
+    }
+  }
+
+  /** Length of a source and whether it starts with a byte-order-marker, read from the source. */
+  private static final class Probe {
+    final int length;
+    final boolean hasBom;
+
+    Probe(int length, boolean hasBom) {
+      this.length = length;
+      this.hasBom = hasBom;
+    }
+  }
+
+  /**
+   * Get the regions of all sources, adjusted to account for UTF BOM, if present, and relative to
+   * the concatenated inputs.
    *
    * <p>UTF8-encoded files may contain a 3 byte byte-order-marker at the beginning of the file. Its
    * use is discouraged and not needed for UTF8 (since the byte order is pre-defined), but we've
    * encountered OCR files in the wild that have it, so we check for it and adjust regions starting
    * on the beginning of the file to account for it.
    */
-  private void adjustRegions(SourcePointer ptr) throws IOException {
+  private List<Region> adjustRegions(SourcePointer ptr) throws IOException {
+    // Probing means opening the file, which can take a while on slow storage, so the files of
+    // multi-file pointers are probed concurrently
+    List<CompletableFuture<Probe>> probes = new ArrayList<>(ptr.sources.size());
+    for (Source src : ptr.sources) {
+      if (ptr.sources.size() == 1) {
+        probes.add(CompletableFuture.completedFuture(probe(src)));
+      } else {
+        probes.add(
+            CompletableFuture.supplyAsync(
+                () -> {
+                  try {
+                    return probe(src);
+                  } catch (IOException e) {
+                    throw new UncheckedIOException(e);
+                  }
+                },
+                READ_AHEAD_EXECUTOR));
+      }
+    }
+
+    // The regions of the sources are never modified, so the adjusted regions are new instances
+    List<Region> regions = new ArrayList<>();
     int outByteOffset = 0;
-    byte[] bomBuf = new byte[3];
-    for (SourcePointer.Source src : ptr.sources) {
-      // Again, section size and cache size don't matter, since we don't use sectioned reads during
-      // indexing.
-      try (SourceReader reader = src.getReader(512, 0)) {
-        int inputLen = reader.length();
+    for (int i = 0; i < ptr.sources.size(); i++) {
+      Source src = ptr.sources.get(i);
+      Probe probe = getProbeResult(probes.get(i));
+      int inputLen = probe.length;
 
-        if (src.regions.isEmpty()) {
-          src.regions.add(new Region(0, inputLen));
-        }
+      List<Region> srcRegions =
+          src.regions.isEmpty() ? ImmutableList.of(new Region(0, inputLen)) : src.regions;
+      for (Region region : srcRegions) {
+        int start = probe.hasBom && region.start == 0 ? 3 : region.start;
+        int end = region.end == -1 ? inputLen : region.end;
+        regions.add(new Region(start + outByteOffset, end + outByteOffset));
+      }
 
-        if (!src.isAscii && src.regions.stream().anyMatch(r -> r.start == 0)) {
-          SeekableByteChannel chan = reader.getByteChannel();
-          chan.read(ByteBuffer.wrap(bomBuf));
-          chan.position(0);
-          boolean hasBOM =
-              Arrays.equals(bomBuf, new byte[] {(byte) 0xEF, (byte) 0xBB, (byte) 0xBF});
-          if (hasBOM) {
-            src.regions.stream().filter(r -> r.start == 0).forEach(r -> r.start += 3);
-          }
-        }
+      outByteOffset += inputLen;
+    }
+    return regions;
+  }
 
-        for (Region region : src.regions) {
-          if (region.end == -1) {
-            region.end = inputLen;
-          }
-          region.start += outByteOffset;
-          region.end += outByteOffset;
+  /** Get the length of a source from its reader and check if it starts with a UTF-8 BOM. */
+  private static Probe probe(Source src) throws IOException {
+    // Section size and cache size don't matter, since we don't use sectioned reads during indexing
+    try (SourceReader reader = src.getReader(512, 0)) {
+      int length = reader.length();
+      boolean startsAtBeginning =
+          src.regions.isEmpty() || src.regions.stream().anyMatch(r -> r.start == 0);
+      if (src.isAscii || !startsAtBeginning) {
+        return new Probe(length, false);
+      }
+      byte[] buf = new byte[UTF8_BOM.length];
+      int numRead = 0;
+      while (numRead < buf.length) {
+        int n = reader.readBytes(buf, numRead, numRead, buf.length - numRead);
+        if (n <= 0) {
+          return new Probe(length, false);
         }
+        numRead += n;
+      }
+      return new Probe(length, Arrays.equals(buf, UTF8_BOM));
+    }
+  }
 
-        outByteOffset += inputLen;
+  private static Probe getProbeResult(CompletableFuture<Probe> probe) throws IOException {
+    try {
+      return probe.get();
+    } catch (InterruptedException e) {
+      Thread.currentThread().interrupt();
+      throw new InterruptedIOException("Interrupted while probing sources");
+    } catch (ExecutionException e) {
+      if (e.getCause() instanceof UncheckedIOException) {
+        throw ((UncheckedIOException) e.getCause()).getCause();
       }
+      throw new IOException(e.getCause());
     }
   }
+
+  private static ExecutorService createReadAheadExecutor() {
+    int numThreads = Math.max(2, Runtime.getRuntime().availableProcessors());
+    // The executor is shared by all cores and indexing threads, so if its queue is full, the
+    // indexing thread does the read itself instead of piling up more work
+    ThreadPoolExecutor executor =
+        new ThreadPoolExecutor(
+            numThreads,
+            numThreads,
+            60L,
+            TimeUnit.SECONDS,
+            new ArrayBlockingQueue<>(numThreads * MAX_QUEUED_PER_THREAD),
+            new ThreadFactoryBuilder().setNameFormat("OcrReadAhead-%d").setDaemon(true).build(),
+            new ThreadPoolExecutor.CallerRunsPolicy());
+    // Only keep threads around while documents are being indexed
+    executor.allowCoreThreadTimeOut(true);
+    return executor;
+  }
 }
@@ -5,15 +5,13 @@ import com.github.dbmdz.solrocr.util.CharBufUtils;
 import java.io.IOException;
 import java.lang.invoke.MethodHandles;
 import java.util.Map;
-import java.util.Optional;
-import org.apache.commons.lang3.reflect.FieldUtils;
 import org.apache.lucene.analysis.TokenFilter;
 import org.apache.lucene.analysis.TokenFilterFactory;
 import org.apache.lucene.analysis.TokenStream;
-import org.apache.lucene.analysis.Tokenizer;
 import org.apache.lucene.analysis.tokenattributes.CharTermAttribute;
 import org.apache.lucene.analysis.tokenattributes.OffsetAttribute;
 import org.apache.lucene.analysis.tokenattributes.PositionIncrementAttribute;
+import org.apache.lucene.util.ArrayUtil;
 import org.slf4j.Logger;
 import org.slf4j.LoggerFactory;
 
@@ -91,69 +89,94 @@ public class OcrAlternativesFilterFactory extends TokenFilterFactory {
      */
     private OcrCharFilter inputFilter = null;
 
+    /** Whether our tokenizer was checked to read from {@link #inputFilter} */
+    private boolean inputVerified = false;
+
     /** Recorded token state, largely re-used for every alternative */
     private State state = null;
 
-    /** Buffer with the chars of the current term */
-    private char[] curTermBuffer;
+    /** Buffer with the chars of the current term, re-used for every term with alternatives */
+    private char[] curTermBuffer = new char[0];
 
     /** Length of the current term, every char after this offset in `curTermBuffer` is garbage. */
     private int curTermLength;
 
     /**
      * Offset in the term buffer until which we've already outputted all alternatives. When this is
-     * equal to `curTermLength`, we're finished with the token.
+     * equal to `curTermLength`, we're finished with the token. Negative if there is no current
+     * term.
      */
-    private int curPos;
+    private int curPos = -1;
 
     public OcrAlternativesFilter(TokenStream input) {
       super(input);
     }
 
-    private OcrCharFilter getInputCharFilter(TokenStream input) {
-      if (!(input instanceof Tokenizer)) {
-        return null;
+    /**
+     * Parse the decimal offset of an alternative in {@code buf[start:end[}, returns -1 if it is not
+     * a valid offset.
+     */
+    private static int parseOffset(char[] buf, int start, int end) {
+      if (end <= start || end - start > 9) {
+        return -1;
       }
-      Tokenizer tok = (Tokenizer) input;
-      try {
-        return (OcrCharFilter) FieldUtils.readField(tok, "input", true);
-      } catch (ClassCastException | ReflectiveOperationException e) {
-        return null;
+      int offset = 0;
+      for (int i = start; i < end; i++) {
+        int digit = buf[i] - '0';
+        if (digit < 0 || digit > 9) {
+          return -1;
+        }
+        offset = offset * 10 + digit;
       }
+      return offset;
     }
 
     @Override
     public void reset() throws IOException {
       super.reset();
-      this.inputFilter = getInputCharFilter(input);
+      // The OcrCharFilterFactory registers the filter it created for the current field value, which
+      // is the input of our tokenizer
+      this.inputFilter = OcrCharFilter.takeRegistered();
+      this.curPos = -1;
+      this.inputVerified = false;
       if (inputFilter == null) {
-        throw new RuntimeException(
-            "An OcrAlternativesFilterFactory must immediately follow a TokenizerFactory that has a OcrCharFilterFactory "
-                + "as its direct input. Check your schema!");
+        throw misconfigured();
       }
     }
 
+    private static RuntimeException misconfigured() {
+      return new RuntimeException(
+          "An OcrAlternativesFilterFactory must immediately follow a TokenizerFactory that has a OcrCharFilterFactory "
+              + "as its direct input. Check your schema!");
+    }
+
     @Override
     public final boolean incrementToken() throws IOException {
       // Initialize variable to hold the index of the next alternative in the term buffer
       int nextAlternativeIdx = -1;
       boolean partial = false;
-      if (curTermBuffer == null) {
+      if (curPos < 0) {
         while (true) {
           if (!this.input.incrementToken()) {
             return false;
           }
+          if (!inputVerified) {
+            // The registered filter could be left over from a chain without a tokenizer that
+            // consumed it, make sure it's the one our tokenizer reads from
+            if (!inputFilter.isConsumed()) {
+              throw misconfigured();
+            }
+            inputVerified = true;
+          }
           // Check if the new token has alternatives and is complete
           int start = offsetAtt.startOffset();
-          Optional<OcrCharFilter.TokenWithAlternatives> tokOpt =
-              inputFilter.getTokenWithAlternatives(start);
-          if (!tokOpt.isPresent()) {
+          int tokIdx = inputFilter.findTokenWithAlternatives(start);
+          if (tokIdx < 0) {
             // No alternatives, nothing to do
             return true;
           }
-          OcrCharFilter.TokenWithAlternatives tok = tokOpt.get();
-          partial = (start - tok.defaultFormStart) > 0;
-          if (start >= tok.defaultFormEnd) {
+          partial = (start - inputFilter.getDefaultFormStart(tokIdx)) > 0;
+          if (start >= inputFilter.getDefaultFormEnd(tokIdx)) {
             // Part of ocr token with alternatives, but not part of the beginning
             // -> OCR token unit got split, ignore this token
             continue;
@@ -167,8 +190,9 @@ public class OcrAlternativesFilterFactory extends TokenFilterFactory {
         this.state = this.captureState();
 
         // Set the initial token state
-        this.curTermBuffer = this.termAtt.buffer().clone();
         this.curTermLength = this.termAtt.length();
+        this.curTermBuffer = ArrayUtil.grow(this.curTermBuffer, this.curTermLength);
+        System.arraycopy(this.termAtt.buffer(), 0, this.curTermBuffer, 0, this.curTermLength);
         this.curPos = 0;
       }
 
@@ -182,17 +206,17 @@ public class OcrAlternativesFilterFactory extends TokenFilterFactory {
             CharBufUtils.indexOf(
                 this.curTermBuffer, this.curPos, this.curTermLength, ALTERNATIVE_MARKER);
         if (closingIdx - curPos >= 0) {
-          String offsetStr = new String(this.curTermBuffer, curPos, (closingIdx - curPos));
-          newOffset = Integer.parseInt(offsetStr);
+          newOffset = parseOffset(this.curTermBuffer, curPos, closingIdx);
+        }
+        if (newOffset >= 0) {
           curPos = closingIdx + ALTERNATIVE_MARKER.length;
           nextAlternativeIdx =
               CharBufUtils.indexOf(
-                  termAtt.buffer(), curPos, this.curTermLength, ALTERNATIVE_MARKER);
+                  this.curTermBuffer, curPos, this.curTermLength, ALTERNATIVE_MARKER);
         } else {
           log.warn(
               "Encountered incomplete token with alternatives, skipping it and all further alternatives,"
                   + "check the maximum token length of your tokenizer!");
-          this.curTermBuffer = null;
           this.curTermLength = -1;
           this.curPos = -1;
           return this.incrementToken();
@@ -219,7 +243,6 @@ public class OcrAlternativesFilterFactory extends TokenFilterFactory {
       }
       if (end == curTermLength || partial) {
         // We're done with this token's alternatives, reset term state
-        this.curTermBuffer = null;
         this.curTermLength = -1;
         this.curPos = -1;
       } else {
@@ -36,11 +36,14 @@ public class OcrCharFilterFactory extends CharFilterFactory {
 
   @Override
   public Reader create(Reader input) {
+    // A filter registered for an earlier field value that was never picked up must not be handed
+    // to the alternatives filter of this one, e.g. if we don't return an OcrCharFilter below
+    OcrCharFilter.clearRegistered();
     PeekingReader peeker =
         new PeekingReader(new SanitizingXmlFilter(input, fixMarkup), BEGIN_BUF_SIZE, CTX_BUF_SIZE);
     if (peeker.peekBeginning().isEmpty()) {
       // Empty document, no special treatment necessary
-      return OcrCharFilter.nopFilter();
+      return register(OcrCharFilter.nopFilter());
     }
     OcrFormat fmt =
         FORMATS.stream()
@@ -52,9 +55,17 @@ public class OcrCharFilterFactory extends CharFilterFactory {
                         "Could not determine OCR format from chunk: " + peeker.peekBeginning()));
     Reader formatFilter = fmt.filter(peeker, expandAlternatives);
     if (formatFilter == null) {
-      return OcrCharFilter.nopFilter();
+      return register(OcrCharFilter.nopFilter());
+    } else if (formatFilter instanceof OcrCharFilter) {
+      return register((OcrCharFilter) formatFilter);
     } else {
       return formatFilter;
     }
   }
+
+  /** Make the filter available to an {@link OcrAlternativesFilterFactory} later in the chain */
+  private static Reader register(OcrCharFilter filter) {
+    filter.register();
+    return filter;
+  }
 }
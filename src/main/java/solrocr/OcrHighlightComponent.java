@@ -1,7 +1,15 @@
 package solrocr;
 
+import com.github.dbmdz.solrocr.model.SourcePointerCache;
+import com.github.dbmdz.solrocr.reader.FileChannelPool;
+import com.github.dbmdz.solrocr.reader.HttpSourceBackend;
+import com.github.dbmdz.solrocr.reader.SectionCache;
+import com.github.dbmdz.solrocr.reader.SourceBackends;
+import com.github.dbmdz.solrocr.solr.FairHighlightScheduler;
 import com.github.dbmdz.solrocr.solr.OcrHighlightParams;
+import com.github.dbmdz.solrocr.solr.OcrHighlighterConfig;
 import com.github.dbmdz.solrocr.solr.SolrOcrHighlighter;
+import com.github.dbmdz.solrocr.solr.VirtualThreadExecutor;
 import com.google.common.base.Strings;
 import java.io.IOException;
 import java.lang.invoke.MethodHandles;
@@ -10,6 +18,7 @@ import java.util.HashSet;
 import java.util.Map;
 import java.util.Objects;
 import java.util.Set;
+import java.util.function.ToLongFunction;
 import java.util.stream.Collectors;
 import java.util.stream.Stream;
 import org.apache.lucene.search.Query;
@@ -19,16 +28,20 @@ import org.apache.solr.common.params.ModifiableSolrParams;
 import org.apache.solr.common.params.SolrParams;
 import org.apache.solr.common.util.NamedList;
 import org.apache.solr.common.util.SimpleOrderedMap;
+import org.apache.solr.core.CloseHook;
 import org.apache.solr.core.PluginInfo;
 import org.apache.solr.core.SolrCore;
+import org.apache.solr.core.SolrEventListener;
 import org.apache.solr.handler.component.ResponseBuilder;
 import org.apache.solr.handler.component.SearchComponent;
 import org.apache.solr.handler.component.ShardRequest;
 import org.apache.solr.handler.component.ShardResponse;
+import org.apache.solr.metrics.SolrMetricsContext;
 import org.apache.solr.request.SolrQueryRequest;
 import org.apache.solr.search.QParser;
 import org.apache.solr.search.QParserPlugin;
 import org.apache.solr.search.QueryParsing;
+import org.apache.solr.search.SolrIndexSearcher;
 import org.apache.solr.search.SyntaxError;
 import org.apache.solr.util.SolrPluginUtils;
 import org.apache.solr.util.plugin.PluginInfoInitialized;
@@ -43,7 +56,7 @@ public class OcrHighlightComponent extends SearchComponent
   private static final Logger log = LoggerFactory.getLogger(MethodHandles.lookup().lookupClass());
 
   private PluginInfo info;
-  private SolrOcrHighlighter ocrHighlighter;
+  private volatile SolrOcrHighlighter ocrHighlighter;
 
   @Override
   public String getDescription() {
@@ -89,6 +102,16 @@ public class OcrHighlightComponent extends SearchComponent
                 String.valueOf(Runtime.getRuntime().availableProcessors())));
     int maxQueuedPerThread =
         Integer.parseInt(info.attributes.getOrDefault("maxQueuedPerThread", "8"));
+    int maxThreadsPerRequest =
+        Integer.parseInt(info.attributes.getOrDefault("maxThreadsPerRequest", "0"));
+    int numPrefetchThreads =
+        Integer.parseInt(info.attributes.getOrDefault("numPrefetchThreads", "4"));
+    String threadMode = info.attributes.getOrDefault("threadMode", "platform");
+    if (!threadMode.equals("platform") && !threadMode.equals("virtual")) {
+      throw new SolrException(
+          SolrException.ErrorCode.SERVER_ERROR,
+          "Invalid threadMode, must be 'platform' or 'virtual': " + threadMode);
+    }
     int sectionReadSize =
         Integer.parseInt(info.attributes.getOrDefault("sectionReadSizeKiB", "8")) * 1024;
     if (sectionReadSize <= 0) {
@@ -102,12 +125,283 @@ public class OcrHighlightComponent extends SearchComponent
       maxSectionCacheSize = sectionReadSize * 10;
     }
 
+    long sharedSectionCacheSize =
+        Long.parseLong(info.attributes.getOrDefault("sharedSectionCacheSizeMiB", "0"))
+            * 1024
+            * 1024;
+    SectionCache sharedSectionCache = null;
+    if (sharedSectionCacheSize > 0) {
+      sharedSectionCache = new SectionCache(sharedSectionCacheSize);
+    }
+
+    long sourcePointerCacheSize =
+        Long.parseLong(info.attributes.getOrDefault("sourcePointerCacheSize", "4096"));
+    long sourcePointerCacheTtl =
+        Long.parseLong(info.attributes.getOrDefault("sourcePointerCacheTtlSeconds", "300"));
+    SourcePointerCache sourcePointerCache = null;
+    if (sourcePointerCacheSize > 0) {
+      sourcePointerCache = new SourcePointerCache(sourcePointerCacheSize, sourcePointerCacheTtl);
+      // Stored values (and the files they point to) can change with every commit
+      core.registerNewSearcherListener(new SourcePointerCacheInvalidator(sourcePointerCache));
+    }
+
+    int maxOpenFiles = Integer.parseInt(info.attributes.getOrDefault("maxOpenFiles", "512"));
+    long openFileIdleTimeout =
+        Long.parseLong(info.attributes.getOrDefault("openFileIdleTimeoutSeconds", "30"));
+    long openFileRevalidateInterval =
+        Long.parseLong(info.attributes.getOrDefault("openFileRevalidateSeconds", "5"));
+    FileChannelPool channelPool = null;
+    if (maxOpenFiles > 0) {
+      FileChannelPool pool =
+          new FileChannelPool(
+              maxOpenFiles, openFileIdleTimeout * 1000, openFileRevalidateInterval * 1000);
+      core.addCloseHook(
+          new CloseHook() {
+            @Override
+            public void preClose(SolrCore core) {}
+
+            @Override
+            public void postClose(SolrCore core) {
+              pool.close();
+            }
+          });
+      channelPool = pool;
+    }
+
+    // Backends are only enabled when they're configured and only apply to this core
+    SourceBackends sourceBackends = SourceBackends.of(createHttpBackend());
+
     this.ocrHighlighter =
         new SolrOcrHighlighter(
-            numHlThreads,
-            maxQueuedPerThread,
-            sectionReadSize,
-            (int) Math.ceil((double) maxSectionCacheSize / sectionReadSize));
+            new OcrHighlighterConfig()
+                .setNumHlThreads(numHlThreads)
+                .setMaxQueuedPerThread(maxQueuedPerThread)
+                .setMaxThreadsPerRequest(maxThreadsPerRequest)
+                .setUseVirtualThreads(threadMode.equals("virtual"))
+                .setNumPrefetchThreads(numPrefetchThreads)
+                .setReaderSectionSize(sectionReadSize)
+                .setReaderMaxCacheEntries(
+                    (int) Math.ceil((double) maxSectionCacheSize / sectionReadSize))
+                .setSharedSectionCache(sharedSectionCache)
+                .setSourcePointerCache(sourcePointerCache)
+                .setChannelPool(channelPool)
+                .setSourceBackends(sourceBackends));
+  }
+
+  /**
+   * Create the backend for OCR files served over HTTP from the {@code http*} attributes, {@code
+   * null} if it is not enabled.
+   */
+  private HttpSourceBackend createHttpBackend() {
+    try {
+      return HttpSourceBackend.fromConfig(info.attributes);
+    } catch (IllegalArgumentException e) {
+      throw new SolrException(
+          SolrException.ErrorCode.SERVER_ERROR,
+          "Invalid HTTP backend configuration: " + e.getMessage());
+    } catch (IOException e) {
+      throw new SolrException(
+          SolrException.ErrorCode.SERVER_ERROR,
+          "Could not create the HTTP block cache at " + info.attributes.get("httpCacheDir"),
+          e);
+    }
+  }
+
+  /** Clears the source pointer cache whenever a new searcher is opened. */
+  private static class SourcePointerCacheInvalidator implements SolrEventListener {
+    private final SourcePointerCache cache;
+
+    private SourcePointerCacheInvalidator(SourcePointerCache cache) {
+      this.cache = cache;
+    }
+
+    @Override
+    public void postCommit() {}
+
+    @Override
+    public void postSoftCommit() {}
+
+    @Override
+    public void newSearcher(SolrIndexSearcher newSearcher, SolrIndexSearcher currentSearcher) {
+      cache.clear();
+    }
+  }
+
+  @Override
+  public void initializeMetrics(SolrMetricsContext parentContext, String scope) {
+    super.initializeMetrics(parentContext, scope);
+    // The highlighter is only created once the core is ready, so the gauges need to look it up
+    // lazily
+    SolrMetricsContext ctx = getSolrMetricsContext();
+    String category = getCategory().toString();
+    ctx.gauge(
+        () -> getSectionCacheStat(SectionCache::getHitCount),
+        true,
+        "hits",
+        category,
+        scope,
+        "sectionCache");
+    ctx.gauge(
+        () -> getSectionCacheStat(SectionCache::getMissCount),
+        true,
+        "misses",
+        category,
+        scope,
+        "sectionCache");
+    ctx.gauge(
+        () -> getSectionCacheStat(SectionCache::getEvictionCount),
+        true,
+        "evictions",
+        category,
+        scope,
+        "sectionCache");
+    ctx.gauge(
+        () -> getSectionCacheStat(SectionCache::getNumEntries),
+        true,
+        "size",
+        category,
+        scope,
+        "sectionCache");
+    ctx.gauge(
+        () -> getSourcePointerCacheStat(SourcePointerCache::getHitCount),
+        true,
+        "hits",
+        category,
+        scope,
+        "sourcePointerCache");
+    ctx.gauge(
+        () -> getSourcePointerCacheStat(SourcePointerCache::getMissCount),
+        true,
+        "misses",
+        category,
+        scope,
+        "sourcePointerCache");
+    ctx.gauge(
+        () -> getSourcePointerCacheStat(SourcePointerCache::getNumEntries),
+        true,
+        "size",
+        category,
+        scope,
+        "sourcePointerCache");
+    ctx.gauge(
+        () -> getChannelPoolStat(FileChannelPool::getNumOpenFiles),
+        true,
+        "openFiles",
+        category,
+        scope,
+        "fileChannelPool");
+    ctx.gauge(
+        () -> getChannelPoolStat(FileChannelPool::getHitCount),
+        true,
+        "hits",
+        category,
+        scope,
+        "fileChannelPool");
+    ctx.gauge(
+        () -> getChannelPoolStat(FileChannelPool::getOpenCount),
+        true,
+        "opens",
+        category,
+        scope,
+        "fileChannelPool");
+    ctx.gauge(
+        () -> getChannelPoolStat(FileChannelPool::getEvictionCount),
+        true,
+        "evictions",
+        category,
+        scope,
+        "fileChannelPool");
+    ctx.gauge(
+        () -> getChannelPoolStat(FileChannelPool::getInvalidationCount),
+        true,
+        "invalidations",
+        category,
+        scope,
+        "fileChannelPool");
+    ctx.gauge(
+        () -> getSchedulerStat(FairHighlightScheduler::getNumQueuedTasks),
+        true,
+        "queuedTasks",
+        category,
+        scope,
+        "scheduler");
+    ctx.gauge(
+        () -> getSchedulerStat(FairHighlightScheduler::getNumRunningTasks),
+        true,
+        "runningTasks",
+        category,
+        scope,
+        "scheduler");
+    ctx.gauge(
+        () -> getSchedulerStat(FairHighlightScheduler::getNumActiveRequests),
+        true,
+        "activeRequests",
+        category,
+        scope,
+        "scheduler");
+    ctx.gauge(
+        () -> getSchedulerStat(FairHighlightScheduler::getNumCompletedTasks),
+        true,
+        "completedTasks",
+        category,
+        scope,
+        "scheduler");
+    ctx.gauge(
+        () -> getSchedulerStat(FairHighlightScheduler::getTotalQueueTimeMs),
+        true,
+        "totalQueueTimeMs",
+        category,
+        scope,
+        "scheduler");
+    ctx.gauge(
+        () -> getVirtualThreadStat(VirtualThreadExecutor::getNumRunningTasks),
+        true,
+        "runningTasks",
+        category,
+        scope,
+        "virtualThreads");
+    ctx.gauge(
+        () -> getVirtualThreadStat(VirtualThreadExecutor::getNumActiveReads),
+        true,
+        "activeReads",
+        category,
+        scope,
+        "virtualThreads");
+    ctx.gauge(
+        () -> getVirtualThreadStat(VirtualThreadExecutor::getNumQueuedReads),
+        true,
+        "queuedReads",
+        category,
+        scope,
+        "virtualThreads");
+  }
+
+  private long getVirtualThreadStat(ToLongFunction<VirtualThreadExecutor> stat) {
+    VirtualThreadExecutor executor =
+        ocrHighlighter == null ? null : ocrHighlighter.getVirtualThreadExecutor();
+    return executor == null ? 0 : stat.applyAsLong(executor);
+  }
+
+  private long getSchedulerStat(ToLongFunction<FairHighlightScheduler> stat) {
+    FairHighlightScheduler scheduler =
+        ocrHighlighter == null ? null : ocrHighlighter.getScheduler();
+    return scheduler == null ? 0 : stat.applyAsLong(scheduler);
+  }
+
+  private long getChannelPoolStat(ToLongFunction<FileChannelPool> stat) {
+    FileChannelPool pool = ocrHighlighter == null ? null : ocrHighlighter.getChannelPool();
+    return pool == null ? 0 : stat.applyAsLong(pool);
+  }
+
+  private long getSourcePointerCacheStat(ToLongFunction<SourcePointerCache> stat) {
+    SourcePointerCache cache =
+        ocrHighlighter == null ? null : ocrHighlighter.getSourcePointerCache();
+    return cache == null ? 0 : stat.applyAsLong(cache);
+  }
+
+  private long getSectionCacheStat(ToLongFunction<SectionCache> stat) {
+    SectionCache cache = ocrHighlighter == null ? null : ocrHighlighter.getSharedSectionCache();
+    return cache == null ? 0 : stat.applyAsLong(cache);
   }
 
   @Override
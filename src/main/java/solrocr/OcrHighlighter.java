@@ -24,6 +24,7 @@
  */
 package solrocr;
 
+import com.github.dbmdz.solrocr.breaklocator.BreakIndex;
 import com.github.dbmdz.solrocr.breaklocator.BreakLocator;
 import com.github.dbmdz.solrocr.breaklocator.ContextBreakLocator;
 import com.github.dbmdz.solrocr.formats.alto.AltoFormat;
@@ -32,19 +33,27 @@ import com.github.dbmdz.solrocr.formats.miniocr.MiniOcrFormat;
 import com.github.dbmdz.solrocr.lucene.OcrFieldHighlighter;
 import com.github.dbmdz.solrocr.lucene.OcrPassageFormatter;
 import com.github.dbmdz.solrocr.lucene.OcrPassageScorer;
+import com.github.dbmdz.solrocr.lucene.PageTable;
+import com.github.dbmdz.solrocr.lucene.ParallelSnippetFormatter;
 import com.github.dbmdz.solrocr.model.OcrBlock;
 import com.github.dbmdz.solrocr.model.OcrFormat;
 import com.github.dbmdz.solrocr.model.OcrHighlightResult;
 import com.github.dbmdz.solrocr.model.OcrSnippet;
 import com.github.dbmdz.solrocr.model.SourcePointer;
+import com.github.dbmdz.solrocr.model.SourcePointerCache;
+import com.github.dbmdz.solrocr.reader.BaseSourceReader;
 import com.github.dbmdz.solrocr.reader.ExitingSourceReader;
 import com.github.dbmdz.solrocr.reader.LegacyBaseCompositeReader;
 import com.github.dbmdz.solrocr.reader.SourceReader;
 import com.github.dbmdz.solrocr.reader.StringSourceReader;
 import com.github.dbmdz.solrocr.solr.OcrHighlightParams;
+import com.github.dbmdz.solrocr.solr.OcrHighlighterConfig;
+import com.github.dbmdz.solrocr.solr.OcrSnippetCache;
 import com.github.dbmdz.solrocr.util.VersionUtils;
 import com.github.dbmdz.solrocr.util.TimeAllowedLimit;
+import com.google.common.collect.ImmutableMap;
 import com.google.common.collect.ImmutableSet;
+import java.io.FileNotFoundException;
 import java.io.IOException;
 import java.lang.reflect.Constructor;
 import java.lang.reflect.InvocationTargetException;
@@ -62,6 +71,7 @@ import java.util.concurrent.CompletableFuture;
 import java.util.concurrent.CompletionException;
 import java.util.concurrent.Executor;
 import java.util.concurrent.RejectedExecutionException;
+import java.util.concurrent.Semaphore;
 import java.util.function.Function;
 import java.util.function.Predicate;
 import org.apache.lucene.analysis.Analyzer;
@@ -90,10 +100,12 @@ import org.apache.lucene.search.uhighlight.UnifiedHighlighter;
 import org.apache.lucene.util.BytesRef;
 import org.apache.lucene.util.InPlaceMergeSorter;
 import org.apache.lucene.util.automaton.CharacterRunAutomaton;
+import org.apache.solr.common.SolrException;
 import org.apache.solr.common.params.HighlightParams;
 import org.apache.solr.common.params.SolrParams;
 import org.apache.solr.request.SolrQueryRequest;
 import org.apache.solr.search.QueryLimits;
+import org.apache.solr.search.SolrIndexSearcher;
 import org.slf4j.Logger;
 import org.slf4j.LoggerFactory;
 
@@ -105,13 +117,22 @@ public class OcrHighlighter extends UnifiedHighlighter {
 
   private static final Logger log = LoggerFactory.getLogger(OcrHighlighter.class);
 
-  private static final Set<OcrFormat> FORMATS =
-      ImmutableSet.of(new HocrFormat(), new AltoFormat(), new MiniOcrFormat());
+  private static final Map<String, OcrFormat> FORMATS_BY_NAME =
+      ImmutableMap.of(
+          "hocr", new HocrFormat(),
+          "alto", new AltoFormat(),
+          "miniocr", new MiniOcrFormat());
+  private static final Set<OcrFormat> FORMATS = ImmutableSet.copyOf(FORMATS_BY_NAME.values());
+  private static final OcrFormat MINIOCR_WITHOUT_SCANNER = new MiniOcrFormat(false);
 
   private static final CharacterRunAutomaton[] ZERO_LEN_AUTOMATA_ARRAY_LEGACY =
       new CharacterRunAutomaton[0];
   private static final IndexSearcher EMPTY_INDEXSEARCHER;
   private static final int DEFAULT_SNIPPET_LIMIT = 100;
+
+  /** Number of snippets of a document that are formatted together when formatting in parallel */
+  private static final int PARALLEL_FORMAT_CHUNK_SIZE = 32;
+
   public static final String PARTIAL_OCR_HIGHLIGHTS = "partialOcrHighlights";
 
   private static final Constructor<UHComponents> hlComponentsConstructorLegacy;
@@ -252,8 +273,8 @@ public class OcrHighlighter extends UnifiedHighlighter {
 
   private final SolrParams params;
   private final SolrQueryRequest req;
-  private final int readerSectionSize;
-  private final int readerMaxCacheEntries;
+  private final OcrHighlighterConfig config;
+  private final Semaphore readPermits;
 
   public OcrHighlighter(
       IndexSearcher indexSearcher,
@@ -261,11 +282,33 @@ public class OcrHighlighter extends UnifiedHighlighter {
       SolrQueryRequest req,
       int readerSectionSize,
       int readerMaxCacheEntries) {
+    this(
+        indexSearcher,
+        indexAnalyzer,
+        req,
+        new OcrHighlighterConfig()
+            .setReaderSectionSize(readerSectionSize)
+            .setReaderMaxCacheEntries(readerMaxCacheEntries),
+        null);
+  }
+
+  /**
+   * @param config the reader settings and shared resources of the highlighter, its thread settings
+   *     are not used
+   * @param readPermits permits that every read from the OCR files has to acquire, to bound the
+   *     number of concurrent reads across requests, can be {@code null}
+   */
+  public OcrHighlighter(
+      IndexSearcher indexSearcher,
+      Analyzer indexAnalyzer,
+      SolrQueryRequest req,
+      OcrHighlighterConfig config,
+      Semaphore readPermits) {
     super(indexSearcher, indexAnalyzer);
     this.params = req.getParams();
     this.req = req;
-    this.readerSectionSize = readerSectionSize;
-    this.readerMaxCacheEntries = readerMaxCacheEntries;
+    this.config = config;
+    this.readPermits = readPermits;
   }
 
   /**
@@ -332,9 +375,25 @@ public class OcrHighlighter extends UnifiedHighlighter {
     return flags;
   }
 
+  /** Highlight passages from OCR fields in multiple documents, without prefetching. */
+  public OcrHighlightResult[] highlightOcrFields(
+      String[] ocrFieldNames,
+      Query query,
+      int[] docIDs,
+      int[] maxPassagesOcr,
+      Map<String, Object> respHeader,
+      Executor hlThreadPool)
+      throws IOException {
+    return highlightOcrFields(
+        ocrFieldNames, query, docIDs, maxPassagesOcr, respHeader, hlThreadPool, null);
+  }
+
   /**
    * Highlight passages from OCR fields in multiple documents.
    *
+   * <p>If a {@code prefetchThreadPool} is passed, the sections around the matches of every document
+   * are read concurrently on it before the passages are formed.
+   *
    * <p>Heavily based on {@link UnifiedHighlighter#highlightFieldsAsObjects(String[], Query, int[],
    * int[])} with modifications to add support for OCR-specific functionality and timeouts.
    * <strong>Please refer to the file header for licensing information on the original
@@ -346,7 +405,8 @@ public class OcrHighlighter extends UnifiedHighlighter {
       int[] docIDs,
       int[] maxPassagesOcr,
       Map<String, Object> respHeader,
-      Executor hlThreadPool)
+      Executor hlThreadPool,
+      Executor prefetchThreadPool)
       throws IOException {
     if (ocrFieldNames.length < 1) {
       throw new IllegalArgumentException("ocrFieldNames must not be empty");
@@ -379,6 +439,44 @@ public class OcrHighlighter extends UnifiedHighlighter {
     copyAndSortFieldsWithMaxPassages(
         ocrFieldNames, maxPassagesOcr, fields, maxPassages); // latter 2 are "out" params
 
+    final Executor prefetchExecutor;
+    if (params.getBool(OcrHighlightParams.PREFETCH, false)) {
+      // Without a dedicated pool, the coalesced reads are issued from the highlighting thread
+      prefetchExecutor = prefetchThreadPool != null ? prefetchThreadPool : Runnable::run;
+    } else {
+      prefetchExecutor = null;
+    }
+
+    // If the format of a field is known, it doesn't have to be determined from the content
+    OcrFormat[] formatHints = new OcrFormat[fields.length];
+    for (int f = 0; f < fields.length; f++) {
+      String formatName = params.getFieldParam(fields[f], OcrHighlightParams.FORMAT);
+      if (formatName != null) {
+        formatHints[f] = FORMATS_BY_NAME.get(formatName.toLowerCase(Locale.US));
+        if (formatHints[f] == null) {
+          throw new SolrException(
+              SolrException.ErrorCode.BAD_REQUEST,
+              String.format(
+                  Locale.US,
+                  "Unknown OCR format '%s' for field %s, must be one of %s",
+                  formatName,
+                  fields[f],
+                  FORMATS_BY_NAME.keySet()));
+        }
+      }
+    }
+
+    // Snippets for popular queries can be cached across requests, if a cache is configured
+    final OcrSnippetCache snippetCache =
+        searcher instanceof SolrIndexSearcher
+            ? OcrSnippetCache.get((SolrIndexSearcher) searcher, query, params, fields)
+            : null;
+
+    // Formatting the snippets of a document on multiple threads only pays off for documents with
+    // many snippets, e.g. for "search inside" requests on a single volume
+    final Executor formatExecutor =
+        params.getBool(OcrHighlightParams.PARALLEL_FORMAT, false) ? hlThreadPool : null;
+
     // Init field highlighters (where most of the highlight logic lives, and on a per field basis)
     Set<Term> queryTerms = extractTerms(query);
     OcrFieldHighlighter[] fieldHighlighters = new OcrFieldHighlighter[fields.length];
@@ -413,8 +511,36 @@ public class OcrHighlighter extends UnifiedHighlighter {
         (numTermVectors >= 2) ? TermVectorReusingLeafReader.wrap(searcher.getIndexReader()) : null;
 
     // [fieldIdx][docIdInIndex] of highlightDoc result
-    OcrSnippet[][][] highlightDocsInByField = new OcrSnippet[fields.length][sortedDocIds.length][];
-    int[][] snippetCountsByField = new int[fields.length][sortedDocIds.length];
+    final int numDocs = sortedDocIds.length;
+    OcrSnippet[][][] highlightDocsInByField = new OcrSnippet[fields.length][numDocs][];
+    int[][] snippetCountsByField = new int[fields.length][numDocs];
+    boolean[][] cachedByField = null;
+    if (snippetCache != null) {
+      cachedByField = new boolean[fields.length][numDocs];
+      // Documents with all fields in the cache don't have to be loaded at all
+      int numUncached = 0;
+      for (int docIdx = 0; docIdx < numDocs; docIdx++) {
+        int docInIndex = docInIndexes[docIdx];
+        boolean allCached = true;
+        for (int fieldIdx = 0; fieldIdx < fields.length; fieldIdx++) {
+          OcrSnippetCache.Entry cached = snippetCache.get(fields[fieldIdx], sortedDocIds[docIdx]);
+          if (cached == null) {
+            allCached = false;
+            continue;
+          }
+          highlightDocsInByField[fieldIdx][docInIndex] = cached.getSnippets();
+          snippetCountsByField[fieldIdx][docInIndex] = cached.getNumTotal();
+          cachedByField[fieldIdx][docInIndex] = true;
+        }
+        if (!allCached) {
+          sortedDocIds[numUncached] = sortedDocIds[docIdx];
+          docInIndexes[numUncached] = docInIndex;
+          numUncached++;
+        }
+      }
+      sortedDocIds = Arrays.copyOf(sortedDocIds, numUncached);
+      docInIndexes = Arrays.copyOf(docInIndexes, numUncached);
+    }
     // Highlight in doc batches determined by loadFieldValues (consumes from docIdIter)
     DocIdSetIterator docIdIter = asDocIdSetIterator(sortedDocIds);
 
@@ -437,6 +563,18 @@ public class OcrHighlighter extends UnifiedHighlighter {
           if (content == null) {
             continue;
           }
+          if (cachedByField != null && cachedByField[fieldIdx][docInIndexes[docIdx]]) {
+            // Only some of the fields of the document were cached
+            try {
+              content.close();
+            } catch (IOException e) {
+              log.warn(
+                  "Encountered error while closing content iterator for {}: {}",
+                  content.getPointer(),
+                  e.getMessage());
+            }
+            continue;
+          }
           QueryTimeout limits = getQueryLimits(req);
           if (limits != null) {
             // We only check against the limits when reading our field content (both from disk and
@@ -483,6 +621,10 @@ public class OcrHighlighter extends UnifiedHighlighter {
                       fieldHighlighter,
                       leafReader,
                       snippetLimit,
+                      formatHints[fieldIdxFinal],
+                      prefetchExecutor,
+                      formatExecutor,
+                      snippetCache,
                       resultByDocIn,
                       snippetCountsByField);
                 } catch (ExitingSourceReader.ExitingSourceReaderException
@@ -561,8 +703,8 @@ public class OcrHighlighter extends UnifiedHighlighter {
       }
     }
 
-    OcrHighlightResult[] out = new OcrHighlightResult[sortedDocIds.length];
-    for (int d = 0; d < sortedDocIds.length; d++) {
+    OcrHighlightResult[] out = new OcrHighlightResult[numDocs];
+    for (int d = 0; d < numDocs; d++) {
       OcrHighlightResult hl = new OcrHighlightResult();
       for (int f = 0; f < fields.length; f++) {
         if (snippetCountsByField[f][d] <= 0) {
@@ -588,16 +730,24 @@ public class OcrHighlighter extends UnifiedHighlighter {
       OcrFieldHighlighter fieldHighlighter,
       LeafReader leafReader,
       int snippetLimit,
+      OcrFormat formatHint,
+      Executor prefetchExecutor,
+      Executor formatExecutor,
+      OcrSnippetCache snippetCache,
       OcrSnippet[][] resultByDocIn,
       int[][] snippetCountsByField)
       throws IOException {
     if (reader == null) {
       return;
     }
-    OcrFormat ocrFormat = getFormat(reader);
+    OcrFormat ocrFormat = formatHint != null ? formatHint : getFormat(reader);
     if (ocrFormat == null) {
       return;
     }
+    if (ocrFormat instanceof MiniOcrFormat
+        && !params.getBool(OcrHighlightParams.USE_MINIOCR_SCANNER, true)) {
+      ocrFormat = MINIOCR_WITHOUT_SCANNER;
+    }
 
     String limitBlockParam = params.get(OcrHighlightParams.LIMIT_BLOCK, "block");
     OcrBlock[] limitBlocks = null;
@@ -610,21 +760,38 @@ public class OcrHighlighter extends UnifiedHighlighter {
         OcrBlock.valueOf(
             params.get(OcrHighlightParams.CONTEXT_BLOCK, "line").toUpperCase(Locale.US));
 
-    BreakLocator contextLocator = ocrFormat.getBreakLocator(reader, contextBlock);
+    BreakIndex breakIndex =
+        params.getBool(OcrHighlightParams.USE_BREAK_INDEX, false) ? BreakIndex.load(reader) : null;
+    BreakLocator contextLocator = getBreakLocator(ocrFormat, breakIndex, reader, contextBlock);
     BreakLocator limitLocator =
-        limitBlocks == null ? null : ocrFormat.getBreakLocator(reader, limitBlocks);
+        limitBlocks == null ? null : getBreakLocator(ocrFormat, breakIndex, reader, limitBlocks);
     BreakLocator breakLocator =
         new ContextBreakLocator(
             contextLocator, limitLocator, params.getInt(OcrHighlightParams.CONTEXT_SIZE, 2));
-    OcrPassageFormatter formatter =
-        ocrFormat.getPassageFormatter(
-            OcrHighlightParams.get(params, OcrHighlightParams.TAG_PRE, "<em>"),
-            OcrHighlightParams.get(params, OcrHighlightParams.TAG_POST, "</em>"),
-            params.getBool(OcrHighlightParams.ABSOLUTE_HIGHLIGHTS, false),
-            params.getBool(OcrHighlightParams.ALIGN_SPANS, false),
-            params.getBool(OcrHighlightParams.TRACK_PAGES, true));
+    OcrPassageFormatter formatter = getPassageFormatter(ocrFormat, breakIndex, reader);
     boolean scorePassages = params.getBool(OcrHighlightParams.SCORE_PASSAGES, true);
 
+    ParallelSnippetFormatter parallelFormatter = null;
+    SourcePointer pointer = reader.getPointer();
+    if (formatExecutor != null && pointer != null) {
+      QueryTimeout limits = getQueryLimits(req);
+      parallelFormatter =
+          new ParallelSnippetFormatter(
+              formatExecutor,
+              () -> {
+                // Every worker reads through its own reader, sections are shared via the shared
+                // section cache and the channel pool, if configured
+                SourceReader workerReader = openReader(pointer);
+                if (limits != null) {
+                  workerReader = new ExitingSourceReader(workerReader, limits);
+                }
+                return new ParallelSnippetFormatter.Worker(
+                    getPassageFormatter(ocrFormat, breakIndex, workerReader), workerReader);
+              },
+              PARALLEL_FORMAT_CHUNK_SIZE,
+              Runtime.getRuntime().availableProcessors() - 1);
+    }
+
     resultByDocIn[docInIndex] =
         fieldHighlighter.highlightFieldForDoc(
             leafReader,
@@ -635,8 +802,42 @@ public class OcrHighlighter extends UnifiedHighlighter {
             reader,
             params.get(OcrHighlightParams.PAGE_ID),
             snippetLimit,
-            scorePassages);
+            scorePassages,
+            prefetchExecutor,
+            parallelFormatter);
     snippetCountsByField[fieldIdx][docInIndex] = fieldHighlighter.getNumMatches(indexDocId);
+    if (snippetCache != null) {
+      // Only reached if the document was highlighted completely, i.e. without a timeout
+      snippetCache.put(
+          fieldHighlighter.getField(),
+          indexDocId,
+          resultByDocIn[docInIndex],
+          snippetCountsByField[fieldIdx][docInIndex]);
+    }
+  }
+
+  private OcrPassageFormatter getPassageFormatter(
+      OcrFormat ocrFormat, BreakIndex breakIndex, SourceReader reader) {
+    OcrPassageFormatter formatter =
+        ocrFormat.getPassageFormatter(
+            OcrHighlightParams.get(params, OcrHighlightParams.TAG_PRE, "<em>"),
+            OcrHighlightParams.get(params, OcrHighlightParams.TAG_POST, "</em>"),
+            params.getBool(OcrHighlightParams.ABSOLUTE_HIGHLIGHTS, false),
+            params.getBool(OcrHighlightParams.ALIGN_SPANS, false),
+            params.getBool(OcrHighlightParams.TRACK_PAGES, true));
+    formatter.setPageTable(
+        new PageTable(
+            reader, getBreakLocator(ocrFormat, breakIndex, reader, OcrBlock.PAGE), ocrFormat));
+    return formatter;
+  }
+
+  /** Get a break locator from the precomputed break index, if available, else from the format */
+  private static BreakLocator getBreakLocator(
+      OcrFormat ocrFormat, BreakIndex breakIndex, SourceReader reader, OcrBlock... blockTypes) {
+    if (breakIndex != null) {
+      return breakIndex.getBreakLocator(reader, blockTypes);
+    }
+    return ocrFormat.getBreakLocator(reader, blockTypes);
   }
 
   protected List<SourceReader[]> loadOcrFieldValues(String[] fields, DocIdSetIterator docIter)
@@ -654,33 +855,75 @@ public class OcrHighlighter extends UnifiedHighlighter {
           ocrVals[fieldIdx] = null;
           continue;
         }
-        if (!SourcePointer.isPointer(fieldValue)) {
-          // OCR content as stored text
-          ocrVals[fieldIdx] = new StringSourceReader(fieldValue);
-          continue;
+        SourcePointerCache sourcePointerCache = config.getSourcePointerCache();
+        SourcePointer sourcePointer =
+            sourcePointerCache == null ? null : sourcePointerCache.get(fieldValue);
+        if (sourcePointer == null) {
+          if (!SourcePointer.isPointer(fieldValue)) {
+            // OCR content as stored text
+            ocrVals[fieldIdx] = new StringSourceReader(fieldValue);
+            continue;
+          }
+          try {
+            sourcePointer = SourcePointer.parse(fieldValue, config.getSourceBackends());
+          } catch (RuntimeException e) {
+            log.error("Could not parse OCR pointer for document {}: {}", docId, fieldValue, e);
+          }
+          if (sourcePointer == null) {
+            // None of the files in the pointer exist or were readable, log should have warnings
+            ocrVals[fieldIdx] = null;
+            continue;
+          }
+          if (sourcePointerCache != null) {
+            sourcePointerCache.put(fieldValue, sourcePointer);
+          }
         }
-        SourcePointer sourcePointer = null;
         try {
-          sourcePointer = SourcePointer.parse(fieldValue);
-        } catch (RuntimeException e) {
-          log.error("Could not parse OCR pointer for document {}: {}", docId, fieldValue, e);
-        }
-        if (sourcePointer == null) {
-          // None of the files in the pointer exist or were readable, log should have warnings
+          ocrVals[fieldIdx] = openReader(sourcePointer);
+        } catch (FileNotFoundException e) {
+          // Remote targets are only accessed once their reader is opened, treat them like local
+          // files that were missing when the pointer was parsed
+          log.error("Could not open OCR pointer for document {}: {}", docId, fieldValue, e);
           ocrVals[fieldIdx] = null;
-          continue;
         }
-        ocrVals[fieldIdx] = sourcePointer.getReader(readerSectionSize, readerMaxCacheEntries);
       }
       fieldValues.add(ocrVals);
     }
     return fieldValues;
   }
 
-  private OcrFormat getFormat(SourceReader content) throws IOException {
+  /** Open a reader for the pointer with the highlighter's caches and read limits. */
+  private SourceReader openReader(SourcePointer pointer) throws IOException {
+    SourceReader reader =
+        pointer.getReader(
+            config.getReaderSectionSize(),
+            config.getReaderMaxCacheEntries(),
+            config.getSharedSectionCache(),
+            config.getChannelPool());
+    if (readPermits != null && reader instanceof BaseSourceReader) {
+      ((BaseSourceReader) reader).setReadPermits(readPermits);
+    }
+    return reader;
+  }
+
+  /**
+   * Determine the OCR format of a source, either from its pointer or by sampling its beginning.
+   *
+   * @return the format or {@code null} if it could not be determined
+   */
+  public static OcrFormat getFormat(SourceReader content) throws IOException {
+    SourcePointer pointer = content.getPointer();
+    if (pointer != null && pointer.getFormat() != null) {
+      return pointer.getFormat();
+    }
     // Sample the first 4k characters to determine the format
     String sampleChunk = content.readAsciiString(0, Math.min(4096, content.length()));
-    return FORMATS.stream().filter(fmt -> fmt.hasFormat(sampleChunk)).findFirst().orElse(null);
+    OcrFormat format =
+        FORMATS.stream().filter(fmt -> fmt.hasFormat(sampleChunk)).findFirst().orElse(null);
+    if (pointer != null && format != null) {
+      pointer.setFormat(format);
+    }
+    return format;
   }
 
   /**
@@ -721,7 +964,8 @@ public class OcrHighlighter extends UnifiedHighlighter {
         getOffsetStrategy(offsetSource, components),
         getScorer(field),
         maxPassages,
-        getMaxNoHighlightPassages(field));
+        getMaxNoHighlightPassages(field),
+        params.getBool(OcrHighlightParams.LAZY_BREAKS, false));
   }
 
   private OcrFieldHighlighter getOcrFieldHighlighterLegacy(
@@ -752,7 +996,8 @@ public class OcrHighlighter extends UnifiedHighlighter {
         getOffsetStrategy(offsetSource, components),
         getScorer(field),
         maxPassages,
-        getMaxNoHighlightPassages(field));
+        getMaxNoHighlightPassages(field),
+        params.getBool(OcrHighlightParams.LAZY_BREAKS, false));
   }
 
   private CharacterRunAutomaton[] getAutomataLegacy(
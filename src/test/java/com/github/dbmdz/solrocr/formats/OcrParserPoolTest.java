@@ -0,0 +1,87 @@
+package com.github.dbmdz.solrocr.formats;
+
+import static org.assertj.core.api.Assertions.assertThat;
+
+import com.github.dbmdz.solrocr.formats.miniocr.MiniOcrFormat;
+import com.github.dbmdz.solrocr.model.OcrBox;
+import com.github.dbmdz.solrocr.model.OcrFormat;
+import java.io.IOException;
+import java.io.StringReader;
+import java.nio.charset.StandardCharsets;
+import java.nio.file.Files;
+import java.nio.file.Paths;
+import java.util.List;
+import java.util.stream.Collectors;
+import org.junit.jupiter.api.Test;
+
+class OcrParserPoolTest {
+  private static final OcrFormat format = new MiniOcrFormat();
+
+  private static final OcrParser.ParsingFeature[] features = {
+    OcrParser.ParsingFeature.TEXT, OcrParser.ParsingFeature.COORDINATES
+  };
+
+  private static String readFragment(int pageIdx) throws IOException {
+    String doc =
+        new String(
+            Files.readAllBytes(Paths.get("src/test/resources/data/miniocr.xml")),
+            StandardCharsets.UTF_8);
+    int start = -1;
+    for (int i = 0; i <= pageIdx; i++) {
+      start = doc.indexOf("<p ", start + 1);
+    }
+    return doc.substring(start, doc.indexOf("</p>", start) + 4);
+  }
+
+  private static List<OcrBox> parseFresh(String fragment) {
+    return format.getParser(new StringReader(fragment), features).stream()
+        .collect(Collectors.toList());
+  }
+
+  @Test
+  void shouldReuseParsersWithoutCarryingOverState() throws IOException {
+    String first = readFragment(1);
+    String second = readFragment(2);
+
+    OcrParser parser = OcrParserPool.acquire(format, new StringReader(first), features);
+    List<OcrBox> firstBoxes = parser.stream().collect(Collectors.toList());
+    OcrParserPool.release(format, parser);
+
+    OcrParser reused = OcrParserPool.acquire(format, new StringReader(second), features);
+    List<OcrBox> secondBoxes = reused.stream().collect(Collectors.toList());
+    OcrParserPool.release(format, reused);
+
+    assertThat(reused).isSameAs(parser);
+    assertThat(firstBoxes).isNotEmpty().isEqualTo(parseFresh(first));
+    assertThat(secondBoxes).isNotEmpty().isEqualTo(parseFresh(second));
+  }
+
+  @Test
+  void shouldNotShareParsersThatAreInUse() throws IOException {
+    String fragment = readFragment(1);
+    OcrParser first = OcrParserPool.acquire(format, new StringReader(fragment), features);
+    OcrParser second = OcrParserPool.acquire(format, new StringReader(fragment), features);
+    assertThat(second).isNotSameAs(first);
+    assertThat(first.next()).isEqualTo(second.next());
+    OcrParserPool.release(format, first);
+    OcrParserPool.release(format, second);
+  }
+
+  @Test
+  void shouldLimitIdleParsers() throws IOException {
+    String fragment = readFragment(1);
+    OcrParserPool.clear();
+    OcrParser[] parsers = new OcrParser[4];
+    for (int i = 0; i < parsers.length; i++) {
+      parsers[i] = OcrParserPool.acquire(format, new StringReader(fragment), features);
+    }
+    for (OcrParser parser : parsers) {
+      OcrParserPool.release(format, parser);
+    }
+    OcrParser first = OcrParserPool.acquire(format, new StringReader(fragment), features);
+    OcrParser second = OcrParserPool.acquire(format, new StringReader(fragment), features);
+    OcrParser third = OcrParserPool.acquire(format, new StringReader(fragment), features);
+    assertThat(parsers).contains(first, second);
+    assertThat(parsers).doesNotContain(third);
+  }
+}
@@ -0,0 +1,155 @@
+package com.github.dbmdz.solrocr.formats.miniocr;
+
+import static org.assertj.core.api.Assertions.assertThat;
+import static org.assertj.core.api.Assertions.assertThatThrownBy;
+
+import com.github.dbmdz.solrocr.formats.OcrParser;
+import com.github.dbmdz.solrocr.model.OcrBox;
+import java.io.FilterReader;
+import java.io.IOException;
+import java.io.Reader;
+import java.io.StringReader;
+import java.nio.charset.StandardCharsets;
+import java.nio.file.Files;
+import java.nio.file.Paths;
+import java.util.ArrayList;
+import java.util.List;
+import java.util.stream.Collectors;
+import javax.xml.stream.XMLStreamException;
+import org.junit.jupiter.api.Test;
+
+class MiniOcrScannerTest {
+  private static List<String> readPageFragments() throws IOException {
+    String doc =
+        new String(
+            Files.readAllBytes(Paths.get("src/test/resources/data/miniocr.xml")),
+            StandardCharsets.UTF_8);
+    List<String> fragments = new ArrayList<>();
+    int start = doc.indexOf("<p ");
+    while (start >= 0) {
+      int end = doc.indexOf("</p>", start) + 4;
+      fragments.add(doc.substring(start, end));
+      start = doc.indexOf("<p ", end);
+    }
+    return fragments;
+  }
+
+  private static List<OcrBox> parseWithScanner(
+      String fragment, OcrParser.ParsingFeature... features) throws XMLStreamException {
+    return new MiniOcrScanner(new StringReader(fragment), features).stream()
+        .collect(Collectors.toList());
+  }
+
+  /** Reader that returns at most a single character per read, to exercise the buffer refills. */
+  private static class TricklingReader extends FilterReader {
+    TricklingReader(Reader in) {
+      super(in);
+    }
+
+    @Override
+    public int read(char[] cbuf, int off, int len) throws IOException {
+      return super.read(cbuf, off, Math.min(len, 1));
+    }
+  }
+
+  private static List<OcrBox> parseWithStax(
+      String fragment, OcrParser.ParsingFeature... features) throws XMLStreamException {
+    return new MiniOcrParser(new StringReader(fragment), features).stream()
+        .collect(Collectors.toList());
+  }
+
+  @Test
+  void shouldProduceSameBoxesAsStaxParser() throws IOException, XMLStreamException {
+    List<String> fragments = readPageFragments();
+    assertThat(fragments).hasSize(27);
+    for (String fragment : fragments) {
+      assertThat(parseWithScanner(fragment)).isNotEmpty().isEqualTo(parseWithStax(fragment));
+    }
+  }
+
+  @Test
+  void shouldProduceSameBoxesWithFeatureSubset() throws IOException, XMLStreamException {
+    OcrParser.ParsingFeature[] features = {
+      OcrParser.ParsingFeature.TEXT, OcrParser.ParsingFeature.COORDINATES
+    };
+    String fragment = readPageFragments().get(1);
+    assertThat(parseWithScanner(fragment, features))
+        .isNotEmpty()
+        .isEqualTo(parseWithStax(fragment, features));
+  }
+
+  @Test
+  void shouldTrackHighlightSpans() throws XMLStreamException {
+    String fragment =
+        "<p xml:id=\"1\"><l><w x=\"1 1 1 1\">Foo</w> <w x=\"2 2 1 1\">"
+            + OcrParser.START_HL
+            + "bar</w> <w x=\"3 3 1 1\">baz"
+            + OcrParser.END_HL
+            + "</w> <w x=\"4 4 1 1\">quux</w></l></p>";
+    List<OcrBox> scanned = parseWithScanner(fragment);
+    List<String> parsedTexts =
+        parseWithStax(fragment).stream().map(OcrBox::getText).collect(Collectors.toList());
+    assertThat(scanned).extracting(OcrBox::getText).isEqualTo(parsedTexts);
+    assertThat(scanned)
+        .extracting(OcrBox::isInHighlight)
+        .containsExactly(false, true, true, false);
+    assertThat(scanned.get(1).getHighlightSpan()).isEqualTo(scanned.get(2).getHighlightSpan());
+  }
+
+  @Test
+  void shouldDecodeEntitiesAndAlternatives() throws XMLStreamException {
+    String fragment =
+        "<p xml:id=\"1\"><l><w x=\"1 1 1 1\">Fo&amp;o&#x20AC;</w> "
+            + "<w x=\"2 2 1 1\">Ver&shy;</w><w x=\"3 3 1 1\">lag⇿Vorlag</w>&lt;</l></p>";
+    List<OcrBox> scanned = parseWithScanner(fragment);
+    assertThat(scanned).isEqualTo(parseWithStax(fragment));
+    assertThat(scanned.get(0).getText()).isEqualTo("Fo&o€");
+    assertThat(scanned.get(2).getAlternatives()).containsExactly("Vorlag");
+    assertThat(scanned.get(2).getTrailingChars()).isEqualTo("<");
+  }
+
+  @Test
+  void shouldFallBackToStaxForUnsupportedMarkup() throws XMLStreamException {
+    String fragment =
+        "<p xml:id=\"1\"><l><w x=\"1 1 1 1\"><![CDATA[Foo]]></w> "
+            + "<w x=\"2 2 1 1\">bar</w></l></p>";
+    List<OcrBox> scanned = parseWithScanner(fragment);
+    assertThat(scanned).isEqualTo(parseWithStax(fragment));
+    assertThat(scanned).extracting(OcrBox::getText).containsExactly("Foo", "bar");
+  }
+
+  @Test
+  void shouldScanIncrementally() throws IOException, XMLStreamException {
+    String fragment = readPageFragments().get(1);
+    List<OcrBox> scanned =
+        new MiniOcrScanner(new TricklingReader(new StringReader(fragment)))
+            .stream().collect(Collectors.toList());
+    assertThat(scanned).isNotEmpty().isEqualTo(parseWithStax(fragment));
+  }
+
+  @Test
+  void shouldFallBackToStaxAfterScannedBoxes() throws XMLStreamException {
+    String fragment =
+        "<p xml:id=\"1\"><l><w x=\"1 1 1 1\">"
+            + OcrParser.START_HL
+            + "Foo</w> <w x=\"2 2 1 1\">bar"
+            + OcrParser.END_HL
+            + "</w> <w x=\"3 3 1 1\"><![CDATA[baz]]></w> <w x=\"4 4 1 1\">quux</w></l></p>";
+    OcrParser parser = new MiniOcrScanner(new StringReader(fragment));
+    // The first box is scanned when the parser is created
+    OcrBox first = parser.next();
+    List<OcrBox> rest = parser.stream().collect(Collectors.toList());
+    List<OcrBox> parsed = parseWithStax(fragment);
+    assertThat(rest).hasSize(3).isEqualTo(parsed.subList(1, 4));
+    assertThat(first).isEqualTo(parsed.get(0));
+    assertThat(first.getHighlightSpan()).isEqualTo(rest.get(0).getHighlightSpan());
+  }
+
+  @Test
+  void shouldFailLikeStaxParserOnMalformedMarkup() {
+    String fragment = "<p xml:id=\"1\"><l><w x=\"1 1 1 1\">Foo</l></p>";
+    assertThatThrownBy(() -> parseWithScanner(fragment))
+        .isInstanceOf(RuntimeException.class)
+        .hasMessageContaining("Failed to parse the OCR markup");
+  }
+}
@@ -0,0 +1,86 @@
+package com.github.dbmdz.solrocr.lucene;
+
+import static org.assertj.core.api.Assertions.assertThat;
+
+import java.io.IOException;
+import java.util.ArrayList;
+import java.util.List;
+import org.apache.lucene.search.uhighlight.OffsetsEnum;
+import org.apache.lucene.util.BytesRef;
+import org.junit.jupiter.api.Test;
+
+class BufferedOffsetsEnumTest {
+  /** Enum with a match of length 2 at every multiple of 10 below {@code 10 * numPositions} */
+  private static class StubOffsetsEnum extends OffsetsEnum {
+    private final int numPositions;
+    private final BytesRef term = new BytesRef("foo");
+    private int pos = -1;
+    private int numCalls = 0;
+
+    StubOffsetsEnum(int numPositions) {
+      this.numPositions = numPositions;
+    }
+
+    @Override
+    public boolean nextPosition() {
+      numCalls++;
+      return ++pos < numPositions;
+    }
+
+    @Override
+    public int freq() {
+      return numPositions;
+    }
+
+    @Override
+    public BytesRef getTerm() {
+      return term;
+    }
+
+    @Override
+    public int startOffset() {
+      return pos * 10;
+    }
+
+    @Override
+    public int endOffset() {
+      return pos * 10 + 2;
+    }
+  }
+
+  private static List<Integer> collectStartOffsets(OffsetsEnum offsets) throws IOException {
+    List<Integer> starts = new ArrayList<>();
+    while (offsets.nextPosition()) {
+      assertThat(offsets.endOffset()).isEqualTo(offsets.startOffset() + 2);
+      assertThat(offsets.getTerm().utf8ToString()).isEqualTo("foo");
+      starts.add(offsets.startOffset());
+    }
+    return starts;
+  }
+
+  @Test
+  void shouldOnlyBufferUpToTheLimit() throws IOException {
+    StubOffsetsEnum in = new StubOffsetsEnum(100);
+    BufferedOffsetsEnum buffered = BufferedOffsetsEnum.buffer(in, 5);
+    assertThat(in.numCalls).isEqualTo(5);
+    assertThat(buffered.getStartOffsets()).containsExactly(0, 10, 20, 30, 40);
+
+    // The remaining positions are read from the input
+    List<Integer> starts = collectStartOffsets(buffered);
+    assertThat(starts).hasSize(100);
+    for (int i = 0; i < starts.size(); i++) {
+      assertThat(starts.get(i)).isEqualTo(i * 10);
+    }
+    assertThat(buffered.nextPosition()).isFalse();
+  }
+
+  @Test
+  void shouldNotReadExhaustedInputAgain() throws IOException {
+    StubOffsetsEnum in = new StubOffsetsEnum(3);
+    BufferedOffsetsEnum buffered = BufferedOffsetsEnum.buffer(in, 10);
+    assertThat(buffered.getStartOffsets()).containsExactly(0, 10, 20);
+    assertThat(collectStartOffsets(buffered)).containsExactly(0, 10, 20);
+    assertThat(buffered.nextPosition()).isFalse();
+    assertThat(in.numCalls).isEqualTo(4);
+  }
+}
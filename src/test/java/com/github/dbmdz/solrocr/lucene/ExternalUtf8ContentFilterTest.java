@@ -146,4 +146,31 @@ public class ExternalUtf8ContentFilterTest {
       assertThat(filtered).isEqualTo(fullText);
     }
   }
+
+  @Test
+  public void readAheadIsIdentical() throws IOException {
+    String ptr =
+        Files.list(Paths.get("src/test/resources/data/alto_multi"))
+            .map(Path::toString)
+            .sorted()
+            .map(p -> p.endsWith("2.xml") ? p + "[1000:25000,30000:]" : p)
+            .collect(Collectors.joining("+"));
+    HashMap<String, String> args = new HashMap<>();
+    args.put("readAheadChunks", "0");
+    ExternalUtf8ContentFilterFactory serialFac = new ExternalUtf8ContentFilterFactory(args);
+    args = new HashMap<>();
+    args.put("readAheadChunks", "3");
+    args.put("readAheadChunkSizeKiB", "1");
+    ExternalUtf8ContentFilterFactory readAheadFac = new ExternalUtf8ContentFilterFactory(args);
+
+    try (CharFilter serial = (CharFilter) serialFac.create(new StringReader(ptr));
+        CharFilter readAhead = (CharFilter) readAheadFac.create(new StringReader(ptr))) {
+      String serialText = IOUtils.toString(serial);
+      String readAheadText = IOUtils.toString(readAhead);
+      assertThat(readAheadText).isEqualTo(serialText);
+      for (int offset = 0; offset < serialText.length(); offset += 997) {
+        assertThat(readAhead.correctOffset(offset)).isEqualTo(serial.correctOffset(offset));
+      }
+    }
+  }
 }
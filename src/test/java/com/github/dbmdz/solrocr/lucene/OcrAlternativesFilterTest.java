@@ -1,34 +1,46 @@
 package com.github.dbmdz.solrocr.lucene;
 
 import static org.assertj.core.api.Assertions.assertThat;
+import static org.assertj.core.api.Assertions.assertThatThrownBy;
 
 import com.github.dbmdz.solrocr.formats.OcrParser;
 import com.github.dbmdz.solrocr.lucene.filters.OcrCharFilter;
 import com.github.dbmdz.solrocr.reader.PeekingReader;
 import com.google.common.collect.ImmutableList;
-import com.google.common.collect.Range;
+import com.google.common.collect.ImmutableMap;
 import com.google.common.collect.Streams;
 import java.io.IOException;
+import java.io.Reader;
 import java.io.StringReader;
+import java.nio.charset.StandardCharsets;
+import java.nio.file.Files;
+import java.nio.file.Paths;
 import java.util.ArrayList;
+import java.util.HashMap;
 import java.util.List;
 import java.util.stream.Collectors;
 import java.util.stream.Stream;
+import org.apache.lucene.analysis.Analyzer;
 import org.apache.lucene.analysis.TokenFilter;
+import org.apache.lucene.analysis.TokenStream;
 import org.apache.lucene.analysis.Tokenizer;
 import org.apache.lucene.analysis.core.UnicodeWhitespaceTokenizer;
 import org.apache.lucene.analysis.core.WhitespaceTokenizer;
+import org.apache.lucene.analysis.core.WhitespaceTokenizerFactory;
+import org.apache.lucene.analysis.custom.CustomAnalyzer;
 import org.apache.lucene.analysis.icu.segmentation.ICUTokenizer;
 import org.apache.lucene.analysis.standard.StandardTokenizer;
 import org.apache.lucene.analysis.tokenattributes.CharTermAttribute;
 import org.apache.lucene.analysis.tokenattributes.OffsetAttribute;
 import org.apache.lucene.analysis.tokenattributes.PositionIncrementAttribute;
 import org.apache.lucene.util.AttributeFactory;
+import org.junit.jupiter.api.Test;
 import org.junit.jupiter.params.ParameterizedTest;
 import org.junit.jupiter.params.provider.Arguments;
 import org.junit.jupiter.params.provider.MethodSource;
 import org.mockito.Mockito;
 import solrocr.OcrAlternativesFilterFactory;
+import solrocr.OcrCharFilterFactory;
 
 public class OcrAlternativesFilterTest {
   public static Stream<Arguments> getTestParams() {
@@ -217,7 +229,59 @@ public class OcrAlternativesFilterTest {
     }
   }
 
-  @SuppressWarnings("UnstableApiUsage")
+  private static List<String> analyze(Analyzer analyzer, String text) throws IOException {
+    List<String> terms = new ArrayList<>();
+    try (TokenStream stream = analyzer.tokenStream("ocr_text", text)) {
+      CharTermAttribute termAtt = stream.addAttribute(CharTermAttribute.class);
+      stream.reset();
+      while (stream.incrementToken()) {
+        terms.add(termAtt.toString());
+      }
+      stream.end();
+    }
+    return terms;
+  }
+
+  @Test
+  public void testAlternativesWithFactories() throws Exception {
+    String doc =
+        new String(
+            Files.readAllBytes(Paths.get("src/test/resources/data/chronicling_america.xml")),
+            StandardCharsets.UTF_8);
+    try (Analyzer analyzer =
+        CustomAnalyzer.builder()
+            .addCharFilter(OcrCharFilterFactory.class, "expandAlternatives", "true")
+            .withTokenizer(WhitespaceTokenizerFactory.class, "maxTokenLen", "1024")
+            .addTokenFilter(OcrAlternativesFilterFactory.class)
+            .build()) {
+      // The analyzer re-uses the token stream, the second document must not see the filter of the
+      // first one
+      for (int i = 0; i < 2; i++) {
+        assertThat(analyze(analyzer, doc))
+            .containsSubsequence(
+                "YoB", "OB", "Greene", "purchased", "purebased", "pUlcohased", "purebred", "of");
+      }
+    }
+  }
+
+  @Test
+  public void testStaleRegistrationIsNotAttached() throws Exception {
+    OcrCharFilterFactory ocrFactory =
+        new OcrCharFilterFactory(new HashMap<>(ImmutableMap.of("expandAlternatives", "true")));
+    // Created and registered, but never consumed by a tokenizer
+    String doc = "<ocr><p><l><w x=\"1 1 1 1\">foo⇿bar</w> <w x=\"2 2 1 1\">baz</w></l></p></ocr>";
+    try (Reader stale = ocrFactory.create(new StringReader(doc));
+        Analyzer analyzer =
+            CustomAnalyzer.builder()
+                .withTokenizer(WhitespaceTokenizerFactory.class)
+                .addTokenFilter(OcrAlternativesFilterFactory.class)
+                .build()) {
+      assertThat(stale).isInstanceOf(OcrCharFilter.class);
+      assertThatThrownBy(() -> analyze(analyzer, "foo baz"))
+          .hasMessageContaining("Check your schema!");
+    }
+  }
+
   public static class StubOcrCharFilter extends OcrCharFilter {
 
     public StubOcrCharFilter(String filteredStream) {
@@ -225,10 +289,12 @@ public class OcrAlternativesFilterTest {
           Mockito.when(Mockito.mock(OcrParser.class).getInput())
               .thenReturn(new PeekingReader(new StringReader(filteredStream), 2048, 16384))
               .getMock());
-      this.alternativeMap.put(Range.closedOpen(0, 12), new TokenWithAlternatives(0, 3, 2));
-      this.alternativeMap.put(Range.closedOpen(20, 81), new TokenWithAlternatives(20, 30, 4));
-      this.alternativeMap.put(Range.closedOpen(99, 118), new TokenWithAlternatives(99, 105, 2));
-      this.alternativeMap.put(Range.closedOpen(119, 466), new TokenWithAlternatives(119, 139, 12));
+      this.addTokenWithAlternatives(0, 12, 0, 3, 2);
+      this.addTokenWithAlternatives(20, 81, 20, 30, 4);
+      this.addTokenWithAlternatives(99, 118, 99, 105, 2);
+      this.addTokenWithAlternatives(119, 466, 119, 139, 12);
+      // Usually done by the OcrCharFilterFactory
+      this.register();
     }
 
     @Override
@@ -0,0 +1,182 @@
+package com.github.dbmdz.solrocr.lucene;
+
+import static com.github.dbmdz.solrocr.formats.OcrParser.END_HL;
+import static com.github.dbmdz.solrocr.formats.OcrParser.START_HL;
+import static org.assertj.core.api.Assertions.assertThat;
+import static org.assertj.core.api.Assertions.assertThatThrownBy;
+
+import com.github.dbmdz.solrocr.formats.miniocr.MiniOcrFormat;
+import com.github.dbmdz.solrocr.model.SourcePointer;
+import com.github.dbmdz.solrocr.reader.FileSourceReader;
+import com.github.dbmdz.solrocr.reader.SourceReader;
+import java.io.EOFException;
+import java.io.IOException;
+import java.nio.charset.StandardCharsets;
+import java.nio.file.Files;
+import java.nio.file.Path;
+import java.util.ArrayList;
+import java.util.Arrays;
+import java.util.Comparator;
+import java.util.List;
+import org.apache.lucene.search.uhighlight.Passage;
+import org.apache.lucene.util.BytesRef;
+import org.junit.jupiter.api.Test;
+import org.junit.jupiter.api.io.TempDir;
+
+class OcrPassageFormatterTest {
+  private static final String OCR =
+      "<ocr><p xml:id=\"p1\" wh=\"100 100\"><b><l>"
+          + "<w x=\"1 1 1 1\">Grüße</w> <w x=\"2 2 2 2\">aus</w> <w x=\"3 3 3 3\">𝔊öln</w> "
+          + "<w x=\"4 4 4 4\">am</w> <w x=\"5 5 5 5\">Rhein</w>"
+          + "</l></b></p></ocr>";
+
+  /** Words with entities and multi-byte characters, whose byte and char offsets differ */
+  private static final String ENTITY_OCR =
+      "<ocr><p xml:id=\"p1\" wh=\"100 100\"><b><l>"
+          + "<w x=\"1 1 1 1\">Müller&amp;Söhne</w> <w x=\"2 2 2 2\">&lt;Grüße&gt;</w> "
+          + "<w x=\"3 3 3 3\">𝔊öln&#x27;s</w> <w x=\"4 4 4 4\">a&amp;b</w> "
+          + "<w x=\"5 5 5 5\">Rhein</w>"
+          + "</l></b></p></ocr>";
+
+  @TempDir Path tempDir;
+
+  private SourceReader writeSource(String ocr) throws IOException {
+    Path path = tempDir.resolve("miniocr.xml");
+    Files.write(path, ocr.getBytes(StandardCharsets.UTF_8));
+    return new FileSourceReader(path, SourcePointer.parse(path.toString()), 8 * 1024, 8);
+  }
+
+  private static int byteOffset(String ocr, String needle, int fromIdx) {
+    return ocr.substring(0, ocr.indexOf(needle, fromIdx)).getBytes(StandardCharsets.UTF_8).length;
+  }
+
+  private static int byteOffset(String needle) {
+    return OCR.substring(0, OCR.indexOf(needle)).getBytes(StandardCharsets.UTF_8).length;
+  }
+
+  private static int byteLength(String str) {
+    return str.getBytes(StandardCharsets.UTF_8).length;
+  }
+
+  @Test
+  void shouldMapByteOffsetsToCharOffsets() {
+    byte[] data = "aü𝔊b".getBytes(StandardCharsets.UTF_8);
+    int[] charOffsets = new int[data.length + 1];
+    String text = OcrPassageFormatter.decodeUtf8WithOffsets(data, charOffsets);
+    assertThat(text).isEqualTo("aü𝔊b");
+    assertThat(charOffsets).containsExactly(0, 1, 1, 2, 2, 2, 2, 4, 5);
+  }
+
+  @Test
+  void shouldSkipPartialSequencesAndRejectMalformedData() {
+    // Cut off the first and last byte of the umlauts
+    byte[] encoded = "üaü".getBytes(StandardCharsets.UTF_8);
+    byte[] data = Arrays.copyOfRange(encoded, 1, encoded.length - 1);
+    int[] charOffsets = new int[data.length + 1];
+    assertThat(OcrPassageFormatter.decodeUtf8WithOffsets(data, charOffsets)).isEqualTo("a");
+    assertThat(charOffsets).containsExactly(0, 0, 1, 1);
+    byte[] overlong = new byte[] {'a', (byte) 0xC0, (byte) 0x80};
+    assertThat(OcrPassageFormatter.decodeUtf8WithOffsets(overlong, new int[overlong.length + 1]))
+        .isNull();
+  }
+
+  @Test
+  void shouldInsertMarkersAroundMultibyteMatches() throws IOException {
+    SourceReader reader = writeSource(OCR);
+    OcrPassageFormatter formatter =
+        new MiniOcrFormat().getPassageFormatter("<em>", "</em>", false, false, false);
+
+    Passage passage = new Passage();
+    passage.setStartOffset(byteOffset("<w x=\"1"));
+    passage.setEndOffset(byteOffset("</l>"));
+    int ausStart = byteOffset("aus");
+    int kolnStart = byteOffset("𝔊öln");
+    int rheinStart = byteOffset("Rhein");
+    passage.addMatch(ausStart, ausStart + 3, new BytesRef("aus"), 1);
+    passage.addMatch(kolnStart, kolnStart + byteLength("𝔊öln"), new BytesRef("köln"), 1);
+    passage.addMatch(rheinStart, rheinStart + 5, new BytesRef("rhein"), 1);
+
+    assertThat(formatter.getHighlightedFragment(passage, reader))
+        .isEqualTo(
+            "<w x=\"1 1 1 1\">Grüße</w> <w x=\"2 2 2 2\">"
+                + START_HL
+                + "aus"
+                + END_HL
+                + "</w> <w x=\"3 3 3 3\">"
+                + START_HL
+                + "𝔊öln"
+                + END_HL
+                + "</w> <w x=\"4 4 4 4\">am</w> <w x=\"5 5 5 5\">"
+                + START_HL
+                + "Rhein"
+                + END_HL
+                + "</w>");
+  }
+
+  @Test
+  void shouldMatchDecodingPathWithEntitiesAndAlignedSpans() throws IOException {
+    SourceReader reader = writeSource(ENTITY_OCR);
+    // Byte ranges of the word contents, and of ranges that start or end inside of an entity
+    List<int[]> ranges = new ArrayList<>();
+    for (int idx = ENTITY_OCR.indexOf("<w "); idx >= 0; idx = ENTITY_OCR.indexOf("<w ", idx + 1)) {
+      ranges.add(
+          new int[] {
+            byteOffset(ENTITY_OCR, "\">", idx) + 2, byteOffset(ENTITY_OCR, "</w>", idx)
+          });
+    }
+    int ampStart = byteOffset(ENTITY_OCR, "&amp;Söhne", 0);
+    ranges.add(new int[] {ampStart + 2, byteOffset(ENTITY_OCR, "</w>", 0)});
+    int ltStart = byteOffset(ENTITY_OCR, "&lt;", 0);
+    ranges.add(new int[] {ltStart, ltStart + 2});
+    int aposStart = byteOffset(ENTITY_OCR, "&#x27;", 0);
+    ranges.add(new int[] {byteOffset(ENTITY_OCR, "𝔊öln", 0), aposStart + 3});
+    ranges.sort(Comparator.comparingInt((int[] r) -> r[0]).thenComparingInt(r -> r[1]));
+
+    Passage passage = new Passage();
+    for (boolean alignSpans : new boolean[] {false, true}) {
+      OcrPassageFormatter formatter =
+          new MiniOcrFormat().getPassageFormatter("<em>", "</em>", false, alignSpans, false);
+      // Every single range and every pair of non-overlapping ranges as the passage's matches
+      for (int i = 0; i < ranges.size(); i++) {
+        for (int j = i; j < ranges.size(); j++) {
+          if (j != i && ranges.get(j)[0] < ranges.get(i)[1]) {
+            continue;
+          }
+          passage.reset();
+          passage.setStartOffset(byteOffset(ENTITY_OCR, "<w x=\"1", 0));
+          passage.setEndOffset(byteOffset(ENTITY_OCR, "</l>", 0));
+          passage.addMatch(ranges.get(i)[0], ranges.get(i)[1], new BytesRef("a"), 1);
+          if (j != i) {
+            passage.addMatch(ranges.get(j)[0], ranges.get(j)[1], new BytesRef("b"), 1);
+          }
+          assertThat(formatter.getHighlightedFragment(passage, reader))
+              .as("alignSpans=%s, matches %d and %d", alignSpans, i, j)
+              .isEqualTo(formatter.getHighlightedFragmentByDecoding(passage, reader));
+        }
+      }
+    }
+  }
+
+  @Test
+  void shouldFailOnTruncatedSources() throws IOException {
+    Path path = tempDir.resolve("truncated.xml");
+    Files.write(path, OCR.getBytes(StandardCharsets.UTF_8));
+    SourceReader reader =
+        new FileSourceReader(path, SourcePointer.parse(path.toString()), 8 * 1024, 8) {
+          @Override
+          public int readBytes(byte[] dst, int dstOffset, int start, int len) {
+            // Like a file that was truncated after its size was determined
+            return -1;
+          }
+        };
+    OcrPassageFormatter formatter =
+        new MiniOcrFormat().getPassageFormatter("<em>", "</em>", false, false, false);
+    Passage passage = new Passage();
+    passage.setStartOffset(byteOffset("<w x=\"1"));
+    passage.setEndOffset(byteOffset("</l>"));
+    int ausStart = byteOffset("aus");
+    passage.addMatch(ausStart, ausStart + 3, new BytesRef("aus"), 1);
+    assertThatThrownBy(() -> formatter.getHighlightedFragment(passage, reader))
+        .isInstanceOf(EOFException.class);
+  }
+}
@@ -0,0 +1,128 @@
+package com.github.dbmdz.solrocr.lucene;
+
+import static org.assertj.core.api.Assertions.assertThat;
+
+import com.github.dbmdz.solrocr.formats.miniocr.MiniOcrFormat;
+import com.github.dbmdz.solrocr.model.OcrSnippet;
+import com.github.dbmdz.solrocr.model.SourcePointer;
+import com.github.dbmdz.solrocr.reader.FileSourceReader;
+import com.github.dbmdz.solrocr.reader.SourceReader;
+import java.io.IOException;
+import java.nio.charset.StandardCharsets;
+import java.nio.file.Files;
+import java.nio.file.Path;
+import java.util.Arrays;
+import java.util.Locale;
+import java.util.concurrent.ExecutorService;
+import java.util.concurrent.Executors;
+import java.util.concurrent.atomic.AtomicInteger;
+import org.apache.lucene.search.uhighlight.Passage;
+import org.apache.lucene.util.BytesRef;
+import org.junit.jupiter.api.AfterEach;
+import org.junit.jupiter.api.BeforeEach;
+import org.junit.jupiter.api.Test;
+import org.junit.jupiter.api.io.TempDir;
+
+class ParallelSnippetFormatterTest {
+  private static final int NUM_LINES = 200;
+
+  @TempDir Path tempDir;
+
+  private Path ocrPath;
+  private Passage[] passages;
+  private ExecutorService pool;
+
+  @BeforeEach
+  void setUp() throws IOException {
+    StringBuilder ocr = new StringBuilder("<ocr><p xml:id=\"p1\" wh=\"100 100\"><b>");
+    int[] lineOffsets = new int[NUM_LINES + 1];
+    for (int i = 0; i < NUM_LINES; i++) {
+      lineOffsets[i] = ocr.length();
+      ocr.append(String.format(Locale.US, "<l><w x=\"%d 1 1 1\">word%03d</w></l>", i, i));
+    }
+    lineOffsets[NUM_LINES] = ocr.length();
+    ocr.append("</b></p></ocr>");
+    ocrPath = tempDir.resolve("miniocr.xml");
+    Files.write(ocrPath, ocr.toString().getBytes(StandardCharsets.US_ASCII));
+
+    passages = new Passage[NUM_LINES];
+    for (int i = 0; i < NUM_LINES; i++) {
+      Passage passage = new Passage();
+      passage.setStartOffset(lineOffsets[i]);
+      passage.setEndOffset(lineOffsets[i + 1]);
+      int matchStart = ocr.indexOf("word", lineOffsets[i]);
+      passage.addMatch(matchStart, matchStart + 7, new BytesRef("word"), 1);
+      passages[i] = passage;
+    }
+    pool = Executors.newFixedThreadPool(4);
+  }
+
+  @AfterEach
+  void tearDown() {
+    pool.shutdownNow();
+  }
+
+  private SourceReader newReader() throws IOException {
+    return new FileSourceReader(ocrPath, SourcePointer.parse(ocrPath.toString()), 8 * 1024, 8);
+  }
+
+  private static OcrPassageFormatter newFormatter() {
+    return new MiniOcrFormat().getPassageFormatter("<em>", "</em>", false, false, false);
+  }
+
+  private static String[] texts(OcrSnippet[] snippets) {
+    return Arrays.stream(snippets).map(OcrSnippet::getText).toArray(String[]::new);
+  }
+
+  @Test
+  void shouldProduceSameSnippetsAsSequentialFormatting() throws IOException {
+    AtomicInteger numWorkers = new AtomicInteger();
+    ParallelSnippetFormatter parallelFormatter =
+        new ParallelSnippetFormatter(
+            pool,
+            () -> {
+              numWorkers.incrementAndGet();
+              return new ParallelSnippetFormatter.Worker(newFormatter(), newReader());
+            },
+            16,
+            3);
+    try (SourceReader reader = newReader()) {
+      String[] expected = texts(newFormatter().format(passages, reader));
+      String[] actual = texts(parallelFormatter.format(passages, newFormatter(), reader));
+      assertThat(actual).containsExactly(expected);
+      assertThat(actual[42]).contains("word042");
+    }
+    assertThat(numWorkers.get()).isLessThanOrEqualTo(3);
+  }
+
+  @Test
+  void shouldFormatOnCallingThreadIfHelpersNeverRun() throws IOException {
+    // Simulates an executor whose threads are all busy, e.g. with the calling thread's document
+    ParallelSnippetFormatter parallelFormatter =
+        new ParallelSnippetFormatter(
+            r -> {},
+            () -> new ParallelSnippetFormatter.Worker(newFormatter(), newReader()),
+            16,
+            3);
+    try (SourceReader reader = newReader()) {
+      OcrSnippet[] snippets = parallelFormatter.format(passages, newFormatter(), reader);
+      assertThat(snippets).hasSize(NUM_LINES).doesNotContainNull();
+    }
+  }
+
+  @Test
+  void shouldFormatAllPassagesIfWorkersCannotBeCreated() throws IOException {
+    ParallelSnippetFormatter parallelFormatter =
+        new ParallelSnippetFormatter(
+            pool,
+            () -> {
+              throw new IOException("no reader for you");
+            },
+            16,
+            3);
+    try (SourceReader reader = newReader()) {
+      OcrSnippet[] snippets = parallelFormatter.format(passages, newFormatter(), reader);
+      assertThat(snippets).hasSize(NUM_LINES).doesNotContainNull();
+    }
+  }
+}
@@ -0,0 +1,110 @@
+package com.github.dbmdz.solrocr.lucene;
+
+import static com.github.dbmdz.solrocr.formats.OcrParser.END_HL;
+import static com.github.dbmdz.solrocr.formats.OcrParser.START_HL;
+import static org.assertj.core.api.Assertions.assertThat;
+
+import com.github.dbmdz.solrocr.formats.OcrParser;
+import com.github.dbmdz.solrocr.formats.miniocr.MiniOcrFormat;
+import com.github.dbmdz.solrocr.model.OcrBox;
+import com.github.dbmdz.solrocr.model.OcrPage;
+import java.io.IOException;
+import java.io.StringReader;
+import java.nio.charset.StandardCharsets;
+import java.nio.file.Files;
+import java.nio.file.Paths;
+import java.util.List;
+import java.util.stream.Collectors;
+import org.junit.jupiter.api.Test;
+
+class WordBoxBufferTest {
+  private static List<OcrBox> parse(String fragment) {
+    return new MiniOcrFormat().getParser(new StringReader(fragment)).stream()
+        .collect(Collectors.toList());
+  }
+
+  private static WordBoxBuffer fill(List<OcrBox> boxes) {
+    WordBoxBuffer words = new WordBoxBuffer();
+    boxes.forEach(words::add);
+    return words;
+  }
+
+  @Test
+  void shouldConvertWordsToSameTextAsBoxes() throws IOException {
+    String doc =
+        new String(
+            Files.readAllBytes(Paths.get("src/test/resources/data/miniocr.xml")),
+            StandardCharsets.UTF_8);
+    int start = doc.indexOf("<p ");
+    int end = doc.indexOf("</p>", doc.indexOf("<p ", start + 1)) + 4;
+    String fragment = doc.substring(start, end);
+    List<OcrBox> boxes = parse(fragment);
+    WordBoxBuffer words = fill(boxes);
+
+    assertThat(words.size()).isEqualTo(boxes.size());
+    assertThat(words.getPages()).hasSize(2);
+    assertThat(words.toText(3, 10)).isEqualTo(OcrParser.boxesToString(boxes.subList(3, 10)));
+    assertThat(words.toText(0, words.size())).isEqualTo(OcrParser.boxesToString(boxes));
+  }
+
+  @Test
+  void shouldHandleHyphenationAndHighlightedAlternatives() {
+    String fragment =
+        "<p xml:id=\"1\"><l><w x=\"1 1 1 1\">Ver&shy;</w><w x=\"2 2 1 1\">lag</w> "
+            + "<w x=\"3 3 1 1\">Haus⇿"
+            + START_HL
+            + "Maus"
+            + END_HL
+            + "</w> <w x=\"4 4 1 1\">Ende</w></l></p>";
+    List<OcrBox> boxes = parse(fragment);
+    WordBoxBuffer words = fill(boxes);
+
+    assertThat(words.toText(0, words.size()))
+        .isEqualTo(OcrParser.boxesToString(parse(fragment)))
+        .isEqualTo("Verlag " + START_HL + "Maus" + END_HL + " Ende");
+    assertThat(words.toText(0, 1)).isEqualTo("Ver-");
+  }
+
+  @Test
+  void shouldNumberHighlightSpans() {
+    String fragment =
+        "<p xml:id=\"1\"><l><w x=\"1 1 1 1\">"
+            + START_HL
+            + "foo</w> <w x=\"2 2 1 1\">bar"
+            + END_HL
+            + "</w> <w x=\"3 3 1 1\">baz</w> <w x=\"4 4 1 1\">"
+            + START_HL
+            + "quux"
+            + END_HL
+            + "</w></l></p>";
+    WordBoxBuffer words = fill(parse(fragment));
+
+    assertThat(words.getHighlightSpan(0)).isEqualTo(0);
+    assertThat(words.getHighlightSpan(1)).isEqualTo(0);
+    assertThat(words.isInHighlight(2)).isFalse();
+    assertThat(words.getHighlightSpan(3)).isEqualTo(1);
+
+    OcrBox box = words.toOcrBox(3);
+    assertThat(box.getText()).isEqualTo(START_HL + "quux" + END_HL);
+    assertThat(box.getUlx()).isEqualTo(4);
+    assertThat(box.getLry()).isEqualTo(5);
+    assertThat(box.getPage()).isEqualTo(new OcrPage("1", null));
+    assertThat(box.isInHighlight()).isTrue();
+  }
+
+  @Test
+  void shouldBeReusableAfterClear() {
+    WordBoxBuffer words = new WordBoxBuffer();
+    for (int i = 0; i < 3; i++) {
+      words.clear();
+      for (int j = 0; j < 100; j++) {
+        OcrBox box = new OcrBox("w" + j, null, j, j, j + 1, j + 1, null);
+        box.setTrailingChars(" ");
+        words.add(box);
+      }
+      assertThat(words.size()).isEqualTo(100);
+      assertThat(words.getPages()).isEmpty();
+      assertThat(words.getText(99)).isEqualTo("w99");
+    }
+  }
+}
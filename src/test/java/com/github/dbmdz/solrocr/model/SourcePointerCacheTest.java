@@ -0,0 +1,94 @@
+package com.github.dbmdz.solrocr.model;
+
+import static org.assertj.core.api.Assertions.assertThat;
+import static org.assertj.core.api.Assertions.assertThatThrownBy;
+
+import com.github.dbmdz.solrocr.reader.SourceReader;
+
+import java.io.IOException;
+import java.nio.charset.StandardCharsets;
+import java.nio.file.Files;
+import java.nio.file.Path;
+import java.util.Collections;
+import org.junit.jupiter.api.Test;
+import org.junit.jupiter.api.io.TempDir;
+
+class SourcePointerCacheTest {
+  @TempDir Path tempDir;
+
+  private Path writeFile(String name, String content) throws IOException {
+    Path path = tempDir.resolve(name);
+    Files.write(path, content.getBytes(StandardCharsets.UTF_8));
+    return path;
+  }
+
+  @Test
+  void shouldPrecomputeSourceOffsets() throws IOException {
+    Path first = writeFile("first.xml", "<p>first</p>");
+    Path second = writeFile("second.xml", "<p>second</p>");
+    SourcePointer pointer = SourcePointer.parse(first + "+" + second);
+
+    assertThat(pointer.getStartOffsets()).containsExactly(0, 12);
+    assertThat(pointer.getLength()).isEqualTo(25);
+    assertThat(pointer.sources.get(1).size).isEqualTo(13);
+  }
+
+  @Test
+  void shouldReturnCachedPointer() throws IOException {
+    String value = writeFile("page.xml", "<p>page</p>").toString();
+    SourcePointerCache cache = new SourcePointerCache(16, 60);
+    assertThat(cache.get(value)).isNull();
+
+    SourcePointer pointer = SourcePointer.parse(value);
+    cache.put(value, pointer);
+    assertThat(cache.get(value)).isSameAs(pointer);
+    assertThat(cache.getHitCount()).isEqualTo(1);
+    assertThat(cache.getMissCount()).isEqualTo(1);
+
+    cache.clear();
+    assertThat(cache.get(value)).isNull();
+    assertThat(cache.getNumEntries()).isZero();
+  }
+
+  @Test
+  void shouldEvictPointerToModifiedFile() throws IOException {
+    Path path = writeFile("page.xml", "<p>a longer page</p>");
+    String value = path.toString();
+    SourcePointerCache cache = new SourcePointerCache(16, 60);
+    SourcePointer pointer = SourcePointer.parse(value);
+    cache.put(value, pointer);
+
+    writeFile("page.xml", "<p>page</p>");
+    try (SourceReader reader = cache.get(value).getReader(8, 4)) {
+      assertThat(reader.length()).isEqualTo(11);
+      assertThat(reader.readAsciiString(0, reader.length())).isEqualTo("<p>page</p>");
+    }
+    assertThat(pointer.isStale()).isTrue();
+    assertThat(cache.get(value)).isNull();
+  }
+
+  @Test
+  void shouldFailOnTruncatedFileInMultiFilePointer() throws IOException {
+    Path first = writeFile("first.xml", "<p>first</p>");
+    Path second = writeFile("second.xml", "<p>second</p>");
+    SourcePointer pointer = SourcePointer.parse(first + "+" + second);
+
+    writeFile("second.xml", "<p>2</p>");
+    try (SourceReader reader = pointer.getReader(8, 4)) {
+      assertThatThrownBy(() -> reader.readAsciiString(0, reader.length()))
+          .isInstanceOf(IOException.class)
+          .hasMessageContaining("second.xml");
+    }
+    assertThat(pointer.isStale()).isTrue();
+  }
+
+  @Test
+  void shouldNotCacheInlineOcr() {
+    SourcePointerCache cache = new SourcePointerCache(16, 60);
+    String value = "<p><l><w>inline</w></l></p>";
+    cache.put(value, new SourcePointer(Collections.emptyList()));
+    assertThat(cache.get(value)).isNull();
+    assertThat(cache.getNumEntries()).isZero();
+    assertThat(cache.getMissCount()).isZero();
+  }
+}
@@ -0,0 +1,138 @@
+package com.github.dbmdz.solrocr.reader;
+
+import static org.assertj.core.api.Assertions.assertThat;
+import static org.assertj.core.api.Assertions.assertThatThrownBy;
+
+import com.github.dbmdz.solrocr.model.SourcePointer;
+import com.github.dbmdz.solrocr.model.SourcePointer.SourceType;
+import java.io.IOException;
+import java.io.InputStream;
+import java.io.OutputStream;
+import java.nio.file.Files;
+import java.nio.file.Path;
+import java.nio.file.Paths;
+import java.nio.file.attribute.FileTime;
+import java.util.Arrays;
+import java.util.Random;
+import java.util.zip.Deflater;
+import java.util.zip.GZIPInputStream;
+import java.util.zip.GZIPOutputStream;
+import org.apache.commons.io.IOUtils;
+import org.junit.jupiter.api.BeforeEach;
+import org.junit.jupiter.api.Test;
+import org.junit.jupiter.api.io.TempDir;
+
+class BgzfSourceReaderTest {
+  private final Path plainPath = Paths.get("src/test/resources/data/chronicling_america.xml");
+
+  @TempDir Path tempDir;
+
+  private Path bgzfPath;
+  private byte[] plainData;
+
+  @BeforeEach
+  void setUp() throws IOException {
+    plainData = Files.readAllBytes(plainPath);
+    bgzfPath = tempDir.resolve("chronicling_america.xml.gz");
+    BgzfWriter.compress(plainPath, bgzfPath, Deflater.BEST_SPEED);
+  }
+
+  private static byte[] readRange(SourceReader reader, int start, int len) throws IOException {
+    byte[] data = new byte[len];
+    int numRead = 0;
+    while (numRead < len) {
+      numRead += reader.readBytes(data, numRead, start + numRead, len - numRead);
+    }
+    return data;
+  }
+
+  private void assertRandomReadsMatch(SourceReader reader, byte[] expected) throws IOException {
+    assertThat(reader.length()).isEqualTo(expected.length);
+    Random rand = new Random(42);
+    for (int i = 0; i < 200; i++) {
+      int start = rand.nextInt(expected.length);
+      int len = Math.min(rand.nextInt(3 * BgzfWriter.MAX_BLOCK_DATA_SIZE), expected.length - start);
+      assertThat(readRange(reader, start, len))
+          .isEqualTo(Arrays.copyOfRange(expected, start, start + len));
+    }
+    int lastSection = (expected.length - 1) / 8192 * 8192;
+    assertThat(reader.getAsciiSection(lastSection).text)
+        .isEqualTo(new String(expected, lastSection, expected.length - lastSection, "ISO-8859-1"));
+  }
+
+  @Test
+  void shouldBeReadableAsGzip() throws IOException {
+    try (InputStream in = new GZIPInputStream(Files.newInputStream(bgzfPath))) {
+      assertThat(IOUtils.toByteArray(in)).isEqualTo(plainData);
+    }
+    assertThat(Files.size(bgzfPath)).isLessThan(plainData.length / 3);
+  }
+
+  @Test
+  void shouldReadUncompressedOffsets() throws IOException {
+    SourcePointer pointer = SourcePointer.parse(bgzfPath.toString());
+    assertThat(pointer.sources.get(0).type).isEqualTo(SourceType.BGZF);
+    assertThat(pointer.getLength()).isEqualTo(plainData.length);
+    try (SourceReader reader = pointer.getReader(8192, 4)) {
+      assertThat(reader).isInstanceOf(BgzfSourceReader.class);
+      assertRandomReadsMatch(reader, plainData);
+    }
+  }
+
+  @Test
+  void shouldScanBlocksWithoutSidecar() throws IOException {
+    BgzfIndex fromSidecar = BgzfIndex.load(bgzfPath);
+    Files.delete(BgzfIndex.getSidecarPath(bgzfPath));
+    BgzfIndex.clearCache();
+    BgzfIndex scanned = BgzfIndex.load(bgzfPath);
+    assertThat(scanned.getNumBlocks()).isEqualTo(fromSidecar.getNumBlocks()).isGreaterThan(1);
+    assertThat(scanned.getLength()).isEqualTo(plainData.length);
+    for (int i = 0; i < scanned.getNumBlocks(); i++) {
+      assertThat(scanned.getCompressedOffset(i)).isEqualTo(fromSidecar.getCompressedOffset(i));
+      assertThat(scanned.getUncompressedOffset(i)).isEqualTo(fromSidecar.getUncompressedOffset(i));
+    }
+    try (SourceReader reader = new BgzfSourceReader(bgzfPath, scanned, null, 8192, 4)) {
+      assertRandomReadsMatch(reader, plainData);
+    }
+  }
+
+  @Test
+  void shouldCacheIndexByFileIdentity() throws IOException {
+    BgzfIndex index = BgzfIndex.load(bgzfPath);
+    assertThat(BgzfIndex.load(bgzfPath)).isSameAs(index);
+
+    FileTime modified = Files.getLastModifiedTime(bgzfPath);
+    BgzfWriter.compress(plainPath, bgzfPath, Deflater.BEST_COMPRESSION);
+    Files.setLastModifiedTime(bgzfPath, FileTime.fromMillis(modified.toMillis() + 2000));
+    BgzfIndex reloaded = BgzfIndex.load(bgzfPath);
+    assertThat(reloaded).isNotSameAs(index);
+    assertThat(reloaded.getLength()).isEqualTo(plainData.length);
+  }
+
+  @Test
+  void shouldFailFastOnPlainGzip() throws IOException {
+    Path gzipPath = tempDir.resolve("plain.xml.gz");
+    try (OutputStream out = new GZIPOutputStream(Files.newOutputStream(gzipPath))) {
+      out.write(plainData);
+    }
+    assertThatThrownBy(() -> BgzfIndex.load(gzipPath))
+        .isInstanceOf(IOException.class)
+        .hasMessageContaining("not BGZF-compressed");
+    assertThatThrownBy(() -> SourcePointer.parse(gzipPath.toString()))
+        .hasMessageContaining("not BGZF-compressed");
+  }
+
+  @Test
+  void shouldMixCompressedAndPlainFilesInPointer() throws IOException {
+    SourcePointer pointer = SourcePointer.parse(plainPath.toAbsolutePath() + "+" + bgzfPath);
+    byte[] expected = Arrays.copyOf(plainData, plainData.length * 2);
+    System.arraycopy(plainData, 0, expected, plainData.length, plainData.length);
+    try (SourceReader reader = pointer.getReader(8192, 4)) {
+      assertThat(reader).isInstanceOf(MultiFileSourceReader.class);
+      assertRandomReadsMatch(reader, expected);
+      // Read across the file boundary
+      assertThat(readRange(reader, plainData.length - 512, 1024))
+          .isEqualTo(Arrays.copyOfRange(expected, plainData.length - 512, plainData.length + 512));
+    }
+  }
+}
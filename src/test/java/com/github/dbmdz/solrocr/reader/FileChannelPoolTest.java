@@ -0,0 +1,132 @@
+package com.github.dbmdz.solrocr.reader;
+
+import static org.assertj.core.api.Assertions.assertThat;
+
+import java.io.IOException;
+import java.nio.charset.StandardCharsets;
+import java.nio.file.Files;
+import java.nio.file.Path;
+import java.nio.file.attribute.FileTime;
+import org.junit.jupiter.api.Test;
+import org.junit.jupiter.api.io.TempDir;
+
+class FileChannelPoolTest {
+  @TempDir Path tempDir;
+
+  private Path writeFile(String name, String content) throws IOException {
+    Path path = tempDir.resolve(name);
+    Files.write(path, content.getBytes(StandardCharsets.UTF_8));
+    return path;
+  }
+
+  @Test
+  void shouldShareChannelsBetweenLeases() throws IOException {
+    Path path = writeFile("page.xml", "<p>page</p>");
+    FileChannelPool pool = new FileChannelPool(16, 60_000, 60_000);
+    FileChannelPool.Lease first = pool.acquire(path);
+    FileChannelPool.Lease second = pool.acquire(path);
+    assertThat(second.channel()).isSameAs(first.channel());
+    first.close();
+    second.close();
+    assertThat(first.channel().isOpen()).isTrue();
+
+    try (FileChannelPool.Lease third = pool.acquire(path)) {
+      assertThat(third.channel()).isSameAs(first.channel());
+    }
+    assertThat(pool.getOpenCount()).isEqualTo(1);
+    assertThat(pool.getHitCount()).isEqualTo(2);
+    assertThat(pool.getNumOpenFiles()).isEqualTo(1);
+
+    pool.close();
+    assertThat(first.channel().isOpen()).isFalse();
+  }
+
+  @Test
+  void shouldOnlyEvictUnusedChannels() throws IOException {
+    FileChannelPool pool = new FileChannelPool(1, 60_000, 60_000);
+    FileChannelPool.Lease first = pool.acquire(writeFile("first.xml", "<p>first</p>"));
+    FileChannelPool.Lease second = pool.acquire(writeFile("second.xml", "<p>second</p>"));
+    assertThat(first.channel().isOpen()).isTrue();
+    assertThat(pool.getNumOpenFiles()).isEqualTo(2);
+
+    first.close();
+    assertThat(first.channel().isOpen()).isFalse();
+    assertThat(second.channel().isOpen()).isTrue();
+    assertThat(pool.getNumOpenFiles()).isEqualTo(1);
+    assertThat(pool.getEvictionCount()).isEqualTo(1);
+    second.close();
+  }
+
+  @Test
+  void shouldKeepChannelsInUseWhenEvictingIdleOnes() throws IOException {
+    Path path = writeFile("used.xml", "<p>used</p>");
+    FileChannelPool pool = new FileChannelPool(16, 60_000, 60_000);
+    FileChannelPool.Lease used = pool.acquire(path);
+    FileChannelPool.Lease idle = pool.acquire(writeFile("idle.xml", "<p>idle</p>"));
+    idle.close();
+
+    pool.evictIdle();
+    assertThat(idle.channel().isOpen()).isFalse();
+    assertThat(used.channel().isOpen()).isTrue();
+    assertThat(pool.getNumOpenFiles()).isEqualTo(1);
+    assertThat(pool.getEvictionCount()).isEqualTo(1);
+    used.close();
+    // Still pooled, so it is reused and stays open after it was released
+    assertThat(used.channel().isOpen()).isTrue();
+    try (FileChannelPool.Lease again = pool.acquire(path)) {
+      assertThat(again.channel()).isSameAs(used.channel());
+    }
+
+    FileChannelPool.Lease beforeClose = pool.acquire(path);
+    pool.close();
+    assertThat(pool.getNumOpenFiles()).isEqualTo(0);
+    assertThat(beforeClose.channel().isOpen()).isTrue();
+    beforeClose.close();
+    assertThat(beforeClose.channel().isOpen()).isFalse();
+  }
+
+  @Test
+  void shouldReopenChangedFiles() throws IOException {
+    Path path = writeFile("page.xml", "<p>first</p>");
+    FileChannelPool pool = new FileChannelPool(16, 60_000, 0);
+    FileChannelPool.Lease first = pool.acquire(path);
+
+    Files.write(path, "<p>second</p>".getBytes(StandardCharsets.UTF_8));
+    Files.setLastModifiedTime(
+        path, FileTime.fromMillis(Files.getLastModifiedTime(path).toMillis() + 1000));
+    try (FileChannelPool.Lease second = pool.acquire(path)) {
+      assertThat(second.channel()).isNotSameAs(first.channel());
+      // Still in use, so it must not have been closed
+      assertThat(first.channel().isOpen()).isTrue();
+    }
+    first.close();
+    assertThat(first.channel().isOpen()).isFalse();
+    assertThat(pool.getInvalidationCount()).isEqualTo(1);
+    pool.close();
+  }
+
+  @Test
+  void shouldReuseValidatedIdentities() throws IOException {
+    Path path = writeFile("page.xml", "<p>first</p>");
+    Path unpooled = writeFile("other.xml", "<p>other</p>");
+    FileChannelPool pool = new FileChannelPool(16, 60_000, 60_000);
+    try (FileChannelPool.Lease lease = pool.acquire(path)) {
+      FileIdentity identity = lease.identity();
+      assertThat(identity).isEqualTo(FileIdentity.of(path));
+
+      // Within the revalidation interval, the file is not stat'ed again
+      Files.write(path, "<p>second, longer</p>".getBytes(StandardCharsets.UTF_8));
+      assertThat(pool.getIdentity(path)).isSameAs(identity);
+      assertThat(pool.getIdentity(unpooled)).isEqualTo(FileIdentity.of(unpooled));
+    }
+    pool.close();
+
+    FileChannelPool revalidating = new FileChannelPool(16, 60_000, 0);
+    try (FileChannelPool.Lease lease = revalidating.acquire(path)) {
+      Files.write(path, "<p>third, even longer</p>".getBytes(StandardCharsets.UTF_8));
+      assertThat(revalidating.getIdentity(path)).isEqualTo(FileIdentity.of(path));
+      assertThat(revalidating.getIdentity(path)).isNotEqualTo(lease.identity());
+    }
+    revalidating.close();
+  }
+}
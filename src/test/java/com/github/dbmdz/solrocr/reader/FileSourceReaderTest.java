@@ -23,22 +23,48 @@ class FileSourceReaderTest {
   void shouldCacheSectionsProperly() throws IOException {
     FileSourceReader reader = new FileSourceReader(filePath, pointer, 8192, 3);
     reader.getAsciiSection(128);
-    assertThat(reader.cachedSectionIdxes).containsExactlyInAnyOrder(-1, -1, 0);
-    assertThat(reader.cache[0].section.start).isEqualTo(0);
-    assertThat(reader.cache[0].section.end).isEqualTo(8192);
+    assertThat(reader.cache.getSectionIdxes()).containsExactly(0);
+    assertThat(reader.cache.get(0).start).isEqualTo(0);
+    assertThat(reader.cache.get(0).end).isEqualTo(8192);
     reader.getAsciiSection(8192 + 128);
-    assertThat(reader.cachedSectionIdxes).containsExactlyInAnyOrder(-1, 1, 0);
-    assertThat(reader.cache[1]).isNotNull();
+    assertThat(reader.cache.getSectionIdxes()).containsExactly(1, 0);
     reader.getAsciiSection(2 * 8192 + 128);
-    assertThat(reader.cachedSectionIdxes).containsExactlyInAnyOrder(2, 1, 0);
-    assertThat(reader.cache[2]).isNotNull();
+    assertThat(reader.cache.getSectionIdxes()).containsExactly(2, 1, 0);
     // Test cache eviction
     reader.getAsciiSection(3 * 8192 + 128);
-    assertThat(reader.cachedSectionIdxes).containsExactlyInAnyOrder(2, 1, 3);
-    assertThat(reader.cache[0]).isNull();
+    assertThat(reader.cache.getSectionIdxes()).containsExactly(3, 2, 1);
+    assertThat(reader.cache.contains(0)).isFalse();
+    // Cache hits should update the recency order
+    reader.getAsciiSection(8192 + 256);
+    assertThat(reader.cache.getSectionIdxes()).containsExactly(1, 3, 2);
     reader.getAsciiSection(16 * 8192 + 128);
-    assertThat(reader.cachedSectionIdxes).containsExactlyInAnyOrder(2, 16, 3);
-    assertThat(reader.cache[1]).isNull();
+    assertThat(reader.cache.getSectionIdxes()).containsExactly(16, 1, 3);
+    assertThat(reader.cache.contains(2)).isFalse();
+  }
+
+  @Test
+  void shouldWorkWithoutCache() throws IOException {
+    FileSourceReader reader = new FileSourceReader(filePath, pointer, 8192, 0);
+    assertThat(reader.getAsciiSection(128).start).isEqualTo(0);
+    assertThat(reader.getAsciiSection(8192 + 128).start).isEqualTo(8192);
+    assertThat(reader.cache.size()).isEqualTo(0);
+  }
+
+  @Test
+  void shouldShareSectionsAcrossReaders() throws IOException {
+    SectionCache sharedCache = new SectionCache(1024 * 1024);
+    try (FileSourceReader reader = new FileSourceReader(filePath, pointer, 8192, 3, sharedCache)) {
+      reader.getAsciiSection(128);
+    }
+    assertThat(sharedCache.getMissCount()).isEqualTo(1);
+    assertThat(sharedCache.getNumEntries()).isEqualTo(1);
+    try (FileSourceReader reader = new FileSourceReader(filePath, pointer, 8192, 3, sharedCache)) {
+      SourceReader.Section section = reader.getAsciiSection(256);
+      assertThat(section.start).isEqualTo(0);
+      assertThat(section.end).isEqualTo(8192);
+    }
+    assertThat(sharedCache.getHitCount()).isEqualTo(1);
+    assertThat(sharedCache.getMissCount()).isEqualTo(1);
   }
 
   @Test
@@ -0,0 +1,328 @@
+package com.github.dbmdz.solrocr.reader;
+
+import static org.assertj.core.api.Assertions.assertThat;
+import static org.assertj.core.api.Assertions.assertThatThrownBy;
+
+import com.github.dbmdz.solrocr.model.SourcePointer;
+import com.github.dbmdz.solrocr.model.SourcePointer.SourceType;
+import com.google.common.collect.ImmutableList;
+import com.google.common.collect.ImmutableMap;
+import com.sun.net.httpserver.HttpExchange;
+import com.sun.net.httpserver.HttpServer;
+import java.io.FileNotFoundException;
+import java.io.IOException;
+import java.io.OutputStream;
+import java.net.InetAddress;
+import java.net.InetSocketAddress;
+import java.nio.file.Files;
+import java.nio.file.NoSuchFileException;
+import java.nio.file.Path;
+import java.nio.file.Paths;
+import java.util.ArrayList;
+import java.util.Arrays;
+import java.util.List;
+import java.util.Locale;
+import java.util.Random;
+import java.util.concurrent.CountDownLatch;
+import java.util.concurrent.ExecutorService;
+import java.util.concurrent.Executors;
+import java.util.concurrent.Future;
+import java.util.concurrent.atomic.AtomicInteger;
+import java.util.regex.Matcher;
+import java.util.regex.Pattern;
+import java.util.stream.Stream;
+import org.junit.jupiter.api.AfterEach;
+import org.junit.jupiter.api.BeforeEach;
+import org.junit.jupiter.api.Test;
+import org.junit.jupiter.api.io.TempDir;
+
+class HttpSourceReaderTest {
+  private static final Path DATA_DIR = Paths.get("src/test/resources/data");
+  private static final Pattern RANGE_PAT = Pattern.compile("^bytes=(\\d+)-(\\d+)$");
+  private static final int BLOCK_SIZE = 64 * 1024;
+
+  @TempDir Path tempDir;
+
+  private HttpServer server;
+  private ExecutorService serverExecutor;
+  private volatile long responseDelayMs = 0;
+  private final AtomicInteger numServed = new AtomicInteger();
+
+  private HttpSourceBackend backend;
+
+  /** Minimal file server for the test data that only supports range requests */
+  private void handle(HttpExchange exchange) throws IOException {
+    numServed.incrementAndGet();
+    try {
+      if (exchange.getRequestURI().getPath().startsWith("/redirect/")) {
+        exchange
+            .getResponseHeaders()
+            .add("Location", getUrl(exchange.getRequestURI().getPath().substring(10)));
+        exchange.sendResponseHeaders(302, -1);
+        return;
+      }
+      Path path = DATA_DIR.resolve(exchange.getRequestURI().getPath().substring(1));
+      byte[] data;
+      try {
+        data = Files.readAllBytes(path);
+      } catch (NoSuchFileException e) {
+        exchange.sendResponseHeaders(404, -1);
+        return;
+      }
+      Matcher m = RANGE_PAT.matcher(exchange.getRequestHeaders().getFirst("Range"));
+      if (!m.matches()) {
+        exchange.sendResponseHeaders(400, -1);
+        return;
+      }
+      int start = Integer.parseInt(m.group(1));
+      int end = Math.min(Integer.parseInt(m.group(2)), data.length - 1);
+      if (start >= data.length) {
+        exchange.sendResponseHeaders(416, -1);
+        return;
+      }
+      Thread.sleep(responseDelayMs);
+      exchange
+          .getResponseHeaders()
+          .add(
+              "Content-Range",
+              String.format(Locale.US, "bytes %d-%d/%d", start, end, data.length));
+      exchange.sendResponseHeaders(206, end - start + 1);
+      try (OutputStream os = exchange.getResponseBody()) {
+        os.write(data, start, end - start + 1);
+      }
+    } catch (InterruptedException e) {
+      Thread.currentThread().interrupt();
+    } finally {
+      exchange.close();
+    }
+  }
+
+  @BeforeEach
+  void setUp() throws IOException {
+    server = HttpServer.create(new InetSocketAddress(InetAddress.getLoopbackAddress(), 0), 0);
+    server.createContext("/", this::handle);
+    serverExecutor = Executors.newFixedThreadPool(8);
+    server.setExecutor(serverExecutor);
+    server.start();
+    backend = new HttpSourceBackend(ImmutableList.of(getUrl("")), 8, BLOCK_SIZE, 5000, null);
+  }
+
+  @AfterEach
+  void tearDown() {
+    server.stop(0);
+    serverExecutor.shutdownNow();
+  }
+
+  private String getUrl(String fileName) {
+    return String.format(
+        Locale.US, "http://localhost:%d/%s", server.getAddress().getPort(), fileName);
+  }
+
+  private SourcePointer parse(String pointer) {
+    return SourcePointer.parse(pointer, SourceBackends.of(backend));
+  }
+
+  private static byte[] readRange(SourceReader reader, int start, int len) throws IOException {
+    byte[] data = new byte[len];
+    int numRead = 0;
+    while (numRead < len) {
+      numRead += reader.readBytes(data, numRead, start + numRead, len - numRead);
+    }
+    return data;
+  }
+
+  @Test
+  void shouldReadRemoteFile() throws IOException {
+    byte[] expected = Files.readAllBytes(DATA_DIR.resolve("chronicling_america.xml"));
+    SourcePointer pointer = parse(getUrl("chronicling_america.xml"));
+    assertThat(pointer.sources.get(0).type).isEqualTo(SourceType.REMOTE);
+    // The size of remote files is only looked up by the reader
+    assertThat(pointer.getLength()).isEqualTo(-1);
+    try (SourceReader reader = pointer.getReader(8192, 8)) {
+      assertThat(reader).isInstanceOf(HttpSourceReader.class);
+      assertThat(reader.length()).isEqualTo(expected.length);
+      Random rand = new Random(42);
+      for (int i = 0; i < 100; i++) {
+        int start = rand.nextInt(expected.length);
+        int len = Math.min(rand.nextInt(3 * BLOCK_SIZE), expected.length - start);
+        assertThat(readRange(reader, start, len))
+            .isEqualTo(Arrays.copyOfRange(expected, start, start + len));
+      }
+    }
+  }
+
+  @Test
+  void shouldReadMultipleRemoteFiles() throws IOException {
+    byte[] first = Files.readAllBytes(DATA_DIR.resolve("alto_multi/1860-11-30_01-00001.xml"));
+    byte[] second = Files.readAllBytes(DATA_DIR.resolve("alto_multi/1865-05-24_01-00001.xml"));
+    String firstUrl = getUrl("alto_multi/1860-11-30_01-00001.xml");
+    String secondUrl = getUrl("alto_multi/1865-05-24_01-00001.xml");
+    SourcePointer pointer = parse(firstUrl + "+" + secondUrl);
+    try (SourceReader reader = pointer.getReader(8192, 8)) {
+      assertThat(reader.length()).isEqualTo(first.length + second.length);
+      assertThat(readRange(reader, first.length - 100, 200))
+          .isEqualTo(
+              concat(
+                  Arrays.copyOfRange(first, first.length - 100, first.length),
+                  Arrays.copyOf(second, 100)));
+    }
+  }
+
+  private static byte[] concat(byte[] a, byte[] b) {
+    byte[] out = Arrays.copyOf(a, a.length + b.length);
+    System.arraycopy(b, 0, out, a.length, b.length);
+    return out;
+  }
+
+  @Test
+  void shouldCoalesceAdjacentSections() throws IOException {
+    SourcePointer pointer = parse(getUrl("chronicling_america.xml"));
+    try (SourceReader reader = pointer.getReader(8192, 8)) {
+      for (int offset = 0; offset < BLOCK_SIZE; offset += 8192) {
+        reader.getAsciiSection(offset);
+      }
+      assertThat(backend.getRequestCount()).isEqualTo(1);
+
+      // Three missing blocks are fetched with a single request
+      readRange(reader, BLOCK_SIZE, 3 * BLOCK_SIZE);
+      assertThat(backend.getRequestCount()).isEqualTo(2);
+      assertThat(backend.getFetchedBytes()).isEqualTo(4 * BLOCK_SIZE);
+    }
+  }
+
+  @Test
+  void shouldShareConcurrentFetches() throws Exception {
+    SourcePointer pointer = parse(getUrl("chronicling_america.xml"));
+    responseDelayMs = 250;
+    int numThreads = 8;
+    CountDownLatch latch = new CountDownLatch(numThreads);
+    ExecutorService pool = Executors.newFixedThreadPool(numThreads);
+    try {
+      List<Future<String>> futures = new ArrayList<>();
+      for (int i = 0; i < numThreads; i++) {
+        futures.add(
+            pool.submit(
+                () -> {
+                  try (SourceReader reader = pointer.getReader(8192, 8)) {
+                    latch.countDown();
+                    latch.await();
+                    return reader.getAsciiSection(8192).text;
+                  }
+                }));
+      }
+      for (Future<String> future : futures) {
+        assertThat(future.get()).hasSize(8192);
+      }
+    } finally {
+      pool.shutdown();
+    }
+    assertThat(backend.getRequestCount()).isEqualTo(1);
+  }
+
+  @Test
+  void shouldUseDiskCache() throws IOException {
+    Path cacheDir = tempDir.resolve("blocks");
+    backend =
+        new HttpSourceBackend(
+            ImmutableList.of(getUrl("")),
+            8,
+            BLOCK_SIZE,
+            5000,
+            new DiskBlockCache(cacheDir, 1 << 20));
+    SourcePointer pointer = parse(getUrl("chronicling_america.xml"));
+    byte[] fromServer;
+    try (SourceReader reader = pointer.getReader(8192, 8)) {
+      fromServer = readRange(reader, 1000, 2 * BLOCK_SIZE);
+    }
+    assertThat(backend.getRequestCount()).isEqualTo(1);
+
+    // A new backend picks up the blocks from the previous one
+    DiskBlockCache diskCache = new DiskBlockCache(cacheDir, 1 << 20);
+    assertThat(diskCache.getNumEntries()).isEqualTo(3);
+    backend = new HttpSourceBackend(ImmutableList.of(getUrl("")), 8, BLOCK_SIZE, 5000, diskCache);
+    try (SourceReader reader = backend.getReader(pointer, 8192, 8, null)) {
+      assertThat(readRange(reader, 1000, 2 * BLOCK_SIZE)).isEqualTo(fromServer);
+    }
+    assertThat(backend.getRequestCount()).isEqualTo(0);
+    assertThat(diskCache.getHitCount()).isEqualTo(3);
+  }
+
+  @Test
+  void shouldEvictFromDiskCache() throws IOException {
+    DiskBlockCache diskCache = new DiskBlockCache(tempDir.resolve("blocks"), 2 * BLOCK_SIZE);
+    backend = new HttpSourceBackend(ImmutableList.of(getUrl("")), 8, BLOCK_SIZE, 5000, diskCache);
+    SourcePointer pointer = parse(getUrl("chronicling_america.xml"));
+    try (SourceReader reader = backend.getReader(pointer, 8192, 8, null)) {
+      readRange(reader, 0, 5 * BLOCK_SIZE);
+    }
+    assertThat(diskCache.getNumEntries()).isEqualTo(2);
+    assertThat(diskCache.getSize()).isLessThanOrEqualTo(2 * BLOCK_SIZE);
+    try (Stream<Path> files = Files.list(tempDir.resolve("blocks"))) {
+      assertThat(files.count()).isEqualTo(2);
+    }
+  }
+
+  @Test
+  void shouldFailForMissingFile() {
+    SourcePointer pointer = parse(getUrl("does_not_exist.xml"));
+    assertThatThrownBy(() -> pointer.getReader(8192, 8))
+        .isInstanceOf(FileNotFoundException.class)
+        .hasMessageContaining("does not exist");
+  }
+
+  @Test
+  void shouldNotAccessRemoteFilesWhenParsing() {
+    parse(getUrl("chronicling_america.xml") + "+" + getUrl("does_not_exist.xml"));
+    assertThat(numServed.get()).isEqualTo(0);
+  }
+
+  @Test
+  void shouldOnlyReadAllowedUrls() {
+    backend = new HttpSourceBackend(ImmutableList.of(getUrl("alto_multi/")));
+    assertThat(backend.handles(getUrl("alto_multi/1860-11-30_01-00001.xml"))).isTrue();
+    assertThat(backend.handles(getUrl("chronicling_america.xml"))).isFalse();
+    assertThat(backend.handles(getUrl("alto_multi/../chronicling_america.xml"))).isFalse();
+    assertThatThrownBy(() -> parse(getUrl("chronicling_america.xml")))
+        .hasMessageContaining("no configured source backend allows it");
+    assertThat(numServed.get()).isEqualTo(0);
+  }
+
+  @Test
+  void shouldNotReadUrlsWithoutBackend() {
+    assertThatThrownBy(() -> SourcePointer.parse(getUrl("chronicling_america.xml")))
+        .hasMessageContaining("no configured source backend allows it");
+    assertThat(numServed.get()).isEqualTo(0);
+  }
+
+  @Test
+  void shouldNotFollowRedirects() {
+    SourcePointer pointer = parse(getUrl("redirect/chronicling_america.xml"));
+    assertThatThrownBy(() -> pointer.getReader(8192, 8))
+        .hasMessageContaining("redirects are not followed");
+    assertThat(numServed.get()).isEqualTo(1);
+  }
+
+  @Test
+  void shouldRequireAllowedUrlPrefixes() {
+    assertThatThrownBy(() -> new HttpSourceBackend(ImmutableList.of()))
+        .isInstanceOf(IllegalArgumentException.class);
+    assertThatThrownBy(() -> new HttpSourceBackend(ImmutableList.of("https://example.com")))
+        .isInstanceOf(IllegalArgumentException.class);
+    assertThatThrownBy(() -> new HttpSourceBackend(ImmutableList.of("file:///data/")))
+        .isInstanceOf(IllegalArgumentException.class);
+  }
+
+  @Test
+  void shouldBeDisabledUnlessConfigured() throws IOException {
+    assertThat(HttpSourceBackend.fromConfig(ImmutableMap.of())).isNull();
+    assertThatThrownBy(
+            () -> HttpSourceBackend.fromConfig(ImmutableMap.of("httpMaxConnections", "4")))
+        .isInstanceOf(IllegalArgumentException.class)
+        .hasMessageContaining("httpAllowedUrlPrefixes");
+    HttpSourceBackend configured =
+        HttpSourceBackend.fromConfig(
+            ImmutableMap.of("httpAllowedUrlPrefixes", getUrl("alto_multi/") + ", " + getUrl("x/")));
+    assertThat(configured.handles(getUrl("x/ocr.xml"))).isTrue();
+    assertThat(configured.handles(getUrl("ocr.xml"))).isFalse();
+  }
+}
@@ -16,6 +16,8 @@ import java.nio.file.Paths;
 import java.util.ArrayList;
 import java.util.Comparator;
 import java.util.List;
+import java.util.concurrent.ExecutorService;
+import java.util.concurrent.Executors;
 import java.util.stream.Collectors;
 import org.apache.commons.io.IOUtils;
 import org.junit.jupiter.api.Test;
@@ -143,4 +145,33 @@ class MultiFileSourceReaderTest {
             .collect(Collectors.joining(""));
     assertThat(fromReader).isEqualTo(fromFiles);
   }
+
+  @ParameterizedTest
+  @ValueSource(ints = {64, 1024, 8192})
+  void shouldPrefetchSectionsAcrossFileBoundaries(int sectionSize) throws IOException {
+    MultiFileSourceReader reader =
+        new MultiFileSourceReader(filePaths, pointer, sectionSize, maxCacheEntries);
+    int boundary = (int) Files.size(filePaths.get(0));
+    ExecutorService executor = Executors.newFixedThreadPool(4);
+    try {
+      reader.prefetch(new int[] {128, boundary}, sectionSize, executor);
+    } finally {
+      executor.shutdown();
+    }
+    assertThat(reader.cache.size()).isGreaterThan(1).isLessThanOrEqualTo(maxCacheEntries);
+    assertThat(reader.cache.contains(boundary / sectionSize)).isTrue();
+    for (int sectionIdx : reader.cache.getSectionIdxes()) {
+      int sectionStart = sectionIdx * sectionSize;
+      byte[] expectedData = readData(sectionStart, sectionStart + sectionSize);
+      Section section = reader.getAsciiSection(sectionStart);
+      assertThat(section.text).isEqualTo(new String(expectedData, 0, 0, expectedData.length));
+    }
+  }
+
+  @Test
+  void shouldNotPrefetchMoreThanFitsIntoCache() throws IOException {
+    MultiFileSourceReader reader = new MultiFileSourceReader(filePaths, pointer, 64, 4);
+    reader.prefetch(new int[] {0, 1024, 4096, 8192}, 128, Runnable::run);
+    assertThat(reader.cache.getSectionIdxes()).containsExactlyInAnyOrder(0, 1, 2, 14);
+  }
 }
@@ -0,0 +1,51 @@
+package com.github.dbmdz.solrocr.reader;
+
+import static org.assertj.core.api.Assertions.assertThat;
+
+import com.github.dbmdz.solrocr.model.SourcePointer;
+import java.io.IOException;
+import java.nio.charset.StandardCharsets;
+import java.nio.file.Files;
+import java.nio.file.Path;
+import java.nio.file.attribute.FileTime;
+import org.junit.jupiter.api.Test;
+import org.junit.jupiter.api.io.TempDir;
+
+class SectionCacheTest {
+  @TempDir Path tempDir;
+
+  private SourceReader.Section readFirstSection(Path path, SectionCache cache) throws IOException {
+    SourcePointer pointer = SourcePointer.parse(path.toString());
+    try (FileSourceReader reader = new FileSourceReader(path, pointer, 64, 2, cache)) {
+      return reader.getAsciiSection(0);
+    }
+  }
+
+  @Test
+  void shouldNotReturnStaleSectionsForModifiedFiles() throws IOException {
+    Path path = tempDir.resolve("page.xml");
+    Files.write(path, "<p><l><w>first</w></l></p>".getBytes(StandardCharsets.UTF_8));
+    SectionCache cache = new SectionCache(1024 * 1024);
+    assertThat(readFirstSection(path, cache).text).contains("first");
+    assertThat(readFirstSection(path, cache).text).contains("first");
+    assertThat(cache.getHitCount()).isEqualTo(1);
+
+    Files.write(path, "<p><l><w>second</w></l></p>".getBytes(StandardCharsets.UTF_8));
+    Files.setLastModifiedTime(
+        path, FileTime.fromMillis(Files.getLastModifiedTime(path).toMillis() + 1000));
+    assertThat(readFirstSection(path, cache).text).contains("second");
+    assertThat(cache.getMissCount()).isEqualTo(2);
+  }
+
+  @Test
+  void shouldEvictSectionsWhenFull() throws IOException {
+    SectionCache cache = new SectionCache(512);
+    FileIdentity identity = new FileIdentity("/some/file", 4096, 0);
+    for (int i = 0; i < 16; i++) {
+      cache.put(identity, 64, i, new SourceReader.ByteSection(i * 64, new byte[64]));
+    }
+    assertThat(cache.getNumEntries()).isLessThan(16);
+    assertThat(cache.getEvictionCount()).isGreaterThan(0);
+    assertThat(cache.get(identity, 64, 15)).isNotNull();
+  }
+}
@@ -0,0 +1,48 @@
+package com.github.dbmdz.solrocr.reader;
+
+import static org.assertj.core.api.Assertions.assertThat;
+
+import com.github.dbmdz.solrocr.reader.SourceReader.ByteSection;
+import java.util.LinkedHashMap;
+import java.util.Map;
+import java.util.Random;
+import org.junit.jupiter.params.ParameterizedTest;
+import org.junit.jupiter.params.provider.ValueSource;
+
+class SectionLruCacheTest {
+  @ParameterizedTest
+  @ValueSource(ints = {1, 2, 3, 7, 10, 64})
+  void shouldBehaveLikeReferenceLru(int capacity) {
+    SectionLruCache cache = new SectionLruCache(capacity);
+    Map<Integer, ByteSection> reference =
+        new LinkedHashMap<Integer, ByteSection>(16, 0.75f, true) {
+          @Override
+          protected boolean removeEldestEntry(Map.Entry<Integer, ByteSection> eldest) {
+            return size() > capacity;
+          }
+        };
+    Random rand = new Random(42);
+    for (int i = 0; i < 100_000; i++) {
+      int sectionIdx = rand.nextInt(capacity * 3);
+      ByteSection expected = reference.get(sectionIdx);
+      ByteSection actual = cache.get(sectionIdx);
+      assertThat(actual).isSameAs(expected);
+      if (actual == null) {
+        ByteSection section = new ByteSection(sectionIdx, new byte[1]);
+        cache.put(sectionIdx, section);
+        reference.put(sectionIdx, section);
+      }
+      assertThat(cache.size()).isEqualTo(reference.size());
+    }
+  }
+
+  @ParameterizedTest
+  @ValueSource(ints = {0, -1})
+  void shouldNotCacheWithoutCapacity(int capacity) {
+    SectionLruCache cache = new SectionLruCache(capacity);
+    cache.put(0, new ByteSection(0, new byte[1]));
+    assertThat(cache.get(0)).isNull();
+    assertThat(cache.size()).isEqualTo(0);
+    assertThat(cache.getSectionIdxes()).isEmpty();
+  }
+}
@@ -0,0 +1,137 @@
+package com.github.dbmdz.solrocr.solr;
+
+import static org.assertj.core.api.Assertions.assertThat;
+import static org.assertj.core.api.Assertions.assertThatThrownBy;
+
+import java.util.ArrayList;
+import java.util.List;
+import java.util.concurrent.CompletableFuture;
+import java.util.concurrent.CountDownLatch;
+import java.util.concurrent.Executor;
+import java.util.concurrent.RejectedExecutionException;
+import java.util.concurrent.TimeUnit;
+import java.util.concurrent.atomic.AtomicInteger;
+import org.junit.jupiter.api.AfterEach;
+import org.junit.jupiter.api.Test;
+
+class FairHighlightSchedulerTest {
+  private FairHighlightScheduler scheduler;
+
+  @AfterEach
+  void shutdown() {
+    if (scheduler != null) {
+      scheduler.shutdown();
+    }
+  }
+
+  @Test
+  void shouldLimitRunningTasksPerRequest() throws Exception {
+    scheduler = new FairHighlightScheduler(4, 2, 16);
+    Executor queue = scheduler.newRequestQueue();
+    AtomicInteger running = new AtomicInteger();
+    AtomicInteger maxRunning = new AtomicInteger();
+    List<CompletableFuture<Void>> futs = new ArrayList<>();
+    for (int i = 0; i < 20; i++) {
+      futs.add(
+          CompletableFuture.runAsync(
+              () -> {
+                maxRunning.accumulateAndGet(running.incrementAndGet(), Math::max);
+                try {
+                  Thread.sleep(5);
+                } catch (InterruptedException e) {
+                  Thread.currentThread().interrupt();
+                }
+                running.decrementAndGet();
+              },
+              queue));
+    }
+    CompletableFuture.allOf(futs.toArray(new CompletableFuture[0])).get(10, TimeUnit.SECONDS);
+    assertThat(maxRunning.get()).isLessThanOrEqualTo(2);
+    assertThat(scheduler.getNumCompletedTasks()).isEqualTo(20);
+    assertThat(scheduler.getNumActiveRequests()).isZero();
+    assertThat(scheduler.getNumQueuedTasks()).isZero();
+  }
+
+  @Test
+  void shouldNotStarveSmallRequests() throws Exception {
+    scheduler = new FairHighlightScheduler(2, 2, 64);
+    CountDownLatch release = new CountDownLatch(1);
+    AtomicInteger numHeavyStarted = new AtomicInteger();
+    Executor heavy = scheduler.newRequestQueue();
+    List<CompletableFuture<Void>> heavyFuts = new ArrayList<>();
+    for (int i = 0; i < 100; i++) {
+      heavyFuts.add(
+          CompletableFuture.runAsync(
+              () -> {
+                numHeavyStarted.incrementAndGet();
+                try {
+                  release.await();
+                } catch (InterruptedException e) {
+                  Thread.currentThread().interrupt();
+                }
+              },
+              heavy));
+    }
+
+    // Once the two running tasks of the heavy request are done, the small request has to go next
+    Executor small = scheduler.newRequestQueue();
+    CompletableFuture<Integer> smallFut =
+        CompletableFuture.supplyAsync(numHeavyStarted::get, small);
+    assertThat(scheduler.getNumActiveRequests()).isEqualTo(2);
+    release.countDown();
+    assertThat(smallFut.get(10, TimeUnit.SECONDS)).isLessThanOrEqualTo(4);
+    CompletableFuture.allOf(heavyFuts.toArray(new CompletableFuture[0])).get(10, TimeUnit.SECONDS);
+  }
+
+  @Test
+  void shouldRejectTasksBeyondQueueBounds() throws Exception {
+    scheduler = new FairHighlightScheduler(2, 1, 2);
+    CountDownLatch release = new CountDownLatch(1);
+    CountDownLatch started = new CountDownLatch(2);
+    Runnable blocking =
+        () -> {
+          started.countDown();
+          try {
+            release.await();
+          } catch (InterruptedException e) {
+            Thread.currentThread().interrupt();
+          }
+        };
+    Executor first = scheduler.newRequestQueue();
+    Executor second = scheduler.newRequestQueue();
+    first.execute(blocking);
+    second.execute(blocking);
+    assertThat(started.await(10, TimeUnit.SECONDS)).isTrue();
+
+    // Every request has room for maxRunningPerRequest * maxQueuedPerThread = 2 queued tasks
+    List<CompletableFuture<Void>> queued = new ArrayList<>();
+    queued.add(CompletableFuture.runAsync(() -> {}, first));
+    queued.add(CompletableFuture.runAsync(() -> {}, first));
+    assertThatThrownBy(() -> first.execute(() -> {}))
+        .isInstanceOf(RejectedExecutionException.class);
+
+    // All requests together have room for numThreads * maxQueuedPerThread = 4 queued tasks
+    queued.add(CompletableFuture.runAsync(() -> {}, second));
+    queued.add(CompletableFuture.runAsync(() -> {}, second));
+    Executor third = scheduler.newRequestQueue();
+    assertThatThrownBy(() -> third.execute(() -> {}))
+        .isInstanceOf(RejectedExecutionException.class);
+    assertThat(scheduler.getNumQueuedTasks()).isEqualTo(4);
+
+    release.countDown();
+    CompletableFuture.allOf(queued.toArray(new CompletableFuture[0])).get(10, TimeUnit.SECONDS);
+    CompletableFuture.runAsync(() -> {}, third).get(10, TimeUnit.SECONDS);
+  }
+
+  @Test
+  void shouldKeepWorkersAliveAfterErrors() throws Exception {
+    scheduler = new FairHighlightScheduler(1, 1, 8);
+    Executor queue = scheduler.newRequestQueue();
+    queue.execute(
+        () -> {
+          throw new AssertionError("Simulated error");
+        });
+    assertThat(CompletableFuture.supplyAsync(() -> 42, queue).get(10, TimeUnit.SECONDS))
+        .isEqualTo(42);
+  }
+}
@@ -6,6 +6,8 @@ public class HlThreadsFilter implements ThreadFilter {
 
   @Override
   public boolean reject(Thread thread) {
-    return thread.getName().startsWith("OcrHighlighter-");
+    return thread.getName().startsWith("OcrHighlighter-")
+        || thread.getName().startsWith("OcrPrefetch-")
+        || thread.getName().startsWith("OcrReadAhead-");
   }
 }
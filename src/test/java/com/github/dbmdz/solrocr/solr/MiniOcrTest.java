@@ -12,6 +12,7 @@ import java.util.stream.Stream;
 import org.apache.lucene.tests.util.QuickPatchThreadsFilter;
 import org.apache.solr.SolrIgnoredThreadsFilter;
 import org.apache.solr.SolrTestCaseJ4;
+import org.apache.solr.common.SolrException;
 import org.apache.solr.common.params.ModifiableSolrParams;
 import org.apache.solr.request.SolrQueryRequest;
 import org.junit.BeforeClass;
@@ -52,6 +53,23 @@ public class MiniOcrTest extends SolrTestCaseJ4 {
             new String(Files.readAllBytes(ocrPath), StandardCharsets.UTF_8),
             "id",
             "41337"));
+    // One line per snippet, with the term in every line but the third one
+    StringBuilder lines = new StringBuilder();
+    String[] firstWords = {"Ein", "Zwei", "Drei", "Vier", "Fünf", "Sechs"};
+    for (int i = 0; i < firstWords.length; i++) {
+      lines.append("<l><w x=\".1 .1 .1 .1\">").append(firstWords[i]).append("</w> ");
+      if (i == 0) {
+        lines.append("<w x=\".2 .1 .1 .1\">zwiebelturm</w> <w x=\".3 .1 .1 .1\">und</w> ");
+      }
+      lines.append("<w x=\".4 .1 .1 .1\">").append(i == 2 ? "ohne" : "zwiebelturm");
+      lines.append("</w></l>");
+    }
+    assertU(
+        adoc(
+            "ocr_text_stored",
+            "<ocr><p xml:id=\"1\" wh=\"100 100\"><b>" + lines + "</b></p></ocr>",
+            "id",
+            "51337"));
     assertU(commit());
   }
 
@@ -297,6 +315,99 @@ public class MiniOcrTest extends SolrTestCaseJ4 {
         "//arr[@name='highlights']/arr/lst[1]/int[@name='uly']/text()='0'");
   }
 
+  @Test
+  public void testUnscoredSnippetsAreFirstInDocument() {
+    SolrQueryRequest req =
+        xmlQ("q", "nicht", "hl.ocr.scorePassages", "off", "hl.snippets", "3", "fq", "id:31337");
+    assertQ(
+        req,
+        "count(//lst[@name='31337']//arr[@name='snippets']/lst)=3",
+        "//lst[@name='31337']//int[@name='numTotal']/text() > 3",
+        "number((//lst[@name='31337']//arr[@name='pages'])[1]/lst[1]/str[@name='id'])"
+            + " <= number((//lst[@name='31337']//arr[@name='pages'])[3]/lst[1]/str[@name='id'])");
+  }
+
+  @Test
+  public void testLazyBreaks() {
+    // Matches are far apart, so the result has to be identical to the exact mode
+    SolrQueryRequest req = xmlQ("q", "München", "hl.ocr.lazyBreaks", "true");
+    assertQ(
+        req,
+        "count(//lst[@name='ocrHighlighting']/lst[@name='31337']/lst[@name='ocr_text']/arr/lst)=3",
+        "//str[@name='text'][1]/text()='Bayerische Staatsbibliothek <em>München</em>'",
+        "count(//arr[@name='highlights'])=3");
+
+    req = xmlQ("q", "nicht", "hl.ocr.lazyBreaks", "true", "hl.snippets", "5", "fq", "id:31337");
+    assertQ(
+        req,
+        "count(//lst[@name='31337']//arr[@name='snippets']/lst)=5",
+        "count(//lst[@name='31337']//arr[@name='snippets']/lst/str[@name='text'][contains(text(), '<em>')])=5",
+        "//lst[@name='31337']//int[@name='numTotal']/text() > 5");
+  }
+
+  @Test
+  public void testFormatHint() {
+    SolrQueryRequest req = xmlQ("q", "München", "hl.ocr.format", "miniocr");
+    assertQ(
+        req,
+        "count(//lst[@name='ocrHighlighting']/lst[@name='31337']/lst[@name='ocr_text']/arr/lst)=3",
+        "//str[@name='text'][1]/text()='Bayerische Staatsbibliothek <em>München</em>'");
+
+    assertQEx(
+        "Unknown format should be rejected",
+        xmlQ("q", "München", "hl.ocr.format", "pdf"),
+        SolrException.ErrorCode.BAD_REQUEST);
+  }
+
+  @Test
+  public void testUnscoredSnippetsWithMoreMatchesThanSnippets() {
+    String snippetsPath = "//lst[@name='51337']/lst[@name='ocr_text_stored']/arr[@name='snippets']";
+    String firstSnippet = "Ein <em>zwiebelturm</em> und <em>zwiebelturm</em>";
+    SolrQueryRequest req =
+        xmlQ(
+            "q",
+            "zwiebelturm",
+            "hl.ocr.fl",
+            "ocr_text_stored",
+            "df",
+            "ocr_text_stored",
+            "hl.ocr.contextSize",
+            "0",
+            "hl.ocr.scorePassages",
+            "off",
+            "hl.snippets",
+            "2");
+    // Both matches in the first line are a single passage, every other line with a match is one
+    assertQ(
+        req,
+        "count(" + snippetsPath + "/lst)=2",
+        snippetsPath + "/lst[1]/str[@name='text']/text()='" + firstSnippet + "'",
+        snippetsPath + "/lst[2]/str[@name='text']/text()='Zwei <em>zwiebelturm</em>'",
+        "//lst[@name='51337']//int[@name='numTotal']/text()='5'");
+
+    // Same passages and total when all of them are formed
+    req =
+        xmlQ(
+            "q",
+            "zwiebelturm",
+            "hl.ocr.fl",
+            "ocr_text_stored",
+            "df",
+            "ocr_text_stored",
+            "hl.ocr.contextSize",
+            "0",
+            "hl.ocr.scorePassages",
+            "off");
+    assertQ(
+        req,
+        "count(" + snippetsPath + "/lst)=5",
+        snippetsPath + "/lst[1]/str[@name='text']/text()='" + firstSnippet + "'",
+        snippetsPath + "/lst[2]/str[@name='text']/text()='Zwei <em>zwiebelturm</em>'",
+        snippetsPath + "/lst[3]/str[@name='text']/text()='Vier <em>zwiebelturm</em>'",
+        snippetsPath + "/lst[5]/str[@name='text']/text()='Sechs <em>zwiebelturm</em>'",
+        "//lst[@name='51337']//int[@name='numTotal']/text()='5'");
+  }
+
   @Test
   public void testFilterByPage() {
     SolrQueryRequest req = xmlQ("q", "München", "hl.ocr.pageId", "26", "fq", "id:31337");
@@ -0,0 +1,105 @@
+package com.github.dbmdz.solrocr.solr;
+
+import com.carrotsearch.randomizedtesting.annotations.ThreadLeakFilters;
+import java.nio.file.Path;
+import java.nio.file.Paths;
+import org.apache.lucene.tests.util.QuickPatchThreadsFilter;
+import org.apache.solr.SolrIgnoredThreadsFilter;
+import org.apache.solr.SolrTestCaseJ4;
+import org.apache.solr.request.SolrQueryRequest;
+import org.junit.Before;
+import org.junit.BeforeClass;
+import org.junit.Test;
+
+@ThreadLeakFilters(
+    defaultFilters = true,
+    filters = {
+      SolrIgnoredThreadsFilter.class,
+      QuickPatchThreadsFilter.class,
+      HlThreadsFilter.class
+    })
+public class SnippetCacheTest extends SolrTestCaseJ4 {
+  private static final String SNIPPETS_XPATH =
+      "//lst[@name='ocrHighlighting']/lst[@name='31337']/lst[@name='ocr_text']/arr/lst";
+  private static final String HAS_SNIPPETS_XPATH = "count(" + SNIPPETS_XPATH + ")>0";
+
+  @BeforeClass
+  public static void beforeClass() throws Exception {
+    // Needed since https://github.com/apache/solr/commit/16657ccab092
+    System.setProperty("solr.install.dir", "./");
+    initCore("solrconfig-snippetcache.xml", "schema.xml", "src/test/resources/solr", "general");
+
+    Path dataPath = Paths.get("src", "test", "resources", "data").toAbsolutePath();
+    assertU(adoc("ocr_text", dataPath.resolve("miniocr.xml").toString(), "id", "31337"));
+    assertU(commit());
+  }
+
+  @Before
+  public void clearCache() throws Exception {
+    h.getCore()
+        .withSearcher(
+            s -> {
+              s.getCache(OcrSnippetCache.CACHE_NAME).clear();
+              return null;
+            });
+  }
+
+  private static SolrQueryRequest hlQ(String... extraArgs) {
+    String[] args = {
+      "q", "München", "df", "ocr_text", "hl", "true", "hl.ocr.fl", "ocr_text", "hl.snippets", "10",
+      "fl", "id"
+    };
+    String[] allArgs = new String[args.length + extraArgs.length];
+    System.arraycopy(args, 0, allArgs, 0, args.length);
+    System.arraycopy(extraArgs, 0, allArgs, args.length, extraArgs.length);
+    return req(allArgs);
+  }
+
+  private static int getNumCached() throws Exception {
+    return h.getCore().withSearcher(s -> s.getCache(OcrSnippetCache.CACHE_NAME).size());
+  }
+
+  @Test
+  public void testSnippetCache() throws Exception {
+    for (int i = 0; i < 2; i++) {
+      assertQ(
+          hlQ("hl.ocr.contextSize", "3", "hl.ocr.tag.pre", "<hit>"),
+          "count(" + SNIPPETS_XPATH + ")=3",
+          "//lst[@name='31337']//int[@name='numTotal']/text() >= 3",
+          "contains(//str[@name='text'][1]/text(), '<hit>München')");
+    }
+    assertEquals(1, getNumCached());
+
+    // Different snippets, different entry
+    assertQ(hlQ("hl.ocr.contextSize", "1"), HAS_SNIPPETS_XPATH);
+    assertEquals(2, getNumCached());
+  }
+
+  @Test
+  public void testParamsThatDontChangeSnippetsShareEntry() throws Exception {
+    assertQ(hlQ(), HAS_SNIPPETS_XPATH);
+    assertQ(hlQ("hl.ocr.timeAllowed", "60000"), HAS_SNIPPETS_XPATH);
+    assertQ(hlQ("hl.ocr.useBreakIndex", "true"), HAS_SNIPPETS_XPATH);
+    assertQ(hlQ("hl.ocr.useMiniOcrScanner", "false"), HAS_SNIPPETS_XPATH);
+    assertQ(hlQ("hl.ocr.prefetch", "true"), HAS_SNIPPETS_XPATH);
+    assertEquals(1, getNumCached());
+  }
+
+  @Test
+  public void testPerFieldParams() throws Exception {
+    assertQ(hlQ(), HAS_SNIPPETS_XPATH);
+    // Parameters for other fields and ignored per-field parameters don't change the snippets
+    assertQ(hlQ("f.other_field.hl.ocr.contextSize", "1"), HAS_SNIPPETS_XPATH);
+    assertQ(hlQ("f.ocr_text.hl.ocr.timeAllowed", "60000"), HAS_SNIPPETS_XPATH);
+    assertEquals(1, getNumCached());
+
+    assertQ(hlQ("f.ocr_text.hl.ocr.contextSize", "1"), HAS_SNIPPETS_XPATH);
+    assertEquals(2, getNumCached());
+  }
+
+  @Test
+  public void testCacheCanBeBypassed() throws Exception {
+    assertQ(hlQ("hl.ocr.cache", "false"), HAS_SNIPPETS_XPATH);
+    assertEquals(0, getNumCached());
+  }
+}
@@ -0,0 +1,81 @@
+package com.github.dbmdz.solrocr.util;
+
+import static org.assertj.core.api.Assertions.assertThat;
+
+import com.google.common.collect.ImmutableList;
+import java.nio.charset.StandardCharsets;
+import java.util.ArrayList;
+import java.util.List;
+import org.junit.jupiter.api.Test;
+
+class AhoCorasickMatcherTest {
+  private static final List<String> PATTERNS =
+      ImmutableList.of("ocr_line", "ocrx_line", "ocr_caption", "line");
+
+  private static final String TEXT =
+      "<span class='ocr_caption'><span class='ocrx_line'>line</span><b class=\"ocr_line\">";
+
+  /** Find the start offsets of all matches by brute force */
+  private static List<Integer> findNaive(String text) {
+    List<Integer> out = new ArrayList<>();
+    for (int i = 0; i < text.length(); i++) {
+      for (String pattern : PATTERNS) {
+        if (text.startsWith(pattern, i)) {
+          out.add(i);
+          break;
+        }
+      }
+    }
+    return out;
+  }
+
+  @Test
+  void shouldFindAllMatchesForward() {
+    AhoCorasickMatcher matcher = new AhoCorasickMatcher(PATTERNS);
+    byte[] data = TEXT.getBytes(StandardCharsets.US_ASCII);
+    List<Integer> ends = new ArrayList<>();
+    int state = AhoCorasickMatcher.START;
+    for (int i = 0; i < data.length; i++) {
+      state = matcher.next(state, data[i]);
+      if (matcher.matchLength(state) > 0) {
+        ends.add(i);
+      }
+    }
+    List<Integer> expectedEnds = new ArrayList<>();
+    for (int i = 0; i < TEXT.length(); i++) {
+      for (String pattern : PATTERNS) {
+        if (TEXT.startsWith(pattern, i - pattern.length() + 1)) {
+          expectedEnds.add(i);
+          break;
+        }
+      }
+    }
+    assertThat(ends).isEqualTo(expectedEnds);
+  }
+
+  @Test
+  void shouldFindAllMatchesBackward() {
+    AhoCorasickMatcher matcher = AhoCorasickMatcher.reversed(PATTERNS);
+    byte[] data = TEXT.getBytes(StandardCharsets.US_ASCII);
+    List<Integer> starts = new ArrayList<>();
+    int state = AhoCorasickMatcher.START;
+    for (int i = data.length - 1; i >= 0; i--) {
+      state = matcher.next(state, data[i]);
+      if (matcher.matchLength(state) > 0) {
+        starts.add(0, i);
+      }
+    }
+    assertThat(starts).isEqualTo(findNaive(TEXT));
+  }
+
+  @Test
+  void shouldReportLongestMatch() {
+    AhoCorasickMatcher matcher = new AhoCorasickMatcher(PATTERNS);
+    int state = AhoCorasickMatcher.START;
+    for (byte b : "ocr_line".getBytes(StandardCharsets.US_ASCII)) {
+      state = matcher.next(state, b);
+    }
+    assertThat(matcher.matchLength(state)).isEqualTo(8);
+    assertThat(matcher.getMaxPatternLength()).isEqualTo(11);
+  }
+}
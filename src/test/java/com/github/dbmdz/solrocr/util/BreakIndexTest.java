@@ -0,0 +1,112 @@
+package com.github.dbmdz.solrocr.util;
+
+import static org.assertj.core.api.Assertions.assertThat;
+
+import com.github.dbmdz.solrocr.breaklocator.BreakIndex;
+import com.github.dbmdz.solrocr.breaklocator.BreakLocator;
+import com.github.dbmdz.solrocr.formats.alto.AltoFormat;
+import com.github.dbmdz.solrocr.formats.hocr.HocrFormat;
+import com.github.dbmdz.solrocr.formats.miniocr.MiniOcrFormat;
+import com.github.dbmdz.solrocr.model.OcrBlock;
+import com.github.dbmdz.solrocr.model.OcrFormat;
+import com.github.dbmdz.solrocr.model.SourcePointer;
+import com.github.dbmdz.solrocr.reader.FileSourceReader;
+import com.github.dbmdz.solrocr.reader.SourceReader;
+import java.io.IOException;
+import java.nio.file.Files;
+import java.nio.file.Path;
+import java.nio.file.Paths;
+import java.nio.file.attribute.FileTime;
+import java.util.stream.Stream;
+import org.junit.jupiter.api.Test;
+import org.junit.jupiter.api.io.TempDir;
+import org.junit.jupiter.params.ParameterizedTest;
+import org.junit.jupiter.params.provider.Arguments;
+import org.junit.jupiter.params.provider.MethodSource;
+
+class BreakIndexTest {
+  private static final Path miniOcrPath = Paths.get("src/test/resources/data/miniocr.xml");
+
+  @TempDir Path tempDir;
+
+  private Path copyToTemp() throws IOException {
+    return copyToTemp(miniOcrPath);
+  }
+
+  private Path copyToTemp(Path source) throws IOException {
+    Path target = tempDir.resolve(source.getFileName());
+    Files.copy(source, target);
+    return target;
+  }
+
+  private static Stream<Arguments> getFormats() {
+    return Stream.of(
+        Arguments.of(
+            miniOcrPath,
+            new MiniOcrFormat(),
+            new OcrBlock[] {OcrBlock.WORD, OcrBlock.LINE, OcrBlock.PAGE}),
+        Arguments.of(
+            Paths.get("src/test/resources/data/chronicling_hocr/seq-4.html"),
+            new HocrFormat(),
+            new OcrBlock[] {OcrBlock.WORD, OcrBlock.LINE, OcrBlock.PARAGRAPH, OcrBlock.PAGE}),
+        Arguments.of(
+            Paths.get("src/test/resources/data/alto.xml"),
+            new AltoFormat(),
+            new OcrBlock[] {OcrBlock.WORD, OcrBlock.LINE, OcrBlock.BLOCK, OcrBlock.PAGE}));
+  }
+
+  private SourceReader getReader(Path path) throws IOException {
+    return new FileSourceReader(path, SourcePointer.parse(path.toString()), 8 * 1024, 8);
+  }
+
+  @ParameterizedTest
+  @MethodSource("getFormats")
+  void shouldLocateSameBreaksAsScanningLocator(Path ocrPath, OcrFormat format, OcrBlock[] blocks)
+      throws IOException {
+    Path path = copyToTemp(ocrPath);
+    BreakIndex.build(path).write(path);
+    SourceReader reader = getReader(path);
+    BreakIndex index = BreakIndex.load(reader);
+    assertThat(index).isNotNull();
+    for (OcrBlock block : blocks) {
+      BreakLocator scanning = format.getBreakLocator(reader, block);
+      BreakLocator indexed = index.getBreakLocator(reader, block);
+      for (int offset = 0; offset < reader.length(); offset += 797) {
+        assertThat(indexed.following(offset)).isEqualTo(scanning.following(offset));
+        assertThat(indexed.preceding(offset)).isEqualTo(scanning.preceding(offset));
+      }
+    }
+  }
+
+  @Test
+  void shouldIgnoreOutdatedIndex() throws IOException {
+    Path path = copyToTemp();
+    BreakIndex.ensureSidecar(path);
+    assertThat(Files.exists(BreakIndex.getSidecarPath(path))).isTrue();
+    assertThat(BreakIndex.read(path)).isNotNull();
+    Files.setLastModifiedTime(
+        path, FileTime.fromMillis(Files.getLastModifiedTime(path).toMillis() + 1000));
+    assertThat(BreakIndex.read(path)).isNull();
+    BreakIndex.ensureSidecar(path);
+    assertThat(BreakIndex.read(path)).isNotNull();
+  }
+
+  @Test
+  void shouldNotLoadIndexWithoutSidecar() throws IOException {
+    assertThat(BreakIndex.load(getReader(copyToTemp()))).isNull();
+  }
+
+  @Test
+  void shouldCacheLoadedIndex() throws IOException {
+    Path path = copyToTemp();
+    BreakIndex.build(path).write(path);
+    BreakIndex index = BreakIndex.load(getReader(path));
+    assertThat(index).isNotNull();
+    assertThat(BreakIndex.load(getReader(path))).isSameAs(index);
+
+    // A modified file must not be served from the cache
+    Files.setLastModifiedTime(
+        path, FileTime.fromMillis(Files.getLastModifiedTime(path).toMillis() + 1000));
+    assertThat(BreakIndex.load(getReader(path))).isNull();
+  }
+}
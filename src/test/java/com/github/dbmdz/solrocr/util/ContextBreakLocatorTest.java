@@ -13,6 +13,7 @@ import java.io.IOException;
 import java.io.StringReader;
 import java.nio.file.Path;
 import java.nio.file.Paths;
+import java.util.concurrent.atomic.AtomicInteger;
 import org.apache.commons.io.IOUtils;
 import org.apache.commons.lang3.StringUtils;
 import org.apache.lucene.analysis.charfilter.HTMLStripCharFilter;
@@ -108,4 +109,45 @@ class ContextBreakLocatorTest {
     snippet = reader.readUtf8String(start, end - start);
     assertThat(StringUtils.countMatches(snippet, "<TextLine")).isEqualTo(1 + 2);
   }
+
+  @Test
+  void testMemoizedContextsMatchFreshContexts() throws IOException {
+    SourceReader reader = new FileSourceReader(utf8Path, null, 8 * 1024, 8);
+    AtomicInteger baseCalls = new AtomicInteger();
+    TagBreakLocator tagLocator = new TagBreakLocator(reader, "w");
+    BreakLocator countingLocator =
+        new BreakLocator() {
+          @Override
+          public int following(int offset) throws IOException {
+            baseCalls.incrementAndGet();
+            return tagLocator.following(offset);
+          }
+
+          @Override
+          public int preceding(int offset) throws IOException {
+            baseCalls.incrementAndGet();
+            return tagLocator.preceding(offset);
+          }
+
+          @Override
+          public SourceReader getText() {
+            return tagLocator.getText();
+          }
+        };
+    ContextBreakLocator memoized =
+        new ContextBreakLocator(countingLocator, new TagBreakLocator(reader, "b"), 5);
+    for (int offset = 16200; offset < 16400; offset += 7) {
+      ContextBreakLocator fresh =
+          new ContextBreakLocator(
+              new TagBreakLocator(reader, "w"), new TagBreakLocator(reader, "b"), 5);
+      assertThat(memoized.preceding(offset)).isEqualTo(fresh.preceding(offset));
+      assertThat(memoized.following(offset)).isEqualTo(fresh.following(offset));
+    }
+
+    // Another offset in an already resolved region only needs the closest breaks
+    baseCalls.set(0);
+    memoized.preceding(16283);
+    memoized.following(16283);
+    assertThat(baseCalls.get()).isEqualTo(2);
+  }
 }
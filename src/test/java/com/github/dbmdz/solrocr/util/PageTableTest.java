@@ -0,0 +1,46 @@
+package com.github.dbmdz.solrocr.util;
+
+import static org.assertj.core.api.Assertions.assertThat;
+
+import com.github.dbmdz.solrocr.breaklocator.BreakLocator;
+import com.github.dbmdz.solrocr.formats.miniocr.MiniOcrFormat;
+import com.github.dbmdz.solrocr.lucene.PageTable;
+import com.github.dbmdz.solrocr.model.OcrBlock;
+import com.github.dbmdz.solrocr.model.OcrPage;
+import com.github.dbmdz.solrocr.reader.FileSourceReader;
+import com.github.dbmdz.solrocr.reader.SourceReader;
+import java.io.IOException;
+import java.nio.file.Path;
+import java.nio.file.Paths;
+import org.junit.jupiter.api.Test;
+
+class PageTableTest {
+  private static final Path miniOcrPath = Paths.get("src/test/resources/data/miniocr.xml");
+
+  private OcrPage scanForPage(SourceReader reader, MiniOcrFormat format, int offset)
+      throws IOException {
+    BreakLocator locator = format.getBreakLocator(reader, OcrBlock.PAGE);
+    int pageOffset = locator.preceding(offset);
+    if (pageOffset == BreakLocator.DONE) {
+      return null;
+    }
+    return format.parsePageFragment(
+        reader.readUtf8String(pageOffset, Math.min(512, reader.length() - pageOffset)));
+  }
+
+  @Test
+  void shouldFindSamePagesAsScanning() throws IOException {
+    SourceReader reader = new FileSourceReader(miniOcrPath, null, 8 * 1024, 8);
+    MiniOcrFormat format = new MiniOcrFormat();
+    PageTable table = new PageTable(reader, format.getBreakLocator(reader, OcrBlock.PAGE), format);
+    int step = Math.max(1, reader.length() / 97);
+    // Look up in both directions to exercise insertion before and after known pages
+    for (int offset = reader.length() - 1; offset > 0; offset -= step) {
+      assertThat(table.getPage(offset)).isEqualTo(scanForPage(reader, format, offset));
+    }
+    for (int offset = 1; offset < reader.length(); offset += step) {
+      assertThat(table.getPage(offset)).isEqualTo(scanForPage(reader, format, offset));
+    }
+    assertThat(table.getPage(0)).isNull();
+  }
+}
@@ -5,6 +5,7 @@ import static org.assertj.core.api.Assertions.assertThat;
 import com.github.dbmdz.solrocr.breaklocator.TagBreakLocator;
 import com.github.dbmdz.solrocr.reader.FileSourceReader;
 import com.github.dbmdz.solrocr.reader.SourceReader;
+import com.github.dbmdz.solrocr.reader.StringSourceReader;
 import com.google.common.collect.ImmutableSet;
 import java.io.IOException;
 import java.io.StringReader;
@@ -90,4 +91,44 @@ class TagBreakLocatorTest {
     assertThat(StringUtils.countMatches(tag, "<w")).isEqualTo(0);
     assertThat(StringUtils.countMatches(tag, "</w>")).isEqualTo(0);
   }
+
+  @Test
+  void shouldFindTagsSpanningSectionBoundaries() throws IOException {
+    SourceReader reader = new FileSourceReader(utf8Path, null, 8 * 1024, 8);
+    // Sections are smaller than most of the tags, so almost every tag spans multiple sections
+    SourceReader tinyReader = new FileSourceReader(utf8Path, null, 3, 8);
+    TagBreakLocator it = new TagBreakLocator(reader, "w");
+    TagBreakLocator tinyIt = new TagBreakLocator(tinyReader, "w");
+    for (int offset = 0; offset < reader.length(); offset += 97) {
+      assertThat(tinyIt.following(offset)).isEqualTo(it.following(offset));
+      if (offset > 0) {
+        assertThat(tinyIt.preceding(offset)).isEqualTo(it.preceding(offset));
+      }
+    }
+  }
+
+  @Test
+  void shouldMatchPlainSearchForClosingTagsLongerThanSections() throws IOException {
+    // Closing tags are longer than the sections, so they can span three of them
+    SourceReader reader = new FileSourceReader(utf8Path, null, 3, 8);
+    String text = reader.readAsciiString(0, reader.length());
+    TagBreakLocator it = new TagBreakLocator(reader, "l", true);
+    for (int offset = 1; offset < text.length(); offset += 97) {
+      int following = text.indexOf("</l>", offset + 1);
+      assertThat(it.following(offset)).isEqualTo(following < 0 ? text.length() : following);
+      assertThat(it.preceding(offset)).isEqualTo(Math.max(0, text.lastIndexOf("</l>", offset - 1)));
+    }
+  }
+
+  @Test
+  void stringSourceWithSupplementaryCharacters() throws IOException {
+    // U+1D49C takes two chars, so byte and char offsets would drift apart if it was encoded
+    String text = "<w>\uD835\uDC9Cbc</w> <w>def</w> <w>\uD835\uDC9C</w>";
+    SourceReader reader = new StringSourceReader(text);
+    TagBreakLocator it = new TagBreakLocator(reader, "w");
+    assertThat(it.following(0)).isEqualTo(text.indexOf("<w>def"));
+    assertThat(it.following(text.indexOf("<w>def"))).isEqualTo(text.lastIndexOf("<w>"));
+    assertThat(it.preceding(text.length() - 1)).isEqualTo(text.lastIndexOf("<w>"));
+    assertThat(it.following(text.lastIndexOf("<w>"))).isEqualTo(text.length());
+  }
 }